@@ -0,0 +1,243 @@
+"""
+alertas.py — Despachante único de alertas com limite de taxa e saídas plugáveis (V5)
+
+Sem GUI. Quem detecta algo chama `DespachanteAlertas.publicar(Alerta(...))`,
+que só faz put_nowait numa fila limitada (fila cheia → alerta descartado e
+contado). Uma única thread consome a fila e:
+
+  - agrupa: alertas da mesma câmera e tipo que chegam dentro de
+    alertas.janela_agrupamento_s, ou antes de passar alertas.intervalo_minimo_s
+    desde o último envio, viram um só (primeiro `de`, último `para`,
+    `quantidade` = quantos foram agrupados)
+  - distribui o alerta resultante para as saídas configuradas:
+      som      winsound (Windows), só mudanças de status; liga com sons.beep_mudanca_status
+      webhook  POST JSON em alertas.webhook_url
+      arquivo  um .json por alerta em alertas.pasta_arquivos
+      comando  alertas.comando (argv), com {tipo} {camera} {de} {para} {mensagem}
+
+Uma saída lenta (webhook fora do ar, comando travado) atrasa só esta thread;
+o que chega nesse meio tempo é agrupado. Rajadas não criam threads.
+"""
+
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+import urllib.request
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import winsound
+    _HAS_WINSOUND = True
+except ImportError:
+    _HAS_WINSOUND = False
+
+_SEM_ALERTA = object()   # get() expirou: só conferir os pendentes
+
+
+def _log_nulo(_msg: str) -> None:
+    pass
+
+
+@dataclass
+class Alerta:
+    tipo: str                  # "mudanca_status" ou "alarme"
+    camera: str
+    para: str = ""             # status novo (mudanca_status)
+    de: Optional[str] = None   # status anterior (mudanca_status)
+    mensagem: str = ""
+    ts: str = ""
+    quantidade: int = 1        # alertas agrupados neste
+    t_chegada: float = field(default_factory=time.monotonic, repr=False)
+
+    @property
+    def chave(self) -> Tuple[str, str]:
+        return self.tipo, self.camera
+
+    def agrupar(self, novo: "Alerta") -> "Alerta":
+        """O mais recente, mantendo o `de` e a chegada do primeiro."""
+        return replace(novo, de=self.de, quantidade=self.quantidade + novo.quantidade, t_chegada=self.t_chegada)
+
+    def para_json(self) -> dict:
+        dados = asdict(self)
+        dados.pop("t_chegada")
+        return dados
+
+
+# =============================================================================
+# SAÍDAS
+# =============================================================================
+
+class SaidaSom:
+    nome = "som"
+
+    def __init__(self, cfg_sons: dict):
+        self.freq_base = int(cfg_sons["beep_frequencia"])
+        self.duracao = int(cfg_sons["beep_duracao"])
+
+    def enviar(self, alerta: Alerta) -> None:
+        if alerta.tipo != "mudanca_status":
+            return
+        freqs = {"VAZIA": self.freq_base, "PARCIAL": int(self.freq_base * 1.25), "CHEIA": int(self.freq_base * 0.8)}
+        winsound.Beep(freqs.get(alerta.para, self.freq_base), self.duracao)
+
+
+class SaidaWebhook:
+    nome = "webhook"
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+
+    def enviar(self, alerta: Alerta) -> None:
+        req = urllib.request.Request(
+            self.url, data=json.dumps(alerta.para_json()).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+class SaidaArquivo:
+    nome = "arquivo"
+
+    def __init__(self, pasta: str):
+        self.pasta = Path(__file__).parent / pasta
+
+    def enviar(self, alerta: Alerta) -> None:
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        caminho = self.pasta / f"alerta_{datetime.now():%Y%m%d_%H%M%S_%f}_{alerta.camera}_{alerta.tipo}.json"
+        # .tmp + rename: quem observa a pasta nunca vê um arquivo pela metade
+        tmp = caminho.with_suffix(".tmp")
+        tmp.write_text(json.dumps(alerta.para_json(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, caminho)
+
+
+class SaidaComando:
+    nome = "comando"
+
+    def __init__(self, argv: List[str], timeout: float):
+        self.argv = argv
+        self.timeout = timeout
+
+    def enviar(self, alerta: Alerta) -> None:
+        campos = {"tipo": alerta.tipo, "camera": alerta.camera, "de": alerta.de or "",
+                  "para": alerta.para, "mensagem": alerta.mensagem}
+        proc = subprocess.run(
+            [arg.format(**campos) for arg in self.argv], timeout=self.timeout, capture_output=True, check=False,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"saiu com código {proc.returncode}")
+
+
+def montar_saidas(cfg: dict) -> list:
+    """Saídas ligadas na config."""
+    al = cfg["alertas"]
+    saidas: list = []
+    if _HAS_WINSOUND and cfg["sons"]["beep_mudanca_status"]:
+        saidas.append(SaidaSom(cfg["sons"]))
+    if al["webhook_url"]:
+        saidas.append(SaidaWebhook(al["webhook_url"], al["webhook_timeout_s"]))
+    if al["pasta_arquivos"]:
+        saidas.append(SaidaArquivo(al["pasta_arquivos"]))
+    if al["comando"]:
+        saidas.append(SaidaComando(al["comando"], al["comando_timeout_s"]))
+    return saidas
+
+
+# =============================================================================
+# DESPACHANTE
+# =============================================================================
+
+class DespachanteAlertas:
+    """Fila limitada + uma thread que agrupa, limita a taxa e distribui para as saídas."""
+
+    def __init__(self, cfg: dict, log: Callable[[str], None] = _log_nulo):
+        self.log = log
+        self.descartados = 0
+        self.enviados = 0
+        self._descartados_avisados = 0
+        self._fila: queue.Queue = queue.Queue(maxsize=cfg["alertas"]["capacidade_fila"])
+        self._cfg_nova: Optional[dict] = None
+        self._lock_cfg = threading.Lock()
+        self._aplicar_config(cfg)
+        self._thread = threading.Thread(target=self._loop, name="alertas", daemon=True)
+        self._thread.start()
+
+    def publicar(self, alerta: Alerta) -> None:
+        """Nunca bloqueia: chamado das threads da GUI e da câmera."""
+        try:
+            self._fila.put_nowait(alerta)
+        except queue.Full:
+            self.descartados += 1
+
+    def configurar(self, cfg: dict) -> None:
+        """Nova config (sons/alertas); a thread remonta as saídas antes do próximo envio."""
+        with self._lock_cfg:
+            self._cfg_nova = cfg
+
+    def parar(self, timeout: float = 3.0) -> None:
+        """Envia os alertas pendentes (sem esperar o limite de taxa) e encerra a thread."""
+        while True:
+            try:
+                self._fila.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                if not self._thread.is_alive():
+                    return
+        self._thread.join(timeout=timeout)
+
+    def _aplicar_config(self, cfg: dict) -> None:
+        al = cfg["alertas"]
+        self._intervalo = al["intervalo_minimo_s"]
+        self._janela = al["janela_agrupamento_s"]
+        self._saidas = montar_saidas(cfg)
+
+    def _loop(self) -> None:
+        pendentes: Dict[Tuple[str, str], Alerta] = {}
+        ultimo_envio: Dict[Tuple[str, str], float] = {}
+        espera: Optional[float] = None
+        while True:
+            try:
+                item = self._fila.get(timeout=espera)
+            except queue.Empty:
+                item = _SEM_ALERTA
+            with self._lock_cfg:
+                cfg, self._cfg_nova = self._cfg_nova, None
+            if cfg is not None:
+                self._aplicar_config(cfg)
+            if item is None:
+                for alerta in pendentes.values():
+                    self._distribuir(alerta)
+                return
+            if item is not _SEM_ALERTA:
+                anterior = pendentes.get(item.chave)
+                pendentes[item.chave] = item if anterior is None else anterior.agrupar(item)
+
+            agora = time.monotonic()
+            espera = None
+            for chave, alerta in list(pendentes.items()):
+                liberado = max(alerta.t_chegada + self._janela, ultimo_envio.get(chave, -self._intervalo) + self._intervalo)
+                if agora >= liberado:
+                    del pendentes[chave]
+                    self._distribuir(alerta)
+                    ultimo_envio[chave] = time.monotonic()
+                else:
+                    espera = liberado - agora if espera is None else min(espera, liberado - agora)
+
+    def _distribuir(self, alerta: Alerta) -> None:
+        self.enviados += 1
+        descartados = self.descartados
+        if descartados != self._descartados_avisados:
+            self.log(f"⚠️  {descartados - self._descartados_avisados} alertas descartados (fila cheia)")
+            self._descartados_avisados = descartados
+        for saida in self._saidas:
+            try:
+                saida.enviar(alerta)
+            except Exception as e:
+                self.log(f"⚠️  Alerta não enviado ({saida.nome}): {e}")
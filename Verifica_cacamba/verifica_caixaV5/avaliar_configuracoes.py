@@ -0,0 +1,418 @@
+"""
+avaliar_configuracoes.py — Precisão × vazão do detector em sessões rotuladas (V5)
+
+Roda o DetectorCacamba sobre sessões gravadas (.cses) com rótulos de
+referência, para várias variantes de configuração, e mostra o que cada
+variante ganha em vazão e perde em precisão:
+
+    config | FPS | ns/px | acurácia do status | erro de preenchimento | latência de transição
+
+As variantes combinam pré-processamentos do depth antes do detector
+(recorte na ROI, pirâmide gaussiana, redução de resolução) com overrides da
+config. Áreas em pixels (area_minima_pixels, area_maxima_corpo), kernel da
+morfologia e ROI são ajustados para o frame transformado. A última coluna
+marca as variantes na fronteira de Pareto (nenhuma outra é melhor ou igual em
+todas as métricas e estritamente melhor em alguma).
+
+Rótulos: <sessao>.rotulos.json ao lado da sessão, em um dos formatos
+    {"intervalos": [{"inicio_ms": 0, "fim_ms": 20000, "status": "VAZIA", "percentual": 5},
+                    {"inicio_ms": 20000, "fim_ms": 60000, "status": "PARCIAL",
+                     "percentual_inicio": 10, "percentual_fim": 90}]}
+    {"frames": {"timestamp_ms": [...], "status": [...], "percentual": [...]}}
+Frames sem rótulo ficam fora das métricas de precisão.
+
+Variantes (--variantes arquivo.json), lista de:
+    {"nome": "rec+pir1", "recorte": 0.05, "piramide": 1, "escala": 1.0,
+     "cfg": {"filtros": {"grid_medicao_size": 5}}}
+
+Uso:
+    python avaliar_configuracoes.py gravacoes/doca1_*.cses --config config_doca1.json
+    python avaliar_configuracoes.py sessao.cses --variantes variantes.json --saida avaliacao/
+    python avaliar_configuracoes.py --gerar-sintetica sint.cses --roteiro enchendo pessoa esvaziando
+"""
+
+import argparse
+import copy
+import csv
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config_manager import CONFIG_PADRAO, ConfigManager
+from detector_cacamba import DetectorCacamba
+from reprocessar_sessoes import frames_aquecimento
+from sessao import GravadorSessao, LeitorSessao
+from simulador import CENARIOS, SimuladorCena
+
+SUFIXO_ROTULOS = ".rotulos.json"
+DEPTH_SCALE_SINTETICA = 0.001
+
+VARIANTES_PADRAO = [
+    {"nome": "base"},
+    {"nome": "recorte", "recorte": 0.05},
+    {"nome": "piramide1", "piramide": 1},
+    {"nome": "piramide2", "piramide": 2},
+    {"nome": "escala0.75", "escala": 0.75},
+    {"nome": "recorte+piramide1", "recorte": 0.05, "piramide": 1},
+]
+COLUNAS = [
+    "variante", "fps", "ns_por_pixel", "acuracia_status", "erro_preenchimento",
+    "latencia_media_s", "latencia_p95_s", "transicoes", "transicoes_perdidas", "pareto",
+]
+
+
+# =============================================================================
+# RÓTULOS
+# =============================================================================
+
+def caminho_rotulos(sessao) -> Path:
+    sessao = Path(sessao)
+    return sessao.with_name(sessao.stem + SUFIXO_ROTULOS)
+
+
+def carregar_rotulos(caminho: Path, timestamps_ms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(status, percentual) por frame; status "" e percentual NaN onde não há rótulo."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    n = len(timestamps_ms)
+    status = np.full(n, "", dtype=object)
+    percentual = np.full(n, np.nan, dtype=np.float64)
+
+    if "frames" in dados:
+        ref = dados["frames"]
+        ts_ref = np.asarray(ref["timestamp_ms"], dtype=np.float64)
+        if len(ts_ref) == 0:
+            return status.astype(str), percentual
+        # Rótulo do frame de referência mais próximo (mesma sessão: timestamps iguais)
+        idx = np.clip(np.searchsorted(ts_ref, timestamps_ms), 1, len(ts_ref) - 1)
+        idx -= (timestamps_ms - ts_ref[idx - 1]) < (ts_ref[idx] - timestamps_ms)
+        status[:] = np.asarray(ref["status"], dtype=object)[idx]
+        if "percentual" in ref:
+            percentual[:] = np.asarray(ref["percentual"], dtype=np.float64)[idx]
+        return status.astype(str), percentual
+
+    for iv in dados.get("intervalos", []):
+        sel = (timestamps_ms >= iv["inicio_ms"]) & (timestamps_ms < iv["fim_ms"])
+        status[sel] = iv["status"]
+        if "percentual" in iv:
+            percentual[sel] = iv["percentual"]
+        elif "percentual_inicio" in iv and "percentual_fim" in iv:
+            frac = (timestamps_ms[sel] - iv["inicio_ms"]) / max(iv["fim_ms"] - iv["inicio_ms"], 1e-6)
+            percentual[sel] = iv["percentual_inicio"] + frac * (iv["percentual_fim"] - iv["percentual_inicio"])
+    return status.astype(str), percentual
+
+
+# =============================================================================
+# VARIANTES
+# =============================================================================
+
+@dataclass
+class Variante:
+    nome: str
+    recorte: Optional[float] = None    # margem (fração do frame) em volta da ROI; None = sem recorte
+    piramide: int = 0                  # níveis de cv2.pyrDown
+    escala: float = 1.0                # cv2.resize (INTER_NEAREST) depois da pirâmide
+    cfg: Dict[str, dict] = field(default_factory=dict)
+
+    @classmethod
+    def de_dict(cls, d: dict) -> "Variante":
+        return cls(
+            nome=d["nome"],
+            recorte=d.get("recorte"),
+            piramide=int(d.get("piramide", 0)),
+            escala=float(d.get("escala", 1.0)),
+            cfg=d.get("cfg", {}),
+        )
+
+
+def _janela_recorte(cfg: dict, margem: float, w: int, h: int) -> Tuple[int, int, int, int]:
+    roi = cfg["roi"]
+    x1 = int(max(roi["x_min"] - margem, 0.0) * w)
+    x2 = int(np.ceil(min(roi["x_max"] + margem, 1.0) * w))
+    y1 = int(max(roi["y_min"] - margem, 0.0) * h)
+    y2 = int(np.ceil(min(roi["y_max"] + margem, 1.0) * h))
+    return x1, y1, x2, y2
+
+
+def preparar(variante: Variante, cfg_base: dict, largura: int, altura: int):
+    """
+    Config ajustada e função depth → depth transformado para a variante.
+
+    O ajuste mantém o significado físico da config no frame transformado: ROI
+    reescrita nas coordenadas do recorte e áreas/kernel escalados pelo fator
+    linear total.
+    """
+    cfg = copy.deepcopy(cfg_base)
+    for secao, valores in variante.cfg.items():
+        cfg.setdefault(secao, {}).update(valores)
+
+    janela = None
+    w, h = largura, altura
+    if variante.recorte is not None:
+        x1, y1, x2, y2 = janela = _janela_recorte(cfg, variante.recorte, largura, altura)
+        w, h = x2 - x1, y2 - y1
+        roi = cfg["roi"]
+        cfg["roi"] = {
+            "x_min": (roi["x_min"] * largura - x1) / w,
+            "x_max": (roi["x_max"] * largura - x1) / w,
+            "y_min": (roi["y_min"] * altura - y1) / h,
+            "y_max": (roi["y_max"] * altura - y1) / h,
+        }
+
+    fator = variante.escala / (2 ** variante.piramide)
+    if fator != 1.0:
+        cfg["medicoes"]["area_minima_pixels"] = max(1, int(cfg["medicoes"]["area_minima_pixels"] * fator ** 2))
+        cfg["protecao_pessoa"]["area_maxima_corpo"] = int(cfg["protecao_pessoa"]["area_maxima_corpo"] * fator ** 2)
+        cfg["filtros"]["kernel_morph_size"] = max(1, round(cfg["filtros"]["kernel_morph_size"] * fator))
+    destino = (max(1, round(w / 2 ** variante.piramide * variante.escala)),
+               max(1, round(h / 2 ** variante.piramide * variante.escala)))
+
+    def transformar(depth: np.ndarray) -> np.ndarray:
+        if janela is not None:
+            x1, y1, x2, y2 = janela
+            depth = depth[y1:y2, x1:x2]
+        for _ in range(variante.piramide):
+            depth = cv2.pyrDown(depth)
+        if variante.escala != 1.0:
+            depth = cv2.resize(depth, destino, interpolation=cv2.INTER_NEAREST)
+        return depth
+
+    return cfg, transformar
+
+
+# =============================================================================
+# AVALIAÇÃO
+# =============================================================================
+
+def latencias_transicao(
+    ts_ms: np.ndarray, rotulo: np.ndarray, previsto: np.ndarray,
+) -> Tuple[List[float], int]:
+    """
+    Para cada mudança no rótulo: segundos até o status_estavel chegar ao novo
+    status (antes da mudança seguinte). Devolve (latências, transições perdidas).
+    """
+    validos = np.flatnonzero(rotulo != "")
+    if len(validos) < 2:
+        return [], 0
+    r = rotulo[validos]
+    inicios = validos[np.flatnonzero(r[1:] != r[:-1]) + 1]
+    latencias, perdidas = [], 0
+    limites = list(inicios[1:]) + [len(rotulo)]
+    for inicio, fim in zip(inicios, limites):
+        acertos = np.flatnonzero(previsto[inicio:fim] == rotulo[inicio])
+        if len(acertos) == 0:
+            perdidas += 1
+        else:
+            latencias.append((ts_ms[inicio + acertos[0]] - ts_ms[inicio]) / 1000.0)
+    return latencias, perdidas
+
+
+def avaliar_sessao(caminho: str, variante: Variante, cfg_base: dict) -> dict:
+    """Roda uma variante sobre uma sessão; devolve acumuladores para agregar."""
+    with LeitorSessao(caminho) as leitor:
+        ts = leitor.timestamps_ms()
+        rotulo, pct_ref = carregar_rotulos(caminho_rotulos(caminho), ts)
+        cfg, transformar = preparar(variante, cfg_base, leitor.largura, leitor.altura)
+        detector = DetectorCacamba(cfg)
+        detector.resetar_historicos(agora=ts[0] / 1000.0 if len(ts) else None)
+
+        n = len(leitor)
+        previsto = np.empty(n, dtype=object)
+        pct = np.full(n, np.nan)
+        tempo = 0.0
+        for i in range(n):
+            depth = leitor.depth_metros(i)
+            t0 = time.perf_counter()
+            r = detector.processar_frame(transformar(depth))
+            tempo += time.perf_counter() - t0
+            previsto[i] = r.status_estavel
+            if r.caixa_detectada:
+                pct[i] = r.percentual
+        pixels = leitor.largura * leitor.altura
+
+    previsto = previsto.astype(str)
+    # Frames de aquecimento (históricos ainda enchendo) não contam na precisão
+    avaliados = rotulo != ""
+    avaliados[: min(frames_aquecimento(cfg_base), n)] = False
+    # Erro de preenchimento só onde há rótulo e leitura (frames sem caixa já pesam na acurácia)
+    com_pct = avaliados & ~np.isnan(pct_ref) & ~np.isnan(pct)
+    erros_pct = np.abs(pct[com_pct] - pct_ref[com_pct])
+    latencias, perdidas = latencias_transicao(ts, np.where(avaliados, rotulo, ""), previsto)
+    return {
+        "frames": n,
+        "tempo_s": tempo,
+        "pixels": pixels * n,
+        "acertos": int((previsto[avaliados] == rotulo[avaliados]).sum()),
+        "avaliados": int(avaliados.sum()),
+        "erros_pct": erros_pct,
+        "latencias": latencias,
+        "perdidas": perdidas,
+    }
+
+
+def avaliar(sessoes: List[str], variantes: List[Variante], cfg_base: dict, progresso=print) -> List[dict]:
+    linhas = []
+    for variante in variantes:
+        partes = [avaliar_sessao(s, variante, cfg_base) for s in sessoes]
+        tempo = sum(p["tempo_s"] for p in partes)
+        frames = sum(p["frames"] for p in partes)
+        avaliados = sum(p["avaliados"] for p in partes)
+        erros = np.concatenate([p["erros_pct"] for p in partes]) if partes else np.zeros(0)
+        latencias = [x for p in partes for x in p["latencias"]]
+        linha = {
+            "variante": variante.nome,
+            "fps": frames / max(tempo, 1e-9),
+            "ns_por_pixel": tempo * 1e9 / max(sum(p["pixels"] for p in partes), 1),
+            "acuracia_status": 100.0 * sum(p["acertos"] for p in partes) / avaliados if avaliados else float("nan"),
+            "erro_preenchimento": float(erros.mean()) if erros.size else float("nan"),
+            "latencia_media_s": float(np.mean(latencias)) if latencias else float("nan"),
+            "latencia_p95_s": float(np.percentile(latencias, 95)) if latencias else float("nan"),
+            "transicoes": len(latencias) + sum(p["perdidas"] for p in partes),
+            "transicoes_perdidas": sum(p["perdidas"] for p in partes),
+        }
+        linhas.append(linha)
+        progresso(f"  {variante.nome:<20} {linha['fps']:>8.0f} FPS  acurácia {linha['acuracia_status']:.1f}%")
+    marcar_pareto(linhas)
+    return linhas
+
+
+def marcar_pareto(linhas: List[dict]) -> None:
+    """linha["pareto"] = True se nenhuma outra variante a domina (NaN conta como o pior valor)."""
+    def vetor(l: dict) -> np.ndarray:
+        # Tudo como "maior é melhor"
+        v = np.array([
+            l["fps"], l["acuracia_status"], -l["erro_preenchimento"],
+            -l["latencia_media_s"], -l["transicoes_perdidas"],
+        ], dtype=np.float64)
+        return np.where(np.isnan(v), -np.inf, v)
+
+    vetores = [vetor(l) for l in linhas]
+    for i, l in enumerate(linhas):
+        l["pareto"] = not any(
+            np.all(v >= vetores[i]) and np.any(v > vetores[i])
+            for j, v in enumerate(vetores) if j != i
+        )
+
+
+# =============================================================================
+# SESSÃO SINTÉTICA ROTULADA
+# =============================================================================
+
+def gravar_sessao_sintetica(
+    caminho, cfg: dict, roteiro: List[dict], largura: int = 640, altura: int = 480,
+    fps: float = 30.0, duracao_s: Optional[float] = None, semente: int = 0,
+) -> Tuple[Path, Path]:
+    """Grava uma sessão do simulador e os rótulos por frame (verdade do cenário)."""
+    sim = SimuladorCena(cfg, largura, altura, fps, roteiro, semente)
+    duracao = duracao_s if duracao_s is not None else sum(p.duracao_s for p in sim.passos)
+    med, th = cfg["medicoes"], cfg["thresholds"]
+    ts, status, percentual = [], [], []
+    with GravadorSessao(caminho, largura, altura, DEPTH_SCALE_SINTETICA, fps) as gravador:
+        for i in range(int(duracao * fps)):
+            _, depth = sim.frame(i, com_cor=False)
+            t_ms = i * 1000.0 / fps
+            z16 = np.clip(depth / DEPTH_SCALE_SINTETICA, 0, 65535).astype(np.uint16)
+            gravador.gravar(z16, timestamp_ms=t_ms, frame_number=i)
+
+            dist = sim.profundidade_nivel(sim.estado_em(i / fps).niveis[0])
+            ts.append(t_ms)
+            status.append("VAZIA" if dist >= th["limite_vazia"] else "CHEIA" if dist <= th["limite_cheia"] else "PARCIAL")
+            pct = (med["altura_camera_chao"] - dist) / max(med["altura_caixa"], 0.001) * 100
+            percentual.append(round(max(0.0, min(100.0, pct)), 2))
+    destino_rotulos = caminho_rotulos(caminho)
+    with open(destino_rotulos, "w", encoding="utf-8") as f:
+        json.dump({"frames": {"timestamp_ms": ts, "status": status, "percentual": percentual}}, f)
+    return Path(caminho), destino_rotulos
+
+
+# =============================================================================
+# SAÍDA
+# =============================================================================
+
+def _fmt(v, casas: int = 2) -> str:
+    if isinstance(v, float):
+        return "—" if np.isnan(v) else f"{v:.{casas}f}"
+    return str(v)
+
+
+def imprimir_tabela(linhas: List[dict]) -> None:
+    print(f"\n  {'variante':<20} {'FPS':>8} {'ns/px':>7} {'acurácia%':>10} {'erro pp':>8} "
+          f"{'lat. média s':>12} {'lat. p95 s':>10} {'perdidas':>9}  pareto")
+    for l in sorted(linhas, key=lambda l: -l["fps"]):
+        print(
+            f"  {l['variante']:<20} {_fmt(l['fps'], 0):>8} {_fmt(l['ns_por_pixel']):>7} "
+            f"{_fmt(l['acuracia_status'], 1):>10} {_fmt(l['erro_preenchimento']):>8} "
+            f"{_fmt(l['latencia_media_s']):>12} {_fmt(l['latencia_p95_s']):>10} "
+            f"{l['transicoes_perdidas']:>4}/{l['transicoes']:<4}  {'*' if l['pareto'] else ''}"
+        )
+
+
+def gravar_resultado(pasta: Path, linhas: List[dict], sessoes: List[str]) -> Path:
+    pasta.mkdir(parents=True, exist_ok=True)
+    with open(pasta / "avaliacao.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUNAS)
+        writer.writeheader()
+        writer.writerows(linhas)
+    destino = pasta / "avaliacao.json"
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump({
+            "gerado_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "sessoes": sessoes,
+            "variantes": linhas,
+        }, f, indent=2, ensure_ascii=False, default=float)
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precisão × vazão do detector V5 em sessões rotuladas")
+    parser.add_argument("sessoes", nargs="*", help=f"Sessões (.cses) com rótulos <sessao>{SUFIXO_ROTULOS}")
+    parser.add_argument("--config", help="Config do detector do local (padrão: valores de fábrica)")
+    parser.add_argument("--variantes", help="JSON com a lista de variantes (padrão: conjunto embutido)")
+    parser.add_argument("--saida", help="Pasta para avaliacao.csv / avaliacao.json")
+    parser.add_argument("--gerar-sintetica", metavar="CSES", help="Grava uma sessão sintética rotulada e sai")
+    parser.add_argument(
+        "--roteiro", nargs="+", default=["enchendo", "pessoa", "esvaziando", "poeira"],
+        choices=sorted(CENARIOS), help="Cenários da sessão sintética",
+    )
+    parser.add_argument("--resolucao", default="640x480", help="Resolução da sessão sintética (LxA)")
+    args = parser.parse_args()
+
+    cfg = ConfigManager(caminho_config=args.config).cfg if args.config else copy.deepcopy(CONFIG_PADRAO)
+
+    if args.gerar_sintetica:
+        largura, altura = (int(v) for v in args.resolucao.lower().split("x"))
+        sessao, rotulos = gravar_sessao_sintetica(
+            args.gerar_sintetica, cfg, [{"cenario": c} for c in args.roteiro], largura, altura,
+        )
+        print(f"✅ Sessão sintética: {sessao} (rótulos: {rotulos.name})")
+        return
+
+    if not args.sessoes:
+        parser.error("informe ao menos uma sessão (ou --gerar-sintetica)")
+    sem_rotulos = [s for s in args.sessoes if not caminho_rotulos(s).exists()]
+    if sem_rotulos:
+        parser.error(f"sessões sem rótulos ({SUFIXO_ROTULOS}): {', '.join(sem_rotulos)}")
+
+    if args.variantes:
+        with open(args.variantes, "r", encoding="utf-8") as f:
+            variantes = [Variante.de_dict(d) for d in json.load(f)]
+    else:
+        variantes = [Variante.de_dict(d) for d in VARIANTES_PADRAO]
+
+    print(f"Avaliando {len(variantes)} variantes em {len(args.sessoes)} sessões")
+    linhas = avaliar(args.sessoes, variantes, cfg)
+    imprimir_tabela(linhas)
+    if args.saida:
+        print(f"\n💾 {gravar_resultado(Path(args.saida), linhas, args.sessoes)}")
+
+
+if __name__ == "__main__":
+    main()
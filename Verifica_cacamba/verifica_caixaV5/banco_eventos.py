@@ -0,0 +1,378 @@
+"""
+banco_eventos.py — Banco SQLite de eventos: mudanças, agregados por minuto, rejeições e sessões (V5)
+
+Sem GUI. Tabelas (tempos em segundos epoch, UTC):
+
+    sessoes     uma por execução de câmera: início, fim, fonte, modo, frames, mudanças
+    mudancas    cada mudança de status_estavel, com distância/percentual/confiança
+    minutos     agregado por minuto e câmera: frames, detectados, frames por status,
+                médias de distância/percentual/confiança
+    rejeicoes   motivos de rejeição por minuto e câmera (números do texto viram "#",
+                para agrupar "Fora da ROI horizontal (cx=0.91)" e "(cx=0.12)")
+    intervalos  linha do tempo de status_estavel: (início, fim, status) de cada
+                trecho fechado (ver linha_tempo.py)
+
+Escrita: quem detecta chama `RegistradorCamera.registrar()` a cada frame; ele
+só acumula somas do minuto corrente e, na virada do minuto ou numa mudança,
+enfileira linhas para o BancoEventos. Uma thread do banco grava o que chegou
+em transações de até `intervalo_lote_s`. SQLite em WAL: vários processos
+(modo --processo, um filho por câmera) gravam no mesmo arquivo, e consultas
+de outro processo não bloqueiam os escritores.
+
+Leitura: `ConsultaEventos(caminho)` abre o banco só para leitura; as consultas
+usam os índices por (camera, t) e por t:
+
+    ConsultaEventos("historico/eventos_v5.db").ciclos(desde=time.time() - 7 * 86400)
+"""
+
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sessoes (
+    id          TEXT PRIMARY KEY,
+    camera      TEXT NOT NULL,
+    modo        TEXT NOT NULL,
+    fonte       TEXT NOT NULL,
+    inicio      REAL NOT NULL,
+    fim         REAL,
+    frames      INTEGER,
+    mudancas    INTEGER
+);
+CREATE TABLE IF NOT EXISTS mudancas (
+    t           REAL NOT NULL,
+    camera      TEXT NOT NULL,
+    sessao      TEXT NOT NULL,
+    de          TEXT,
+    para        TEXT NOT NULL,
+    distancia   REAL,
+    percentual  REAL,
+    confianca   REAL
+);
+CREATE TABLE IF NOT EXISTS minutos (
+    t               REAL NOT NULL,          -- início do minuto
+    camera          TEXT NOT NULL,
+    sessao          TEXT NOT NULL,
+    frames          INTEGER NOT NULL,
+    detectados      INTEGER NOT NULL,
+    frames_vazia    INTEGER NOT NULL,
+    frames_parcial  INTEGER NOT NULL,
+    frames_cheia    INTEGER NOT NULL,
+    distancia       REAL,                   -- médias sobre os frames com caixa detectada
+    percentual      REAL,
+    confianca       REAL
+);
+CREATE TABLE IF NOT EXISTS rejeicoes (
+    t           REAL NOT NULL,              -- início do minuto
+    camera      TEXT NOT NULL,
+    sessao      TEXT NOT NULL,
+    motivo      TEXT NOT NULL,
+    quantidade  INTEGER NOT NULL,
+    exemplo     TEXT
+);
+CREATE TABLE IF NOT EXISTS intervalos (
+    inicio      REAL NOT NULL,
+    fim         REAL NOT NULL,
+    camera      TEXT NOT NULL,
+    sessao      TEXT NOT NULL,
+    status      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_sessoes_inicio ON sessoes (inicio);
+CREATE INDEX IF NOT EXISTS ix_sessoes_camera ON sessoes (camera, inicio);
+CREATE INDEX IF NOT EXISTS ix_mudancas_t ON mudancas (t);
+CREATE INDEX IF NOT EXISTS ix_mudancas_camera ON mudancas (camera, t);
+CREATE INDEX IF NOT EXISTS ix_mudancas_para ON mudancas (para, t);
+CREATE INDEX IF NOT EXISTS ix_minutos_t ON minutos (t);
+CREATE INDEX IF NOT EXISTS ix_minutos_camera ON minutos (camera, t);
+CREATE INDEX IF NOT EXISTS ix_rejeicoes_t ON rejeicoes (t);
+CREATE INDEX IF NOT EXISTS ix_rejeicoes_camera ON rejeicoes (camera, t);
+CREATE INDEX IF NOT EXISTS ix_intervalos_fim ON intervalos (fim);
+CREATE INDEX IF NOT EXISTS ix_intervalos_camera ON intervalos (camera, fim);
+"""
+
+LOTE_MAX = 500                  # linhas por transação, no máximo
+BUSY_TIMEOUT_MS = 5000          # outro processo com o banco travado: espera até isso
+
+_SQL_SESSAO = "INSERT INTO sessoes (id, camera, modo, fonte, inicio) VALUES (?, ?, ?, ?, ?)"
+_SQL_FIM_SESSAO = "UPDATE sessoes SET fim = ?, frames = ?, mudancas = ? WHERE id = ?"
+_SQL_MUDANCA = "INSERT INTO mudancas VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_SQL_MINUTO = "INSERT INTO minutos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+_SQL_REJEICAO = "INSERT INTO rejeicoes VALUES (?, ?, ?, ?, ?, ?)"
+_SQL_INTERVALO = "INSERT INTO intervalos VALUES (?, ?, ?, ?, ?)"
+
+_NUMERO = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _log_nulo(_msg: str) -> None:
+    pass
+
+
+def categoria_motivo(motivo: str) -> str:
+    """Motivo de rejeição sem os números: 'Área 250000px² > máximo 200000px²' → 'Área #px² > máximo #px²'."""
+    return _NUMERO.sub("#", motivo)
+
+
+def _conectar(caminho: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(caminho, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+# =============================================================================
+# ESCRITA
+# =============================================================================
+
+class BancoEventos:
+    """Fila de linhas + thread que as grava em transações em lote."""
+
+    def __init__(self, caminho, intervalo_lote_s: float = 1.0, log: Callable[[str], None] = _log_nulo):
+        self.caminho = Path(caminho)
+        self.intervalo_lote_s = intervalo_lote_s
+        self.log = log
+        self.gravadas = 0
+        self._fila: queue.Queue = queue.Queue()
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        # Esquema criado aqui: falha de arquivo aparece para quem abriu o banco, não na thread
+        conn = _conectar(self.caminho)
+        try:
+            conn.executescript(ESQUEMA)
+        finally:
+            conn.close()
+        self._thread = threading.Thread(target=self._loop, name="banco-eventos", daemon=True)
+        self._thread.start()
+
+    def executar(self, sql: str, parametros: tuple) -> None:
+        """Enfileira uma escrita; nunca bloqueia quem chama."""
+        self._fila.put((sql, parametros))
+
+    def fechar(self, timeout: float = 5.0) -> None:
+        """Grava o que estiver na fila e encerra a thread."""
+        self._fila.put(None)
+        self._thread.join(timeout=timeout)
+
+    def _loop(self) -> None:
+        conn = _conectar(self.caminho)
+        try:
+            fim = False
+            while not fim:
+                item = self._fila.get()
+                if item is None:
+                    break
+                lote = [item]
+                prazo = time.monotonic() + self.intervalo_lote_s
+                while len(lote) < LOTE_MAX:
+                    restante = prazo - time.monotonic()
+                    if restante <= 0:
+                        break
+                    try:
+                        item = self._fila.get(timeout=restante)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        fim = True
+                        break
+                    lote.append(item)
+                self._gravar(conn, lote)
+        finally:
+            conn.close()
+
+    def _gravar(self, conn: sqlite3.Connection, lote: List[Tuple[str, tuple]]) -> None:
+        try:
+            with conn:
+                for sql, parametros in lote:
+                    conn.execute(sql, parametros)
+            self.gravadas += len(lote)
+        except sqlite3.Error as e:
+            self.log(f"⚠️  Banco de eventos: {len(lote)} linhas não gravadas: {e}")
+
+
+class RegistradorCamera:
+    """
+    Lado de quem detecta (uma câmera, uma thread): acumula o minuto corrente
+    e enfileira mudanças, agregados e rejeições no BancoEventos.
+    """
+
+    def __init__(self, banco: BancoEventos, camera: str, modo: str, fonte: str = ""):
+        self.banco = banco
+        self.camera = camera
+        self.sessao = uuid.uuid4().hex
+        self.frames = 0
+        self.mudancas = 0
+        self._minuto: Optional[float] = None
+        self._zerar_minuto()
+        # Intervalo de status_estavel em curso (começa na primeira mudança)
+        self._status: Optional[str] = None
+        self._t_status = 0.0
+        banco.executar(_SQL_SESSAO, (self.sessao, camera, modo, fonte, time.time()))
+
+    def _zerar_minuto(self) -> None:
+        self._n = self._detectados = 0
+        self._por_status = {"VAZIA": 0, "PARCIAL": 0, "CHEIA": 0}
+        self._soma_dist = self._soma_perc = self._soma_conf = 0.0
+        self._motivos: Dict[str, List] = {}   # categoria → [quantidade, exemplo]
+
+    def registrar(self, resultado, mudou: bool, anterior: Optional[str], t: Optional[float] = None) -> None:
+        t = time.time() if t is None else t
+        minuto = t - t % 60
+        if minuto != self._minuto:
+            self._fechar_minuto()
+            self._minuto = minuto
+
+        self.frames += 1
+        self._n += 1
+        if resultado.status_estavel in self._por_status:
+            self._por_status[resultado.status_estavel] += 1
+        if resultado.caixa_detectada:
+            self._detectados += 1
+            self._soma_dist += resultado.distancia
+            self._soma_perc += resultado.percentual
+            self._soma_conf += resultado.confianca
+        elif resultado.motivo_rejeicao:
+            cat = categoria_motivo(resultado.motivo_rejeicao)
+            m = self._motivos.get(cat)
+            if m is None:
+                self._motivos[cat] = [1, resultado.motivo_rejeicao]
+            else:
+                m[0] += 1
+        if mudou:
+            self.mudancas += 1
+            self.banco.executar(_SQL_MUDANCA, (
+                t, self.camera, self.sessao, anterior, resultado.status_estavel,
+                resultado.distancia, resultado.percentual, resultado.confianca,
+            ))
+            self._fechar_intervalo(t)
+            self._status, self._t_status = resultado.status_estavel, t
+
+    def _fechar_intervalo(self, t: float) -> None:
+        if self._status is not None:
+            self.banco.executar(_SQL_INTERVALO, (self._t_status, t, self.camera, self.sessao, self._status))
+            self._status = None
+
+    def _fechar_minuto(self) -> None:
+        if self._minuto is None or self._n == 0:
+            return
+        d = self._detectados
+        self.banco.executar(_SQL_MINUTO, (
+            self._minuto, self.camera, self.sessao, self._n, d,
+            self._por_status["VAZIA"], self._por_status["PARCIAL"], self._por_status["CHEIA"],
+            self._soma_dist / d if d else None, self._soma_perc / d if d else None, self._soma_conf / d if d else None,
+        ))
+        for cat, (quantidade, exemplo) in self._motivos.items():
+            self.banco.executar(_SQL_REJEICAO, (self._minuto, self.camera, self.sessao, cat, quantidade, exemplo))
+        self._zerar_minuto()
+
+    def fechar(self) -> None:
+        """Minuto parcial, intervalo em curso e fim da sessão."""
+        agora = time.time()
+        self._fechar_minuto()
+        self._fechar_intervalo(agora)
+        self.banco.executar(_SQL_FIM_SESSAO, (agora, self.frames, self.mudancas, self.sessao))
+
+
+def abrir_banco(cfg: dict, log: Callable[[str], None] = _log_nulo) -> Optional[BancoEventos]:
+    """BancoEventos de cfg["eventos"], ou None se desligado."""
+    ev = cfg["eventos"]
+    if not ev["ativo"]:
+        return None
+    return BancoEventos(Path(__file__).parent / ev["arquivo"], ev["intervalo_lote_s"], log=log)
+
+
+def descrever_fonte(simulate: bool = False, replay: Optional[str] = None, serial: Optional[str] = None, **_outros) -> str:
+    """Fonte da sessão para a tabela sessoes (aceita os kwargs de criar_fonte)."""
+    if replay:
+        return f"replay {Path(replay).name}"
+    if simulate:
+        return "simulacao"
+    return f"realsense {serial}" if serial else "realsense"
+
+
+# =============================================================================
+# LEITURA
+# =============================================================================
+
+class ConsultaEventos:
+    """Consultas só-leitura (outro processo, outra thread, sem passar pela GUI)."""
+
+    def __init__(self, caminho):
+        uri = Path(caminho).resolve().as_uri() + "?mode=ro"
+        self.conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_MS / 1000)
+
+    def fechar(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    @staticmethod
+    def _filtro(desde: float, ate: Optional[float], camera: Optional[str], coluna: str = "t") -> Tuple[str, list]:
+        where, params = [f"{coluna} >= ?"], [desde]
+        if ate is not None:
+            where.append(f"{coluna} < ?")
+            params.append(ate)
+        if camera is not None:
+            where.append("camera = ?")
+            params.append(camera)
+        return " AND ".join(where), params
+
+    def ciclos(self, desde: float, ate: Optional[float] = None, camera: Optional[str] = None) -> int:
+        """Ciclos de enchimento: mudanças para CHEIA no intervalo."""
+        where, params = self._filtro(desde, ate, camera)
+        (n,) = self.conn.execute(f"SELECT COUNT(*) FROM mudancas WHERE para = 'CHEIA' AND {where}", params).fetchone()
+        return n
+
+    def mudancas(self, desde: float, ate: Optional[float] = None, camera: Optional[str] = None) -> List[tuple]:
+        """[(t, camera, de, para)] em ordem de tempo."""
+        where, params = self._filtro(desde, ate, camera)
+        return self.conn.execute(
+            f"SELECT t, camera, de, para FROM mudancas WHERE {where} ORDER BY t", params,
+        ).fetchall()
+
+    def motivos_rejeicao(self, desde: float, ate: Optional[float] = None, camera: Optional[str] = None) -> List[tuple]:
+        """[(motivo, quantidade)] do mais frequente ao menos."""
+        where, params = self._filtro(desde, ate, camera)
+        return self.conn.execute(
+            f"SELECT motivo, SUM(quantidade) AS n FROM rejeicoes WHERE {where} GROUP BY motivo ORDER BY n DESC",
+            params,
+        ).fetchall()
+
+    def minutos(self, desde: float, ate: Optional[float] = None, camera: Optional[str] = None) -> List[tuple]:
+        """Agregados por minuto: [(t, camera, frames, detectados, vazia, parcial, cheia, dist, perc, conf)]."""
+        where, params = self._filtro(desde, ate, camera)
+        return self.conn.execute(
+            "SELECT t, camera, frames, detectados, frames_vazia, frames_parcial, frames_cheia, "
+            f"distancia, percentual, confianca FROM minutos WHERE {where} ORDER BY t",
+            params,
+        ).fetchall()
+
+    def intervalos(self, desde: float, ate: Optional[float] = None, camera: Optional[str] = None) -> List[tuple]:
+        """[(inicio, fim, status)] de status_estavel que terminam depois de `desde`, em ordem."""
+        # Por `fim`: um intervalo que começou antes de `desde` e ainda não tinha acabado também entra
+        where, params = ["fim > ?"], [desde]
+        if ate is not None:
+            where.append("inicio < ?")
+            params.append(ate)
+        if camera is not None:
+            where.append("camera = ?")
+            params.append(camera)
+        return self.conn.execute(
+            f"SELECT inicio, fim, status FROM intervalos WHERE {' AND '.join(where)} ORDER BY inicio", params,
+        ).fetchall()
+
+    def sessoes(self, desde: float, ate: Optional[float] = None, camera: Optional[str] = None) -> List[tuple]:
+        """[(id, camera, modo, fonte, inicio, fim, frames, mudancas)] iniciadas no intervalo."""
+        where, params = self._filtro(desde, ate, camera, coluna="inicio")
+        return self.conn.execute(
+            f"SELECT id, camera, modo, fonte, inicio, fim, frames, mudancas FROM sessoes WHERE {where} ORDER BY inicio",
+            params,
+        ).fetchall()
+
@@ -0,0 +1,326 @@
+"""
+benchmark_detector.py — Benchmark do DetectorCacamba em cenas sintéticas (V5)
+
+Sem câmera, sem GUI, sem rede: roda em qualquer Linux com numpy + OpenCV.
+Mede `processar_frame` e as subetapas (det_mascara, det_morfologia,
+det_contornos, det_validacao, det_grid) sobre cenas determinísticas do
+simulador.py, na matriz:
+
+    resoluções  424x240, 640x480, 848x480, 1280x720
+    grid        grid_medicao_size (padrão 3, 5, 8)
+    contornos   blobs extras no range de profundidade (padrão 0, 16, 64),
+                cada um com área acima de area_minima_pixels, para exercitar
+                a validação de contornos
+    cenários    cenários do simulador (padrão: senoide)
+
+Por caso: ns/pixel (mediana), frames/s, p50/p95 de cada subetapa e o pico de
+memória alocada por frame (tracemalloc, em passada separada para não
+distorcer os tempos). Os frames são gerados antes da medição.
+
+Uso:
+    python benchmark_detector.py
+    python benchmark_detector.py --salvar-baseline benchmarks/baseline.json
+    python benchmark_detector.py --baseline benchmarks/baseline.json --limiar 15
+    python benchmark_detector.py --rapido --resolucoes 640x480 --grids 3
+
+Com --baseline, termina com código 1 se algum caso ficar mais lento (ns/pixel)
+ou alocar mais que `limiar` % acima do baseline.
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config_manager import CONFIG_PADRAO, ConfigManager
+from detector_cacamba import DetectorCacamba
+from metricas import MedidorEstagios
+from simulador import CENARIOS, SimuladorCena
+
+RESOLUCOES_PADRAO = ["424x240", "640x480", "848x480", "1280x720"]
+GRIDS_PADRAO = [3, 5, 8]
+CONTORNOS_PADRAO = [0, 16, 64]
+CENARIOS_PADRAO = ["senoide"]
+
+N_FRAMES_CENA = 60          # frames distintos pré-gerados por caso (em loop)
+N_AQUECIMENTO = 10
+N_MEDIDOS = 200
+N_ALOCACAO = 20
+LIMIAR_PADRAO = 15.0        # % acima do baseline que conta como regressão
+SEMENTE = 1234
+ESTAGIOS = ("det_mascara", "det_morfologia", "det_contornos", "det_validacao", "det_grid")
+
+
+# =============================================================================
+# CENAS
+# =============================================================================
+
+def _resolucao(texto: str) -> Tuple[int, int]:
+    try:
+        w, h = texto.lower().split("x")
+        return int(w), int(h)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Resolução inválida: {texto!r} (use LARGURAxALTURA)")
+
+
+def _blobs(largura: int, altura: int, n: int, cfg: dict, livre: np.ndarray) -> List[Tuple[slice, slice, float]]:
+    """
+    n quadrados no range da cacamba, só em pixels `livre` (fora das cacambas).
+
+    Primeiro blobs acima de area_minima_pixels (passam para a validação); se a
+    área livre acabar, completa com blobs pequenos que só sobrevivem à
+    morfologia (contam em det_contornos).
+    """
+    rng = np.random.default_rng(SEMENTE + n)
+    med = cfg["medicoes"]
+    prof = (med["profundidade_min_caixa"] + med["profundidade_max_caixa"]) / 2
+    lados = (
+        max(int(np.ceil(np.sqrt(med["area_minima_pixels"]))) + 4, 6),
+        cfg["filtros"]["kernel_morph_size"] + 4,
+    )
+    blobs: List[Tuple[slice, slice, float]] = []
+    ocupado = ~livre
+    for lado in lados:
+        tentativas = 0
+        while len(blobs) < n and tentativas < 500:
+            tentativas += 1
+            y = int(rng.integers(0, altura - lado))
+            x = int(rng.integers(0, largura - lado))
+            # Margem para os blobs não se fundirem na morfologia
+            m = cfg["filtros"]["kernel_morph_size"]
+            ys, xs = slice(max(y - m, 0), y + lado + m), slice(max(x - m, 0), x + lado + m)
+            if ocupado[ys, xs].any():
+                continue
+            ocupado[ys, xs] = True
+            blobs.append((slice(y, y + lado), slice(x, x + lado), prof))
+            tentativas = 0
+    return blobs
+
+
+def gerar_cena(
+    cfg: dict, largura: int, altura: int, cenario: str, contornos: int, n_frames: int = N_FRAMES_CENA,
+) -> List[np.ndarray]:
+    """Frames de depth determinísticos para um caso (mesmos argumentos → mesmos frames)."""
+    sim = SimuladorCena(cfg, largura, altura, fps=30.0, roteiro=[{"cenario": cenario}], semente=SEMENTE)
+    duracao = sim.passos[0].duracao_s
+    indices = np.linspace(0, duracao * sim.fps, n_frames, endpoint=False).astype(int)
+    frames = [sim.frame(int(i), com_cor=False)[1] for i in indices]
+
+    med = cfg["medicoes"]
+    fora_range = np.ones((altura, largura), dtype=bool)
+    for d in frames[:: max(1, n_frames // 8)]:
+        fora_range &= ~((d > med["profundidade_min_caixa"]) & (d < med["profundidade_max_caixa"]))
+    blobs = _blobs(largura, altura, contornos, cfg, cv2.erode(fora_range.astype(np.uint8), np.ones((9, 9))) > 0)
+    for d in frames:
+        for ys, xs, prof in blobs:
+            d[ys, xs] = prof
+    return frames
+
+
+# =============================================================================
+# MEDIÇÃO
+# =============================================================================
+
+def medir_caso(
+    cfg: dict, frames: List[np.ndarray], n_medidos: int = N_MEDIDOS, n_alocacao: int = N_ALOCACAO,
+) -> dict:
+    """Tempos e alocações de processar_frame sobre `frames` (em loop)."""
+    altura, largura = frames[0].shape
+    medidor = MedidorEstagios(janela=max(n_medidos, 1))
+    detector = DetectorCacamba(cfg, medidor=medidor)
+    n = len(frames)
+
+    for i in range(N_AQUECIMENTO):
+        detector.processar_frame(frames[i % n])
+    medidor.limpar()
+
+    tempos = np.empty(n_medidos, dtype=np.float64)
+    detectados = 0
+    for i in range(n_medidos):
+        t0 = time.perf_counter()
+        r = detector.processar_frame(frames[i % n])
+        tempos[i] = time.perf_counter() - t0
+        detectados += bool(r.caixa_detectada)
+
+    # Alocações em passada separada: o tracemalloc deixa tudo mais lento
+    picos = []
+    tracemalloc.start()
+    try:
+        for i in range(n_alocacao):
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            detector.processar_frame(frames[i % n])
+            _, pico = tracemalloc.get_traced_memory()
+            picos.append(pico - base)
+    finally:
+        tracemalloc.stop()
+
+    mediana = float(np.median(tempos))
+    pixels = largura * altura
+    estagios = {}
+    for nome, p in medidor.percentis().items():
+        if nome in ESTAGIOS:
+            estagios[nome] = {
+                "p50_ms": round(p["p50"], 4),
+                "p95_ms": round(p["p95"], 4),
+                "ns_por_pixel": round(p["p50"] * 1e6 / pixels, 3),
+            }
+    return {
+        "largura": largura,
+        "altura": altura,
+        "ns_por_pixel": round(mediana * 1e9 / pixels, 3),
+        "p50_ms": round(mediana * 1000, 4),
+        "p95_ms": round(float(np.percentile(tempos, 95)) * 1000, 4),
+        "fps": round(n_medidos / float(tempos.sum()), 1),
+        "alocacao_pico_kb": round(float(np.median(picos)) / 1024, 1) if picos else 0.0,
+        "taxa_deteccao": round(detectados / max(n_medidos, 1), 3),
+        "estagios": estagios,
+    }
+
+
+def chave_caso(largura: int, altura: int, grid: int, contornos: int, cenario: str) -> str:
+    return f"{largura}x{altura}_g{grid}_c{contornos}_{cenario}"
+
+
+def executar(
+    cfg_base: dict,
+    resolucoes: List[Tuple[int, int]],
+    grids: List[int],
+    contornos: List[int],
+    cenarios: List[str],
+    n_medidos: int = N_MEDIDOS,
+    n_alocacao: int = N_ALOCACAO,
+    progresso=print,
+) -> Dict[str, dict]:
+    casos: Dict[str, dict] = {}
+    for largura, altura in resolucoes:
+        for cenario in cenarios:
+            for n_contornos in contornos:
+                frames = gerar_cena(cfg_base, largura, altura, cenario, n_contornos)
+                for grid in grids:
+                    cfg = copy.deepcopy(cfg_base)
+                    cfg["filtros"]["grid_medicao_size"] = grid
+                    chave = chave_caso(largura, altura, grid, n_contornos, cenario)
+                    casos[chave] = medir_caso(cfg, frames, n_medidos, n_alocacao)
+                    casos[chave].update({"grid": grid, "contornos": n_contornos, "cenario": cenario})
+                    progresso(_linha(chave, casos[chave]))
+    return casos
+
+
+# =============================================================================
+# BASELINE
+# =============================================================================
+
+def info_maquina() -> dict:
+    return {
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "threads_opencv": cv2.getNumThreads(),
+    }
+
+
+def salvar_baseline(caminho: Path, casos: Dict[str, dict]) -> Path:
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    dados = {
+        "gerado_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "maquina": info_maquina(),
+        "casos": casos,
+    }
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+    return caminho
+
+
+def comparar(casos: Dict[str, dict], baseline: Dict[str, dict], limiar_pct: float) -> List[str]:
+    """Regressões acima de `limiar_pct` em ns/pixel ou pico de alocação; casos ausentes são ignorados."""
+    regressoes = []
+    for chave, atual in casos.items():
+        ref = baseline.get(chave)
+        if ref is None:
+            continue
+        for metrica in ("ns_por_pixel", "alocacao_pico_kb"):
+            antes, agora = ref.get(metrica, 0.0), atual[metrica]
+            if antes > 0 and agora > antes * (1 + limiar_pct / 100):
+                regressoes.append(
+                    f"{chave}: {metrica} {antes:g} → {agora:g} (+{(agora / antes - 1) * 100:.0f}%)"
+                )
+    return regressoes
+
+
+def _linha(chave: str, caso: dict) -> str:
+    return (
+        f"  {chave:<32} {caso['ns_por_pixel']:>8.2f} ns/px  {caso['fps']:>8.1f} FPS  "
+        f"p95 {caso['p95_ms']:>7.3f} ms  pico {caso['alocacao_pico_kb']:>8.1f} KB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do DetectorCacamba (V5) em cenas sintéticas")
+    parser.add_argument(
+        "--resolucoes", nargs="+", type=_resolucao, default=[_resolucao(r) for r in RESOLUCOES_PADRAO],
+        metavar="LxA", help=f"Resoluções (padrão: {' '.join(RESOLUCOES_PADRAO)})",
+    )
+    parser.add_argument("--grids", nargs="+", type=int, default=GRIDS_PADRAO, help="Valores de grid_medicao_size")
+    parser.add_argument("--contornos", nargs="+", type=int, default=CONTORNOS_PADRAO, help="Blobs extras por cena")
+    parser.add_argument(
+        "--cenarios", nargs="+", default=CENARIOS_PADRAO, choices=sorted(CENARIOS),
+        help="Cenários do simulador (padrão: senoide)",
+    )
+    parser.add_argument("--config", help="Config do detector (padrão: valores de fábrica, para ser reprodutível)")
+    parser.add_argument("--frames", type=int, default=N_MEDIDOS, help=f"Frames medidos por caso (padrão: {N_MEDIDOS})")
+    parser.add_argument("--rapido", action="store_true", help="Menos frames por caso (checagem rápida)")
+    parser.add_argument("--salvar-baseline", metavar="JSON", help="Grava os resultados como baseline")
+    parser.add_argument("--baseline", metavar="JSON", help="Compara com um baseline e falha se houver regressão")
+    parser.add_argument(
+        "--limiar", type=float, default=LIMIAR_PADRAO,
+        help=f"Regressão tolerada em %% (padrão: {LIMIAR_PADRAO:g})",
+    )
+    parser.add_argument("--threads", type=int, help="cv2.setNumThreads (1 = mais estável entre execuções)")
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+    cfg = ConfigManager(caminho_config=args.config).cfg if args.config else copy.deepcopy(CONFIG_PADRAO)
+    n_medidos = 50 if args.rapido else args.frames
+    n_alocacao = 5 if args.rapido else N_ALOCACAO
+
+    n_casos = len(args.resolucoes) * len(args.grids) * len(args.contornos) * len(args.cenarios)
+    print(f"Benchmark DetectorCacamba: {n_casos} casos × {n_medidos} frames")
+    t0 = time.perf_counter()
+    casos = executar(cfg, args.resolucoes, args.grids, args.contornos, args.cenarios, n_medidos, n_alocacao)
+    print(f"✅ {n_casos} casos em {time.perf_counter() - t0:.1f}s")
+
+    if args.salvar_baseline:
+        destino = salvar_baseline(Path(args.salvar_baseline), casos)
+        print(f"💾 Baseline gravado em {destino}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressoes = comparar(casos, baseline.get("casos", {}), args.limiar)
+        comuns = len(set(casos) & set(baseline.get("casos", {})))
+        if regressoes:
+            print(f"❌ {len(regressoes)} regressões acima de {args.limiar:g}% ({comuns} casos comparados):")
+            for r in regressoes:
+                print(f"   {r}")
+            sys.exit(1)
+        print(f"✅ Sem regressões acima de {args.limiar:g}% ({comuns} casos comparados)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+"""
+captura.py — Fontes de captura de frames (V5)
+
+Sem Tkinter, sem PIL. Cada fonte expõe `quadros(stop_event, ocioso=None)`, um
+gerador que entrega QuadroCapturado até o stop_event ser sinalizado (ou a
+fonte acabar). Enquanto espera o próximo frame, a fonte chama `ocioso()` a
+cada poucos milissegundos e confere o stop_event: o consumidor atende
+comandos sem depender da chegada de frames, e parar é imediato.
+
+Com o Event `pausa` sinalizado a fonte fica "quente" sem entregar frames: a
+câmera continua transmitindo (framesets drenados e descartados; a cadeia de
+filtros roda só em 1 a cada camera.pausa_filtrar_a_cada frames, para o
+temporal não envelhecer) e a simulação/replay congelam no frame atual.
+Ao retomar, o próximo frame já sai em regime.
+Usado tanto pela GUI (gui_app.py) quanto pelo modo serviço (servico_headless.py).
+
+Fontes:
+  - FonteCamera     — RealSense real (pyrealsense2)
+  - FonteSimulacao  — cenas sintéticas por cenário (simulador.py), sem hardware
+  - FonteReplay     — sessão gravada (sessao.py)
+
+Com `com_cor=False` nenhuma imagem BGR é produzida: a câmera não habilita os
+streams color/IR e a simulação/replay não renderizam a imagem. Com `com_cor=True`
+a câmera habilita um só stream de imagem (color, ou IR sem sensor RGB).
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import pyrealsense2 as rs
+    _HAS_REALSENSE = True
+except ImportError:
+    _HAS_REALSENSE = False
+
+from filtros_realsense import ComparadorFiltros, montar_cadeia
+from streams_realsense import cadeia_com_decimacao, planejar_streams
+from metricas import ContadorQuadros, MedidorEstagios, marcar
+from sessao import GravadorSessao, LeitorSessao, esperar, frame_bgr_de_depth, reproduzir
+from simulador import simulador_de_cfg
+
+
+@dataclass
+class QuadroCapturado:
+    # Metros; None quando há depth_z16 (câmera/replay): convertido só se alguém pedir (metros())
+    depth_meters: Optional[np.ndarray]
+    frame_bgr: Optional[np.ndarray]
+    fps: float
+    timestamp: str
+    # Identificação do frame no dispositivo (-1 / 0.0 quando não disponível)
+    frame_number: int = -1
+    timestamp_dispositivo_ms: float = 0.0
+    # Instante de captura no relógio do host (time.time()); base das latências
+    t_captura: float = 0.0
+    # Profundidade z16 de origem (câmera/replay), lida direto pelo detector e pelo pré-gatilho; None na simulação
+    depth_z16: Optional[np.ndarray] = None
+    depth_scale: float = 0.001
+
+    def metros(self) -> np.ndarray:
+        """Profundidade em metros (float32), convertida do z16 na primeira chamada."""
+        if self.depth_meters is None:
+            self.depth_meters = self.depth_z16.astype(np.float32) * np.float32(self.depth_scale)
+        return self.depth_meters
+
+
+INTERVALO_POLL_MS = 5   # câmera: espera máxima na fila de frames antes de conferir stop/ocioso
+
+
+def _agora_str() -> str:
+    return datetime.now().strftime("%H:%M:%S.%f")[:-3]
+
+
+def _log_nulo(_msg: str) -> None:
+    pass
+
+
+# =============================================================================
+# CÂMERA REALSENSE
+# =============================================================================
+
+class FonteCamera:
+    """
+    Captura da RealSense com a cadeia de filtros de profundidade.
+
+    Os framesets chegam numa rs.frame_queue (camera.fila_frames) consumida
+    por polling curto, nunca num wait_for_frames bloqueante. Com
+    camera.fila_politica = "mais_recente", uma rajada acumulada é descartada
+    e só o frame mais novo segue; com "todos", cada frame é processado.
+    """
+
+    nome = "Câmera RealSense"
+
+    def __init__(
+        self,
+        cfg: dict,
+        com_cor: bool = True,
+        gravar: Optional[str] = None,
+        log: Callable[[str], None] = _log_nulo,
+        medidor: Optional[MedidorEstagios] = None,
+        contador: Optional[ContadorQuadros] = None,
+        serial: Optional[str] = None,
+    ):
+        self.cfg = cfg
+        self.com_cor = com_cor
+        self.gravar = gravar
+        self.log = log
+        self.medidor = medidor
+        self.contador = contador
+        # Serial do dispositivo; None = primeiro encontrado
+        self.serial = serial
+        if serial:
+            self.nome = f"Câmera RealSense {serial}"
+
+    def quadros(self, stop_event, ocioso: Optional[Callable[[], None]] = None, pausa=None) -> Iterator[QuadroCapturado]:
+        cfg = self.cfg
+        med = self.medidor
+        contador = self.contador
+        filtrar_a_cada = cfg["camera"]["pausa_filtrar_a_cada"]
+        em_pausa = 0
+        fila = rs.frame_queue(cfg["camera"]["fila_frames"], keep_frames=True)
+        mais_recente = cfg["camera"]["fila_politica"] == "mais_recente"
+        pipeline = rs.pipeline()
+        rs_cfg = rs.config()
+        if self.serial:
+            rs_cfg.enable_device(self.serial)
+
+        # Só os streams necessários; modo depth da config ou escolhido pela precisão alvo
+        plano = planejar_streams(cfg, self.serial, self.com_cor, log=self.log)
+        W, H, FPS = plano.largura, plano.altura, plano.fps
+        rs_cfg.enable_stream(rs.stream.depth, W, H, rs.format.z16, FPS)
+        if plano.visual == "color":
+            rs_cfg.enable_stream(
+                rs.stream.color, cfg["camera"]["resolucao_largura"], cfg["camera"]["resolucao_altura"],
+                rs.format.bgr8, FPS,
+            )
+        elif plano.visual == "infrared":
+            # IR sai do mesmo sensor do depth: mesma resolução/fps
+            rs_cfg.enable_stream(rs.stream.infrared, 1, W, H, rs.format.y8, FPS)
+
+        gravador: Optional[GravadorSessao] = None
+        try:
+            profile = pipeline.start(rs_cfg, fila)
+            device = profile.get_device()
+            depth_sensor = device.first_depth_sensor()
+            depth_scale = depth_sensor.get_depth_scale()
+
+            if depth_sensor.supports(rs.option.emitter_enabled):
+                depth_sensor.set_option(rs.option.emitter_enabled, 1.0)
+                if depth_sensor.supports(rs.option.laser_power):
+                    lp = cfg["camera"]["laser_potencia"]
+                    if lp > 0:
+                        depth_sensor.set_option(rs.option.laser_power, float(lp))
+            # Timestamps no domínio global = relógio do host → latência ponta a ponta
+            if depth_sensor.supports(rs.option.global_time_enabled):
+                depth_sensor.set_option(rs.option.global_time_enabled, 1.0)
+
+            # Filtros de profundidade (ordem/opções de camera.filtros_realsense)
+            especificacao = cfg["camera"]["filtros_realsense"]
+            if plano.decimacao is not None:
+                especificacao = cadeia_com_decimacao(especificacao, plano.decimacao)
+            cadeia = montar_cadeia(especificacao)
+            comparador: Optional[ComparadorFiltros] = None
+            if cfg["camera"]["comparar_filtros"]:
+                comparador = ComparadorFiltros([nome for nome, _ in cadeia], cfg["roi"])
+            intervalo_comparacao = cfg["camera"]["comparar_filtros_intervalo"]
+
+            self.log(f"✅ {self.nome} conectada e configurada: {plano.descricao()}.")
+            self.log(f"   Filtros: {' → '.join(nome for nome, _ in cadeia) or 'nenhum'}"
+                     + (" (comparação ativa)" if comparador else ""))
+
+            t_prev_frame = time.time()  # para medir FPS inter-frame real
+            t = time.perf_counter()
+            while not stop_event.is_set():
+                ok, frame = fila.try_wait_for_frame(INTERVALO_POLL_MS)
+                if not ok:
+                    if ocioso is not None:
+                        ocioso()
+                    continue
+                if mais_recente:
+                    # Rajada acumulada: segue só o mais novo
+                    while True:
+                        mais_novo = fila.poll_for_frame()
+                        if not mais_novo:
+                            break
+                        if contador is not None:
+                            antigo = frame.as_frameset().get_depth_frame()
+                            if antigo:
+                                contador.registrar_numero(antigo.get_frame_number())
+                            contador.descartar("captura")
+                        frame = mais_novo
+                frames = frame.as_frameset()
+                if pausa is not None and pausa.is_set():
+                    # Pausa quente: o stream segue, o frame é descartado sem detecção
+                    depth_raw = frames.get_depth_frame()
+                    if depth_raw:
+                        if contador is not None:
+                            contador.registrar_numero(depth_raw.get_frame_number())
+                        if em_pausa % filtrar_a_cada == 0:
+                            filtrado = depth_raw
+                            for _, filtro in cadeia:
+                                filtrado = filtro.process(filtrado)
+                        em_pausa += 1
+                    t_prev_frame = time.time()
+                    if ocioso is not None:
+                        ocioso()
+                    t = time.perf_counter()
+                    continue
+                em_pausa = 0
+                t = marcar(med, "captura_wait", t)
+                depth_raw = frames.get_depth_frame()
+                if not depth_raw:
+                    if contador is not None:
+                        contador.descartar("filtros")
+                    t = time.perf_counter()
+                    continue
+
+                frame_number = depth_raw.get_frame_number()
+                ts_disp = depth_raw.get_timestamp()
+                if contador is not None:
+                    contador.registrar_numero(frame_number)
+
+                # FPS medido como frequência real entre frames (inclui wait da câmera)
+                t_now = time.time()
+                fps = 1.0 / max(t_now - t_prev_frame, 1e-6)
+                t_prev_frame = t_now
+                t_captura = _instante_captura(depth_raw, ts_disp, t_now)
+
+                filtered = depth_raw
+                if comparador is not None:
+                    comparador.registrar("bruto", np.asanyarray(depth_raw.get_data()), depth_scale)
+                for nome, filtro in cadeia:
+                    t_filtro = t
+                    filtered = filtro.process(filtered)
+                    t = marcar(med, f"filtro_{nome}", t)
+                    if comparador is not None:
+                        comparador.registrar(nome, np.asanyarray(filtered.get_data()), depth_scale, t - t_filtro)
+                        t = time.perf_counter()  # custo da comparação fora do tempo do próximo filtro
+                if comparador is not None and comparador.quadros % intervalo_comparacao == 0:
+                    self.log(comparador.formatar())
+
+                depth_image = np.asanyarray(filtered.get_data())
+                if depth_image.size == 0:
+                    if contador is not None:
+                        contador.descartar("filtros")
+                    t = time.perf_counter()
+                    continue
+
+                frame_bgr: Optional[np.ndarray] = None
+                color_frame = None
+                if plano.visual is not None:
+                    if plano.visual == "color":
+                        color_frame = frames.get_color_frame()
+                        if color_frame:
+                            frame_bgr = np.asanyarray(color_frame.get_data())
+                    else:
+                        ir_frame = frames.get_infrared_frame(1)
+                        if ir_frame:
+                            frame_bgr = cv2.cvtColor(np.asanyarray(ir_frame.get_data()), cv2.COLOR_GRAY2BGR)
+                    dh, dw = depth_image.shape[:2]
+                    if frame_bgr is None:
+                        # Frameset sem a imagem (ex: início do stream): exibe a própria profundidade
+                        frame_bgr = frame_bgr_de_depth(depth_image)
+                    elif frame_bgr.shape[:2] != (dh, dw):
+                        frame_bgr = cv2.resize(frame_bgr, (dw, dh))
+                    marcar(med, "captura_cor", t)
+
+                if self.gravar:
+                    if gravador is None:
+                        dh, dw = depth_image.shape[:2]
+                        gravador = GravadorSessao(
+                            self.gravar, dw, dh, depth_scale, FPS,
+                            cor_shape=(dh, dw) if color_frame else None,
+                        )
+                        self.log(f"⏺ Gravando sessão em {self.gravar}")
+                    gravador.gravar(
+                        depth_image,
+                        frame_bgr if color_frame else None,
+                        timestamp_ms=t_captura * 1000.0,
+                        frame_number=frame_number,
+                    )
+
+                yield QuadroCapturado(
+                    None, frame_bgr, fps, _agora_str(),
+                    frame_number=frame_number,
+                    timestamp_dispositivo_ms=ts_disp,
+                    t_captura=t_captura,
+                    depth_z16=depth_image,
+                    depth_scale=depth_scale,
+                )
+                t = time.perf_counter()
+        finally:
+            try:
+                pipeline.stop()
+            except Exception:
+                pass
+            if gravador is not None:
+                gravador.fechar()
+                self.log(f"⏹ Sessão gravada: {gravador.frames_gravados} frames.")
+
+
+def _instante_captura(depth_raw, ts_disp_ms: float, t_chegada: float) -> float:
+    """Instante de captura no relógio do host, na melhor fonte disponível."""
+    dominio = depth_raw.get_frame_timestamp_domain()
+    if dominio == rs.timestamp_domain.global_time:
+        return ts_disp_ms / 1000.0
+    chegada = rs.frame_metadata_value.time_of_arrival
+    if depth_raw.supports_frame_metadata(chegada):
+        return depth_raw.get_frame_metadata(chegada) / 1000.0
+    return t_chegada
+
+
+# =============================================================================
+# SIMULAÇÃO
+# =============================================================================
+
+class FonteSimulacao:
+    """Câmera virtual: cenas do simulador (seção "simulacao" da config) no FPS configurado."""
+
+    def __init__(
+        self,
+        cfg: dict,
+        com_cor: bool = True,
+        log: Callable[[str], None] = _log_nulo,
+        medidor: Optional[MedidorEstagios] = None,
+        contador: Optional[ContadorQuadros] = None,
+    ):
+        self.cfg = cfg
+        self.com_cor = com_cor
+        self.log = log
+        self.medidor = medidor
+        self.contador = contador
+        self.simulador = simulador_de_cfg(cfg)
+        cenarios = " → ".join(p.cenario.nome for p in self.simulador.passos)
+        self.nome = f"Simulação ({cenarios})"
+
+    def quadros(self, stop_event, ocioso: Optional[Callable[[], None]] = None, pausa=None) -> Iterator[QuadroCapturado]:
+        sim = self.simulador
+        self.log(
+            f"🎮 Modo simulação ativo — {sim.largura}x{sim.altura} @ {sim.fps:.0f} FPS, "
+            f"roteiro: {' → '.join(p.cenario.nome for p in sim.passos)}."
+        )
+        periodo = 1.0 / sim.fps
+        t_prox = time.perf_counter()
+        n = 0
+        while not stop_event.is_set():
+            if pausa is not None and pausa.is_set():
+                # Congela a cena: o roteiro não avança durante a pausa
+                esperar(periodo, stop_event, ocioso)
+                t_prox = time.perf_counter()
+                continue
+            t_captura = time.time()
+            t_gen = time.perf_counter()
+            frame_bgr, depth_meters = sim.frame(n, self.com_cor)
+            marcar(self.medidor, "captura_simulada", t_gen)
+            if self.contador is not None:
+                self.contador.registrar_numero(n)
+            yield QuadroCapturado(
+                depth_meters, frame_bgr, sim.fps, _agora_str(),
+                frame_number=n, timestamp_dispositivo_ms=n * periodo * 1000.0, t_captura=t_captura,
+            )
+            n += 1
+
+            # Ritmo do FPS configurado (o tempo de processamento do consumidor entra no período)
+            t_prox += periodo
+            espera = t_prox - time.perf_counter()
+            if espera > 0:
+                esperar(espera, stop_event, ocioso)
+            else:
+                t_prox = time.perf_counter()
+
+
+# =============================================================================
+# REPLAY
+# =============================================================================
+
+class FonteReplay:
+    """Reproduz uma sessão gravada pelo mesmo caminho da câmera."""
+
+    nome = "Replay"
+
+    def __init__(
+        self,
+        caminho: str,
+        modo: str = "tempo_real",
+        fator: float = 1.0,
+        com_cor: bool = True,
+        log: Callable[[str], None] = _log_nulo,
+        medidor: Optional[MedidorEstagios] = None,
+        contador: Optional[ContadorQuadros] = None,
+    ):
+        self.caminho = caminho
+        self.modo = modo
+        self.fator = fator
+        self.com_cor = com_cor
+        self.log = log
+        self.medidor = medidor
+        self.contador = contador
+
+    def quadros(self, stop_event, ocioso: Optional[Callable[[], None]] = None, pausa=None) -> Iterator[QuadroCapturado]:
+        with LeitorSessao(self.caminho) as leitor:
+            self.log(
+                f"⏯ Replay: {Path(self.caminho).name} — {len(leitor)} frames "
+                f"{leitor.largura}x{leitor.altura} (modo {self.modo})."
+            )
+            for frame, fps in reproduzir(leitor, self.modo, self.fator, stop_event, ocioso=ocioso, pausa=pausa):
+                t = time.perf_counter()
+                # Em replay o "instante de captura" é a entrega do frame (o gravado é passado)
+                t_captura = time.time()
+                if self.contador is not None:
+                    self.contador.registrar_numero(frame.frame_number)
+                frame_bgr: Optional[np.ndarray] = None
+                if self.com_cor:
+                    if frame.color_bgr is not None:
+                        frame_bgr = frame.color_bgr  # consumidor copia antes de desenhar
+                    else:
+                        frame_bgr = frame_bgr_de_depth(frame.depth_z16)
+                marcar(self.medidor, "captura_replay", t)
+                ts = datetime.fromtimestamp(frame.timestamp_ms / 1000.0).strftime("%H:%M:%S.%f")[:-3]
+                yield QuadroCapturado(
+                    None, frame_bgr, fps, ts,
+                    frame_number=frame.frame_number,
+                    timestamp_dispositivo_ms=frame.timestamp_ms,
+                    t_captura=t_captura,
+                    depth_z16=frame.depth_z16,
+                    depth_scale=leitor.depth_scale,
+                )
+            if not stop_event.is_set():
+                self.log("⏹ Replay concluído.")
+
+
+def realsense_disponivel() -> bool:
+    return _HAS_REALSENSE
+
+
+def enumerar_dispositivos() -> List[Tuple[str, str]]:
+    """(serial, nome) de cada RealSense conectada; vazio sem pyrealsense2."""
+    if not _HAS_REALSENSE:
+        return []
+    dispositivos = []
+    for dev in rs.context().query_devices():
+        dispositivos.append((
+            dev.get_info(rs.camera_info.serial_number),
+            dev.get_info(rs.camera_info.name),
+        ))
+    return dispositivos
+
+
+def criar_fonte(
+    cfg: dict,
+    simulate: bool = False,
+    replay: Optional[str] = None,
+    replay_modo: str = "tempo_real",
+    replay_fator: float = 1.0,
+    gravar: Optional[str] = None,
+    com_cor: bool = True,
+    log: Callable[[str], None] = _log_nulo,
+    medidor: Optional[MedidorEstagios] = None,
+    contador: Optional[ContadorQuadros] = None,
+    serial: Optional[str] = None,
+):
+    """Escolhe a fonte pela mesma precedência da linha de comando: replay > simulação > câmera."""
+    comum = dict(com_cor=com_cor, log=log, medidor=medidor, contador=contador)
+    if replay:
+        return FonteReplay(replay, replay_modo, replay_fator, **comum)
+    if simulate:
+        return FonteSimulacao(cfg, **comum)
+    if not _HAS_REALSENSE:
+        raise RuntimeError("pyrealsense2 não encontrado — use --simulate ou --replay.")
+    return FonteCamera(cfg, gravar=gravar, serial=serial, **comum)
@@ -0,0 +1,303 @@
+"""
+config_compilada.py — Snapshot imutável e validado da config do detector (V5)
+
+Sem GUI. `compilar_config(cfg)` valida o dicionário de configuração e devolve
+uma ConfigCompilada: atributos planos (sem cfg["secao"]["chave"] no caminho
+quente) e valores derivados prontos:
+
+  - kernel da morfologia
+  - limites da ROI em pixels para a resolução do frame (`para_resolucao`)
+  - limites de profundidade e de clip em unidades z16 para o depth_scale da
+    câmera (`para_escala`), usados direto no z16 por
+    DetectorCacamba.processar_frame_z16
+
+Config inválida levanta ConfigInvalida na compilação, ou seja, no
+ConfigManager, antes de chegar à thread da câmera.
+"""
+
+import re
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from filtros_realsense import validar_cadeia
+from simulador import validar_roteiro
+
+DEPTH_SCALE_PADRAO = 0.001      # D4xx: 1 unidade z16 = 1 mm
+PROF_VALIDA_M = (0.05, 5.0)     # pixels com retorno plausível (mediana de profundidade do contorno)
+_HORARIO = re.compile(r"([01]\d|2[0-3]):[0-5]\d")
+
+
+class ConfigInvalida(ValueError):
+    """Config rejeitada; `erros` lista cada problema encontrado."""
+
+    def __init__(self, erros: List[str]):
+        self.erros = erros
+        super().__init__("; ".join(erros))
+
+
+@dataclass(frozen=True, eq=False)
+class ConfigCompilada:
+    __slots__ = (
+        "largura", "altura",
+        "prof_min", "prof_max", "area_min", "altura_camera_chao", "altura_caixa",
+        "prof_min_corpo", "area_max_corpo", "tempo_min_mudancas",
+        "roi_x_min", "roi_x_max", "roi_y_min", "roi_y_max", "roi_px",
+        "limite_vazia", "limite_cheia",
+        "clip_min", "clip_max",
+        "grid", "kernel_size", "kernel", "tamanho_historico", "historico_distancias",
+        "depth_scale", "prof_min_z16", "prof_max_z16", "valida_min_z16", "valida_max_z16",
+        "clip_min_z16", "clip_max_z16",
+    )
+
+    largura: int                      # resolução para a qual roi_px foi calculado (0 = nenhuma)
+    altura: int
+    prof_min: float
+    prof_max: float
+    area_min: int
+    altura_camera_chao: float
+    altura_caixa: float
+    prof_min_corpo: float
+    area_max_corpo: int
+    tempo_min_mudancas: float
+    roi_x_min: float
+    roi_x_max: float
+    roi_y_min: float
+    roi_y_max: float
+    roi_px: Tuple[float, float, float, float]    # (x_min, x_max, y_min, y_max) em pixels
+    limite_vazia: float
+    limite_cheia: float
+    clip_min: float
+    clip_max: float
+    grid: int
+    kernel_size: int
+    kernel: np.ndarray
+    tamanho_historico: int
+    historico_distancias: int
+    depth_scale: float
+    # Limites inclusivos em z16, equivalentes a prof_min < metros < prof_max (idem PROF_VALIDA_M, clip)
+    prof_min_z16: int
+    prof_max_z16: int
+    valida_min_z16: int
+    valida_max_z16: int
+    clip_min_z16: int
+    clip_max_z16: int
+
+    def para_resolucao(self, largura: int, altura: int) -> "ConfigCompilada":
+        """Mesmo snapshot com a ROI em pixels de um frame largura×altura."""
+        if (largura, altura) == (self.largura, self.altura):
+            return self
+        return replace(self, largura=largura, altura=altura, roi_px=(
+            self.roi_x_min * largura, self.roi_x_max * largura,
+            self.roi_y_min * altura, self.roi_y_max * altura,
+        ))
+
+    def para_escala(self, depth_scale: float) -> "ConfigCompilada":
+        """Mesmo snapshot com os limites z16 de uma câmera com outro depth_scale."""
+        if depth_scale == self.depth_scale:
+            return self
+        return replace(self, **_derivados_z16(depth_scale, self.prof_min, self.prof_max, self.clip_min, self.clip_max))
+
+
+def validar_config(cfg: dict) -> List[str]:
+    """Lista de problemas da config (vazia se válida)."""
+    erros: List[str] = []
+
+    def num(secao: str, chave: str, minimo: Optional[float] = None, inteiro: bool = False):
+        try:
+            v = cfg
+            for parte in secao.split("."):
+                v = v[parte]
+            v = v[chave]
+        except (KeyError, TypeError):
+            erros.append(f"{secao}.{chave} ausente")
+            return None
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or (inteiro and not float(v).is_integer()):
+            erros.append(f"{secao}.{chave}={v!r} não é {'inteiro' if inteiro else 'número'}")
+            return None
+        if minimo is not None and v < minimo:
+            erros.append(f"{secao}.{chave}={v} < {minimo}")
+            return None
+        return v
+
+    prof_min = num("medicoes", "profundidade_min_caixa", 0.0)
+    prof_max = num("medicoes", "profundidade_max_caixa", 0.0)
+    if prof_min is not None and prof_max is not None and prof_min >= prof_max:
+        erros.append(f"medicoes.profundidade_min_caixa ({prof_min}) >= profundidade_max_caixa ({prof_max})")
+    num("medicoes", "area_minima_pixels", 1, inteiro=True)
+    num("medicoes", "altura_camera_chao", 0.0)
+    altura_caixa = num("medicoes", "altura_caixa", 0.0)
+    if altura_caixa == 0:
+        erros.append("medicoes.altura_caixa deve ser > 0")
+
+    num("protecao_pessoa", "profundidade_minima_corpo", 0.0)
+    num("protecao_pessoa", "area_maxima_corpo", 1, inteiro=True)
+    num("protecao_pessoa", "tempo_minimo_entre_mudancas", 0.0)
+
+    for eixo in ("x", "y"):
+        a, b = num("roi", f"{eixo}_min", 0.0), num("roi", f"{eixo}_max", 0.0)
+        if a is not None and b is not None and not (a < b <= 1.0):
+            erros.append(f"roi.{eixo}_min/{eixo}_max ({a}, {b}) fora de 0 <= min < max <= 1")
+
+    vazia, cheia = num("thresholds", "limite_vazia", 0.0), num("thresholds", "limite_cheia", 0.0)
+    if vazia is not None and cheia is not None and cheia >= vazia:
+        erros.append(f"thresholds.limite_cheia ({cheia}) >= limite_vazia ({vazia})")
+
+    clip_min, clip_max = num("camera", "clip_min", 0.0), num("camera", "clip_max", 0.0)
+    if clip_min is not None and clip_max is not None and clip_min >= clip_max:
+        erros.append(f"camera.clip_min ({clip_min}) >= clip_max ({clip_max})")
+    erros += validar_cadeia(cfg.get("camera", {}).get("filtros_realsense", []))
+    num("camera", "comparar_filtros_intervalo", 1, inteiro=True)
+    num("camera", "precisao_alvo_mm", 0.0)
+    num("camera", "subpixel", 0.0)
+    num("camera", "fila_frames", 1, inteiro=True)
+    num("camera", "pausa_filtrar_a_cada", 1, inteiro=True)
+    if cfg.get("camera", {}).get("fila_politica") not in ("mais_recente", "todos"):
+        erros.append(f"camera.fila_politica={cfg.get('camera', {}).get('fila_politica')!r} não é mais_recente/todos")
+    visual = cfg.get("camera", {}).get("stream_visual")
+    if visual not in ("auto", "color", "infrared"):
+        erros.append(f"camera.stream_visual={visual!r} não é auto/color/infrared")
+
+    num("filtros", "grid_medicao_size", 1, inteiro=True)
+    num("filtros", "kernel_morph_size", 1, inteiro=True)
+    num("filtros", "tamanho_historico", 1, inteiro=True)
+    num("filtros", "historico_distancias", 1, inteiro=True)
+
+    turnos = cfg.get("estatisticas", {}).get("inicio_turnos")
+    if not isinstance(turnos, list) or not all(isinstance(h, str) and _HORARIO.fullmatch(h) for h in turnos):
+        erros.append(f"estatisticas.inicio_turnos={turnos!r} não é lista de horários HH:MM")
+
+    num("alertas", "intervalo_minimo_s", 0.0)
+    num("alertas", "janela_agrupamento_s", 0.0)
+    num("alertas", "capacidade_fila", 1, inteiro=True)
+    num("alertas", "webhook_timeout_s", 0.1)
+    num("alertas", "comando_timeout_s", 0.1)
+    alertas = cfg.get("alertas", {})
+    url = alertas.get("webhook_url")
+    if not isinstance(url, str) or (url and not url.startswith(("http://", "https://"))):
+        erros.append(f"alertas.webhook_url={url!r} não é vazia nem http(s)://")
+    if not isinstance(alertas.get("pasta_arquivos"), str):
+        erros.append(f"alertas.pasta_arquivos={alertas.get('pasta_arquivos')!r} não é texto")
+    comando = alertas.get("comando")
+    if not isinstance(comando, list) or not all(isinstance(a, str) for a in comando):
+        erros.append(f"alertas.comando={comando!r} não é lista de textos")
+
+    num("eventos", "intervalo_lote_s", 0.0)
+    if not isinstance(cfg.get("eventos", {}).get("arquivo"), str) or not cfg["eventos"]["arquivo"]:
+        erros.append(f"eventos.arquivo={cfg.get('eventos', {}).get('arquivo')!r} não é um caminho")
+
+    num("pre_gatilho", "segundos", 0.1)
+    num("pre_gatilho", "pos_gatilho_s", 0.0)
+    escala = num("pre_gatilho", "escala_cor", 0.0)
+    if escala is not None and escala > 1.0:
+        erros.append(f"pre_gatilho.escala_cor={escala} > 1")
+    num("pre_gatilho", "intervalo_minimo_s", 0.0)
+    num("pre_gatilho.gatilhos", "janela_rejeicoes", 1, inteiro=True)
+    rajada = num("pre_gatilho.gatilhos", "rajada_rejeicoes", 0, inteiro=True)
+    janela = cfg.get("pre_gatilho", {}).get("gatilhos", {}).get("janela_rejeicoes")
+    if rajada is not None and isinstance(janela, int) and rajada > janela:
+        erros.append(f"pre_gatilho.gatilhos.rajada_rejeicoes ({rajada}) > janela_rejeicoes ({janela})")
+    num("pre_gatilho.gatilhos", "confianca_min", 0.0)
+    num("pre_gatilho.gatilhos", "frames_baixa_confianca", 0, inteiro=True)
+
+    num("simulacao", "largura", 16, inteiro=True)
+    num("simulacao", "altura", 16, inteiro=True)
+    num("simulacao", "fps", 0.1)
+    num("simulacao", "semente", 0, inteiro=True)
+    sim = cfg.get("simulacao", {})
+    erros += validar_roteiro(sim.get("cenario"), sim.get("roteiro", []))
+    return erros
+
+
+def _derivados_z16(depth_scale: float, prof_min: float, prof_max: float, clip_min: float, clip_max: float) -> dict:
+    """
+    Limites z16 de um depth_scale. Saem da própria conversão z16 × escala
+    (float64, como a câmera fazia antes), então comparar no z16 seleciona
+    exatamente os pixels que a comparação em metros selecionaria.
+    """
+    metros = np.arange(65536, dtype=np.float64) * depth_scale
+
+    def acima(m: float) -> int:     # menor z16 com metros > m
+        return int(np.searchsorted(metros, m, side="right"))
+
+    def abaixo(m: float) -> int:    # maior z16 com metros < m
+        return int(np.searchsorted(metros, m, side="left")) - 1
+
+    return {
+        "depth_scale": depth_scale,
+        "prof_min_z16": acima(prof_min),
+        "prof_max_z16": abaixo(prof_max),
+        "valida_min_z16": acima(PROF_VALIDA_M[0]),
+        "valida_max_z16": abaixo(PROF_VALIDA_M[1]),
+        "clip_min_z16": acima(clip_min),
+        "clip_max_z16": abaixo(clip_max),
+    }
+
+
+def compilar_config(
+    cfg: dict,
+    largura: int = 0,
+    altura: int = 0,
+    depth_scale: Optional[float] = None,
+    anterior: Optional[ConfigCompilada] = None,
+) -> ConfigCompilada:
+    """
+    Valida `cfg` e monta o snapshot. Com `anterior`, reaproveita kernel e
+    limites z16 se não mudaram e, sem `depth_scale`, mantém a escala dele.
+    """
+    erros = validar_config(cfg)
+    if erros:
+        raise ConfigInvalida(erros)
+
+    med, pp, roi, th = cfg["medicoes"], cfg["protecao_pessoa"], cfg["roi"], cfg["thresholds"]
+    cam, fil = cfg["camera"], cfg["filtros"]
+    k = int(fil["kernel_morph_size"])
+    clip_min, clip_max = float(cam["clip_min"]), float(cam["clip_max"])
+    prof_min, prof_max = float(med["profundidade_min_caixa"]), float(med["profundidade_max_caixa"])
+    if depth_scale is None:
+        depth_scale = anterior.depth_scale if anterior is not None else DEPTH_SCALE_PADRAO
+
+    if anterior is not None and anterior.kernel_size == k:
+        kernel = anterior.kernel
+    else:
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (k, k))
+        kernel.flags.writeable = False
+    if anterior is not None and (anterior.depth_scale, anterior.prof_min, anterior.prof_max,
+                                 anterior.clip_min, anterior.clip_max) == (
+        depth_scale, prof_min, prof_max, clip_min, clip_max
+    ):
+        z16 = {k: getattr(anterior, k) for k in (
+            "depth_scale", "prof_min_z16", "prof_max_z16", "valida_min_z16", "valida_max_z16",
+            "clip_min_z16", "clip_max_z16")}
+    else:
+        z16 = _derivados_z16(depth_scale, prof_min, prof_max, clip_min, clip_max)
+
+    return ConfigCompilada(
+        largura=largura,
+        altura=altura,
+        prof_min=prof_min,
+        prof_max=prof_max,
+        area_min=int(med["area_minima_pixels"]),
+        altura_camera_chao=float(med["altura_camera_chao"]),
+        altura_caixa=float(med["altura_caixa"]),
+        prof_min_corpo=float(pp["profundidade_minima_corpo"]),
+        area_max_corpo=int(pp["area_maxima_corpo"]),
+        tempo_min_mudancas=float(pp["tempo_minimo_entre_mudancas"]),
+        roi_x_min=float(roi["x_min"]),
+        roi_x_max=float(roi["x_max"]),
+        roi_y_min=float(roi["y_min"]),
+        roi_y_max=float(roi["y_max"]),
+        roi_px=(roi["x_min"] * largura, roi["x_max"] * largura, roi["y_min"] * altura, roi["y_max"] * altura),
+        limite_vazia=float(th["limite_vazia"]),
+        limite_cheia=float(th["limite_cheia"]),
+        clip_min=clip_min,
+        clip_max=clip_max,
+        grid=int(fil["grid_medicao_size"]),
+        kernel_size=k,
+        kernel=kernel,
+        tamanho_historico=int(fil["tamanho_historico"]),
+        historico_distancias=int(fil["historico_distancias"]),
+        **z16,
+    )
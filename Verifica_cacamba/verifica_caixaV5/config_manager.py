@@ -1,10 +1,51 @@
 """
 config_manager.py — Gerenciamento de configurações e perfis (V5)
+
+Cada mudança aplicada incrementa `versao`. Quem roda detectores recebe só o
+delta ({secao: {chave: valor}}) com a versão, nunca a config inteira.
+
+Toda mudança é validada antes de valer (config_compilada.validar_config):
+config inválida levanta ConfigInvalida e não altera nada.
+
+Com `observar(callback)`, alterações feitas direto no config_v5.json (ex:
+engenheiro ajustando remotamente) viram deltas: uma thread espera o arquivo
+parar de mudar (debounce) e chama o callback com o que mudou. Com o pacote
+watchdog a thread só acorda em eventos do sistema de arquivos; sem ele,
+compara mtime/tamanho do arquivo 1x por segundo (um stat, nada mais).
+As gravações do próprio ConfigManager são reconhecidas e ignoradas.
+
+Persistência write-behind: `salvar()` só agenda; uma thread grava depois que
+os pedidos param de chegar (debounce), e uma sequência de salvamentos (ex:
+trocar de perfil várias vezes) vira uma única gravação. A gravação é atômica
+(arquivo temporário + os.replace) e, feita com sucesso, também atualiza o
+backup config_v5.json.bak (última config válida). Se o arquivo principal
+estiver corrompido, `_carregar` usa o backup. `descarregar()` força a gravação
+pendente (chamado ao fechar).
 """
 
+import atexit
 import copy
 import json
+import os
+import threading
+import time
 from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from config_compilada import ConfigInvalida, validar_config
+from filtros_realsense import FILTROS_REALSENSE_PADRAO
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    _HAS_WATCHDOG = True
+except ImportError:
+    _HAS_WATCHDOG = False
+
+DEBOUNCE_OBSERVACAO_S = 0.5      # arquivo precisa ficar parado esse tempo antes de recarregar
+INTERVALO_OBSERVACAO_S = 1.0     # sem watchdog: período do stat
+DEBOUNCE_GRAVACAO_S = 0.3        # grava quando os pedidos de salvar param por esse tempo...
+ATRASO_MAX_GRAVACAO_S = 2.0      # ...ou no máximo esse tempo após o primeiro pedido pendente
 
 CONFIG_PADRAO: dict = {
     "camera": {
@@ -14,6 +55,18 @@ CONFIG_PADRAO: dict = {
         "clip_min": 0.1,
         "clip_max": 2.0,
         "laser_potencia": 360,
+        # Pós-processamento de profundidade, na ordem (ver filtros_realsense.py)
+        "filtros_realsense": copy.deepcopy(FILTROS_REALSENSE_PADRAO),
+        "comparar_filtros": False,          # loga o efeito de cada filtro no ruído da ROI
+        "comparar_filtros_intervalo": 300,  # frames entre relatórios da comparação
+        # Streams e modo de profundidade (ver streams_realsense.py)
+        "stream_visual": "auto",            # auto: color se houver sensor RGB, senão infrared
+        "perfil_automatico": False,         # escolhe o modo depth mais barato dentro da precisão alvo
+        "precisao_alvo_mm": 10.0,           # erro RMS aceito na distância do chão
+        "subpixel": 0.08,                   # precisão subpixel do estéreo (D4xx típico)
+        "fila_frames": 2,                   # capacidade da rs.frame_queue
+        "fila_politica": "mais_recente",    # mais_recente: rajada → só o mais novo; todos: processa cada frame
+        "pausa_filtrar_a_cada": 15,         # em pausa, 1 a cada N frames passa pelos filtros (temporal aquecido)
     },
     "medicoes": {
         "altura_camera_chao": 0.725,
@@ -54,32 +107,176 @@ CONFIG_PADRAO: dict = {
         "beep_frequencia": 1000,
         "beep_duracao": 200,
     },
+    # Aba Estatísticas: tempo em cada status no turno corrente, no dia e em 7 dias
+    "estatisticas": {
+        "inicio_turnos": ["06:00", "14:00", "22:00"],
+    },
+    # Alertas de mudança de status e alarmes (ver alertas.py); o som usa a seção "sons"
+    "alertas": {
+        "intervalo_minimo_s": 1.0,      # por câmera e tipo; o que chega antes é agrupado
+        "janela_agrupamento_s": 0.2,
+        "capacidade_fila": 256,
+        "webhook_url": "",              # POST JSON, ex.: "http://127.0.0.1:9000/alerta" ("" = desligado)
+        "webhook_timeout_s": 2.0,
+        "pasta_arquivos": "",           # um .json por alerta ("" = desligado)
+        "comando": [],                  # argv; {tipo} {camera} {de} {para} {mensagem} são substituídos
+        "comando_timeout_s": 5.0,
+    },
+    "servidor": {
+        "habilitado": False,
+        "host": "127.0.0.1",
+        "porta": 8765,
+        "fps_mjpeg": 10,
+        "qualidade_jpeg": 80,
+    },
+    # Banco SQLite de mudanças, agregados por minuto, rejeições e sessões (ver banco_eventos.py)
+    "eventos": {
+        "ativo": True,
+        "arquivo": "historico/eventos_v5.db",
+        "intervalo_lote_s": 1.0,        # a thread do banco grava em uma transação o que chegou nesse tempo
+    },
+    # Caixa-preta: últimos segundos de z16 despejados em eventos/ (ver pre_gatilho.py)
+    "pre_gatilho": {
+        "ativo": False,
+        "segundos": 10,                 # tamanho do anel (× camera.fps frames)
+        "pos_gatilho_s": 2,             # frames depois do gatilho que entram no despejo
+        "escala_cor": 0.25,             # imagem color reduzida junto (0 = só profundidade)
+        "pasta": "eventos",
+        "intervalo_minimo_s": 30,       # entre dois despejos da mesma câmera
+        "gatilhos": {
+            "mudanca_status": True,
+            "janela_rejeicoes": 30,     # frames
+            "rajada_rejeicoes": 20,     # frames sem caixa (com motivo) na janela; 0 = desligado
+            "confianca_min": 40,
+            "frames_baixa_confianca": 15,  # seguidos abaixo de confianca_min; 0 = desligado
+        },
+    },
+    # Multi-câmera: uma entrada por RealSense (serial). Lista vazia = uma câmera,
+    # a primeira encontrada. Cada entrada pode sobrescrever as SECOES_POR_CAMERA:
+    #   {"serial": "123456789", "nome": "Doca 1", "medicoes": {"altura_camera_chao": 1.1}}
+    "cameras": [],
+    # --simulate: resolução/FPS da câmera virtual e cenário (ou roteiro) do simulador.py
+    "simulacao": {
+        "largura": 640,
+        "altura": 480,
+        "fps": 30,
+        "cenario": "senoide",
+        "roteiro": [],
+        "semente": 0,
+    },
     "perfis": {},
 }
 
+# Seções da config que podem ser sobrescritas por câmera
+SECOES_POR_CAMERA = ("camera", "medicoes", "protecao_pessoa", "roi", "thresholds", "filtros")
+# Seções que só o ConfigManager/GUI usam: não vão nos deltas para os detectores
+SECOES_SEM_DELTA = ("cameras", "perfis")
+
+
+def calcular_delta(antes: dict, depois: dict) -> dict:
+    """
+    Folhas que mudaram de `antes` para `depois`, no formato {secao: {chave: valor}}.
+
+    Listas são comparadas inteiras; chaves que só existem em `antes` não
+    entram (a config carregada sempre tem todas as chaves do padrão).
+    """
+    delta = {}
+    for k, v in depois.items():
+        a = antes.get(k)
+        if isinstance(v, dict) and isinstance(a, dict):
+            sub = calcular_delta(a, v)
+            if sub:
+                delta[k] = sub
+        elif k not in antes or a != v:
+            delta[k] = copy.deepcopy(v)
+    return delta
+
+
+def aplicar_delta(cfg: dict, delta: dict) -> dict:
+    """Mescla `delta` em `cfg` (no lugar) e devolve `cfg`."""
+    for k, v in delta.items():
+        if isinstance(v, dict) and isinstance(cfg.get(k), dict):
+            aplicar_delta(cfg[k], v)
+        else:
+            cfg[k] = copy.deepcopy(v)
+    return cfg
+
 
 class ConfigManager:
     """Carrega, salva e gerencia perfis de configuração."""
 
     def __init__(self, caminho_config: str = "config_v5.json"):
         self.caminho = Path(__file__).parent / caminho_config
+        self.versao = 0
+        # Conteúdo do arquivo como foi lido/gravado por último (base dos deltas externos)
+        self._lock_arquivo = threading.Lock()
+        self._snapshot_arquivo: dict = {}
+        self._assinatura_gravada: Optional[Tuple[int, int]] = None
+        self.caminho_backup = self.caminho.with_name(self.caminho.name + ".bak")
         self._config = self._carregar()
 
+        # Write-behind: snapshot pendente + thread gravadora (criada no 1º salvar)
+        self._cond_gravacao = threading.Condition()
+        self._pendente: Optional[dict] = None
+        self._t_primeiro_pedido = 0.0
+        self._t_ultimo_pedido = 0.0
+        self._gravando = False
+        self._urgente = False
+        self._gravador: Optional[threading.Thread] = None
+
+        self._observador: Optional[threading.Thread] = None
+        self._parar_observacao = threading.Event()
+        self._acordar = threading.Event()
+        self._watchdog = None
+
     # ── Internals ────────────────────────────────────────────────────────────
 
     def _carregar(self) -> dict:
-        base = copy.deepcopy(CONFIG_PADRAO)
-        if self.caminho.exists():
+        if not self.caminho.exists() and not self.caminho_backup.exists():
+            base = copy.deepcopy(CONFIG_PADRAO)
+            self._gravar(base)
+            return base
+        for caminho in (self.caminho, self.caminho_backup):
             try:
-                with open(self.caminho, "r", encoding="utf-8") as f:
-                    dados = json.load(f)
-                return self._merge(base, dados)
+                cfg = self._ler_arquivo(caminho)
             except Exception as e:
-                print(f"⚠️  Erro ao carregar config: {e}. Usando padrão.")
-        # Criar arquivo com valores padrão
+                print(f"⚠️  Erro ao carregar {caminho.name}: {e}")
+                continue
+            if caminho == self.caminho:
+                with self._lock_arquivo:
+                    self._snapshot_arquivo = copy.deepcopy(cfg)
+                    self._assinatura_gravada = self._assinatura()
+                return cfg
+            print(f"♻️  Usando a última config válida ({caminho.name}).")
+            self._preservar_corrompido()
+            self._gravar(cfg)
+            return cfg
+        print("⚠️  Nenhuma config válida encontrada. Usando padrão.")
+        base = copy.deepcopy(CONFIG_PADRAO)
+        self._preservar_corrompido()
         self._gravar(base)
         return base
 
+    def _ler_arquivo(self, caminho: Path) -> dict:
+        """Lê e valida um arquivo de config (merge sobre o padrão); levanta exceção se inválido."""
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        cfg = self._merge(copy.deepcopy(CONFIG_PADRAO), dados)
+        erros = validar_config(cfg)
+        if erros:
+            raise ConfigInvalida(erros)
+        return cfg
+
+    def _preservar_corrompido(self) -> None:
+        """Guarda o arquivo principal inválido como .corrompido antes de sobrescrevê-lo."""
+        if self.caminho.exists():
+            destino = self.caminho.with_name(self.caminho.name + ".corrompido")
+            try:
+                os.replace(self.caminho, destino)
+                print(f"   Arquivo inválido preservado em {destino.name}")
+            except OSError as e:
+                print(f"⚠️  Não foi possível preservar {self.caminho.name}: {e}")
+
     def _merge(self, base: dict, override: dict) -> dict:
         """Merge recursivo: garante que todos os campos do padrão existam."""
         for k, v in override.items():
@@ -90,8 +287,33 @@ class ConfigManager:
         return base
 
     def _gravar(self, cfg: dict) -> None:
-        with open(self.caminho, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, indent=2, ensure_ascii=False)
+        """Grava atomicamente (temporário + os.replace) e atualiza o backup."""
+        texto = json.dumps(cfg, indent=2, ensure_ascii=False)
+        with self._lock_arquivo:
+            self._gravar_atomico(self.caminho, texto)
+            self._snapshot_arquivo = copy.deepcopy(cfg)
+            self._assinatura_gravada = self._assinatura()
+        try:
+            self._gravar_atomico(self.caminho_backup, texto)
+        except OSError as e:
+            print(f"⚠️  Erro ao atualizar {self.caminho_backup.name}: {e}")
+
+    @staticmethod
+    def _gravar_atomico(caminho: Path, texto: str) -> None:
+        tmp = caminho.with_name(caminho.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(texto)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, caminho)
+
+    def _assinatura(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, tamanho) do arquivo; None se não existe."""
+        try:
+            st = self.caminho.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
 
     # ── Public API ────────────────────────────────────────────────────────────
 
@@ -100,13 +322,127 @@ class ConfigManager:
         return self._config
 
     def salvar(self) -> None:
-        self._gravar(self._config)
+        """Agenda a gravação da config atual e retorna (write-behind; pedidos seguidos viram uma gravação)."""
+        snapshot = copy.deepcopy(self._config)
+        agora = time.monotonic()
+        with self._cond_gravacao:
+            if self._pendente is None:
+                self._t_primeiro_pedido = agora
+            self._pendente = snapshot
+            self._t_ultimo_pedido = agora
+            if self._gravador is None:
+                self._gravador = threading.Thread(target=self._loop_gravacao, name="config-gravacao", daemon=True)
+                self._gravador.start()
+                atexit.register(self.descarregar)
+            self._cond_gravacao.notify_all()
+
+    def descarregar(self, timeout: float = 5.0) -> bool:
+        """Grava já o que estiver pendente e espera terminar. Retorna False se estourou o timeout."""
+        with self._cond_gravacao:
+            self._urgente = True
+            self._cond_gravacao.notify_all()
+            ok = self._cond_gravacao.wait_for(
+                lambda: self._pendente is None and not self._gravando, timeout,
+            )
+            self._urgente = False
+        return ok
+
+    def _loop_gravacao(self) -> None:
+        cond = self._cond_gravacao
+        while True:
+            with cond:
+                cond.wait_for(lambda: self._pendente is not None)
+                # Debounce: espera os pedidos pararem (limitado por ATRASO_MAX_GRAVACAO_S)
+                while not self._urgente:
+                    agora = time.monotonic()
+                    espera = min(self._t_ultimo_pedido + DEBOUNCE_GRAVACAO_S,
+                                 self._t_primeiro_pedido + ATRASO_MAX_GRAVACAO_S) - agora
+                    if espera <= 0:
+                        break
+                    cond.wait(espera)
+                cfg, self._pendente = self._pendente, None
+                self._gravando = True
+            try:
+                self._gravar(cfg)
+            except Exception as e:
+                print(f"⚠️  Erro ao salvar config: {e}")
+            finally:
+                with cond:
+                    self._gravando = False
+                    cond.notify_all()
+
+    def aplicar(self, novos_valores: dict) -> dict:
+        """
+        Merge parcial (sem persistir); devolve o delta efetivo e incrementa
+        `versao` se algo mudou. Levanta ConfigInvalida (sem aplicar nada) se o
+        resultado, global ou de alguma câmera, for inválido.
+        """
+        delta = calcular_delta(self._config, novos_valores)
+        if delta:
+            candidata = aplicar_delta(copy.deepcopy(self._config), delta)
+            self._validar(candidata)
+            aplicar_delta(self._config, delta)
+            self.versao += 1
+        return delta
+
+    def _validar(self, cfg: dict) -> None:
+        """Valida a config global e a de cada câmera (global + sobrescritas)."""
+        erros = validar_config(cfg)
+        for entrada in cfg.get("cameras", []):
+            cam = copy.deepcopy(cfg)
+            for secao in SECOES_POR_CAMERA:
+                if isinstance(entrada.get(secao), dict):
+                    self._merge(cam[secao], copy.deepcopy(entrada[secao]))
+            erros += [f"câmera {entrada.get('serial')}: {e}" for e in validar_config(cam)]
+        if erros:
+            raise ConfigInvalida(erros)
 
     def atualizar(self, novos_valores: dict) -> None:
         """Merge parcial e persiste."""
-        self._merge(self._config, novos_valores)
+        self.aplicar(novos_valores)
         self.salvar()
 
+    # ── Cameras ──────────────────────────────────────────────────────────────
+
+    def listar_cameras(self) -> list:
+        """Entradas de câmera configuradas (com "serial"); lista vazia = modo câmera única."""
+        return [c for c in self._config.get("cameras", []) if c.get("serial")]
+
+    def _entrada_camera(self, serial: str) -> dict:
+        for c in self._config.get("cameras", []):
+            if str(c.get("serial")) == str(serial):
+                return c
+        return {}
+
+    def cfg_camera(self, serial=None) -> dict:
+        """Cópia da config global com as sobrescritas da câmera `serial` aplicadas."""
+        cfg = copy.deepcopy(self._config)
+        if serial is None:
+            return cfg
+        return self._sobrepor_camera(cfg, serial)
+
+    def _sobrepor_camera(self, cfg: dict, serial) -> dict:
+        entrada = self._entrada_camera(serial)
+        for secao in SECOES_POR_CAMERA:
+            if isinstance(entrada.get(secao), dict):
+                self._merge(cfg[secao], copy.deepcopy(entrada[secao]))
+        return cfg
+
+    def definir_valores_camera(self, serial: str, valores: dict) -> None:
+        """
+        Grava `valores` ({secao: {chave: valor}}) na sobrescrita da câmera (não
+        altera a config global nem persiste). Levanta ConfigInvalida sem aplicar nada.
+        """
+        entrada = self._entrada_camera(serial)
+        if not entrada:
+            raise KeyError(f"Câmera {serial} não configurada.")
+        erros = validar_config(aplicar_delta(self.cfg_camera(serial), valores))
+        if erros:
+            raise ConfigInvalida(erros)
+        for secao, chaves in valores.items():
+            entrada.setdefault(secao, {}).update(copy.deepcopy(chaves))
+        self.versao += 1
+
     # ── Profiles ─────────────────────────────────────────────────────────────
 
     def listar_perfis(self) -> list:
@@ -119,14 +455,26 @@ class ConfigManager:
         self._config.setdefault("perfis", {})[nome] = perfil
         self.salvar()
 
+    def cfg_perfil(self, nome: str, serial=None) -> Optional[dict]:
+        """
+        Config que a câmera `serial` teria com o perfil `nome` carregado (sem
+        alterar nada), sem as seções que não vão para os detectores. None se não existe.
+        """
+        perfil = self._config.get("perfis", {}).get(nome)
+        if perfil is None:
+            return None
+        cfg = {s: copy.deepcopy(v) for s, v in self._config.items() if s not in SECOES_SEM_DELTA}
+        aplicar_delta(cfg, {secao: valores for secao, valores in perfil.items() if secao in cfg})
+        if serial is None:
+            return cfg
+        return self._sobrepor_camera(cfg, serial)
+
     def carregar_perfil(self, nome: str) -> bool:
         """Aplica um perfil salvo sobre a config atual. Retorna True se encontrado."""
         perfil = self._config.get("perfis", {}).get(nome)
         if perfil is None:
             return False
-        for secao, valores in perfil.items():
-            if secao in self._config:
-                self._config[secao].update(valores)
+        self.aplicar({secao: valores for secao, valores in perfil.items() if secao in self._config})
         self.salvar()
         return True
 
@@ -137,3 +485,103 @@ class ConfigManager:
             self.salvar()
             return True
         return False
+
+    # ── Observação do arquivo ────────────────────────────────────────────────
+
+    def observar(self, callback: Callable[[dict], None], debounce_s: float = DEBOUNCE_OBSERVACAO_S) -> None:
+        """
+        Chama `callback(delta)` (na thread do observador) quando o arquivo for
+        alterado por fora. O callback não deve mexer na config: quem é dono
+        dela aplica o delta com `aplicar()` na própria thread.
+        """
+        if self._observador is not None:
+            return
+        self._parar_observacao.clear()
+        if _HAS_WATCHDOG:
+            acordar = self._acordar
+            alvo = self.caminho.resolve()
+
+            class _Handler(FileSystemEventHandler):
+                def on_any_event(self, evento):
+                    caminhos = (getattr(evento, "src_path", ""), getattr(evento, "dest_path", ""))
+                    if any(c and Path(c).resolve() == alvo for c in caminhos):
+                        acordar.set()
+
+            self._watchdog = Observer()
+            self._watchdog.schedule(_Handler(), str(self.caminho.parent), recursive=False)
+            self._watchdog.start()
+        self._observador = threading.Thread(
+            target=self._loop_observacao, args=(callback, debounce_s), daemon=True,
+        )
+        self._observador.start()
+
+    def parar_observacao(self) -> None:
+        self._parar_observacao.set()
+        self._acordar.set()
+        if self._watchdog is not None:
+            self._watchdog.stop()
+            self._watchdog.join(timeout=2.0)
+            self._watchdog = None
+        if self._observador is not None:
+            self._observador.join(timeout=2.0)
+            self._observador = None
+
+    def _loop_observacao(self, callback: Callable[[dict], None], debounce_s: float) -> None:
+        # Com watchdog o timeout é só uma rede de segurança (evento perdido)
+        intervalo = 30.0 if _HAS_WATCHDOG else INTERVALO_OBSERVACAO_S
+        parar = self._parar_observacao
+        vista = self._assinatura()
+        while not parar.is_set():
+            self._acordar.wait(intervalo)
+            self._acordar.clear()
+            atual = self._assinatura()
+            if parar.is_set() or atual == vista or atual is None:
+                continue
+            # Debounce: editores gravam em vários passos; espera o arquivo parar de mudar
+            while True:
+                if parar.wait(debounce_s):
+                    return
+                nova = self._assinatura()
+                if nova == atual:
+                    break
+                atual = nova
+            vista = atual
+            lido = self._recarregar_arquivo(atual)
+            if lido is None:
+                continue
+            delta, base, novo = lido
+            if delta:
+                try:
+                    callback(delta)
+                except Exception as e:
+                    # Snapshot não avança: o mesmo delta é repassado na próxima verificação
+                    print(f"⚠️  Erro ao repassar config alterada: {e}")
+                    vista = None
+                    continue
+            self._confirmar_arquivo(base, novo, atual)
+
+    def _recarregar_arquivo(self, assinatura: Optional[Tuple[int, int]]) -> Optional[Tuple[dict, dict, dict]]:
+        """
+        (delta, snapshot base, conteúdo novo) entre o arquivo atual e o último
+        conteúdo lido/gravado; None se for gravação própria ou inválido. O
+        snapshot só avança com `_confirmar_arquivo`, depois do delta entregue.
+        """
+        with self._lock_arquivo:
+            if assinatura == self._assinatura_gravada:
+                return None
+            try:
+                with open(self.caminho, "r", encoding="utf-8") as f:
+                    dados = json.load(f)
+            except Exception as e:
+                print(f"⚠️  {self.caminho.name} alterado mas inválido ({e}); mantendo a config atual.")
+                return None
+            novo = self._merge(copy.deepcopy(CONFIG_PADRAO), dados)
+            base = self._snapshot_arquivo
+            return calcular_delta(base, novo), base, novo
+
+    def _confirmar_arquivo(self, base: dict, novo: dict, assinatura: Optional[Tuple[int, int]]) -> None:
+        with self._lock_arquivo:
+            # Uma gravação própria no meio do caminho já trocou o snapshot: vale a dela
+            if self._snapshot_arquivo is base:
+                self._snapshot_arquivo = novo
+                self._assinatura_gravada = assinatura
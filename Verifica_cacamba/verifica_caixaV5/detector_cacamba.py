@@ -8,14 +8,19 @@ Corrige os problemas da V4:
   - Detecção de mudança de status com tempo mínimo
 """
 
+import copy
 import time
 from collections import deque
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
+from config_compilada import PROF_VALIDA_M, ConfigCompilada, ConfigInvalida, compilar_config
+from config_manager import aplicar_delta
+from metricas import MedidorEstagios, marcar
+
 
 @dataclass
 class ResultadoDeteccao:
@@ -26,7 +31,7 @@ class ResultadoDeteccao:
     confianca: float = 0.0
     caixa_detectada: bool = False
     motivo_rejeicao: str = ""
-    # Bounding box (x1, y1, x2, y2) no espaço do depth_meters
+    # Bounding box (x1, y1, x2, y2) em pixels do frame de profundidade
     bbox: Optional[Tuple[int, int, int, int]] = None
 
 
@@ -37,29 +42,144 @@ class DetectorCacamba:
     mas a instância deve pertencer a UMA só thread por vez).
     """
 
-    def __init__(self, cfg: dict):
+    def __init__(self, cfg: dict, medidor: Optional[MedidorEstagios] = None):
         self._cfg = cfg
-        n_hist = cfg["filtros"]["tamanho_historico"]
-        n_dist = cfg["filtros"]["historico_distancias"]
-        self._hist_status: deque = deque(maxlen=n_hist)
-        self._hist_dist: deque = deque(maxlen=n_dist)
+        # Snapshot compilado lido pelo caminho quente; levanta ConfigInvalida
+        self._cc: ConfigCompilada = compilar_config(cfg)
+        # Opcional: tempos das subetapas (det_mascara, det_morfologia, ...)
+        self._medidor = medidor
+        # Versão da config (ConfigManager.versao) do último delta aplicado
+        self.versao_config = 0
+        self._hist_status: deque = deque(maxlen=self._cc.tamanho_historico)
+        self._hist_dist: deque = deque(maxlen=self._cc.historico_distancias)
         self._hist_confianca: deque = deque(maxlen=30)
         self._status_anterior: Optional[str] = None
         self._ultima_mudanca: float = time.time()
+        # Perfis pré-compilados para troca instantânea: nome → (cfg, snapshot)
+        self._perfis: Dict[str, Tuple[dict, ConfigCompilada]] = {}
 
     # ── Config ────────────────────────────────────────────────────────────────
 
+    # Estruturas derivadas (além do snapshot) e as chaves de que cada uma depende
+    _DERIVADOS = {
+        "_montar_historicos": (("filtros", "tamanho_historico"), ("filtros", "historico_distancias")),
+    }
+
+    @property
+    def config(self) -> dict:
+        """Config vigente do detector (troca de objeto em atualizar_config/trocar_perfil)."""
+        return self._cfg
+
+    @property
+    def config_compilada(self) -> ConfigCompilada:
+        return self._cc
+
     def atualizar_config(self, cfg: dict) -> None:
+        """Troca a config inteira e reconstrói todas as estruturas derivadas."""
+        self._cc = compilar_config(cfg, anterior=self._cc).para_resolucao(self._cc.largura, self._cc.altura)
         self._cfg = cfg
-        n_hist = cfg["filtros"]["tamanho_historico"]
-        n_dist = cfg["filtros"]["historico_distancias"]
+        for montar in self._DERIVADOS:
+            getattr(self, montar)()
+
+    def aplicar_delta(self, delta: dict, versao: Optional[int] = None) -> bool:
+        """
+        Mescla um delta ({secao: {chave: valor}}) na config do detector e
+        reconstrói só as estruturas que dependem das chaves alteradas.
+        Deltas de versão anterior à já aplicada são ignorados; retorna False nesse caso.
+        """
+        if versao is not None and versao < self.versao_config:
+            return False
+        # Compila antes de tocar na config: delta inválido levanta ConfigInvalida sem efeito
+        cc = compilar_config(aplicar_delta(copy.deepcopy(self._cfg), delta), anterior=self._cc)
+        self._cc = cc.para_resolucao(self._cc.largura, self._cc.altura)
+        if versao is not None:
+            self.versao_config = versao
+        aplicar_delta(self._cfg, delta)
+        for montar, chaves in self._DERIVADOS.items():
+            if any(chave in delta.get(secao, {}) for secao, chave in chaves):
+                getattr(self, montar)()
+        return True
+
+    def _montar_historicos(self) -> None:
+        n_hist = self._cc.tamanho_historico
+        n_dist = self._cc.historico_distancias
         if self._hist_status.maxlen != n_hist:
-            self._hist_status = deque(list(self._hist_status), maxlen=n_hist)
+            self._hist_status = deque(self._hist_status, maxlen=n_hist)
         if self._hist_dist.maxlen != n_dist:
-            self._hist_dist = deque(list(self._hist_dist), maxlen=n_dist)
+            self._hist_dist = deque(self._hist_dist, maxlen=n_dist)
+
+    # ── Perfis ────────────────────────────────────────────────────────────────
+
+    def registrar_perfis(self, perfis: Dict[str, dict]) -> List[str]:
+        """
+        Pré-compila as configs completas de cada perfil (kernel, limites z16, ROI em
+        pixels) para `trocar_perfil` não compilar nada. Substitui os registrados
+        antes; devolve os nomes rejeitados por config inválida.
+        """
+        registrados: Dict[str, Tuple[dict, ConfigCompilada]] = {}
+        rejeitados: List[str] = []
+        for nome, cfg in perfis.items():
+            anterior = self._perfis.get(nome, (None, self._cc))[1]
+            try:
+                cc = compilar_config(cfg, anterior=anterior)
+            except ConfigInvalida:
+                rejeitados.append(nome)
+                continue
+            registrados[nome] = (cfg, cc.para_resolucao(self._cc.largura, self._cc.altura))
+        self._perfis = registrados
+        return rejeitados
+
+    def trocar_perfil(self, nome: str, versao: Optional[int] = None) -> bool:
+        """
+        Passa a usar o perfil pré-compilado `nome` já no próximo frame. Mantém os
+        históricos que continuam comparáveis (ver `_descartar_historicos_incompativeis`).
+        Retorna False se o perfil não foi registrado ou a versão é antiga.
+        """
+        if versao is not None and versao < self.versao_config:
+            return False
+        entrada = self._perfis.get(nome)
+        if entrada is None:
+            return False
+        cfg, cc = entrada
+        if (cc.largura, cc.altura, cc.depth_scale) != (self._cc.largura, self._cc.altura, self._cc.depth_scale):
+            cc = cc.para_resolucao(self._cc.largura, self._cc.altura).para_escala(self._cc.depth_scale)
+            self._perfis[nome] = (cfg, cc)
+        anterior, self._cc = self._cc, cc
+        if versao is not None:
+            self.versao_config = versao
+        # Na mesma dict (quem criou o detector pode estar lendo essa config, ex: overlays)
+        for secao, valores in cfg.items():
+            self._cfg[secao] = copy.deepcopy(valores)
+        self._descartar_historicos_incompativeis(anterior)
+        self._montar_historicos()
+        return True
+
+    def _descartar_historicos_incompativeis(self, anterior: ConfigCompilada) -> None:
+        """
+        Distâncias só são comparáveis se a região medida (ROI, faixa de
+        profundidade, clip) não mudou; status, se além disso os limites de
+        VAZIA/CHEIA são os mesmos. O que não for comparável é descartado.
+        """
+        cc = self._cc
+        regiao = (cc.roi_x_min, cc.roi_x_max, cc.roi_y_min, cc.roi_y_max,
+                  cc.prof_min, cc.prof_max, cc.clip_min, cc.clip_max)
+        regiao_ant = (anterior.roi_x_min, anterior.roi_x_max, anterior.roi_y_min, anterior.roi_y_max,
+                      anterior.prof_min, anterior.prof_max, anterior.clip_min, anterior.clip_max)
+        if regiao != regiao_ant:
+            self._hist_dist.clear()
+            self._hist_confianca.clear()
+            self._hist_status.clear()
+        elif (cc.limite_vazia, cc.limite_cheia) != (anterior.limite_vazia, anterior.limite_cheia):
+            self._hist_status.clear()
 
     # ── Main processing ───────────────────────────────────────────────────────
 
+    def processar_quadro(self, quadro) -> ResultadoDeteccao:
+        """QuadroCapturado: pelo z16 de origem se houver (câmera, replay), senão em metros (simulação)."""
+        if quadro.depth_z16 is not None:
+            return self.processar_frame_z16(quadro.depth_z16, quadro.depth_scale)
+        return self.processar_frame(quadro.depth_meters)
+
     def processar_frame(
         self,
         depth_meters: np.ndarray,
@@ -73,25 +193,52 @@ class DetectorCacamba:
         Returns:
             ResultadoDeteccao preenchido.
         """
-        cfg = self._cfg
-
-        PROF_MIN = cfg["medicoes"]["profundidade_min_caixa"]
-        PROF_MAX = cfg["medicoes"]["profundidade_max_caixa"]
-        AREA_MIN = cfg["medicoes"]["area_minima_pixels"]
-        KERNEL = cfg["filtros"]["kernel_morph_size"]
-        CLIP_MIN = cfg["camera"]["clip_min"]
-        CLIP_MAX = cfg["camera"]["clip_max"]
-        GRID = cfg["filtros"]["grid_medicao_size"]
-
-        dh, dw = depth_meters.shape[:2]
-
+        cc = self._ajustar(depth_meters)
+        t = time.perf_counter()
         # Máscara de profundidade no range da cacamba
-        mask = ((depth_meters > PROF_MIN) & (depth_meters < PROF_MAX)).astype(np.uint8) * 255
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (KERNEL, KERNEL))
+        mask = ((depth_meters > cc.prof_min) & (depth_meters < cc.prof_max)).astype(np.uint8) * 255
+        return self._processar(depth_meters, mask, cc, None, t)
+
+    def processar_frame_z16(self, depth_z16: np.ndarray, depth_scale: float) -> ResultadoDeteccao:
+        """
+        Mesmo resultado de processar_frame(depth_z16 × depth_scale), sem
+        converter o frame: as comparações usam os limites z16 do snapshot e
+        só as medianas viram metros.
+        """
+        cc = self._ajustar(depth_z16, depth_scale)
+        t = time.perf_counter()
+        mask = cv2.inRange(depth_z16, cc.prof_min_z16, cc.prof_max_z16)
+        return self._processar(depth_z16, mask, cc, depth_scale, t)
+
+    def _ajustar(self, depth: np.ndarray, depth_scale: Optional[float] = None) -> ConfigCompilada:
+        """Snapshot na resolução (ROI em pixels) e no depth_scale do frame; recalcula só quando mudam."""
+        dh, dw = depth.shape[:2]
+        cc = self._cc
+        if cc.largura != dw or cc.altura != dh:
+            cc = cc.para_resolucao(dw, dh)
+        if depth_scale is not None:
+            cc = cc.para_escala(depth_scale)
+        self._cc = cc
+        return cc
+
+    def _processar(
+        self,
+        depth: np.ndarray,
+        mask: np.ndarray,
+        cc: ConfigCompilada,
+        depth_scale: Optional[float],
+        t: float,
+    ) -> ResultadoDeteccao:
+        """`depth` em metros (depth_scale None) ou em z16; `mask` já com o range da cacamba."""
+        med = self._medidor
+        t = marcar(med, "det_mascara", t)
+        kernel = cc.kernel
         mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
         mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        t = marcar(med, "det_morfologia", t)
 
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        t = marcar(med, "det_contornos", t)
 
         melhor_contorno = None
         maior_area = 0.0
@@ -99,15 +246,16 @@ class DetectorCacamba:
 
         for contour in contours:
             area = cv2.contourArea(contour)
-            if area < AREA_MIN:
+            if area < cc.area_min:
                 continue
-            valido, motivo = self._validar_deteccao(contour, depth_meters, dw, dh)
+            valido, motivo = self._validar_deteccao(contour, depth, cc, area, depth_scale)
             if valido and area > maior_area:
                 maior_area = area
                 melhor_contorno = contour
                 motivo_rejeicao = ""
             elif not valido:
                 motivo_rejeicao = motivo
+        t = marcar(med, "det_validacao", t)
 
         resultado = ResultadoDeteccao()
 
@@ -116,7 +264,8 @@ class DetectorCacamba:
             x2, y2 = x1 + wb, y1 + hb
             resultado.caixa_detectada = True
             resultado.bbox = (x1, y1, x2, y2)
-            medicoes = self._medir_grid(depth_meters, x1, y1, x2, y2, GRID, CLIP_MIN, CLIP_MAX)
+            medicoes = self._medir_grid(depth[y1:y2, x1:x2], cc, depth_scale)
+            marcar(med, "det_grid", t)
         else:
             resultado.motivo_rejeicao = motivo_rejeicao
             # Sem caixa detectada: não contaminar o histórico com leituras espúrias
@@ -130,16 +279,12 @@ class DetectorCacamba:
         self._hist_dist.append(distancia)
 
         # Calcular percentual de preenchimento
-        ALTURA_CAM = cfg["medicoes"]["altura_camera_chao"]
-        ALTURA_CAIXA = max(cfg["medicoes"]["altura_caixa"], 0.001)
-        percentual = max(0.0, min(100.0, ((ALTURA_CAM - distancia) / ALTURA_CAIXA) * 100))
+        percentual = max(0.0, min(100.0, ((cc.altura_camera_chao - distancia) / cc.altura_caixa) * 100))
 
         # Status instantâneo
-        LIMITE_VAZIA = cfg["thresholds"]["limite_vazia"]
-        LIMITE_CHEIA = cfg["thresholds"]["limite_cheia"]
-        if distancia >= LIMITE_VAZIA:
+        if distancia >= cc.limite_vazia:
             status_inst = "VAZIA"
-        elif distancia <= LIMITE_CHEIA:
+        elif distancia <= cc.limite_cheia:
             status_inst = "CHEIA"
         else:
             status_inst = "PARCIAL"
@@ -174,16 +319,17 @@ class DetectorCacamba:
     def _validar_deteccao(
         self,
         contour,
-        depth_meters: np.ndarray,
-        w_frame: int,
-        h_frame: int,
+        depth: np.ndarray,
+        cc: ConfigCompilada,
+        area: float,
+        depth_scale: Optional[float] = None,
     ) -> Tuple[bool, str]:
         """
         Valida se um contorno é a cacamba e não uma pessoa.
         Implementa as 4 proteções documentadas no resumo_v4.md.
+        `cc` já está na resolução do frame; `area` é a do contorno; `depth`
+        em metros, ou em z16 com o `depth_scale` dado.
         """
-        cfg = self._cfg
-        area = cv2.contourArea(contour)
         x, y, w, h = cv2.boundingRect(contour)
 
         # 1. Aspect ratio — braços/pernas têm proporção muito alongada
@@ -192,28 +338,28 @@ class DetectorCacamba:
             return False, f"Aspect ratio {aspect:.1f} > 5 (objeto muito alongado)"
 
         # 2. ROI — a cacamba fica na região central configurada
-        cx_norm = (x + w / 2) / max(w_frame, 1)
-        cy_norm = (y + h / 2) / max(h_frame, 1)
-        roi = cfg["roi"]
-        if not (roi["x_min"] < cx_norm < roi["x_max"]):
-            return False, f"Fora da ROI horizontal (cx={cx_norm:.2f})"
-        if not (roi["y_min"] < cy_norm < roi["y_max"]):
-            return False, f"Fora da ROI vertical (cy={cy_norm:.2f})"
+        cx, cy = x + w / 2, y + h / 2
+        rx_min, rx_max, ry_min, ry_max = cc.roi_px
+        if not (rx_min < cx < rx_max):
+            return False, f"Fora da ROI horizontal (cx={cx / max(cc.largura, 1):.2f})"
+        if not (ry_min < cy < ry_max):
+            return False, f"Fora da ROI vertical (cy={cy / max(cc.altura, 1):.2f})"
 
         # 3. Profundidade mínima — pessoas ficam muito próximas da câmera
-        regiao = depth_meters[y : y + h, x : x + w]
-        pixels_validos = regiao[(regiao > 0.05) & (regiao < 5.0)]
+        regiao = depth[y : y + h, x : x + w]
+        if depth_scale is None:
+            pixels_validos = regiao[(regiao > PROF_VALIDA_M[0]) & (regiao < PROF_VALIDA_M[1])]
+        else:
+            pixels_validos = regiao[(regiao >= cc.valida_min_z16) & (regiao <= cc.valida_max_z16)]
         if len(pixels_validos) < 10:
             return False, "Poucos pixels válidos na região"
-        mediana_prof = float(np.median(pixels_validos))
-        prof_min = cfg["protecao_pessoa"]["profundidade_minima_corpo"]
-        if mediana_prof < prof_min:
-            return False, f"Muito próximo ({mediana_prof:.2f}m < {prof_min}m)"
+        mediana_prof = float(np.median(pixels_validos)) * (depth_scale or 1.0)
+        if mediana_prof < cc.prof_min_corpo:
+            return False, f"Muito próximo ({mediana_prof:.2f}m < {cc.prof_min_corpo}m)"
 
         # 4. Área máxima — pessoas ocupam muito mais área que a cacamba
-        area_max = cfg["protecao_pessoa"]["area_maxima_corpo"]
-        if area > area_max:
-            return False, f"Área {area:.0f}px² > máximo {area_max}px²"
+        if area > cc.area_max_corpo:
+            return False, f"Área {area:.0f}px² > máximo {cc.area_max_corpo}px²"
 
         return True, "OK"
 
@@ -221,16 +367,17 @@ class DetectorCacamba:
 
     def _medir_grid(
         self,
-        depth_meters: np.ndarray,
-        x1: int, y1: int, x2: int, y2: int,
-        grid_size: int,
-        clip_min: float,
-        clip_max: float,
+        regiao: np.ndarray,
+        cc: ConfigCompilada,
+        depth_scale: Optional[float] = None,
     ) -> List[float]:
-        """Mede profundidade em grade NxN; retorna lista de medianas por célula."""
-        regiao = depth_meters[y1:y2, x1:x2]
+        """
+        Mede profundidade da região da caixa (metros, ou z16 com `depth_scale`)
+        em grade NxN; retorna lista de medianas por célula, em metros.
+        """
         if regiao.size == 0:
             return []
+        grid_size = cc.grid
         h_r, w_r = regiao.shape
         cell_h = max(1, h_r // grid_size)
         cell_w = max(1, w_r // grid_size)
@@ -242,9 +389,12 @@ class DetectorCacamba:
                 xs = j * cell_w
                 xe = (j + 1) * cell_w if j < grid_size - 1 else w_r
                 celula = regiao[ys:ye, xs:xe]
-                validos = celula[(celula > clip_min) & (celula < clip_max)]
+                if depth_scale is None:
+                    validos = celula[(celula > cc.clip_min) & (celula < cc.clip_max)]
+                else:
+                    validos = celula[(celula >= cc.clip_min_z16) & (celula <= cc.clip_max_z16)]
                 if len(validos) > 10:
-                    medicoes.append(float(np.median(validos)))
+                    medicoes.append(float(np.median(validos)) * (depth_scale or 1.0))
         return medicoes
 
     # ── Helpers públicos ──────────────────────────────────────────────────────
@@ -255,17 +405,23 @@ class DetectorCacamba:
         return float(np.mean(self._hist_confianca))
 
     def detectou_mudanca_status(
-        self, status_estavel: str
+        self, status_estavel: str, agora: Optional[float] = None
     ) -> Tuple[bool, Optional[str]]:
         """
         Verifica se houve mudança de status respeitando o tempo mínimo entre mudanças.
 
+        Args:
+            status_estavel: status estável do frame atual.
+            agora: instante do frame em segundos (padrão: time.time()). Usado no
+                reprocessamento offline, onde vale o timestamp gravado.
+
         Returns:
             (True, status_anterior) se mudou e tempo suficiente passou.
             (False, None) caso contrário.
         """
-        tempo_min = self._cfg["protecao_pessoa"]["tempo_minimo_entre_mudancas"]
-        agora = time.time()
+        tempo_min = self._cc.tempo_min_mudancas
+        if agora is None:
+            agora = time.time()
         if status_estavel != self._status_anterior and (agora - self._ultima_mudanca) > tempo_min:
             anterior = self._status_anterior
             self._status_anterior = status_estavel
@@ -273,9 +429,9 @@ class DetectorCacamba:
             return True, anterior
         return False, None
 
-    def resetar_historicos(self) -> None:
+    def resetar_historicos(self, agora: Optional[float] = None) -> None:
         self._hist_status.clear()
         self._hist_dist.clear()
         self._hist_confianca.clear()
         self._status_anterior = None
-        self._ultima_mudanca = time.time()
+        self._ultima_mudanca = time.time() if agora is None else agora
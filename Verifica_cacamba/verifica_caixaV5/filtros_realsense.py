@@ -0,0 +1,192 @@
+"""
+filtros_realsense.py — Cadeia de pós-processamento de profundidade da RealSense (V5)
+
+A cadeia vem de cfg["camera"]["filtros_realsense"]: uma lista, na ordem de
+aplicação, de
+
+    {"tipo": "spatial", "ativo": true, "opcoes": {"filter_magnitude": 2, ...}}
+
+Tipos aceitos e suas opções (nomes de rs.option) estão em OPCOES_FILTROS, com
+as faixas válidas do SDK; `validar_cadeia` é chamado pelo validar_config.
+
+Com cfg["camera"]["comparar_filtros"] a FonteCamera mede, além do tempo de
+cada filtro, o efeito de cada etapa na ROI (ComparadorFiltros): ruído da
+medição entre frames, dispersão espacial e fração de pixels válidos. Um filtro
+caro que não reduz o ruído é candidato a sair da cadeia.
+"""
+
+from collections import deque
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    import pyrealsense2 as rs
+    _HAS_REALSENSE = True
+except ImportError:
+    _HAS_REALSENSE = False
+
+# tipo → {opção: (mínimo, máximo)}
+OPCOES_FILTROS: Dict[str, Dict[str, Tuple[float, float]]] = {
+    "decimation": {"filter_magnitude": (1, 8)},
+    "threshold": {"min_distance": (0.0, 16.0), "max_distance": (0.0, 16.0)},
+    "spatial": {
+        "filter_magnitude": (1, 5),
+        "filter_smooth_alpha": (0.25, 1.0),
+        "filter_smooth_delta": (1, 50),
+        "holes_fill": (0, 5),
+    },
+    "temporal": {
+        "filter_smooth_alpha": (0.0, 1.0),
+        "filter_smooth_delta": (1, 100),
+        "holes_fill": (0, 8),     # persistência
+    },
+    "hole_filling": {"holes_fill": (0, 2)},
+}
+
+# Equivalente à cadeia fixa das versões anteriores
+FILTROS_REALSENSE_PADRAO: List[dict] = [
+    {"tipo": "decimation", "ativo": True, "opcoes": {"filter_magnitude": 2}},
+    {"tipo": "spatial", "ativo": True, "opcoes": {
+        "filter_magnitude": 2, "filter_smooth_alpha": 0.5, "filter_smooth_delta": 20,
+    }},
+    {"tipo": "temporal", "ativo": True, "opcoes": {"filter_smooth_alpha": 0.4, "filter_smooth_delta": 20}},
+    {"tipo": "hole_filling", "ativo": True, "opcoes": {"holes_fill": 1}},
+]
+
+JANELA_COMPARACAO = 300   # frames por etapa no comparador (~10 s a 30 FPS)
+
+
+def validar_cadeia(cadeia) -> List[str]:
+    """Lista de problemas da cadeia de filtros (vazia se válida)."""
+    if not isinstance(cadeia, list):
+        return [f"camera.filtros_realsense={cadeia!r} não é lista"]
+    erros: List[str] = []
+    for i, filtro in enumerate(cadeia):
+        onde = f"camera.filtros_realsense[{i}]"
+        if not isinstance(filtro, dict):
+            erros.append(f"{onde} não é objeto")
+            continue
+        tipo = filtro.get("tipo")
+        if tipo not in OPCOES_FILTROS:
+            erros.append(f"{onde}.tipo={tipo!r} desconhecido (use {', '.join(OPCOES_FILTROS)})")
+            continue
+        opcoes = filtro.get("opcoes", {})
+        if not isinstance(opcoes, dict):
+            erros.append(f"{onde}.opcoes não é objeto")
+            continue
+        for opcao, valor in opcoes.items():
+            faixa = OPCOES_FILTROS[tipo].get(opcao)
+            if faixa is None:
+                erros.append(f"{onde}: opção {opcao!r} não existe em {tipo}")
+            elif isinstance(valor, bool) or not isinstance(valor, (int, float)) or not faixa[0] <= valor <= faixa[1]:
+                erros.append(f"{onde}.{opcao}={valor!r} fora de [{faixa[0]}, {faixa[1]}]")
+    return erros
+
+
+def nomes_etapas(cadeia: List[dict]) -> List[str]:
+    """Nome de cada filtro ativo, na ordem (tipos repetidos ganham sufixo: spatial, spatial_2)."""
+    nomes: List[str] = []
+    for filtro in cadeia:
+        if not filtro.get("ativo", True):
+            continue
+        nome = filtro["tipo"]
+        n = sum(1 for x in nomes if x == nome or x.startswith(nome + "_"))
+        nomes.append(nome if n == 0 else f"{nome}_{n + 1}")
+    return nomes
+
+
+def montar_cadeia(cadeia: List[dict]) -> list:
+    """[(nome, filtro rs)] dos filtros ativos, já com as opções aplicadas."""
+    construtores = {
+        "decimation": rs.decimation_filter,
+        "threshold": rs.threshold_filter,
+        "spatial": rs.spatial_filter,
+        "temporal": rs.temporal_filter,
+        "hole_filling": rs.hole_filling_filter,
+    }
+    ativos = [f for f in cadeia if f.get("ativo", True)]
+    montados = []
+    for nome, filtro in zip(nomes_etapas(cadeia), ativos):
+        rs_filtro = construtores[filtro["tipo"]]()
+        for opcao, valor in filtro.get("opcoes", {}).items():
+            rs_filtro.set_option(getattr(rs.option, opcao), float(valor))
+        montados.append((nome, rs_filtro))
+    return montados
+
+
+# =============================================================================
+# COMPARAÇÃO
+# =============================================================================
+
+class ComparadorFiltros:
+    """
+    Efeito de cada etapa da cadeia sobre a ROI, numa janela de frames:
+
+      - ruido_mm:     desvio da mediana da ROI entre frames consecutivos / √2
+                      (ruído que chega ao detector; imune a mudanças lentas da cena)
+      - dispersao_mm: desvio dos pixels válidos dentro da ROI no frame
+      - validos_pct:  fração de pixels com profundidade (buracos = 0)
+      - ms:           tempo médio do filtro
+
+    A etapa "bruto" é o frame antes de qualquer filtro.
+    """
+
+    def __init__(self, etapas: List[str], roi: dict, janela: int = JANELA_COMPARACAO):
+        self.etapas = ["bruto"] + list(etapas)
+        self.roi = (roi["x_min"], roi["x_max"], roi["y_min"], roi["y_max"])
+        self.quadros = 0
+        self._mediana_ant: Dict[str, float] = {}
+        self._saltos = {e: deque(maxlen=janela) for e in self.etapas}
+        self._dispersao = {e: deque(maxlen=janela) for e in self.etapas}
+        self._validos = {e: deque(maxlen=janela) for e in self.etapas}
+        self._tempo = {e: deque(maxlen=janela) for e in self.etapas}
+
+    def registrar(self, etapa: str, depth_z16: np.ndarray, depth_scale: float, duracao_s: float = 0.0) -> None:
+        """Mede a saída de `etapa` (array z16 do frame já filtrado até ela)."""
+        if etapa == "bruto":
+            self.quadros += 1
+        h, w = depth_z16.shape[:2]
+        x0, x1, y0, y1 = self.roi
+        recorte = depth_z16[int(y0 * h):int(y1 * h), int(x0 * w):int(x1 * w)]
+        if recorte.size == 0:
+            return
+        validos = recorte[recorte > 0]
+        self._validos[etapa].append(validos.size / recorte.size)
+        self._tempo[etapa].append(duracao_s)
+        if validos.size < 10:
+            self._mediana_ant.pop(etapa, None)
+            return
+        mediana = float(np.median(validos)) * depth_scale
+        self._dispersao[etapa].append(float(np.std(validos)) * depth_scale)
+        anterior = self._mediana_ant.get(etapa)
+        if anterior is not None:
+            self._saltos[etapa].append(mediana - anterior)
+        self._mediana_ant[etapa] = mediana
+
+    def relatorio(self) -> List[dict]:
+        linhas = []
+        for etapa in self.etapas:
+            saltos = self._saltos[etapa]
+            linhas.append({
+                "etapa": etapa,
+                "ruido_mm": float(np.std(saltos)) / np.sqrt(2) * 1000 if len(saltos) > 1 else float("nan"),
+                "dispersao_mm": float(np.mean(self._dispersao[etapa])) * 1000 if self._dispersao[etapa] else float("nan"),
+                "validos_pct": float(np.mean(self._validos[etapa])) * 100 if self._validos[etapa] else float("nan"),
+                "ms": float(np.mean(self._tempo[etapa])) * 1000 if self._tempo[etapa] else 0.0,
+            })
+        return linhas
+
+    def formatar(self) -> str:
+        """Tabela do relatório, com a variação do ruído que cada filtro causou."""
+        linhas = [f"🔬 Filtros RealSense — efeito na ROI ({self.quadros} frames):",
+                  f"   {'etapa':<14}{'ms':>7}{'ruído mm':>10}{'Δruído':>9}{'disp. mm':>10}{'válidos':>9}"]
+        ruido_ant = None
+        for r in self.relatorio():
+            delta = "" if ruido_ant is None else f"{r['ruido_mm'] - ruido_ant:+.2f}"
+            linhas.append(
+                f"   {r['etapa']:<14}{r['ms']:>7.2f}{r['ruido_mm']:>10.2f}{delta:>9}"
+                f"{r['dispersao_mm']:>10.1f}{r['validos_pct']:>8.1f}%"
+            )
+            ruido_ant = r["ruido_mm"]
+        return "\n".join(linhas)
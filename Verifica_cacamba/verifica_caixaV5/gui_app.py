@@ -1,31 +1,30 @@
 """
 gui_app.py — Interface gráfica V5
 
-Correções em relação à V4:
-  - queue.Queue para comunicação entre threads (sem variáveis compartilhadas sem lock)
-  - Config lida do dicionário self.cm.cfg, nunca de widgets Tkinter dentro da thread da câmera
-  - validar_deteccao() reintroduzida em detector_cacamba.py
-  - Confiança média calculada com deque real (corrigido)
-  - GUI atualizada via poll_queue() a ~15 FPS (sem root.after(0,...) a cada frame)
-
-Novas funcionalidades:
-  - Alertas sonoros via winsound ao mudar status
-  - Exportar histórico para CSV (pasta historico/)
-  - Multi-view: color + depth colormap lado a lado
-  - Perfis de configuração nomeados
-  - Modo simulação sem câmera física
-  - Wizard de calibração em 3 passos
+Tkinter sobre os módulos sem GUI: um CanalCamera por câmera configurada, cada
+um com seu pipeline de threads (captura → detecção → render, ver pipeline.py)
+ou com um processo filho (--processo, processo_deteccao.py). As threads nunca
+tocam em widgets: falam com a GUI só por filas, drenadas em _poll_queue a
+~15 FPS, e recebem config como deltas versionados pelo cmd_queue do canal.
+
+A GUI cuida da exibição (vídeo, tiles, status, log), das abas de config,
+perfis, calibração e estatísticas, e do que sai da detecção: alertas,
+histórico CSV, tempo em cada status e o servidor web.
 """
 
 import copy
 import csv
+import logging
 import queue
+import sqlite3
 import threading
 import time
 from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -33,20 +32,19 @@ import tkinter as tk
 from tkinter import messagebox, scrolledtext, simpledialog, ttk
 from PIL import Image, ImageTk
 
-try:
-    import winsound
-    _HAS_WINSOUND = True
-except ImportError:
-    _HAS_WINSOUND = False
-
-try:
-    import pyrealsense2 as rs
-    _HAS_REALSENSE = True
-except ImportError:
-    _HAS_REALSENSE = False
-
-from config_manager import ConfigManager
+from alertas import Alerta, DespachanteAlertas
+from banco_eventos import ConsultaEventos, RegistradorCamera, abrir_banco, descrever_fonte
+from captura import criar_fonte, enumerar_dispositivos, realsense_disponivel
+from config_compilada import ConfigInvalida
+from config_manager import SECOES_SEM_DELTA, ConfigManager, calcular_delta
 from detector_cacamba import DetectorCacamba, ResultadoDeteccao
+from linha_tempo import SEMANA_S, LinhaTempoStatus, formatar_duracao, inicio_dia, inicio_turno
+from metricas import ContadorQuadros, MedidorEstagios, marcar
+from overlays import desenhar_depth_colormap, desenhar_overlays_color
+from pipeline import DESCARTAR_ANTIGO, FIM, FilaEstagio, MonitorPipeline
+from pre_gatilho import criar_pre_gatilho
+from processo_deteccao import ProcessoDeteccao
+from servidor_web import criar_servidor
 
 # ── UI constants ──────────────────────────────────────────────────────────────
 CORES_STATUS = {
@@ -56,41 +54,106 @@ CORES_STATUS = {
     "SEM LEITURA": "#808080",
     "AGUARDANDO":  "#808080",
 }
-CORES_BGR = {
-    "VAZIA":   (0, 0, 255),
-    "PARCIAL": (0, 165, 255),
-    "CHEIA":   (0, 255, 0),
-}
 
 VIDEO_W, VIDEO_H = 480, 360   # tamanho de display de cada painel de vídeo
 GUI_POLL_MS      = 66          # ~15 FPS de atualização da GUI
 HIST_MAX         = 10_000      # máximo de registros no histórico para CSV
+LOG_MAX_LINHAS   = 2_000       # linhas mantidas na aba Logs (o arquivo em logs/ tem tudo)
+MUDANCAS_MAX     = 1_000       # linhas mantidas na lista de mudanças de status
+LOG_ARQUIVO_MAX_BYTES = 5_000_000  # logs/gui_v5.log é rotacionado nesse tamanho...
+LOG_ARQUIVO_BACKUPS   = 5          # ...mantendo gui_v5.log.1 … .5
+LATENCIA_UPDATE_S = 1.0        # período de recálculo dos percentis na aba Estatísticas
+CANAL_UNICO      = "principal"  # id do canal quando não há seção "cameras"
+CAPACIDADE_FILA_DETECCAO = 2    # frames capturados aguardando o detector
+CAPACIDADE_FILA_RENDER   = 1    # resultados aguardando overlays/RGB
+INTERVALO_COMANDOS_S     = 0.005  # sem frame chegando, o detector atende o cmd_queue nesse período
+
+
+def _configurar_log_arquivo(pasta: Path) -> logging.Logger:
+    """Log completo da GUI em logs/gui_v5.log, rotacionado por tamanho."""
+    pasta.mkdir(exist_ok=True)
+    logger = logging.getLogger("cacamba.v5.gui")
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            pasta / "gui_v5.log", maxBytes=LOG_ARQUIVO_MAX_BYTES, backupCount=LOG_ARQUIVO_BACKUPS, encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+@dataclass
+class CanalCamera:
+    """Uma câmera: sua thread de captura, fila de comandos e métricas próprias."""
+
+    id: str
+    nome: str
+    serial: Optional[str] = None
+    cfg: dict = field(default_factory=dict)   # cópia da GUI (global + sobrescritas)
+    perfis: dict = field(default_factory=dict)  # perfis pré-compilados na thread/processo: nome → cfg
+    cmd_queue: queue.Queue = field(default_factory=queue.Queue)
+    medidor: MedidorEstagios = field(default_factory=MedidorEstagios)
+    contador: ContadorQuadros = field(default_factory=ContadorQuadros)
+    thread: Optional[threading.Thread] = None
+    ativo: bool = False
+    # Último (resultado, fps) — escrito pela thread da câmera, lido pelo tile na GUI
+    ultimo: Optional[Tuple[ResultadoDeteccao, float]] = None
+    # Modo processo: filho de captura/detecção e suas últimas métricas enviadas
+    processo: Optional[ProcessoDeteccao] = None
+    metricas_remotas: dict = field(default_factory=dict)
+    # Modo thread: ocupação dos estágios e profundidade das filas do pipeline
+    pipeline: Optional[MonitorPipeline] = None
 
 
 class DetectorCacambaGUIV5:
     """Interface gráfica V5 — comunicação via queue.Queue, thread-safe."""
 
-    def __init__(self, root: tk.Tk, config_manager: ConfigManager, simulate: bool = False):
+    def __init__(
+        self,
+        root: tk.Tk,
+        config_manager: ConfigManager,
+        simulate: bool = False,
+        replay: Optional[str] = None,
+        replay_modo: str = "tempo_real",
+        replay_fator: float = 1.0,
+        gravar: Optional[str] = None,
+        processo: bool = False,
+    ):
         self.root = root
         self.cm = config_manager
         self.simulate = simulate
-
-        self.root.title(f"Sistema de Detecção V5{'  [SIMULAÇÃO]' if simulate else ''}")
+        # Sessão gravada usada como fonte de captura (substitui câmera/simulação)
+        self.replay = replay
+        self.replay_modo = replay_modo
+        self.replay_fator = replay_fator
+        # Arquivo de sessão onde a câmera real grava os frames filtrados
+        self.gravar = gravar
+        # Captura + detecção em processo filho (anel em memória compartilhada)
+        self.processo = processo
+
+        sufixo = "  [SIMULAÇÃO]" if simulate else ("  [REPLAY]" if replay else "")
+        self.root.title(f"Sistema de Detecção V5{sufixo}")
         self.root.geometry("1620x960")
         self.root.configure(bg="#2b2b2b")
 
         # ── Comunicação entre threads ──────────────────────────────────────
         # A thread da câmera coloca msgs aqui; a GUI consome via poll_queue()
         self.data_queue: queue.Queue = queue.Queue(maxsize=3)
-        # A GUI envia comandos para a thread da câmera (ex: atualizar config)
-        self.cmd_queue: queue.Queue = queue.Queue()
+        # Deltas do config_v5.json editado por fora: fila própria e sem limite, nunca descartados
+        self._config_externa: queue.SimpleQueue = queue.SimpleQueue()
+        # Mensagens de controle das threads (mudanças, erros, câmera parada): sem limite, nunca
+        # descartadas nem bloqueiam quem detecta; drenadas antes dos frames
+        self._controle: queue.SimpleQueue = queue.SimpleQueue()
+        # Cada canal tem seu cmd_queue (a GUI envia comandos, ex: atualizar config)
         self._stop_event = threading.Event()
-        self._thread_camera: Optional[threading.Thread] = None
-
-        # Snapshot de config para a thread da câmera.
-        # Atualizado APENAS pela GUI thread com o lock.
-        self._cfg_lock = threading.Lock()
-        self._cfg_snapshot: dict = copy.deepcopy(self.cm.cfg)
+        # Pausa quente: câmeras seguem transmitindo, frames descartados sem detecção
+        self._pausa_event = threading.Event()
+        self._canais: Dict[str, CanalCamera] = self._montar_canais()
+        # Canal exibido em detalhe (overlays, colormap, gráfico, estatísticas).
+        # Escrito só pela GUI; a leitura da str pelas threads é atômica no CPython.
+        self._canal_sel: str = next(iter(self._canais))
 
         # ── Estado (modificado APENAS pela GUI thread via poll_queue) ──────
         self._camera_ativa = False
@@ -98,15 +161,43 @@ class DetectorCacambaGUIV5:
         self._ultimo_fps = 0.0
         self._hist_dist: deque = deque(maxlen=150)
         self._hist_completo: deque = deque(maxlen=HIST_MAX)
-        self._log_mudancas: list = []
+        # Linhas novas de log/mudanças: anéis limitados, descarregados nos widgets uma vez por tick
+        self._log_pendente: deque = deque(maxlen=LOG_MAX_LINHAS)
+        self._mudancas_pendentes: deque = deque(maxlen=MUDANCAS_MAX)
+        self._total_mudancas = 0
+        self._log_arquivo = _configurar_log_arquivo(Path(__file__).parent / "logs")
         self._contador_frames = 0
         self._tempo_inicio: Optional[float] = None
         self._hist_fps: deque = deque(maxlen=30)
         self._multi_view = True
+        # Último perfil carregado com sucesso (volta ao combo se outro for rejeitado)
+        self._perfil_ativo: Optional[str] = None
+
+        # Latência por estágio e frames perdidos do canal selecionado
+        # (cada canal tem os seus; escritos pelas threads de captura e da GUI)
+        self._medidor = self._canais[self._canal_sel].medidor
+        self._t_ultima_latencia = 0.0
+        self._contador = self._canais[self._canal_sel].contador
 
         # ── Construir interface ────────────────────────────────────────────
         self._criar_interface()
 
+        # ── Servidor web local (opcional) ──────────────────────────────────
+        self._servidor = criar_servidor(self.cm.cfg, log=self._enqueue_log)
+        if self._servidor is not None:
+            self._servidor.iniciar()
+
+        # Alertas: uma thread só, alimentada sem bloquear pela GUI
+        self._alertas = DespachanteAlertas(self.cm.cfg, log=self._enqueue_log)
+        # Banco de eventos (modo thread; no modo processo cada filho abre o seu)
+        self._banco = abrir_banco(self.cm.cfg, log=self._enqueue_log)
+        # Linha do tempo de status_estavel por câmera: 7 dias do banco + mudanças ao vivo
+        self._linhas_tempo: Dict[str, LinhaTempoStatus] = {c: LinhaTempoStatus() for c in self._canais}
+        self._carregar_linhas_tempo()
+
+        # Edições externas do config_v5.json chegam como delta pela data_queue
+        self.cm.observar(self._enqueue_config_externa)
+
         # Iniciar polling da queue
         self.root.after(GUI_POLL_MS, self._poll_queue)
 
@@ -125,6 +216,7 @@ class DetectorCacambaGUIV5:
         # Coluna esquerda: vídeos + status
         left = tk.Frame(main, bg="#2b2b2b")
         left.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._criar_painel_cameras(left)
         self._criar_painel_videos(left)
         self._criar_painel_status(left)
 
@@ -147,9 +239,9 @@ class DetectorCacambaGUIV5:
         )
         self._barra_status.pack(fill=tk.X, side=tk.BOTTOM)
 
-        modo = "SIMULAÇÃO" if self.simulate else "CÂMERA REAL"
+        modo = "SIMULAÇÃO" if self.simulate else ("REPLAY" if self.replay else "CÂMERA REAL")
         self._adicionar_log(f"Sistema V5 iniciado. Modo: {modo}")
-        if not _HAS_REALSENSE and not self.simulate:
+        if not realsense_disponivel() and not self.simulate and not self.replay:
             self._adicionar_log("⚠️  pyrealsense2 não encontrado — use --simulate.")
 
     # ── Painel de controles (topo) ────────────────────────────────────────────
@@ -165,9 +257,9 @@ class DetectorCacambaGUIV5:
             title_row, text="🎯 SISTEMA DE DETECÇÃO DE NÍVEL DA CACAMBA V5",
             font=("Arial", 15, "bold"), bg="#1e1e1e", fg="#4CAF50",
         ).pack(side=tk.LEFT)
-        if self.simulate:
+        if self.simulate or self.replay:
             tk.Label(
-                title_row, text="  [MODO SIMULAÇÃO]",
+                title_row, text="  [MODO SIMULAÇÃO]" if self.simulate else "  [MODO REPLAY]",
                 font=("Arial", 11, "bold"), bg="#1e1e1e", fg="#FF9800",
             ).pack(side=tk.LEFT)
 
@@ -184,12 +276,14 @@ class DetectorCacambaGUIV5:
 
         self._btn_toggle = _btn(btn_row, "▶ INICIAR CÂMERA", self._toggle_camera, "#4CAF50", 20)
         self._btn_toggle.grid(row=0, column=0, padx=4)
-        _btn(btn_row, "💾 SALVAR CONFIG",    self._salvar_configuracoes, "#2196F3").grid(row=0, column=1, padx=4)
-        _btn(btn_row, "📥 EXPORTAR CSV",     self._exportar_csv,          "#607D8B").grid(row=0, column=2, padx=4)
-        _btn(btn_row, "📷 TOGGLE VIEW",      self._toggle_view,           "#795548").grid(row=0, column=3, padx=4)
-        _btn(btn_row, "🔧 WIZARD CALIB.",    self._abrir_wizard,          "#009688").grid(row=0, column=4, padx=4)
-        _btn(btn_row, "🔄 RESETAR STATS",    self._resetar_estatisticas,  "#FF9800").grid(row=0, column=5, padx=4)
-        _btn(btn_row, "❓ AJUDA",            self._mostrar_ajuda,         "#9C27B0").grid(row=0, column=6, padx=4)
+        self._btn_pausa = _btn(btn_row, "⏸ PAUSAR", self._toggle_pausa, "#757575", 12)
+        self._btn_pausa.grid(row=0, column=1, padx=4)
+        _btn(btn_row, "💾 SALVAR CONFIG",    self._salvar_configuracoes, "#2196F3").grid(row=0, column=2, padx=4)
+        _btn(btn_row, "📥 EXPORTAR CSV",     self._exportar_csv,          "#607D8B").grid(row=0, column=3, padx=4)
+        _btn(btn_row, "📷 TOGGLE VIEW",      self._toggle_view,           "#795548").grid(row=0, column=4, padx=4)
+        _btn(btn_row, "🔧 WIZARD CALIB.",    self._abrir_wizard,          "#009688").grid(row=0, column=5, padx=4)
+        _btn(btn_row, "🔄 RESETAR STATS",    self._resetar_estatisticas,  "#FF9800").grid(row=0, column=6, padx=4)
+        _btn(btn_row, "❓ AJUDA",            self._mostrar_ajuda,         "#9C27B0").grid(row=0, column=7, padx=4)
 
         # Linha de perfis
         perf_row = tk.Frame(top, bg="#1e1e1e")
@@ -210,6 +304,35 @@ class DetectorCacambaGUIV5:
 
         self._atualizar_dropdown_perfis()
 
+    # ── Tiles de câmeras (multi-câmera) ───────────────────────────────────────
+
+    def _criar_painel_cameras(self, parent):
+        """Um tile compacto por câmera (status, distância, FPS); clique seleciona."""
+        self._tiles: Dict[str, dict] = {}
+        if len(self._canais) < 2:
+            return
+        tf = tk.Frame(parent, bg="#2b2b2b")
+        tf.pack(fill=tk.X, padx=4, pady=(4, 0))
+        for canal in self._canais.values():
+            tile = tk.Frame(tf, bg="#1e1e1e", padx=6, pady=3, cursor="hand2",
+                            highlightthickness=2, highlightbackground="#1e1e1e")
+            tile.pack(side=tk.LEFT, padx=4)
+            lbl_nome = tk.Label(tile, text=canal.nome, font=("Arial", 9, "bold"), bg="#1e1e1e", fg="white")
+            lbl_nome.pack(anchor=tk.W)
+            lbl_status = tk.Label(tile, text="AGUARDANDO", font=("Arial", 12, "bold"),
+                                  bg="#1e1e1e", fg="#808080", width=12, anchor=tk.W)
+            lbl_status.pack(anchor=tk.W)
+            lbl_info = tk.Label(tile, text="—", font=("Arial", 8), bg="#1e1e1e", fg="#aaaaaa")
+            lbl_info.pack(anchor=tk.W)
+            for w in (tile, lbl_nome, lbl_status, lbl_info):
+                w.bind("<Button-1>", lambda _e, cid=canal.id: self._selecionar_canal(cid))
+            self._tiles[canal.id] = {"frame": tile, "status": lbl_status, "info": lbl_info, "ultimo": None}
+        self._destacar_tile()
+
+    def _destacar_tile(self):
+        for cid, tile in self._tiles.items():
+            tile["frame"].config(highlightbackground="#4CAF50" if cid == self._canal_sel else "#1e1e1e")
+
     # ── Painel de vídeos ──────────────────────────────────────────────────────
 
     def _criar_painel_videos(self, parent):
@@ -376,7 +499,7 @@ class DetectorCacambaGUIV5:
         nb.add(frame, text="📊 Estatísticas")
 
         inner = tk.Frame(frame, bg="#1e1e1e")
-        inner.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+        inner.pack(fill=tk.X, padx=12, pady=12)
         self._stats_labels: dict = {}
 
         items = [
@@ -387,6 +510,7 @@ class DetectorCacambaGUIV5:
             ("Tempo em PARCIAL:",   "tempo_parcial"),
             ("Tempo em CHEIA:",     "tempo_cheia"),
             ("Mudanças Totais:",    "mudancas_total"),
+            ("Frames Perdidos:",    "frames_perdidos"),
             ("Confiança Média:",    "confianca_media"),
             ("Distância Atual:",    "distancia_atual"),
         ]
@@ -397,6 +521,34 @@ class DetectorCacambaGUIV5:
             v.grid(row=i, column=1, sticky=tk.W, padx=4, pady=5)
             self._stats_labels[key] = v
 
+        # Pipeline (modo thread): ocupação por estágio e fila de entrada de cada um
+        pipe = tk.LabelFrame(frame, text="🔀 Pipeline (ocupação / fila)", font=("Arial", 9, "bold"),
+                             bg="#1e1e1e", fg="white")
+        pipe.pack(fill=tk.X, padx=8, pady=(0, 8))
+        colunas = ("util", "vazao", "fila", "descartes")
+        self._tree_pipeline = ttk.Treeview(pipe, columns=colunas, height=3)
+        self._tree_pipeline.heading("#0", text="Estágio")
+        self._tree_pipeline.column("#0", width=170)
+        for c, titulo in zip(colunas, ("ocupação", "itens/s", "fila", "descartes")):
+            self._tree_pipeline.heading(c, text=titulo)
+            self._tree_pipeline.column(c, width=70, anchor=tk.E)
+        self._tree_pipeline.pack(fill=tk.X, padx=4, pady=4)
+
+        # Latência por estágio (ms) — percentis da janela recente
+        lat = tk.LabelFrame(frame, text="⏱ Latência por estágio (ms)", font=("Arial", 9, "bold"),
+                            bg="#1e1e1e", fg="white")
+        lat.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
+        colunas = ("n", "p50", "p95", "p99")
+        self._tree_latencia = ttk.Treeview(lat, columns=colunas, height=12)
+        self._tree_latencia.heading("#0", text="Estágio")
+        self._tree_latencia.column("#0", width=170)
+        for c in colunas:
+            self._tree_latencia.heading(c, text=c)
+            self._tree_latencia.column(c, width=70, anchor=tk.E)
+        self._tree_latencia.pack(fill=tk.BOTH, expand=True, padx=4, pady=4)
+        tk.Button(lat, text="📤 Exportar latências", command=self._exportar_latencias,
+                  bg="#607D8B", fg="white", cursor="hand2").pack(pady=4)
+
     # =========================================================================
     # CONTROLE DA CÂMERA / SIMULAÇÃO
     # =========================================================================
@@ -410,11 +562,19 @@ class DetectorCacambaGUIV5:
     def _iniciar_camera(self):
         if self._camera_ativa:
             return
-        if not self.simulate and not _HAS_REALSENSE:
+        if not self.simulate and not self.replay and not realsense_disponivel():
             messagebox.showerror("Erro", "pyrealsense2 não encontrado.\nUse --simulate ou instale o SDK RealSense.")
             return
 
+        canais = list(self._canais.values())
+        if not self.simulate and not self.replay and self.cm.listar_cameras():
+            canais = self._canais_conectados(canais)
+            if not canais:
+                messagebox.showerror("Erro", "Nenhuma das câmeras configuradas está conectada.")
+                return
+
         self._stop_event.clear()
+        self._pausa_event.clear()
         # Limpar fila antiga
         while not self.data_queue.empty():
             try:
@@ -422,314 +582,378 @@ class DetectorCacambaGUIV5:
             except queue.Empty:
                 break
 
-        # Snapshot de config para a thread
-        with self._cfg_lock:
-            self._cfg_snapshot = copy.deepcopy(self.cm.cfg)
-
-        target = self._loop_simulacao if self.simulate else self._loop_camera
-        self._thread_camera = threading.Thread(target=target, daemon=True)
-        self._thread_camera.start()
+        if self.replay:
+            nome = "Replay"
+        elif self.simulate:
+            nome = "Simulação"
+        else:
+            nome = "Câmera RealSense"
+        if len(canais) > 1:
+            nome = f"{nome} ({len(canais)} câmeras)"
+        for canal in canais:
+            # Snapshot de config para a thread (a thread nunca lê self.cm.cfg)
+            canal.cfg = self.cm.cfg_camera(canal.serial)
+            canal.cmd_queue = queue.Queue()
+            canal.perfis = {}
+            canal.ultimo = None
+            canal.ativo = True
+            if self.processo:
+                canal.metricas_remotas = {}
+                canal.processo = ProcessoDeteccao(
+                    copy.deepcopy(canal.cfg), self._fonte_kwargs(canal), VIDEO_W, VIDEO_H, camera=canal.id,
+                )
+                canal.processo.iniciar(overlays=canal.id == self._canal_sel, colormap=self._multi_view)
+            else:
+                canal.thread = threading.Thread(
+                    target=self._loop_captura, args=(canal, copy.deepcopy(canal.cfg)), daemon=True,
+                )
+                canal.thread.start()
+        self._sincronizar_perfis()
 
         self._camera_ativa = True
         self._tempo_inicio = time.time()
-        self._btn_toggle.config(text="⏸ PARAR CÂMERA", bg="#f44336")
-        self._barra_status.config(text=f"✅ {'Simulação' if self.simulate else 'Câmera'} ativa — detectando...")
-        self._adicionar_log(f"🚀 {'Simulação' if self.simulate else 'Câmera RealSense'} iniciada.")
+        self._btn_toggle.config(text="⏹ PARAR CÂMERA", bg="#f44336")
+        self._barra_status.config(text=f"✅ {nome} ativa — detectando...")
+        self._adicionar_log(f"🚀 {nome} iniciada.")
 
     def _parar_camera(self):
+        """Parada completa: encerra pipelines/threads (o próximo início reconfigura tudo)."""
         self._stop_event.set()
-        if self._thread_camera:
-            self._thread_camera.join(timeout=3.0)
+        for canal in self._canais.values():
+            if canal.processo:
+                canal.processo.parar()
+            elif canal.thread:
+                canal.thread.join(timeout=3.0)
+            canal.ativo = False
         self._camera_ativa = False
+        self._pausa_event.clear()
+        self._btn_pausa.config(text="⏸ PAUSAR", bg="#757575")
         self._btn_toggle.config(text="▶ INICIAR CÂMERA", bg="#4CAF50")
         self._barra_status.config(text="💤 Câmera parada.")
         self._adicionar_log("✅ Câmera parada.")
 
+    def _toggle_pausa(self):
+        """
+        Pausa quente: a câmera segue transmitindo (frames drenados e descartados,
+        filtros aquecidos), detector e históricos ficam como estão. Retomar
+        volta no próximo frame, sem reabrir o dispositivo.
+        """
+        if not self._camera_ativa:
+            return
+        pausar = not self._pausa_event.is_set()
+        if pausar:
+            self._pausa_event.set()
+        else:
+            self._pausa_event.clear()
+        for canal in self._canais.values():
+            if canal.processo is not None:
+                if pausar:
+                    canal.processo.pausar()
+                else:
+                    canal.processo.retomar()
+        if pausar:
+            self._btn_pausa.config(text="▶ RETOMAR", bg="#FF9800")
+            self._barra_status.config(text="⏸ Detecção pausada — câmera segue transmitindo.")
+            self._adicionar_log("⏸ Detecção pausada (stream mantido).")
+        else:
+            self._btn_pausa.config(text="⏸ PAUSAR", bg="#757575")
+            self._barra_status.config(text="✅ Detecção retomada — detectando...")
+            self._adicionar_log("▶ Detecção retomada.")
+
+    # ── Canais (uma câmera por canal) ─────────────────────────────────────────
+
+    def _montar_canais(self) -> Dict[str, CanalCamera]:
+        """Um canal por entrada de "cameras"; sem entradas (ou em replay), um canal único."""
+        if self.replay:
+            return {CANAL_UNICO: CanalCamera(CANAL_UNICO, "Replay", cfg=self.cm.cfg_camera())}
+        canais: Dict[str, CanalCamera] = {}
+        for entrada in self.cm.listar_cameras():
+            serial = str(entrada["serial"])
+            canais[serial] = CanalCamera(
+                serial, entrada.get("nome") or serial, serial, cfg=self.cm.cfg_camera(serial),
+            )
+        if not canais:
+            canais[CANAL_UNICO] = CanalCamera(CANAL_UNICO, "Câmera", cfg=self.cm.cfg_camera())
+        return canais
+
+    def _canais_conectados(self, canais: List[CanalCamera]) -> List[CanalCamera]:
+        """Filtra os canais cujo serial está conectado; avisa sobre ausentes e extras."""
+        conectados = {serial for serial, _ in enumerar_dispositivos()}
+        for canal in canais:
+            if canal.serial not in conectados:
+                self._adicionar_log(f"⚠️  Câmera '{canal.nome}' ({canal.serial}) não encontrada.")
+        configurados = {canal.serial for canal in canais}
+        for serial in sorted(conectados - configurados):
+            self._adicionar_log(f"ℹ️  RealSense {serial} conectada, mas fora da seção 'cameras'.")
+        return [canal for canal in canais if canal.serial in conectados]
+
+    def _selecionar_canal(self, cid: str):
+        if cid == self._canal_sel or cid not in self._canais:
+            return
+        canal = self._canais[cid]
+        self._canal_sel = cid
+        self._medidor = canal.medidor
+        self._contador = canal.contador
+        self._hist_dist.clear()
+        self._tree_latencia.delete(*self._tree_latencia.get_children())
+        self._tree_pipeline.delete(*self._tree_pipeline.get_children())
+        self._destacar_tile()
+        self._atualizar_visualizacao()
+        if canal.ultimo is not None:
+            self._atualizar_status_panel(*canal.ultimo)
+        self._adicionar_log(f"📷 Câmera selecionada: {canal.nome}")
+
+    def _fonte_kwargs(self, canal: CanalCamera) -> dict:
+        """Argumentos de criar_fonte() do canal (picklable, para o modo processo)."""
+        return dict(
+            simulate=self.simulate,
+            replay=self.replay,
+            replay_modo=self.replay_modo,
+            replay_fator=self.replay_fator,
+            gravar=self._caminho_gravacao(canal),
+            serial=canal.serial,
+        )
+
+    def _enviar_comando(self, canal: CanalCamera, cmd: dict):
+        if canal.processo is not None:
+            canal.processo.enviar(cmd)
+        else:
+            canal.cmd_queue.put_nowait(cmd)
+
+    def _atualizar_visualizacao(self):
+        """Modo processo: overlays só no canal selecionado, colormap conforme o TOGGLE VIEW."""
+        for canal in self._canais.values():
+            if canal.processo is not None and canal.ativo:
+                canal.processo.enviar({
+                    "tipo": "visualizacao",
+                    "overlays": canal.id == self._canal_sel,
+                    "colormap": self._multi_view,
+                })
+
+    def _caminho_gravacao(self, canal: CanalCamera) -> Optional[str]:
+        """Com várias câmeras, cada uma grava em <arquivo>_<serial>.<ext>."""
+        if not self.gravar or canal.serial is None or len(self._canais) < 2:
+            return self.gravar
+        p = Path(self.gravar)
+        return str(p.with_name(f"{p.stem}_{canal.serial}{p.suffix}"))
+
     # =========================================================================
     # THREADS
     # =========================================================================
 
-    def _loop_camera(self):
-        """Thread da câmera RealSense — nunca acessa widgets Tkinter."""
-        with self._cfg_lock:
-            cfg = copy.deepcopy(self._cfg_snapshot)
+    def _loop_captura(self, canal: CanalCamera, cfg: dict):
+        """Thread de captura de um canal (câmera, simulação ou replay) — nunca acessa widgets Tkinter.
 
-        detector = DetectorCacamba(cfg)
-        pipeline = rs.pipeline()
-        rs_cfg = rs.config()
-
-        W = cfg["camera"]["resolucao_largura"]
-        H = cfg["camera"]["resolucao_altura"]
-        FPS = cfg["camera"]["fps"]
-        rs_cfg.enable_stream(rs.stream.depth, W, H, rs.format.z16, FPS)
-        rs_cfg.enable_stream(rs.stream.infrared, 1, W, H, rs.format.y8, FPS)
-        rs_cfg.enable_stream(rs.stream.color, W, H, rs.format.bgr8, FPS)
+        É o estágio 1 do pipeline (captura + filtros); dispara os estágios de
+        detecção e render, cada um na sua thread, ligados por filas limitadas.
+        """
+        if len(self._canais) > 1:
+            def log(m: str):
+                self._enqueue_log(f"[{canal.nome}] {m}")
+        else:
+            log = self._enqueue_log
+
+        mon = canal.pipeline = MonitorPipeline()
+        fila_det = FilaEstagio("deteccao", CAPACIDADE_FILA_DETECCAO, DESCARTAR_ANTIGO)
+        fila_render = FilaEstagio("render", CAPACIDADE_FILA_RENDER, DESCARTAR_ANTIGO)
+        mon.estagio("captura")
+        mon.estagio("deteccao", fila_det)
+        mon.estagio("render", fila_render)
+        falha = threading.Event()  # erro em um estágio posterior encerra a captura
+        # Anel do pré-gatilho alimentado aqui, antes da fila que descarta: o despejo tem todos os frames
+        pre_gatilho = criar_pre_gatilho(cfg, camera=canal.id, log=log)
+        estagios = [
+            threading.Thread(
+                target=self._estagio_deteccao, args=(canal, cfg, fila_det, fila_render, falha, log, pre_gatilho),
+                daemon=True,
+            ),
+            threading.Thread(target=self._estagio_render, args=(canal, fila_render, falha, log), daemon=True),
+        ]
+        for th in estagios:
+            th.start()
 
         try:
-            profile = pipeline.start(rs_cfg)
-            device = profile.get_device()
-            depth_sensor = device.first_depth_sensor()
-            depth_scale = depth_sensor.get_depth_scale()
-
-            if depth_sensor.supports(rs.option.emitter_enabled):
-                depth_sensor.set_option(rs.option.emitter_enabled, 1.0)
-                if depth_sensor.supports(rs.option.laser_power):
-                    lp = cfg["camera"]["laser_potencia"]
-                    if lp > 0:
-                        depth_sensor.set_option(rs.option.laser_power, float(lp))
-
-            # Filtros de profundidade
-            decimation = rs.decimation_filter()
-            spatial = rs.spatial_filter()
-            spatial.set_option(rs.option.filter_magnitude, 2)
-            spatial.set_option(rs.option.filter_smooth_alpha, 0.5)
-            spatial.set_option(rs.option.filter_smooth_delta, 20)
-            temporal = rs.temporal_filter()
-            temporal.set_option(rs.option.filter_smooth_alpha, 0.4)
-            temporal.set_option(rs.option.filter_smooth_delta, 20)
-            hole_filling = rs.hole_filling_filter()
-
-            self._enqueue_log("✅ RealSense conectada e configurada.")
-
-            t_prev_frame = time.time()  # para medir FPS inter-frame real
-            while not self._stop_event.is_set():
-                # Processar comandos da GUI (ex: update_config)
-                self._processar_cmd_queue(detector)
-
-                frames = pipeline.wait_for_frames(timeout_ms=1000)
-                depth_raw = frames.get_depth_frame()
-                color_frame = frames.get_color_frame()
-                ir_frame = frames.get_infrared_frame(1)
-
-                if not depth_raw:
+            fonte = criar_fonte(
+                cfg, log=log, medidor=canal.medidor, contador=canal.contador, **self._fonte_kwargs(canal),
+            )
+            t = time.perf_counter()
+            # O tempo "ocupado" da captura inclui a espera pelo dispositivo
+            for quadro in fonte.quadros(self._stop_event, pausa=self._pausa_event):
+                if pre_gatilho is not None:
+                    pre_gatilho.gravar(quadro)
+                mon.ocupado("captura", time.perf_counter() - t)
+                descartados = fila_det.colocar(quadro)
+                if descartados:
+                    canal.contador.descartar("pipeline", descartados)
+                if falha.is_set():
+                    break
+                t = time.perf_counter()
+        except Exception as e:
+            self._reportar_erro(canal, log, e)
+        finally:
+            fila_det.colocar_fim()
+            for th in estagios:
+                th.join(timeout=3.0)
+            if pre_gatilho is not None:
+                pre_gatilho.fechar()
+            self._enqueue_camera_parada(canal)
+
+    def _estagio_deteccao(
+        self,
+        canal: CanalCamera,
+        cfg: dict,
+        fila_det: FilaEstagio,
+        fila_render: FilaEstagio,
+        falha: threading.Event,
+        log,
+        pre_gatilho=None,
+    ):
+        """Estágio 2: DetectorCacamba em todo frame; só o canal selecionado segue para o render."""
+        detector = DetectorCacamba(cfg, medidor=canal.medidor)
+        registrador = None
+        if self._banco is not None:
+            fonte = descrever_fonte(self.simulate, self.replay, canal.serial)
+            registrador = RegistradorCamera(self._banco, canal.id, "gui", fonte)
+        mon = canal.pipeline
+        try:
+            while True:
+                try:
+                    quadro = fila_det.obter(timeout=INTERVALO_COMANDOS_S)
+                except queue.Empty:
+                    # Sem frame: comandos da GUI não esperam o próximo
+                    self._processar_cmd_queue(canal, detector)
                     continue
-
-                # FPS medido como frequência real entre frames (inclui wait da câmera)
-                t_now = time.time()
-                fps = 1.0 / max(t_now - t_prev_frame, 1e-6)
-                t_prev_frame = t_now
-
-                filtered = decimation.process(depth_raw)
-                filtered = spatial.process(filtered)
-                filtered = temporal.process(filtered)
-                filtered = hole_filling.process(filtered)
-
-                depth_image = np.asanyarray(filtered.get_data())
-                depth_meters = depth_image * depth_scale
-
-                if color_frame:
-                    frame_bgr = np.asanyarray(color_frame.get_data())
-                    dh, dw = depth_meters.shape[:2]
-                    if frame_bgr.shape[:2] != (dh, dw):
-                        frame_bgr = cv2.resize(frame_bgr, (dw, dh))
-                else:
-                    ir_img = np.asanyarray(ir_frame.get_data())
-                    frame_bgr = cv2.cvtColor(ir_img, cv2.COLOR_GRAY2BGR)
-
-                ts = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                self._processar_e_enfileirar(frame_bgr, depth_meters, fps, ts, detector, cfg)
-
+                if quadro is FIM:
+                    break
+                t = time.perf_counter()
+                # Processar comandos da GUI (ex: delta_config)
+                self._processar_cmd_queue(canal, detector)
+                resultado = self._detectar(quadro, detector, canal, pre_gatilho, registrador)
+                if canal.id == self._canal_sel:
+                    # Overlays com a config do detector: um perfil trocado substitui o dict
+                    descartados = fila_render.colocar((quadro, resultado, detector.config))
+                    if descartados:
+                        canal.contador.descartar("pipeline", descartados)
+                mon.ocupado("deteccao", time.perf_counter() - t)
         except Exception as e:
-            self._enqueue_log(f"❌ Erro câmera: {e}")
-            try:
-                self.data_queue.put_nowait({"tipo": "erro", "mensagem": str(e)})
-            except queue.Full:
-                pass
+            falha.set()
+            self._reportar_erro(canal, log, e)
         finally:
-            try:
-                pipeline.stop()
-            except Exception:
-                pass
-            self._enqueue_camera_parada()
-
-    def _loop_simulacao(self):
-        """Thread de simulação — gera frames sintéticos sem câmera física."""
-        with self._cfg_lock:
-            cfg = copy.deepcopy(self._cfg_snapshot)
-
-        detector = DetectorCacamba(cfg)
-        t_start = time.time()
-        self._enqueue_log("🎮 Modo simulação ativo — câmera virtual rodando.")
-
-        while not self._stop_event.is_set():
-            self._processar_cmd_queue(detector)
-
-            t = time.time() - t_start
-            t0 = time.time()
-
-            frame_bgr, depth_meters = self._gerar_frame_simulado(t, cfg)
-            fps = 30.0
-            ts = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            self._processar_e_enfileirar(frame_bgr, depth_meters, fps, ts, detector, cfg)
-
-            # Simular ~30 FPS
-            elapsed = time.time() - t0
-            time.sleep(max(0.0, (1.0 / 30) - elapsed))
-
-        self._enqueue_camera_parada()
-
-    def _gerar_frame_simulado(self, t: float, cfg: dict) -> Tuple[np.ndarray, np.ndarray]:
-        """Gera frame de depth + frame colorido sintéticos."""
-        h, w = 480, 640
-        LIMITE_VAZIA = cfg["thresholds"]["limite_vazia"]
-        LIMITE_CHEIA = cfg["thresholds"]["limite_cheia"]
-        mid = (LIMITE_VAZIA + LIMITE_CHEIA) / 2
-        amp = (LIMITE_VAZIA - LIMITE_CHEIA) / 2
-        target_depth = mid + amp * np.sin(t * 0.25)
-
-        # Depth frame — zero no background, target_depth na região da caixa
-        depth = np.zeros((h, w), dtype=np.float32)
-        bx1, by1 = int(w * 0.30), int(h * 0.28)
-        bx2, by2 = int(w * 0.70), int(h * 0.75)
-        noise = np.random.normal(0, 0.004, (by2 - by1, bx2 - bx1)).astype(np.float32)
-        depth[by1:by2, bx1:bx2] = np.clip(target_depth + noise, 0.1, 2.0)
-
-        # Color frame
-        frame_bgr = np.full((h, w, 3), 25, dtype=np.uint8)
-        pct = (LIMITE_VAZIA - target_depth) / max(LIMITE_VAZIA - LIMITE_CHEIA, 0.001)
-        pct = max(0.0, min(1.0, pct))
-        fill_y = by2 - int((by2 - by1) * pct)
-        cv2.rectangle(frame_bgr, (bx1, by1), (bx2, by2), (60, 60, 60), -1)
-        cv2.rectangle(frame_bgr, (bx1, fill_y), (bx2, by2), (40, 120, 40), -1)
-        cv2.rectangle(frame_bgr, (bx1, by1), (bx2, by2), (180, 180, 180), 2)
-        cv2.putText(frame_bgr, f"SIMULACAO  t={t:.1f}s  {pct * 100:.0f}%",
-                    (10, h - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 220, 220), 2)
-        return frame_bgr, depth
+            fila_render.colocar_fim()
+            if registrador is not None:
+                registrador.fechar()
+
+    def _estagio_render(self, canal: CanalCamera, fila_render: FilaEstagio, falha: threading.Event, log):
+        """Estágio 3: overlays, colormap e conversões RGB do canal selecionado → data_queue."""
+        mon = canal.pipeline
+        try:
+            while True:
+                try:
+                    item = fila_render.obter(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if item is FIM:
+                    break
+                t = time.perf_counter()
+                self._renderizar_e_enfileirar(canal, *item)
+                mon.ocupado("render", time.perf_counter() - t)
+        except Exception as e:
+            falha.set()
+            self._reportar_erro(canal, log, e)
+
+    def _reportar_erro(self, canal: CanalCamera, log, e: Exception):
+        log(f"❌ Erro captura: {e}")
+        self._controle.put({"tipo": "erro", "camera": canal.id, "mensagem": f"{canal.nome}: {e}"})
 
     # ── Processamento de frame (compartilhado entre câmera e simulação) ───────
 
-    def _processar_cmd_queue(self, detector: DetectorCacamba):
-        """Drena o cmd_queue e aplica comandos na thread da câmera."""
+    def _processar_cmd_queue(self, canal: CanalCamera, detector: DetectorCacamba) -> None:
+        """Drena o cmd_queue do canal e aplica os comandos no detector, na thread da câmera."""
         try:
             while True:
-                cmd = self.cmd_queue.get_nowait()
-                if cmd.get("tipo") == "update_config":
-                    detector.atualizar_config(cmd["cfg"])
+                cmd = canal.cmd_queue.get_nowait()
+                if cmd.get("tipo") == "delta_config":
+                    # O detector mescla o delta na própria config (detector.config)
+                    detector.aplicar_delta(cmd["delta"], cmd["versao"])
+                elif cmd.get("tipo") == "trocar_perfil":
+                    detector.trocar_perfil(cmd["nome"], cmd["versao"])
+                elif cmd.get("tipo") == "registrar_perfis":
+                    for nome in detector.registrar_perfis(cmd["perfis"]):
+                        self._enqueue_log(f"⚠️  [{canal.nome}] Perfil '{nome}' inválido, ignorado.")
         except queue.Empty:
             pass
 
-    def _processar_e_enfileirar(
-        self,
-        frame_bgr: np.ndarray,
-        depth_meters: np.ndarray,
-        fps: float,
-        ts: str,
-        detector: DetectorCacamba,
-        cfg: dict,
-    ):
-        """Detecta, desenha overlays e coloca resultado na data_queue."""
-        # Detecção leve sempre ocorre (atualiza históricos)
-        resultado = detector.processar_frame(depth_meters)
+    def _detectar(
+        self, quadro, detector: DetectorCacamba, canal: CanalCamera, pre_gatilho=None, registrador=None,
+    ) -> ResultadoDeteccao:
+        """Detecção leve — sempre ocorre (atualiza históricos); mudanças vão direto para a GUI."""
+        resultado = detector.processar_quadro(quadro)
         mudou, status_anterior = detector.detectou_mudanca_status(resultado.status_estavel)
-
-        # Se a fila já está cheia, descartar ANTES de fazer qualquer trabalho pesado
-        if self.data_queue.full():
+        if pre_gatilho is not None:
+            # O frame já foi para o anel na captura; aqui só os gatilhos
+            pre_gatilho.avaliar(resultado, mudou)
+        if registrador is not None:
+            registrador.registrar(resultado, mudou, status_anterior, quadro.t_captura or None)
+        if quadro.t_captura:
+            canal.medidor.registrar("lat_captura_deteccao", time.time() - quadro.t_captura)
+        canal.ultimo = (resultado, quadro.fps)
+        if mudou:
+            self._controle.put({
+                "tipo": "mudanca", "camera": canal.id, "de": status_anterior,
+                "para": resultado.status_estavel, "ts": quadro.timestamp, "t": quadro.t_captura or time.time(),
+            })
+        if canal.id == self._canal_sel and self._servidor is not None:
+            self._servidor.publicar_resultado(resultado, quadro.fps, quadro.timestamp)
+        return resultado
+
+    def _renderizar_e_enfileirar(self, canal: CanalCamera, quadro, resultado: ResultadoDeteccao, cfg: dict):
+        """Desenha overlays e coloca o frame na data_queue."""
+        med = canal.medidor
+        servidor = self._servidor
+        web_quer_video = servidor is not None and servidor.tem_clientes_video()
+
+        # Se a fila já está cheia (e ninguém assiste pelo navegador),
+        # descartar ANTES de fazer qualquer trabalho pesado
+        gui_quer_video = not self.data_queue.full()
+        if not gui_quer_video:
+            canal.contador.descartar("fila")
+            if not web_quer_video:
+                return
+
+        t = time.perf_counter()
+        overlay_bgr = desenhar_overlays_color(quadro.frame_bgr.copy(), resultado, cfg)
+        if web_quer_video:
+            servidor.publicar_frame(overlay_bgr)  # encode JPEG fica na thread do servidor
+        if not gui_quer_video:
+            marcar(med, "overlays", t)
             return
 
-        frame_rgb = cv2.cvtColor(
-            self._desenhar_overlays_color(frame_bgr.copy(), resultado, cfg),
-            cv2.COLOR_BGR2RGB,
-        )
+        frame_rgb = cv2.cvtColor(overlay_bgr, cv2.COLOR_BGR2RGB)
+        t = marcar(med, "overlays", t)
         # Só processa depth colormap se o painel estiver visível (leitura de bool é thread-safe no CPython)
-        frame_depth_rgb: Optional[np.ndarray] = (
-            cv2.cvtColor(
-                self._desenhar_depth_colormap(depth_meters, resultado, cfg),
+        frame_depth_rgb: Optional[np.ndarray] = None
+        if self._multi_view:
+            frame_depth_rgb = cv2.cvtColor(
+                desenhar_depth_colormap(quadro.metros(), resultado, cfg),
                 cv2.COLOR_BGR2RGB,
             )
-            if self._multi_view
-            else None
-        )
+            marcar(med, "colormap", t)
 
         msg: dict = {
             "tipo": "frame",
+            "camera": canal.id,
             "frame_color": frame_rgb,
             "frame_depth": frame_depth_rgb,
             "resultado": resultado,
-            "fps": fps,
-            "timestamp": ts,
+            "fps": quadro.fps,
+            "timestamp": quadro.timestamp,
+            "t_enfileirado": time.perf_counter(),
+            "t_captura": quadro.t_captura,
         }
-        if mudou:
-            msg["mudanca"] = {"de": status_anterior, "para": resultado.status_estavel, "ts": ts}
-
         try:
             self.data_queue.put_nowait(msg)
         except queue.Full:
-            pass  # descarta frame se GUI ainda não consumiu
-
-    # ── Desenho de overlays ───────────────────────────────────────────────────
-
-    def _desenhar_overlays_color(
-        self, frame_bgr: np.ndarray, resultado: ResultadoDeteccao, cfg: dict
-    ) -> np.ndarray:
-        h, w = frame_bgr.shape[:2]
-        cor = CORES_BGR.get(resultado.status_estavel, (128, 128, 128))
-
-        # Header com status
-        cv2.rectangle(frame_bgr, (0, 0), (w, 70), (20, 20, 20), -1)
-        cv2.putText(frame_bgr, f"STATUS: {resultado.status_estavel}",
-                    (8, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, cor, 2)
-        cv2.putText(
-            frame_bgr,
-            f"Dist:{resultado.distancia:.3f}m  {resultado.percentual:.0f}%  Conf:{resultado.confianca:.0f}%",
-            (8, 58), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (210, 210, 210), 1,
-        )
-
-        # Bounding box e grid
-        if resultado.bbox:
-            x1, y1, x2, y2 = resultado.bbox
-            cv2.rectangle(frame_bgr, (x1, y1), (x2, y2), (0, 255, 255), 2)
-            g = cfg["filtros"]["grid_medicao_size"]
-            for gi in range(1, g):
-                gx = x1 + gi * (x2 - x1) // g
-                gy = y1 + gi * (y2 - y1) // g
-                cv2.line(frame_bgr, (gx, y1), (gx, y2), (0, 200, 200), 1)
-                cv2.line(frame_bgr, (x1, gy), (x2, gy), (0, 200, 200), 1)
-        else:
-            cx, cy = w // 2, h // 2
-            cv2.line(frame_bgr, (cx - 25, cy), (cx + 25, cy), (200, 200, 200), 2)
-            cv2.line(frame_bgr, (cx, cy - 25), (cx, cy + 25), (200, 200, 200), 2)
-
-        # ROI
-        roi = cfg["roi"]
-        cv2.rectangle(
-            frame_bgr,
-            (int(roi["x_min"] * w), int(roi["y_min"] * h)),
-            (int(roi["x_max"] * w), int(roi["y_max"] * h)),
-            (80, 80, 220), 1,
-        )
-        return frame_bgr
-
-    def _desenhar_depth_colormap(
-        self, depth_meters: np.ndarray, resultado: ResultadoDeteccao, cfg: dict
-    ) -> np.ndarray:
-        clip_min = cfg["camera"]["clip_min"]
-        clip_max = cfg["camera"]["clip_max"]
-        depth_clip = np.clip(depth_meters, clip_min, clip_max)
-        depth_norm = (255 - ((depth_clip - clip_min) / (clip_max - clip_min) * 255)).astype(np.uint8)
-        colormap = cfg["visualizacao"].get("colormap", 2)
-        depth_color = cv2.applyColorMap(depth_norm, colormap)
-
-        h, w = depth_color.shape[:2]
-        if resultado.bbox:
-            x1, y1, x2, y2 = resultado.bbox
-            # Escalar bbox se depth foi redimensionado
-            dh_orig, dw_orig = depth_meters.shape[:2]
-            sx, sy = w / dw_orig, h / dh_orig
-            cv2.rectangle(depth_color,
-                          (int(x1 * sx), int(y1 * sy)),
-                          (int(x2 * sx), int(y2 * sy)),
-                          (255, 255, 255), 2)
-
-        roi = cfg["roi"]
-        cv2.rectangle(
-            depth_color,
-            (int(roi["x_min"] * w), int(roi["y_min"] * h)),
-            (int(roi["x_max"] * w), int(roi["y_max"] * h)),
-            (180, 180, 180), 1,
-        )
-        cv2.putText(depth_color, f"DEPTH  {resultado.distancia:.3f}m",
-                    (8, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (255, 255, 255), 2)
-        return depth_color
+            canal.contador.descartar("fila")  # descarta frame se GUI ainda não consumiu
 
     # =========================================================================
     # QUEUE POLLING (GUI thread — ~15 FPS)
@@ -738,26 +962,92 @@ class DetectorCacambaGUIV5:
     def _poll_queue(self):
         """Consome mensagens da data_queue e atualiza a GUI.
 
-        Mensagens leves (log, erro, controle) são drenadas todas.
-        Mensagens de frame são limitadas a 1 por tick para não travar a GUI
-        com múltiplos resize+canvas em sequência dentro do mesmo ciclo.
+        Mensagens de log são drenadas todas.
+        Só o frame mais recente é exibido (1 resize+canvas por tick); frames
+        mais antigos na fila são pulados — contados como perda "gui". Mudanças
+        de status, erros e paradas vêm pela fila de controle, sem limite, e
+        nunca são puladas.
         """
+        ultimo_frame: Optional[dict] = self._coletar_processos()
         try:
             while True:
-                msg = self.data_queue.get_nowait()
-                self._processar_mensagem(msg)
-                # Frame pesado (resize + canvas): processar só 1 por tick
-                if msg.get("tipo") == "frame":
+                try:
+                    self._aplicar_config_externa(self._config_externa.get_nowait())
+                except queue.Empty:
                     break
+            while True:
+                try:
+                    self._processar_mensagem(self._controle.get_nowait())
+                except queue.Empty:
+                    break
+            while True:
+                msg = self.data_queue.get_nowait()
+                if msg.get("tipo") != "frame":
+                    self._processar_mensagem(msg)
+                    continue
+                if ultimo_frame is not None:
+                    self._pular_frame(ultimo_frame)
+                ultimo_frame = msg
         except queue.Empty:
             pass
         finally:
+            if ultimo_frame is not None:
+                self._processar_mensagem(ultimo_frame)
+            self._atualizar_tiles()
+            self._descarregar_logs()
             self.root.after(GUI_POLL_MS, self._poll_queue)
 
+    def _coletar_processos(self) -> Optional[dict]:
+        """Modo processo: eventos de cada filho + slot mais recente de cada anel.
+
+        Devolve a mensagem de frame do canal selecionado (ou None).
+        """
+        ultimo_frame: Optional[dict] = None
+        for canal in self._canais.values():
+            proc = canal.processo
+            if proc is None:
+                continue
+            for ev in proc.eventos():
+                if ev["tipo"] == "metricas":
+                    canal.metricas_remotas = ev
+                    continue
+                if ev["tipo"] in ("log", "erro") and len(self._canais) > 1:
+                    ev["mensagem"] = f"[{canal.nome}] {ev['mensagem']}"
+                ev["camera"] = canal.id
+                self._processar_mensagem(ev)
+
+            copia, pulados = proc.ler_ultimo()
+            if copia is None:
+                continue
+            resultado = copia["resultado"]
+            canal.ultimo = (resultado, copia["fps"])
+            if canal.id != self._canal_sel:
+                continue
+            if pulados:
+                canal.contador.descartar("gui", pulados)
+            servidor = self._servidor
+            if servidor is not None:
+                servidor.publicar_resultado(resultado, copia["fps"], copia["timestamp"])
+                if copia["frame_color"] is not None and servidor.tem_clientes_video():
+                    servidor.publicar_frame(cv2.cvtColor(copia["frame_color"], cv2.COLOR_RGB2BGR))
+            if copia["frame_color"] is not None:
+                ultimo_frame = {"tipo": "frame", "camera": canal.id, "t_enfileirado": 0.0, **copia}
+        return ultimo_frame
+
+    def _pular_frame(self, msg: dict):
+        self._canais[msg["camera"]].contador.descartar("gui")
+
     def _processar_mensagem(self, msg: dict):
         tipo = msg.get("tipo")
 
-        if tipo == "frame":
+        if tipo == "frame" and msg["camera"] != self._canal_sel:
+            # Enfileirado antes de o usuário trocar de câmera
+            self._pular_frame(msg)
+
+        elif tipo == "frame":
+            t = time.perf_counter()
+            if msg["t_enfileirado"]:
+                t = marcar(self._medidor, "fila_espera", msg["t_enfileirado"])
             resultado: ResultadoDeteccao = msg["resultado"]
             fps = msg["fps"]
             ts = msg["timestamp"]
@@ -769,6 +1059,7 @@ class DetectorCacambaGUIV5:
             self._hist_dist.append(resultado.distancia)
 
             record = {
+                "camera": msg["camera"],
                 "timestamp": ts,
                 "status": resultado.status_estavel,
                 "distancia_m": round(resultado.distancia, 4),
@@ -782,21 +1073,31 @@ class DetectorCacambaGUIV5:
             self._atualizar_status_panel(resultado, fps)
             self._desenhar_grafico()
             self._atualizar_stats()
+            marcar(self._medidor, "render_gui", t)
+            if msg["t_captura"]:
+                self._medidor.registrar("lat_captura_tela", time.time() - msg["t_captura"])
 
-            if "mudanca" in msg:
-                m = msg["mudanca"]
-                self._registrar_mudanca_status(m["de"], m["para"], m["ts"])
+        elif tipo == "mudanca":
+            self._registrar_mudanca_status(msg["de"], msg["para"], msg["ts"], msg["camera"], msg["t"])
 
         elif tipo == "log":
             self._adicionar_log(msg["mensagem"])
 
         elif tipo == "erro":
             self._adicionar_log(f"❌ {msg['mensagem']}")
+            self._alertas.publicar(Alerta("alarme", msg["camera"], mensagem=msg["mensagem"],
+                                          ts=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
             self._barra_status.config(text=f"❌ Erro: {msg['mensagem'][:90]}")
 
         elif tipo == "camera_parada":
-            if self._camera_ativa:
+            canal = self._canais.get(msg["camera"])
+            if canal is not None:
+                canal.ativo = False
+                self._linhas_tempo[canal.id].encerrar(time.time())
+            if self._camera_ativa and not any(c.ativo for c in self._canais.values()):
                 self._camera_ativa = False
+                self._pausa_event.clear()
+                self._btn_pausa.config(text="⏸ PAUSAR", bg="#757575")
                 self._btn_toggle.config(text="▶ INICIAR CÂMERA", bg="#4CAF50")
                 self._barra_status.config(text="💤 Câmera parada.")
 
@@ -808,11 +1109,13 @@ class DetectorCacambaGUIV5:
         except queue.Full:
             pass
 
-    def _enqueue_camera_parada(self):
-        try:
-            self.data_queue.put_nowait({"tipo": "camera_parada"})
-        except queue.Full:
-            pass
+    def _enqueue_config_externa(self, delta: dict):
+        """Chamado pela thread do observador do ConfigManager; aplicado no próximo tick, em ordem."""
+        self._config_externa.put(delta)
+
+    def _enqueue_camera_parada(self, canal: CanalCamera):
+        # Pela fila de controle: perder este aviso deixaria o canal "ativo" para sempre
+        self._controle.put({"tipo": "camera_parada", "camera": canal.id})
 
     # =========================================================================
     # ATUALIZAÇÕES DA GUI
@@ -830,6 +1133,19 @@ class DetectorCacambaGUIV5:
         if self._multi_view and frame_depth_rgb is not None:
             _show(self._lbl_video2, frame_depth_rgb)
 
+    def _atualizar_tiles(self):
+        """Atualiza os tiles a partir do último resultado de cada canal (sem fila)."""
+        for cid, tile in self._tiles.items():
+            ultimo = self._canais[cid].ultimo
+            if ultimo is None or ultimo is tile["ultimo"]:
+                continue
+            tile["ultimo"] = ultimo
+            resultado, fps = ultimo
+            tile["status"].config(
+                text=resultado.status_estavel, fg=CORES_STATUS.get(resultado.status_estavel, "#808080"),
+            )
+            tile["info"].config(text=f"{resultado.distancia:.3f} m · {resultado.percentual:.0f}% · {fps:.0f} FPS")
+
     def _atualizar_status_panel(self, resultado: ResultadoDeteccao, fps: float):
         cor = CORES_STATUS.get(resultado.status_estavel, "#808080")
         self._lbl_status.config(text=resultado.status_estavel, fg=cor)
@@ -866,8 +1182,8 @@ class DetectorCacambaGUIV5:
             yy = _to_y(val)
             c.create_text(mx - 4, yy, text=f"{val:.2f}", fill="#888", anchor="e", font=("Arial", 7))
 
-        # Linhas de threshold
-        cfg = self.cm.cfg
+        # Linhas de threshold (da câmera selecionada)
+        cfg = self._canais[self._canal_sel].cfg
         lv = cfg["thresholds"]["limite_vazia"]
         lc = cfg["thresholds"]["limite_cheia"]
         if mn_v <= lv <= mx_v:
@@ -898,17 +1214,74 @@ class DetectorCacambaGUIV5:
         fps_med = float(np.mean(self._hist_fps)) if self._hist_fps else 0.0
         sl["fps_medio"].config(text=f"{fps_med:.1f}")
 
-        recentes = list(self._hist_completo)[-500:] if self._hist_completo else []
-        statuses = [r["status"] for r in recentes]
-        sl["tempo_vazia"].config(text=str(statuses.count("VAZIA")))
-        sl["tempo_parcial"].config(text=str(statuses.count("PARCIAL")))
-        sl["tempo_cheia"].config(text=str(statuses.count("CHEIA")))
-        sl["mudancas_total"].config(text=str(len(self._log_mudancas)))
+        # Tempo real em cada status (linha do tempo: O(log n) por janela)
+        momento = datetime.now()
+        t = momento.timestamp()
+        linha = self._linhas_tempo[self._canal_sel]
+        janelas = [
+            linha.tempo_em(inicio_turno(momento, self.cm.cfg["estatisticas"]["inicio_turnos"]).timestamp(), t),
+            linha.tempo_em(inicio_dia(momento).timestamp(), t),
+            linha.tempo_em(t - SEMANA_S, t),
+        ]
+        for status in ("VAZIA", "PARCIAL", "CHEIA"):
+            turno, hoje, semana = (formatar_duracao(j.get(status, 0.0)) for j in janelas)
+            sl[f"tempo_{status.lower()}"].config(text=f"turno {turno} · hoje {hoje} · 7 dias {semana}")
+        sl["mudancas_total"].config(text=str(self._total_mudancas))
+
+        recentes = [r for r in list(self._hist_completo)[-500:] if r["camera"] == self._canal_sel]
 
         confs = [r["confianca"] for r in recentes if r["confianca"] > 0]
         if confs:
             sl["confianca_media"].config(text=f"{np.mean(confs):.1f}%")
         sl["distancia_atual"].config(text=f"{self._ultimo_resultado.distancia:.3f}m")
+        p = self._perdidos_canal(self._canais[self._canal_sel])
+        sl["frames_perdidos"].config(
+            text=f"USB {p['usb']} · captura {p['captura']} · filtros {p['filtros']} · pipeline {p['pipeline']} · "
+                 f"fila {p['fila']} · GUI {p['gui']}"
+        )
+
+        agora = time.time()
+        if agora - self._t_ultima_latencia >= LATENCIA_UPDATE_S:
+            self._t_ultima_latencia = agora
+            self._atualizar_latencias()
+            self._atualizar_pipeline()
+
+    def _perdidos_canal(self, canal: CanalCamera) -> dict:
+        """Perdas do canal; no modo processo soma as contadas no filho (USB/filtros)."""
+        p = dict(canal.contador.perdidos)
+        remotos = canal.metricas_remotas.get("perdidos")
+        if remotos:
+            for causa in ContadorQuadros.CAUSAS:
+                p[causa] += remotos[causa]
+        return p
+
+    def _percentis_canal(self, canal: CanalCamera) -> dict:
+        """Percentis do canal; no modo processo inclui os estágios medidos no filho."""
+        percentis = dict(canal.metricas_remotas.get("percentis", {}))
+        percentis.update(canal.medidor.percentis())
+        return percentis
+
+    def _atualizar_latencias(self):
+        tree = self._tree_latencia
+        for estagio, p in self._percentis_canal(self._canais[self._canal_sel]).items():
+            valores = (p["n"], f"{p['p50']:.2f}", f"{p['p95']:.2f}", f"{p['p99']:.2f}")
+            if tree.exists(estagio):
+                tree.item(estagio, values=valores)
+            else:
+                tree.insert("", tk.END, iid=estagio, text=estagio, values=valores)
+
+    def _atualizar_pipeline(self):
+        mon = self._canais[self._canal_sel].pipeline
+        if mon is None:
+            return
+        tree = self._tree_pipeline
+        for estagio, e in mon.resumo().items():
+            fila = f"{e['fila']}/{e['capacidade']}" if e["capacidade"] is not None else "—"
+            valores = (f"{e['utilizacao']:.0f}%", f"{e['vazao']:.1f}", fila, e["descartados"])
+            if tree.exists(estagio):
+                tree.item(estagio, values=valores)
+            else:
+                tree.insert("", tk.END, iid=estagio, text=estagio, values=valores)
 
     # =========================================================================
     # CONFIGURAÇÕES
@@ -917,36 +1290,98 @@ class DetectorCacambaGUIV5:
     def _aplicar_configuracoes(self):
         try:
             w = self._cfg_widgets
-            cfg = self.cm.cfg
-            cfg["medicoes"]["altura_camera_chao"]              = float(w["altura_camera_chao"].get())
-            cfg["medicoes"]["altura_caixa"]                    = float(w["altura_caixa"].get())
-            cfg["medicoes"]["profundidade_min_caixa"]          = float(w["profundidade_min_caixa"].get())
-            cfg["medicoes"]["profundidade_max_caixa"]          = float(w["profundidade_max_caixa"].get())
-            cfg["medicoes"]["area_minima_pixels"]              = int(w["area_minima_pixels"].get())
-            cfg["thresholds"]["limite_vazia"]                  = float(w["limite_vazia"].get())
-            cfg["thresholds"]["limite_cheia"]                  = float(w["limite_cheia"].get())
-            cfg["protecao_pessoa"]["profundidade_minima_corpo"]     = float(w["profundidade_minima_corpo"].get())
-            cfg["protecao_pessoa"]["area_maxima_corpo"]             = int(w["area_maxima_corpo"].get())
-            cfg["protecao_pessoa"]["tempo_minimo_entre_mudancas"]   = float(w["tempo_minimo_entre_mudancas"].get())
-            cfg["filtros"]["tamanho_historico"]                = int(w["tamanho_historico"].get())
-            cfg["filtros"]["historico_distancias"]             = int(w["historico_distancias"].get())
-            cfg["filtros"]["kernel_morph_size"]                = int(w["kernel_morph_size"].get())
-            cfg["sons"]["beep_mudanca_status"]                 = self._var_beep.get()
-            cfg["sons"]["beep_frequencia"]                     = int(w["beep_frequencia"].get())
-            cfg["sons"]["beep_duracao"]                        = int(w["beep_duracao"].get())
-
-            # Enviar update para thread da câmera via cmd_queue (sem acessar widgets de outra thread)
-            if self._camera_ativa:
-                try:
-                    self.cmd_queue.put_nowait({"tipo": "update_config", "cfg": copy.deepcopy(cfg)})
-                except queue.Full:
-                    pass
+            novos = {"medicoes": {}, "thresholds": {}, "protecao_pessoa": {}, "filtros": {}, "sons": {}}
+            novos["medicoes"]["altura_camera_chao"]              = float(w["altura_camera_chao"].get())
+            novos["medicoes"]["altura_caixa"]                    = float(w["altura_caixa"].get())
+            novos["medicoes"]["profundidade_min_caixa"]          = float(w["profundidade_min_caixa"].get())
+            novos["medicoes"]["profundidade_max_caixa"]          = float(w["profundidade_max_caixa"].get())
+            novos["medicoes"]["area_minima_pixels"]              = int(w["area_minima_pixels"].get())
+            novos["thresholds"]["limite_vazia"]                  = float(w["limite_vazia"].get())
+            novos["thresholds"]["limite_cheia"]                  = float(w["limite_cheia"].get())
+            novos["protecao_pessoa"]["profundidade_minima_corpo"]     = float(w["profundidade_minima_corpo"].get())
+            novos["protecao_pessoa"]["area_maxima_corpo"]             = int(w["area_maxima_corpo"].get())
+            novos["protecao_pessoa"]["tempo_minimo_entre_mudancas"]   = float(w["tempo_minimo_entre_mudancas"].get())
+            novos["filtros"]["tamanho_historico"]                = int(w["tamanho_historico"].get())
+            novos["filtros"]["historico_distancias"]             = int(w["historico_distancias"].get())
+            novos["filtros"]["kernel_morph_size"]                = int(w["kernel_morph_size"].get())
+            novos["sons"]["beep_mudanca_status"]                 = self._var_beep.get()
+            novos["sons"]["beep_frequencia"]                     = int(w["beep_frequencia"].get())
+            novos["sons"]["beep_duracao"]                        = int(w["beep_duracao"].get())
+            self.cm.aplicar(novos)
+
+            # Enviar o delta para as threads das câmeras via cmd_queue (sem acessar widgets de outra thread)
+            self._enviar_config()
 
             self._adicionar_log("✅ Configurações aplicadas.")
             messagebox.showinfo("Sucesso", "Configurações aplicadas!")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao aplicar configurações:\n{e}")
 
+    def _enviar_config(self, perfil: Optional[str] = None):
+        """
+        Envia a cada canal ativo só o que mudou na sua config (global + sobrescritas da câmera).
+        Com `perfil` (recém-carregado), canais que já têm esse perfil pré-compilado com a mesma
+        config recebem só a troca de perfil.
+        """
+        self._alertas.configurar(self.cm.cfg)
+        versao = self.cm.versao
+        for canal in self._canais.values():
+            nova = self.cm.cfg_camera(canal.serial)
+            pronta = {s: v for s, v in nova.items() if s not in SECOES_SEM_DELTA}
+            delta = {s: v for s, v in calcular_delta(canal.cfg, nova).items() if s not in SECOES_SEM_DELTA}
+            canal.cfg = nova
+            if not delta or not canal.ativo:
+                continue
+            if perfil is not None and canal.perfis.get(perfil) == pronta:
+                self._enviar_comando(canal, {"tipo": "trocar_perfil", "versao": versao, "nome": perfil})
+            else:
+                self._enviar_comando(canal, {"tipo": "delta_config", "versao": versao, "delta": delta})
+        self._sincronizar_perfis()
+
+    def _sincronizar_perfis(self):
+        """Repassa aos canais ativos as configs completas de cada perfil, se mudaram, para pré-compilação."""
+        nomes = self.cm.listar_perfis()
+        for canal in self._canais.values():
+            if not canal.ativo:
+                continue
+            perfis = {nome: self.cm.cfg_perfil(nome, canal.serial) for nome in nomes}
+            if perfis != canal.perfis:
+                canal.perfis = perfis
+                self._enviar_comando(canal, {"tipo": "registrar_perfis", "perfis": perfis})
+
+    def _aplicar_config_externa(self, delta: dict):
+        """config_v5.json editado por fora: aplica na config, atualiza a aba e repassa aos canais."""
+        try:
+            self.cm.aplicar(delta)
+        except ConfigInvalida as e:
+            self._adicionar_log(f"⚠️  {self.cm.caminho.name} alterado com valores inválidos, ignorado: {e}")
+            return
+        self._preencher_campos_config()
+        self._enviar_config()
+        chaves = []
+        for secao, valores in delta.items():
+            if isinstance(valores, dict):
+                chaves.extend(f"{secao}.{k}" for k in valores)
+            else:
+                chaves.append(secao)
+        self._adicionar_log(f"📝 {self.cm.caminho.name} alterado: {', '.join(chaves)} (versão {self.cm.versao})")
+
+    def _gravar_calibracao(self, valores: dict) -> bool:
+        """Grava os valores do wizard ({secao: {chave: valor}}) de uma vez, para validar o conjunto:
+        na câmera selecionada (multi-câmera) ou na config global, e repassa aos canais.
+
+        Retorna True se foi na config global (e os campos da aba devem refletir os valores).
+        Levanta ConfigInvalida sem aplicar nada.
+        """
+        canal = self._canais[self._canal_sel]
+        global_ = not (canal.serial is not None and len(self._canais) > 1)
+        if global_:
+            self.cm.aplicar(valores)
+        else:
+            self.cm.definir_valores_camera(canal.serial, valores)
+        self._enviar_config()
+        return global_
+
     def _salvar_configuracoes(self):
         self._aplicar_configuracoes()
         try:
@@ -998,13 +1433,21 @@ class DetectorCacambaGUIV5:
         if not nome:
             messagebox.showwarning("Aviso", "Selecione um perfil primeiro.")
             return
-        if self.cm.carregar_perfil(nome):
+        try:
+            encontrado = self.cm.carregar_perfil(nome)
+        except ConfigInvalida as e:
+            # Nada foi aplicado: segue o perfil anterior
+            self._var_perfil.set(self._perfil_ativo or "")
+            self._adicionar_log(f"⚠️  Perfil '{nome}' rejeitado (config inválida): {e}")
+            messagebox.showerror(
+                "Perfil rejeitado",
+                f"Perfil '{nome}' tem valores inválidos e não foi carregado:\n\n" + "\n".join(e.erros),
+            )
+            return
+        if encontrado:
+            self._perfil_ativo = nome
             self._preencher_campos_config()
-            if self._camera_ativa:
-                try:
-                    self.cmd_queue.put_nowait({"tipo": "update_config", "cfg": copy.deepcopy(self.cm.cfg)})
-                except queue.Full:
-                    pass
+            self._enviar_config(perfil=nome)
             self._adicionar_log(f"📂 Perfil '{nome}' carregado.")
             messagebox.showinfo("Sucesso", f"Perfil '{nome}' carregado!")
         else:
@@ -1017,8 +1460,10 @@ class DetectorCacambaGUIV5:
         nome = nome.strip()
         self._aplicar_configuracoes()
         self.cm.salvar_perfil(nome)
+        self._sincronizar_perfis()
         self._atualizar_dropdown_perfis()
         self._var_perfil.set(nome)
+        self._perfil_ativo = nome
         self._adicionar_log(f"💾 Perfil '{nome}' salvo.")
         messagebox.showinfo("Sucesso", f"Perfil '{nome}' salvo!")
 
@@ -1029,8 +1474,11 @@ class DetectorCacambaGUIV5:
             return
         if messagebox.askyesno("Confirmar", f"Deletar perfil '{nome}'?"):
             self.cm.deletar_perfil(nome)
+            self._sincronizar_perfis()
             self._atualizar_dropdown_perfis()
             self._var_perfil.set("")
+            if self._perfil_ativo == nome:
+                self._perfil_ativo = None
             self._adicionar_log(f"🗑 Perfil '{nome}' deletado.")
 
     # =========================================================================
@@ -1045,7 +1493,7 @@ class DetectorCacambaGUIV5:
             pasta = Path(__file__).parent / "historico"
             pasta.mkdir(exist_ok=True)
             nome = pasta / f"historico_{datetime.now():%Y%m%d_%H%M%S}.csv"
-            campos = ["timestamp", "status", "distancia_m", "percentual", "confianca", "fps"]
+            campos = ["camera", "timestamp", "status", "distancia_m", "percentual", "confianca", "fps"]
             with open(nome, "w", newline="", encoding="utf-8") as f:
                 writer = csv.DictWriter(f, fieldnames=campos)
                 writer.writeheader()
@@ -1055,27 +1503,48 @@ class DetectorCacambaGUIV5:
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao exportar CSV:\n{e}")
 
-    def _emitir_beep(self, status: str):
-        if not _HAS_WINSOUND:
+    def _exportar_latencias(self):
+        percentis = self._percentis_canal(self._canais[self._canal_sel])
+        if not percentis:
+            messagebox.showwarning("Aviso", "Nenhuma medição de latência ainda.")
             return
-        cfg = self.cm.cfg
-        if not cfg["sons"]["beep_mudanca_status"]:
+        try:
+            pasta = Path(__file__).parent / "historico"
+            pasta.mkdir(exist_ok=True)
+            nome = self._medidor.exportar_json(
+                pasta / f"latencias_{datetime.now():%Y%m%d_%H%M%S}.json", estagios=percentis,
+            )
+            self._adicionar_log(f"📤 Latências exportadas: {nome.name}")
+            messagebox.showinfo("Exportado", f"Arquivo salvo em:\n{nome}")
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao exportar latências:\n{e}")
+
+    def _carregar_linhas_tempo(self):
+        """Intervalos dos últimos 7 dias de cada câmera, do banco de eventos."""
+        if self._banco is None:
             return
-        freq_base = int(cfg["sons"]["beep_frequencia"])
-        dur = int(cfg["sons"]["beep_duracao"])
-        freqs = {"VAZIA": freq_base, "PARCIAL": int(freq_base * 1.25), "CHEIA": int(freq_base * 0.8)}
-        freq = freqs.get(status, freq_base)
-        threading.Thread(target=lambda: winsound.Beep(freq, dur), daemon=True).start()
-
-    def _registrar_mudanca_status(self, de: Optional[str], para: str, ts: str):
-        entrada = f"{ts}  {de or 'N/A'} → {para}"
-        self._log_mudancas.append(entrada)
-        self._listbox_mudancas.insert(0, entrada)
-        self._adicionar_log(f"🔔 Mudança de status: {de or 'N/A'} → {para}")
-        self._emitir_beep(para)
+        desde = time.time() - SEMANA_S
+        try:
+            with ConsultaEventos(self._banco.caminho) as consulta:
+                for camera, linha in self._linhas_tempo.items():
+                    linha.carregar(consulta.intervalos(desde, camera=camera))
+        except sqlite3.Error as e:
+            self._adicionar_log(f"⚠️  Linha do tempo não carregada do banco de eventos: {e}")
+
+    def _registrar_mudanca_status(
+        self, de: Optional[str], para: str, ts: str, camera: str = CANAL_UNICO, t: Optional[float] = None,
+    ):
+        prefixo = f"[{self._canais[camera].nome}] " if len(self._canais) > 1 else ""
+        entrada = f"{ts}  {prefixo}{de or 'N/A'} → {para}"
+        self._total_mudancas += 1
+        self._linhas_tempo[camera].registrar(t or time.time(), para)
+        self._mudancas_pendentes.append(entrada)
+        self._adicionar_log(f"🔔 {prefixo}Mudança de status: {de or 'N/A'} → {para}")
+        self._alertas.publicar(Alerta("mudanca_status", camera, para=para, de=de, ts=ts))
 
     def _toggle_view(self):
         self._multi_view = not self._multi_view
+        self._atualizar_visualizacao()
         if self._multi_view:
             self._frame_video2.pack(side=tk.LEFT, padx=4)
             self._adicionar_log("📷 Multi-view ativado (Color + Depth).")
@@ -1094,11 +1563,29 @@ class DetectorCacambaGUIV5:
     # ── Logs ──────────────────────────────────────────────────────────────────
 
     def _adicionar_log(self, mensagem: str):
+        """Vai para o arquivo já; para a aba Logs no próximo tick (_descarregar_logs)."""
         ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self._text_logs.insert(tk.END, f"[{ts}] {mensagem}\n")
-        self._text_logs.see(tk.END)
+        self._log_pendente.append(f"[{ts}] {mensagem}\n")
+        self._log_arquivo.info(mensagem)
+
+    def _descarregar_logs(self):
+        """Um insert por widget com o que chegou no tick e corte das linhas mais antigas."""
+        if self._log_pendente:
+            self._text_logs.insert(tk.END, "".join(self._log_pendente))
+            self._log_pendente.clear()
+            linhas = int(self._text_logs.index("end-1c").split(".")[0]) - 1
+            if linhas > LOG_MAX_LINHAS:
+                self._text_logs.delete("1.0", f"{linhas - LOG_MAX_LINHAS + 1}.0")
+            self._text_logs.see(tk.END)
+        if self._mudancas_pendentes:
+            # Mais recente no topo
+            self._listbox_mudancas.insert(0, *reversed(self._mudancas_pendentes))
+            self._mudancas_pendentes.clear()
+            if self._listbox_mudancas.size() > MUDANCAS_MAX:
+                self._listbox_mudancas.delete(MUDANCAS_MAX, tk.END)
 
     def _limpar_logs(self):
+        self._log_pendente.clear()
         self._text_logs.delete(1.0, tk.END)
         self._adicionar_log("Logs limpos.")
 
@@ -1108,8 +1595,16 @@ class DetectorCacambaGUIV5:
         self._hist_dist.clear()
         self._hist_fps.clear()
         self._hist_completo.clear()
-        self._log_mudancas.clear()
+        self._total_mudancas = 0
+        self._mudancas_pendentes.clear()
         self._listbox_mudancas.delete(0, tk.END)
+        for canal in self._canais.values():
+            canal.medidor.limpar()
+            canal.contador.limpar()
+            canal.metricas_remotas = {}
+            if canal.processo is not None and canal.ativo:
+                canal.processo.enviar({"tipo": "resetar_metricas"})
+        self._tree_latencia.delete(*self._tree_latencia.get_children())
         self._adicionar_log("🔄 Estatísticas resetadas.")
         messagebox.showinfo("Resetado", "Estatísticas resetadas!")
 
@@ -1124,9 +1619,27 @@ COMO USAR:
 3. O sistema detecta o nível automaticamente
 4. Use "SALVAR CONFIG" para persistir as configurações
 
+PAUSAR / PARAR:
+PAUSAR suspende a detecção mas mantém a câmera
+transmitindo: RETOMAR volta já no próximo frame.
+PARAR CÂMERA encerra tudo (reiniciar reconfigura
+o dispositivo e zera os históricos).
+
 MODOS:
 • Câmera Real: requer hardware RealSense conectado
 • Simulação: use --simulate para testar sem câmera
+• Replay: use --replay ARQUIVO para reproduzir uma sessão
+  gravada com --gravar ARQUIVO
+
+MODO PROCESSO:
+Use --processo para rodar captura e detecção em um
+processo filho; a GUI só lê o frame mais recente da
+memória compartilhada (menos travadas sob carga).
+
+MULTI-CÂMERA:
+Liste as câmeras (serial, nome) na seção "cameras" da
+config. Cada uma tem seu tile; clique no tile para ver
+overlays, gráfico e estatísticas daquela câmera.
 
 WIZARD DE CALIBRAÇÃO:
 Com a câmera ativa, o wizard guia em 3 passos:
@@ -1148,8 +1661,15 @@ Versão: 5.0
 """)
 
     def fechar_aplicacao(self):
+        self.cm.parar_observacao()
+        self.cm.descarregar()  # gravação de config pendente (write-behind)
         if self._camera_ativa:
             self._parar_camera()
+        if self._servidor is not None:
+            self._servidor.parar()
+        self._alertas.parar()
+        if self._banco is not None:
+            self._banco.fechar()
         self.root.quit()
         self.root.destroy()
 
@@ -1260,38 +1780,33 @@ class WizardCalibracao(tk.Toplevel):
 
     def _finalizar(self):
         """Aplica os valores capturados à configuração."""
-        cfg = self.app.cm.cfg
-        w = self.app._cfg_widgets
-
+        valores: Dict[str, Dict[str, float]] = {}
         if "altura_camera_chao" in self.capturas:
-            v = self.capturas["altura_camera_chao"]
-            cfg["medicoes"]["altura_camera_chao"] = v
-            if "altura_camera_chao" in w:
-                w["altura_camera_chao"].delete(0, tk.END)
-                w["altura_camera_chao"].insert(0, str(round(v, 4)))
-
+            valores.setdefault("medicoes", {})["altura_camera_chao"] = self.capturas["altura_camera_chao"]
         if "limite_vazia" in self.capturas:
-            v = self.capturas["limite_vazia"]
-            cfg["thresholds"]["limite_vazia"] = v
-            if "limite_vazia" in w:
-                w["limite_vazia"].delete(0, tk.END)
-                w["limite_vazia"].insert(0, str(round(v, 4)))
-
+            valores.setdefault("thresholds", {})["limite_vazia"] = self.capturas["limite_vazia"]
         if "limite_cheia" in self.capturas:
-            v = self.capturas["limite_cheia"]
-            cfg["thresholds"]["limite_cheia"] = v
-            if "limite_cheia" in w:
-                w["limite_cheia"].delete(0, tk.END)
-                w["limite_cheia"].insert(0, str(round(v, 4)))
-
+            valores.setdefault("thresholds", {})["limite_cheia"] = self.capturas["limite_cheia"]
             # Calcular altura da cacamba automaticamente
             if "limite_vazia" in self.capturas:
-                altura_caixa = round(self.capturas["limite_vazia"] - v, 4)
+                altura_caixa = round(self.capturas["limite_vazia"] - self.capturas["limite_cheia"], 4)
                 if altura_caixa > 0:
-                    cfg["medicoes"]["altura_caixa"] = altura_caixa
-                    if "altura_caixa" in w:
-                        w["altura_caixa"].delete(0, tk.END)
-                        w["altura_caixa"].insert(0, str(altura_caixa))
+                    valores.setdefault("medicoes", {})["altura_caixa"] = altura_caixa
+
+        try:
+            # Câmera selecionada em multi-câmera; o conjunto é validado de uma vez
+            global_ = self.app._gravar_calibracao(valores)
+        except ConfigInvalida as e:
+            messagebox.showerror("Calibração rejeitada", "\n".join(e.erros), parent=self)
+            return
+
+        w = self.app._cfg_widgets
+        if global_:
+            for secao in valores.values():
+                for chave, v in secao.items():
+                    if chave in w:
+                        w[chave].delete(0, tk.END)
+                        w[chave].insert(0, str(round(v, 4)))
 
         resumo = "\n".join(f"  {k}: {v:.4f} m" for k, v in self.capturas.items())
         messagebox.showinfo(
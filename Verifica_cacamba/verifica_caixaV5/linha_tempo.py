@@ -0,0 +1,117 @@
+"""
+linha_tempo.py — Linha do tempo de status_estavel codificada por intervalos (V5)
+
+Sem GUI. Em vez de um registro por frame, guarda só as trocas: o intervalo i
+vai de inicios[i] até inicios[i + 1] (o último fica aberto até "agora") com
+status[i]. Status None marca um trecho sem dados (câmera parada).
+
+Para cada status há uma soma de prefixos das durações dos intervalos
+fechados, então "quanto tempo em CHEIA entre t0 e t1" é:
+
+    2 buscas binárias (intervalos que contêm t0 e t1)
+    + diferença de prefixos (intervalos inteiros no meio)
+    + as duas pontas parciais
+
+O(log n) por consulta, O(1) amortizado por troca. Persistência: os
+intervalos fechados vão para a tabela `intervalos` do banco de eventos
+(banco_eventos.RegistradorCamera) e voltam com `carregar()`.
+"""
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SEMANA_S = 7 * 86400
+
+
+class LinhaTempoStatus:
+    """Intervalos (início, status) de uma câmera, com consultas de tempo em cada status."""
+
+    def __init__(self):
+        self._inicios: List[float] = []
+        self._status: List[Optional[str]] = []
+        # status → prefixos: _acum[s][k] = tempo em s nos intervalos 0..k-1 (k <= último fechado)
+        self._acum: Dict[str, List[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._inicios)
+
+    @property
+    def status_atual(self) -> Optional[str]:
+        return self._status[-1] if self._status else None
+
+    def registrar(self, t: float, status: Optional[str]) -> None:
+        """Novo status a partir de t; repetir o status atual não cria intervalo."""
+        if self._status and self._status[-1] == status:
+            return
+        if self._inicios:
+            t = max(t, self._inicios[-1])   # relógio voltou: intervalo anterior fica com duração zero
+            duracao = t - self._inicios[-1]
+            anterior = self._status[-1]
+            for s, acum in self._acum.items():
+                acum.append(acum[-1] + duracao if s == anterior else acum[-1])
+        if status is not None and status not in self._acum:
+            self._acum[status] = [0.0] * (len(self._inicios) + 1)
+        self._inicios.append(t)
+        self._status.append(status)
+
+    def encerrar(self, t: float) -> None:
+        """Sem dados a partir de t (câmera parada)."""
+        self.registrar(t, None)
+
+    def carregar(self, intervalos: Iterable[Tuple[float, float, str]]) -> None:
+        """Intervalos fechados (início, fim, status) em ordem, como vêm do banco de eventos."""
+        fim_anterior = None
+        for inicio, fim, status in intervalos:
+            if fim_anterior is not None and inicio > fim_anterior:
+                self.encerrar(fim_anterior)
+            self.registrar(inicio, status)
+            fim_anterior = fim
+        if fim_anterior is not None:
+            self.encerrar(fim_anterior)
+
+    def tempo_em(self, desde: float, ate: float) -> Dict[str, float]:
+        """Segundos em cada status dentro de [desde, ate); o último intervalo conta até `ate`."""
+        n = len(self._inicios)
+        j = bisect_right(self._inicios, ate) - 1        # intervalo que contém `ate`
+        if n == 0 or j < 0 or ate <= desde:
+            return {}
+        i = max(bisect_right(self._inicios, desde) - 1, 0)
+        inicio_i = max(desde, self._inicios[i])
+        tempos: Dict[str, float] = {}
+        if i == j:
+            if self._status[i] is not None:
+                tempos[self._status[i]] = ate - inicio_i
+            return tempos
+        for s, acum in self._acum.items():
+            tempos[s] = acum[j] - acum[i + 1]
+        if self._status[i] is not None:
+            tempos[self._status[i]] += self._inicios[i + 1] - inicio_i
+        if self._status[j] is not None:
+            tempos[self._status[j]] += ate - self._inicios[j]
+        return tempos
+
+
+# =============================================================================
+# JANELAS
+# =============================================================================
+
+def inicio_turno(agora: datetime, turnos: List[str]) -> datetime:
+    """Início do turno corrente; `turnos` são os horários de troca ("06:00", "14:00", ...)."""
+    hoje = agora.replace(hour=0, minute=0, second=0, microsecond=0)
+    inicios = []
+    for hhmm in turnos:
+        h, m = (int(x) for x in hhmm.split(":"))
+        inicios += [hoje + timedelta(hours=h, minutes=m), hoje - timedelta(days=1) + timedelta(hours=h, minutes=m)]
+    return max((t for t in inicios if t <= agora), default=hoje)
+
+
+def inicio_dia(agora: datetime) -> datetime:
+    return agora.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def formatar_duracao(segundos: float) -> str:
+    minutos = int(segundos // 60)
+    if minutos < 60:
+        return f"{minutos}m"
+    return f"{minutos // 60}h{minutos % 60:02d}m"
@@ -0,0 +1,148 @@
+"""
+metricas.py — Instrumentação leve de latência por estágio (V5)
+
+Sem GUI. Cada estágio do pipeline (wait_for_frames, filtros rs, subetapas do
+processar_frame, overlays, colormap, fila, render da GUI) registra sua duração
+em uma janela circular preallocada; percentis (p50/p95/p99) são calculados
+sob demanda por quem lê (a GUI, ~1x por segundo), nunca no caminho quente.
+
+Uso típico no caminho quente:
+
+    t = time.perf_counter()
+    ...trabalho...
+    t = marcar(medidor, "estagio", t)
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+JANELA_PADRAO = 512   # amostras por estágio (~17 s a 30 FPS)
+PERCENTIS = (50, 95, 99)
+
+
+class MedidorEstagios:
+    """Janela deslizante de durações (segundos) por estágio; thread-safe."""
+
+    def __init__(self, janela: int = JANELA_PADRAO):
+        self.janela = janela
+        self._lock = threading.Lock()
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._pos: Dict[str, int] = {}
+        self._total: Dict[str, int] = {}
+
+    def registrar(self, estagio: str, duracao_s: float) -> None:
+        with self._lock:
+            buf = self._buffers.get(estagio)
+            if buf is None:
+                buf = self._buffers[estagio] = np.zeros(self.janela, dtype=np.float64)
+                self._pos[estagio] = 0
+                self._total[estagio] = 0
+            i = self._pos[estagio]
+            buf[i] = duracao_s
+            self._pos[estagio] = (i + 1) % self.janela
+            self._total[estagio] += 1
+
+    def percentis(self) -> Dict[str, dict]:
+        """{estagio: {"n", "p50", "p95", "p99", "media"}} em milissegundos, na ordem de registro."""
+        with self._lock:
+            copias = {
+                k: buf[: min(self._total[k], self.janela)].copy()
+                for k, buf in self._buffers.items()
+            }
+            totais = dict(self._total)
+        resumo = {}
+        for estagio, amostras in copias.items():
+            if amostras.size == 0:
+                continue
+            ms = amostras * 1000.0
+            p = np.percentile(ms, PERCENTIS)
+            resumo[estagio] = {
+                "n": totais[estagio],
+                "p50": float(p[0]),
+                "p95": float(p[1]),
+                "p99": float(p[2]),
+                "media": float(ms.mean()),
+            }
+        return resumo
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._buffers.clear()
+            self._pos.clear()
+            self._total.clear()
+
+    def exportar_json(self, caminho, estagios: Optional[Dict[str, dict]] = None) -> Path:
+        """Grava os percentis em JSON; `estagios` substitui os deste medidor (ex: mesclados de outro processo)."""
+        caminho = Path(caminho)
+        dados = {
+            "gerado_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "janela": self.janela,
+            "unidade": "ms",
+            "estagios": self.percentis() if estagios is None else estagios,
+        }
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, indent=2, ensure_ascii=False)
+        return caminho
+
+
+class ContadorQuadros:
+    """
+    Contabiliza frames perdidos por causa, a partir do número de frame do dispositivo.
+
+    Causas:
+        usb      — buracos na numeração do dispositivo (frame nunca chegou ao host)
+        captura  — chegou ao host mas foi trocado por um mais novo na fila do SDK (rajada)
+        filtros  — frameset sem depth ou saída vazia da cadeia de filtros
+        pipeline — descartado em uma fila entre estágios (detecção/render atrasados)
+        fila     — data_queue cheia (frame detectado, mas não enviado à GUI)
+        gui      — frame enviado, mas substituído por um mais novo antes de ser exibido
+
+    Thread-safe: a mesma causa é contada por várias threads (ex: "pipeline",
+    pela captura e pela detecção).
+    """
+
+    CAUSAS = ("usb", "captura", "filtros", "pipeline", "fila", "gui")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.recebidos = 0
+        self.perdidos: Dict[str, int] = dict.fromkeys(self.CAUSAS, 0)
+        self._ultimo_numero: Optional[int] = None
+
+    def registrar_numero(self, frame_number: int) -> None:
+        """Chamado pela fonte a cada frame recebido (numeração monotônica do dispositivo)."""
+        with self._lock:
+            self.recebidos += 1
+            if frame_number < 0:
+                return
+            ultimo = self._ultimo_numero
+            if ultimo is not None and frame_number > ultimo + 1:
+                self.perdidos["usb"] += frame_number - ultimo - 1
+            self._ultimo_numero = frame_number
+
+    def descartar(self, causa: str, n: int = 1) -> None:
+        with self._lock:
+            self.perdidos[causa] += n
+
+    def resumo(self) -> Dict[str, int]:
+        with self._lock:
+            return {"recebidos": self.recebidos, **self.perdidos}
+
+    def limpar(self) -> None:
+        with self._lock:
+            self.recebidos = 0
+            self.perdidos = dict.fromkeys(self.CAUSAS, 0)
+            self._ultimo_numero = None
+
+
+def marcar(medidor: Optional[MedidorEstagios], estagio: str, t_inicio: float) -> float:
+    """Registra perf_counter() - t_inicio em `estagio` e devolve o novo instante."""
+    t = time.perf_counter()
+    if medidor is not None:
+        medidor.registrar(estagio, t - t_inicio)
+    return t
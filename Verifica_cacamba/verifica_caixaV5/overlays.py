@@ -0,0 +1,91 @@
+"""
+overlays.py — Desenho de overlays sobre os frames (V5)
+
+Sem Tkinter, sem PIL: só OpenCV/NumPy, para poder rodar tanto na thread da
+câmera da GUI quanto no processo filho de detecção (processo_deteccao.py).
+"""
+
+import cv2
+import numpy as np
+
+from detector_cacamba import ResultadoDeteccao
+
+CORES_BGR = {
+    "VAZIA":   (0, 0, 255),
+    "PARCIAL": (0, 165, 255),
+    "CHEIA":   (0, 255, 0),
+}
+
+
+def desenhar_overlays_color(
+    frame_bgr: np.ndarray, resultado: ResultadoDeteccao, cfg: dict
+) -> np.ndarray:
+    h, w = frame_bgr.shape[:2]
+    cor = CORES_BGR.get(resultado.status_estavel, (128, 128, 128))
+
+    # Header com status
+    cv2.rectangle(frame_bgr, (0, 0), (w, 70), (20, 20, 20), -1)
+    cv2.putText(frame_bgr, f"STATUS: {resultado.status_estavel}",
+                (8, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, cor, 2)
+    cv2.putText(
+        frame_bgr,
+        f"Dist:{resultado.distancia:.3f}m  {resultado.percentual:.0f}%  Conf:{resultado.confianca:.0f}%",
+        (8, 58), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (210, 210, 210), 1,
+    )
+
+    # Bounding box e grid
+    if resultado.bbox:
+        x1, y1, x2, y2 = resultado.bbox
+        cv2.rectangle(frame_bgr, (x1, y1), (x2, y2), (0, 255, 255), 2)
+        g = cfg["filtros"]["grid_medicao_size"]
+        for gi in range(1, g):
+            gx = x1 + gi * (x2 - x1) // g
+            gy = y1 + gi * (y2 - y1) // g
+            cv2.line(frame_bgr, (gx, y1), (gx, y2), (0, 200, 200), 1)
+            cv2.line(frame_bgr, (x1, gy), (x2, gy), (0, 200, 200), 1)
+    else:
+        cx, cy = w // 2, h // 2
+        cv2.line(frame_bgr, (cx - 25, cy), (cx + 25, cy), (200, 200, 200), 2)
+        cv2.line(frame_bgr, (cx, cy - 25), (cx, cy + 25), (200, 200, 200), 2)
+
+    # ROI
+    roi = cfg["roi"]
+    cv2.rectangle(
+        frame_bgr,
+        (int(roi["x_min"] * w), int(roi["y_min"] * h)),
+        (int(roi["x_max"] * w), int(roi["y_max"] * h)),
+        (80, 80, 220), 1,
+    )
+    return frame_bgr
+
+def desenhar_depth_colormap(
+    depth_meters: np.ndarray, resultado: ResultadoDeteccao, cfg: dict
+) -> np.ndarray:
+    clip_min = cfg["camera"]["clip_min"]
+    clip_max = cfg["camera"]["clip_max"]
+    depth_clip = np.clip(depth_meters, clip_min, clip_max)
+    depth_norm = (255 - ((depth_clip - clip_min) / (clip_max - clip_min) * 255)).astype(np.uint8)
+    colormap = cfg["visualizacao"].get("colormap", 2)
+    depth_color = cv2.applyColorMap(depth_norm, colormap)
+
+    h, w = depth_color.shape[:2]
+    if resultado.bbox:
+        x1, y1, x2, y2 = resultado.bbox
+        # Escalar bbox se depth foi redimensionado
+        dh_orig, dw_orig = depth_meters.shape[:2]
+        sx, sy = w / dw_orig, h / dh_orig
+        cv2.rectangle(depth_color,
+                      (int(x1 * sx), int(y1 * sy)),
+                      (int(x2 * sx), int(y2 * sy)),
+                      (255, 255, 255), 2)
+
+    roi = cfg["roi"]
+    cv2.rectangle(
+        depth_color,
+        (int(roi["x_min"] * w), int(roi["y_min"] * h)),
+        (int(roi["x_max"] * w), int(roi["y_max"] * h)),
+        (180, 180, 180), 1,
+    )
+    cv2.putText(depth_color, f"DEPTH  {resultado.distancia:.3f}m",
+                (8, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (255, 255, 255), 2)
+    return depth_color
@@ -0,0 +1,116 @@
+"""
+pipeline.py — Filas entre estágios e monitor de ocupação (V5)
+
+Sem GUI. O loop de captura da GUI é dividido em estágios, cada um na sua
+thread, ligados por filas limitadas:
+
+    captura + filtros ──[deteccao]──▶ detecção ──[render]──▶ overlays/RGB ──▶ data_queue
+
+Com os estágios sobrepostos, a vazão tende à do estágio mais lento em vez da
+soma de todos. Fila cheia nunca bloqueia o produtor: a política da fila decide
+qual item é descartado (o mais antigo, para manter o frame mais novo, ou o
+que está chegando).
+
+O MonitorPipeline acumula o tempo ocupado de cada estágio e expõe, sob
+demanda (~1x por segundo), utilização, vazão e profundidade das filas.
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+DESCARTAR_ANTIGO = "antigo"   # fila cheia: sai o item mais antigo (vídeo ao vivo)
+DESCARTAR_NOVO   = "novo"     # fila cheia: o item que chega é descartado
+
+# Sentinela de fim de fluxo: o estágio repassa adiante e termina
+FIM = object()
+
+
+class FilaEstagio:
+    """queue.Queue limitada com política de descarte explícita."""
+
+    def __init__(self, nome: str, capacidade: int, politica: str = DESCARTAR_ANTIGO):
+        if politica not in (DESCARTAR_ANTIGO, DESCARTAR_NOVO):
+            raise ValueError(f"Política de descarte inválida: {politica!r}")
+        self.nome = nome
+        self.capacidade = capacidade
+        self.politica = politica
+        self.descartados = 0
+        self._fila: queue.Queue = queue.Queue(maxsize=capacidade)
+
+    def colocar(self, item) -> int:
+        """Enfileira sem bloquear; devolve quantos itens foram descartados."""
+        descartados = 0
+        while True:
+            try:
+                self._fila.put_nowait(item)
+                break
+            except queue.Full:
+                if self.politica == DESCARTAR_NOVO and item is not FIM:
+                    descartados += 1
+                    break
+                try:
+                    self._fila.get_nowait()
+                    descartados += 1
+                except queue.Empty:
+                    pass
+        self.descartados += descartados
+        return descartados
+
+    def colocar_fim(self) -> None:
+        """Enfileira a sentinela FIM, descartando o que for preciso para caber."""
+        self.colocar(FIM)
+
+    def obter(self, timeout: float):
+        """Próximo item (pode ser FIM); levanta queue.Empty após `timeout`."""
+        return self._fila.get(timeout=timeout)
+
+    def profundidade(self) -> int:
+        return self._fila.qsize()
+
+
+class MonitorPipeline:
+    """Tempo ocupado e itens processados por estágio; thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filas: Dict[str, Optional[FilaEstagio]] = {}
+        self._ocupado: Dict[str, float] = {}
+        self._processados: Dict[str, int] = {}
+        self._t_ultimo = time.perf_counter()
+
+    def estagio(self, nome: str, fila_entrada: Optional[FilaEstagio] = None) -> None:
+        """Declara um estágio (na ordem do fluxo) e a fila de onde ele consome."""
+        with self._lock:
+            self._filas[nome] = fila_entrada
+            self._ocupado[nome] = 0.0
+            self._processados[nome] = 0
+
+    def ocupado(self, estagio: str, duracao_s: float) -> None:
+        """Registra um item processado por `estagio` em `duracao_s` segundos."""
+        with self._lock:
+            self._ocupado[estagio] += duracao_s
+            self._processados[estagio] += 1
+
+    def resumo(self) -> Dict[str, dict]:
+        """{estagio: utilizacao (%), vazao (itens/s), fila, capacidade, descartados} desde o último resumo."""
+        with self._lock:
+            agora = time.perf_counter()
+            dt = max(agora - self._t_ultimo, 1e-6)
+            self._t_ultimo = agora
+            ocupado = dict(self._ocupado)
+            processados = dict(self._processados)
+            self._ocupado = dict.fromkeys(self._ocupado, 0.0)
+            self._processados = dict.fromkeys(self._processados, 0)
+            filas = dict(self._filas)
+        resumo = {}
+        for nome, fila in filas.items():
+            resumo[nome] = {
+                "utilizacao": min(100.0 * ocupado[nome] / dt, 100.0),
+                "vazao": processados[nome] / dt,
+                "fila": fila.profundidade() if fila is not None else None,
+                "capacidade": fila.capacidade if fila is not None else None,
+                "descartados": fila.descartados if fila is not None else 0,
+            }
+        return resumo
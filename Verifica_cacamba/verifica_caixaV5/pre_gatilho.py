@@ -0,0 +1,246 @@
+"""
+pre_gatilho.py — Caixa-preta: últimos segundos de profundidade bruta, despejados em eventos (V5)
+
+Sem GUI. A cada frame, quem captura chama `PreGatilho.gravar(quadro)` (antes
+de qualquer fila que descarte frames, para o despejo ter todos) e quem detecta
+chama `PreGatilho.avaliar(resultado, mudou)`; com captura e detecção na mesma
+thread, `registrar(quadro, resultado, mudou)` faz os dois:
+
+  - o frame z16 (e, opcionalmente, a imagem color reduzida) é copiado para um
+    anel preallocado de N = segundos × camera.fps posições; a escrita é uma
+    cópia em fatia, sem alocação por frame
+  - os gatilhos avaliam o resultado: mudança de status, rajada de rejeições
+    (muitos frames sem caixa numa janela) ou confiança baixa sustentada
+  - disparado um gatilho, uma thread espera `pos_gatilho_s` e grava o
+    conteúdo do anel numa sessão comprimida (eventos/*.ses.gz), reproduzível
+    com --replay
+
+A thread de despejo lê o anel enquanto ele continua sendo escrito: cada
+posição tem um número de sequência, conferido depois da cópia; se o escritor
+alcançou a posição durante a leitura, o frame é pulado (não corrompido).
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+from sessao import GravadorSessao
+
+DEPTH_SCALE_SIMULACAO = 0.001   # sem z16 de origem, os metros são convertidos com essa escala
+
+
+def _log_nulo(_msg: str) -> None:
+    pass
+
+
+class AnelPreGatilho:
+    """Últimos `capacidade` frames z16 (+ cor reduzida) em memória fixa, alocada no 1º frame."""
+
+    def __init__(self, capacidade: int, escala_cor: float = 0.0):
+        self.capacidade = capacidade
+        self.escala_cor = escala_cor
+        self.escritos = 0
+        self.depth_scale = DEPTH_SCALE_SIMULACAO
+        self._depth: Optional[np.ndarray] = None
+        self._cor: Optional[np.ndarray] = None
+        self._metros_z16: Optional[np.ndarray] = None   # rascunho da conversão metros → z16
+        self._ts = np.zeros(capacidade, dtype=np.float64)
+        self._fn = np.zeros(capacidade, dtype=np.int64)
+        self._seq = np.full(capacidade, -1, dtype=np.int64)
+
+    def _alocar(self, altura: int, largura: int, com_cor: bool) -> None:
+        self._depth = np.zeros((self.capacidade, altura, largura), dtype=np.uint16)
+        self._metros_z16 = np.empty((altura, largura), dtype=np.float32)
+        if com_cor and self.escala_cor > 0:
+            ch = max(1, int(round(altura * self.escala_cor)))
+            cw = max(1, int(round(largura * self.escala_cor)))
+            self._cor = np.zeros((self.capacidade, ch, cw, 3), dtype=np.uint8)
+
+    @property
+    def forma(self):
+        return None if self._depth is None else self._depth.shape[1:]
+
+    @property
+    def forma_cor(self):
+        return None if self._cor is None else self._cor.shape[1:3]
+
+    def gravar(self, quadro) -> None:
+        z16 = quadro.depth_z16
+        origem = z16 if z16 is not None else quadro.depth_meters
+        if self._depth is None:
+            self._alocar(*origem.shape[:2], com_cor=quadro.frame_bgr is not None)
+            if z16 is not None:
+                self.depth_scale = quadro.depth_scale
+        if origem.shape[:2] != self._depth.shape[1:]:
+            return  # resolução mudou no meio da fonte: não cabe no anel
+        i = self.escritos % self.capacidade
+        self._seq[i] = -1   # em escrita
+        if z16 is not None:
+            self._depth[i] = z16
+        else:
+            np.multiply(quadro.depth_meters, 1.0 / self.depth_scale, out=self._metros_z16)
+            np.copyto(self._depth[i], self._metros_z16, casting="unsafe")
+        if self._cor is not None and quadro.frame_bgr is not None:
+            ch, cw = self._cor.shape[1:3]
+            # INTER_LINEAR: ~7x mais barato que INTER_AREA; a cor é só contexto para quem revisa o evento
+            cv2.resize(quadro.frame_bgr, (cw, ch), dst=self._cor[i], interpolation=cv2.INTER_LINEAR)
+        self._ts[i] = (quadro.t_captura or time.time()) * 1000.0
+        self._fn[i] = quadro.frame_number
+        self._seq[i] = self.escritos
+        self.escritos += 1
+
+    def copiar(self, seq: int, depth: np.ndarray, cor: Optional[np.ndarray]):
+        """Copia o frame `seq` para os buffers dados; (timestamp_ms, frame_number) ou None se já sobrescrito."""
+        i = seq % self.capacidade
+        if self._seq[i] != seq:
+            return None
+        ts, fn = float(self._ts[i]), int(self._fn[i])
+        np.copyto(depth, self._depth[i])
+        if cor is not None:
+            np.copyto(cor, self._cor[i])
+        if self._seq[i] != seq:
+            return None
+        return ts, fn
+
+
+class GatilhosDespejo:
+    """Decide, frame a frame, se algo merece despejo (motivo) ou não (None)."""
+
+    def __init__(self, cfg_gatilhos: dict):
+        self.mudanca_status = cfg_gatilhos["mudanca_status"]
+        self.rejeicoes_min = cfg_gatilhos["rajada_rejeicoes"]
+        self._rejeicoes = deque(maxlen=cfg_gatilhos["janela_rejeicoes"])
+        self.confianca_min = cfg_gatilhos["confianca_min"]
+        self.frames_baixa_confianca = cfg_gatilhos["frames_baixa_confianca"]
+        self._baixa_seguidos = 0
+        self._em_rajada = False
+
+    def avaliar(self, resultado, mudou: bool) -> Optional[str]:
+        rejeitado = not resultado.caixa_detectada and bool(resultado.motivo_rejeicao)
+        self._rejeicoes.append(rejeitado)
+        if resultado.caixa_detectada and resultado.confianca < self.confianca_min:
+            self._baixa_seguidos += 1
+        elif resultado.caixa_detectada:
+            self._baixa_seguidos = 0
+
+        if mudou and self.mudanca_status:
+            return "mudanca_status"
+        rajada = self.rejeicoes_min > 0 and sum(self._rejeicoes) >= self.rejeicoes_min
+        disparou, self._em_rajada = rajada and not self._em_rajada, rajada
+        if disparou:
+            return "rajada_rejeicoes"
+        if self.frames_baixa_confianca > 0 and self._baixa_seguidos == self.frames_baixa_confianca:
+            return "baixa_confianca"
+        return None
+
+
+class PreGatilho:
+    """Anel + gatilhos + thread de despejo de uma câmera."""
+
+    def __init__(
+        self,
+        cfg: dict,
+        camera: str = "principal",
+        log: Callable[[str], None] = _log_nulo,
+    ):
+        pg = cfg["pre_gatilho"]
+        self.fps = float(cfg["camera"]["fps"])
+        self.camera = camera
+        self.log = log
+        self.pasta = Path(__file__).parent / pg["pasta"]
+        self.pos_frames = int(round(pg["pos_gatilho_s"] * self.fps))
+        self.intervalo_minimo_s = pg["intervalo_minimo_s"]
+        self.anel = AnelPreGatilho(max(1, int(round(pg["segundos"] * self.fps))), pg["escala_cor"])
+        self.gatilhos = GatilhosDespejo(pg["gatilhos"])
+        self._pedidos: queue.Queue = queue.Queue()
+        self._t_ultimo_despejo = -float("inf")
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._loop_despejo, name=f"pre-gatilho-{camera}", daemon=True)
+        self._thread.start()
+
+    def registrar(self, quadro, resultado, mudou: bool) -> None:
+        """No caminho quente: copia o frame para o anel e avalia os gatilhos."""
+        self.gravar(quadro)
+        self.avaliar(resultado, mudou)
+
+    def gravar(self, quadro) -> None:
+        """Thread de captura (o único escritor do anel): copia o frame para o anel."""
+        self.anel.gravar(quadro)
+
+    def avaliar(self, resultado, mudou: bool) -> None:
+        """Thread de detecção: avalia os gatilhos e pede o despejo.
+
+        Com a captura à frente (fila entre as duas), o pós-gatilho conta a partir
+        do último frame capturado, não do detectado.
+        """
+        motivo = self.gatilhos.avaliar(resultado, mudou)
+        if motivo is None:
+            return
+        agora = time.monotonic()
+        if agora - self._t_ultimo_despejo < self.intervalo_minimo_s:
+            return
+        self._t_ultimo_despejo = agora
+        self._pedidos.put((motivo, self.anel.escritos, datetime.now()))
+
+    def fechar(self, timeout: float = 5.0) -> None:
+        """Encerra a thread; um despejo pendente é gravado com o que já estiver no anel."""
+        self._parar.set()
+        self._pedidos.put(None)
+        self._thread.join(timeout=timeout)
+
+    # ── Thread de despejo ────────────────────────────────────────────────────
+
+    def _loop_despejo(self) -> None:
+        while True:
+            pedido = self._pedidos.get()
+            if pedido is None:
+                return
+            motivo, seq_gatilho, quando = pedido
+            # Espera os frames pós-gatilho (ou o encerramento)
+            alvo = seq_gatilho + self.pos_frames
+            while self.anel.escritos < alvo and not self._parar.wait(1.0 / self.fps):
+                pass
+            try:
+                self._despejar(motivo, quando)
+            except Exception as e:
+                self.log(f"⚠️  Erro ao gravar despejo do pré-gatilho: {e}")
+
+    def _despejar(self, motivo: str, quando: datetime) -> None:
+        anel = self.anel
+        if anel.forma is None:
+            return
+        fim = anel.escritos
+        inicio = max(0, fim - anel.capacidade)
+        altura, largura = anel.forma
+        depth = np.empty((altura, largura), dtype=np.uint16)
+        cor = np.empty((*anel.forma_cor, 3), dtype=np.uint8) if anel.forma_cor else None
+
+        self.pasta.mkdir(exist_ok=True)
+        caminho = self.pasta / f"evento_{self.camera}_{quando:%Y%m%d_%H%M%S}_{motivo}.ses.gz"
+        gravados = 0
+        with GravadorSessao(
+            caminho, largura, altura, anel.depth_scale, self.fps, cor_shape=anel.forma_cor,
+            metadados={"motivo": motivo, "camera": self.camera, "gatilho_em": quando.isoformat()},
+        ) as gravador:
+            for seq in range(inicio, fim):
+                lido = anel.copiar(seq, depth, cor)
+                if lido is None:
+                    continue
+                ts, fn = lido
+                gravador.gravar(depth, cor, timestamp_ms=ts, frame_number=fn)
+                gravados += 1
+        self.log(f"📼 Pré-gatilho ({motivo}): {gravados} frames em {caminho.name}")
+
+
+def criar_pre_gatilho(cfg: dict, camera: str = "principal", log: Callable[[str], None] = _log_nulo) -> Optional[PreGatilho]:
+    """PreGatilho da câmera se cfg["pre_gatilho"]["ativo"], senão None."""
+    if not cfg["pre_gatilho"]["ativo"]:
+        return None
+    return PreGatilho(cfg, camera=camera, log=log)
@@ -0,0 +1,405 @@
+"""
+processo_deteccao.py — Captura + detecção em processo filho (V5)
+
+A thread da câmera, o trabalho NumPy/OpenCV e o render Tkinter disputam o
+mesmo GIL; sob carga isso aparece como travadas na GUI. Neste modo a fonte de
+captura, o DetectorCacamba e os overlays rodam em um processo filho, que
+escreve frames e resultados em um anel de multiprocessing.shared_memory.
+A GUI lê só o slot mais recente, sem pickling de arrays grandes.
+
+Anel (AnelQuadros):
+    [controle: escritos, ...][slot 0][slot 1]...[slot N-1]
+Cada slot é um registro numpy de tamanho fixo (resultado + imagens RGB já no
+tamanho de exibição). Um número de sequência por slot (seqlock) protege
+contra leituras rasgadas: o escritor o torna ímpar antes de escrever e par
+depois; o leitor copia o slot e só aceita a cópia se a sequência era par e
+não mudou durante a cópia.
+
+Mensagens pequenas (logs, mudanças de status, erros, métricas) vão por uma
+multiprocessing.Queue; comandos da GUI (delta_config, perfis, visualização) por
+outra.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from banco_eventos import RegistradorCamera, abrir_banco, descrever_fonte
+from captura import criar_fonte
+from detector_cacamba import DetectorCacamba, ResultadoDeteccao
+from metricas import ContadorQuadros, MedidorEstagios, marcar
+from overlays import desenhar_depth_colormap, desenhar_overlays_color
+from pre_gatilho import criar_pre_gatilho
+
+N_SLOTS_PADRAO   = 4
+METRICAS_S       = 1.0   # período de envio de percentis/perdas do filho para a GUI
+TENTATIVAS_LEITURA = 3
+_BYTES_CONTROLE  = 64    # cabeçalho do anel (alinhado)
+
+_DTYPE_CONTROLE = np.dtype([("escritos", "<u8")])
+
+
+def _dtype_slot(altura: int, largura: int) -> np.dtype:
+    return np.dtype([
+        ("seq", "<u8"),
+        ("numero", "<u8"),
+        ("t_captura", "<f8"),
+        ("fps", "<f4"),
+        ("timestamp", "S16"),
+        ("status", "S16"),
+        ("status_estavel", "S16"),
+        ("distancia", "<f4"),
+        ("percentual", "<f4"),
+        ("confianca", "<f4"),
+        ("caixa_detectada", "?"),
+        ("motivo_rejeicao", "S96"),
+        ("bbox", "<i4", (4,)),
+        ("tem_bbox", "?"),
+        ("tem_color", "?"),
+        ("tem_depth", "?"),
+        ("color", "u1", (altura, largura, 3)),
+        ("depth", "u1", (altura, largura, 3)),
+    ])
+
+
+def _bytes(texto: str, n: int) -> bytes:
+    return texto.encode("utf-8")[:n]
+
+
+def _texto(valor: bytes) -> str:
+    return valor.decode("utf-8", errors="ignore")
+
+
+# =============================================================================
+# ANEL EM MEMÓRIA COMPARTILHADA
+# =============================================================================
+
+class AnelQuadros:
+    """Anel de slots de tamanho fixo sobre um buffer compartilhado (um escritor, um leitor)."""
+
+    def __init__(self, buf, n_slots: int, altura: int, largura: int):
+        self.n_slots = n_slots
+        self.altura = altura
+        self.largura = largura
+        self._controle = np.ndarray((1,), dtype=_DTYPE_CONTROLE, buffer=buf)
+        self._slots = np.ndarray((n_slots,), dtype=_dtype_slot(altura, largura), buffer=buf, offset=_BYTES_CONTROLE)
+        self._seq = self._slots["seq"]
+        self._escritos = int(self._controle["escritos"][0])
+
+    @staticmethod
+    def tamanho_bytes(n_slots: int, altura: int, largura: int) -> int:
+        return _BYTES_CONTROLE + n_slots * _dtype_slot(altura, largura).itemsize
+
+    # ── Escritor (processo filho) ─────────────────────────────────────────────
+
+    def escrever(
+        self,
+        resultado: ResultadoDeteccao,
+        fps: float,
+        timestamp: str,
+        t_captura: float,
+        color_rgb: Optional[np.ndarray] = None,
+        depth_rgb: Optional[np.ndarray] = None,
+    ) -> None:
+        """Escreve no próximo slot; as imagens já devem estar em (altura, largura, 3)."""
+        numero = self._escritos + 1
+        i = self._escritos % self.n_slots
+        slots = self._slots
+        seq = int(self._seq[i])
+        self._seq[i] = seq + 1          # ímpar: escrita em andamento
+
+        slots["numero"][i] = numero
+        slots["t_captura"][i] = t_captura
+        slots["fps"][i] = fps
+        slots["timestamp"][i] = _bytes(timestamp, 16)
+        slots["status"][i] = _bytes(resultado.status, 16)
+        slots["status_estavel"][i] = _bytes(resultado.status_estavel, 16)
+        slots["distancia"][i] = resultado.distancia
+        slots["percentual"][i] = resultado.percentual
+        slots["confianca"][i] = resultado.confianca
+        slots["caixa_detectada"][i] = resultado.caixa_detectada
+        slots["motivo_rejeicao"][i] = _bytes(resultado.motivo_rejeicao, 96)
+        slots["tem_bbox"][i] = resultado.bbox is not None
+        if resultado.bbox is not None:
+            slots["bbox"][i] = resultado.bbox
+        slots["tem_color"][i] = color_rgb is not None
+        if color_rgb is not None:
+            slots["color"][i] = color_rgb
+        slots["tem_depth"][i] = depth_rgb is not None
+        if depth_rgb is not None:
+            slots["depth"][i] = depth_rgb
+
+        self._seq[i] = seq + 2          # par: slot consistente
+        self._escritos = numero
+        self._controle["escritos"][0] = numero
+
+    # ── Leitor (processo da GUI) ──────────────────────────────────────────────
+
+    def escritos(self) -> int:
+        return int(self._controle["escritos"][0])
+
+    def ler_ultimo(self, ultimo_lido: int = 0) -> Optional[dict]:
+        """Cópia do slot mais recente, ou None se não há frame novo (ou só leituras rasgadas)."""
+        k = self.escritos()
+        if k == 0 or k == ultimo_lido:
+            return None
+        i = (k - 1) % self.n_slots
+        slots = self._slots
+        for _ in range(TENTATIVAS_LEITURA):
+            s1 = int(self._seq[i])
+            if s1 & 1:
+                time.sleep(0)
+                continue
+            tem_color = bool(slots["tem_color"][i])
+            tem_depth = bool(slots["tem_depth"][i])
+            copia = {
+                "numero": int(slots["numero"][i]),
+                "t_captura": float(slots["t_captura"][i]),
+                "fps": float(slots["fps"][i]),
+                "timestamp": _texto(slots["timestamp"][i]),
+                "resultado": ResultadoDeteccao(
+                    status=_texto(slots["status"][i]),
+                    status_estavel=_texto(slots["status_estavel"][i]),
+                    distancia=float(slots["distancia"][i]),
+                    percentual=float(slots["percentual"][i]),
+                    confianca=float(slots["confianca"][i]),
+                    caixa_detectada=bool(slots["caixa_detectada"][i]),
+                    motivo_rejeicao=_texto(slots["motivo_rejeicao"][i]),
+                    bbox=tuple(int(v) for v in slots["bbox"][i]) if slots["tem_bbox"][i] else None,
+                ),
+                "frame_color": slots["color"][i].copy() if tem_color else None,
+                "frame_depth": slots["depth"][i].copy() if tem_depth else None,
+            }
+            if int(self._seq[i]) == s1:
+                return copia
+        return None
+
+
+# =============================================================================
+# PROCESSO FILHO
+# =============================================================================
+
+def _para_exibicao(frame_bgr: np.ndarray, largura: int, altura: int) -> np.ndarray:
+    """Redimensiona para o tamanho do slot e converte para RGB (o que a GUI exibe)."""
+    if frame_bgr.shape[:2] != (altura, largura):
+        frame_bgr = cv2.resize(frame_bgr, (largura, altura), interpolation=cv2.INTER_LINEAR)
+    return cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+
+
+def _executar_filho(
+    nome_shm: str,
+    n_slots: int,
+    altura: int,
+    largura: int,
+    cfg: dict,
+    fonte_kwargs: dict,
+    cmd_q,
+    evt_q,
+    stop_event,
+    pausa_event,
+    overlays: bool,
+    colormap: bool,
+    camera: str,
+) -> None:
+    """Ponto de entrada do processo filho: captura → detecção → overlays → anel."""
+
+    def log(m: str):
+        evt_q.put({"tipo": "log", "mensagem": m})
+
+    shm = shared_memory.SharedMemory(name=nome_shm)
+    anel = AnelQuadros(shm.buf, n_slots, altura, largura)
+    medidor = MedidorEstagios()
+    contador = ContadorQuadros()
+    detector = DetectorCacamba(cfg, medidor=medidor)
+    visualizacao = {"overlays": overlays, "colormap": colormap}
+
+    def atender_comandos():
+        """Entre frames e enquanto a fonte espera o próximo (ocioso)."""
+        try:
+            while True:
+                cmd = cmd_q.get_nowait()
+                if cmd.get("tipo") == "delta_config":
+                    # Mescla na `cfg` do filho (a mesma do detector), lida também pelos overlays
+                    detector.aplicar_delta(cmd["delta"], cmd["versao"])
+                elif cmd.get("tipo") == "trocar_perfil":
+                    detector.trocar_perfil(cmd["nome"], cmd["versao"])
+                elif cmd.get("tipo") == "registrar_perfis":
+                    for nome in detector.registrar_perfis(cmd["perfis"]):
+                        log(f"⚠️  Perfil '{nome}' inválido, ignorado.")
+                elif cmd.get("tipo") == "visualizacao":
+                    visualizacao["overlays"] = cmd["overlays"]
+                    visualizacao["colormap"] = cmd["colormap"]
+                elif cmd.get("tipo") == "resetar_metricas":
+                    medidor.limpar()
+                    contador.limpar()
+        except queue.Empty:
+            pass
+
+    t_metricas = time.time()
+    pre_gatilho = banco = registrador = None
+    try:
+        pre_gatilho = criar_pre_gatilho(cfg, camera=camera, log=log)
+        banco = abrir_banco(cfg, log=log)
+        if banco is not None:
+            registrador = RegistradorCamera(banco, camera, "processo", descrever_fonte(**fonte_kwargs))
+        fonte = criar_fonte(cfg, com_cor=True, log=log, medidor=medidor, contador=contador, **fonte_kwargs)
+        for quadro in fonte.quadros(stop_event, ocioso=atender_comandos, pausa=pausa_event):
+            atender_comandos()
+
+            resultado = detector.processar_quadro(quadro)
+            mudou, anterior = detector.detectou_mudanca_status(resultado.status_estavel)
+            if quadro.t_captura:
+                medidor.registrar("lat_captura_deteccao", time.time() - quadro.t_captura)
+            if mudou:
+                evt_q.put({"tipo": "mudanca", "de": anterior, "para": resultado.status_estavel,
+                           "ts": quadro.timestamp, "t": quadro.t_captura or time.time()})
+            if pre_gatilho is not None:
+                pre_gatilho.registrar(quadro, resultado, mudou)
+            if registrador is not None:
+                registrador.registrar(resultado, mudou, anterior, quadro.t_captura or None)
+
+            color_rgb = depth_rgb = None
+            if visualizacao["overlays"] and quadro.frame_bgr is not None:
+                t = time.perf_counter()
+                overlay_bgr = desenhar_overlays_color(quadro.frame_bgr.copy(), resultado, cfg)
+                color_rgb = _para_exibicao(overlay_bgr, largura, altura)
+                t = marcar(medidor, "overlays", t)
+                if visualizacao["colormap"]:
+                    depth_rgb = _para_exibicao(
+                        desenhar_depth_colormap(quadro.metros(), resultado, cfg), largura, altura,
+                    )
+                    marcar(medidor, "colormap", t)
+
+            t = time.perf_counter()
+            anel.escrever(resultado, quadro.fps, quadro.timestamp, quadro.t_captura, color_rgb, depth_rgb)
+            marcar(medidor, "anel_escrita", t)
+
+            agora = time.time()
+            if agora - t_metricas >= METRICAS_S:
+                t_metricas = agora
+                evt_q.put({"tipo": "metricas", "percentis": medidor.percentis(), "perdidos": contador.resumo()})
+    except Exception as e:
+        log(f"❌ Erro captura: {e}")
+        evt_q.put({"tipo": "erro", "mensagem": str(e)})
+    finally:
+        if pre_gatilho is not None:
+            pre_gatilho.fechar()
+        if registrador is not None:
+            registrador.fechar()
+        if banco is not None:
+            banco.fechar()
+        evt_q.put({"tipo": "metricas", "percentis": medidor.percentis(), "perdidos": contador.resumo()})
+        evt_q.put({"tipo": "camera_parada"})
+        del anel
+        shm.close()
+
+
+# =============================================================================
+# LADO DA GUI
+# =============================================================================
+
+class ProcessoDeteccao:
+    """Dono do processo filho e do anel compartilhado; usado pela thread da GUI."""
+
+    def __init__(
+        self,
+        cfg: dict,
+        fonte_kwargs: dict,
+        largura: int,
+        altura: int,
+        n_slots: int = N_SLOTS_PADRAO,
+        camera: str = "principal",
+    ):
+        self.largura = largura
+        self.altura = altura
+        self.n_slots = n_slots
+        self.camera = camera
+        self._cfg = cfg
+        self._fonte_kwargs = fonte_kwargs
+        # spawn em todas as plataformas: não herda o estado do Tk nem threads do pai
+        self._ctx = mp.get_context("spawn")
+        self._cmd_q = self._ctx.Queue()
+        self._evt_q = self._ctx.Queue()
+        self._stop_event = self._ctx.Event()
+        self._pausa_event = self._ctx.Event()
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._anel: Optional[AnelQuadros] = None
+        self._processo = None
+        self._ultimo_lido = 0
+        self._pendentes: List[dict] = []
+
+    def iniciar(self, overlays: bool = True, colormap: bool = True) -> None:
+        tamanho = AnelQuadros.tamanho_bytes(self.n_slots, self.altura, self.largura)
+        self._shm = shared_memory.SharedMemory(create=True, size=tamanho)
+        self._anel = AnelQuadros(self._shm.buf, self.n_slots, self.altura, self.largura)
+        self._processo = self._ctx.Process(
+            target=_executar_filho,
+            args=(
+                self._shm.name, self.n_slots, self.altura, self.largura, self._cfg, self._fonte_kwargs,
+                self._cmd_q, self._evt_q, self._stop_event, self._pausa_event, overlays, colormap,
+                self.camera,
+            ),
+            daemon=True,
+        )
+        self._processo.start()
+
+    @property
+    def vivo(self) -> bool:
+        return self._processo is not None and self._processo.is_alive()
+
+    def pausar(self) -> None:
+        """Pausa quente: o filho continua com a câmera transmitindo, sem detectar."""
+        self._pausa_event.set()
+
+    def retomar(self) -> None:
+        self._pausa_event.clear()
+
+    def enviar(self, cmd: dict) -> None:
+        self._cmd_q.put_nowait(cmd)
+
+    def _drenar(self) -> None:
+        try:
+            while True:
+                self._pendentes.append(self._evt_q.get_nowait())
+        except queue.Empty:
+            pass
+
+    def eventos(self) -> List[dict]:
+        """Drena (sem bloquear) as mensagens pequenas enviadas pelo filho."""
+        self._drenar()
+        evs, self._pendentes = self._pendentes, []
+        return evs
+
+    def ler_ultimo(self) -> Tuple[Optional[dict], int]:
+        """(slot mais recente ou None, frames escritos e nunca lidos desde a última leitura)."""
+        if self._anel is None:
+            return None, 0
+        copia = self._anel.ler_ultimo(self._ultimo_lido)
+        if copia is None:
+            return None, 0
+        pulados = max(copia["numero"] - self._ultimo_lido - 1, 0) if self._ultimo_lido else 0
+        self._ultimo_lido = copia["numero"]
+        return copia, pulados
+
+    def parar(self, timeout: float = 3.0) -> None:
+        self._stop_event.set()
+        limite = time.time() + timeout
+        # Drenar a fila de eventos enquanto espera: o filho só termina depois de esvaziá-la
+        while self.vivo and time.time() < limite:
+            self._drenar()
+            self._processo.join(timeout=0.05)
+        if self.vivo:
+            self._processo.terminate()
+            self._processo.join(timeout=1.0)
+        self._drenar()
+        self._cmd_q.cancel_join_thread()
+        if self._shm is not None:
+            self._anel = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
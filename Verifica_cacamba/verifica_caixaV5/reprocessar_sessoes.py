@@ -0,0 +1,259 @@
+"""
+reprocessar_sessoes.py — Reprocessamento offline de sessões gravadas (V5)
+
+Roda o DetectorCacamba sobre uma ou várias sessões (.cses) sem GUI, em um
+pool de processos. Cada sessão é dividida em trechos; cada worker reprocessa
+um trecho começando `aquecimento` frames antes, para que os históricos do
+detector (status, distância, confiança) cheguem aquecidos ao primeiro frame
+do trecho. Os frames de aquecimento não entram na saída.
+
+A coluna `mudou` não sai dos workers: o tempo mínimo entre mudanças depende
+de toda a sequência anterior de status, então ela é calculada uma vez por
+sessão, depois de juntar os trechos, e bate com a de uma execução sequencial.
+
+Saída por sessão (Parquet se pyarrow estiver instalado, senão .npz):
+    <sessao>_frames      — resultado por frame
+    <sessao>_intervalos  — intervalos de status_estavel (início, fim, status)
+    <sessao>_motivos     — contagem de motivos de rejeição
+    <sessao>_confianca   — distribuição (histograma) da confiança
+
+Uso:
+    python reprocessar_sessoes.py gravacoes/*.cses --saida reprocessado/
+    python reprocessar_sessoes.py sessao.cses --workers 8 --chunk 1500
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config_manager import ConfigManager
+from detector_cacamba import DetectorCacamba
+from sessao import LeitorSessao
+
+CHUNK_PADRAO = 3000             # frames por trecho (~100 s a 30 FPS)
+BINS_CONFIANCA = np.arange(0, 105, 5)
+
+
+def frames_aquecimento(cfg: dict) -> int:
+    """Frames necessários para encher todos os históricos do detector."""
+    return max(cfg["filtros"]["tamanho_historico"], cfg["filtros"]["historico_distancias"], 30)
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+def processar_trecho(caminho: str, inicio: int, fim: int, cfg: dict) -> Dict[str, np.ndarray]:
+    """Reprocessa os frames [inicio, fim) de uma sessão; roda no processo worker."""
+    aquec = frames_aquecimento(cfg)
+    a = max(0, inicio - aquec)
+
+    colunas: Dict[str, list] = {
+        "indice": [], "timestamp_ms": [], "frame_number": [],
+        "status": [], "status_estavel": [], "distancia": [], "percentual": [],
+        "confianca": [], "caixa_detectada": [], "motivo_rejeicao": [],
+    }
+    with LeitorSessao(caminho) as leitor:
+        ts = leitor.timestamps_ms()
+        fn = leitor.frame_numbers()
+        detector = DetectorCacamba(cfg)
+        detector.resetar_historicos(agora=ts[a] / 1000.0 if len(ts) else None)
+        for i in range(a, fim):
+            r = detector.processar_frame_z16(leitor[i].depth_z16, leitor.depth_scale)
+            if i < inicio:
+                continue
+            colunas["indice"].append(i)
+            colunas["timestamp_ms"].append(ts[i])
+            colunas["frame_number"].append(fn[i])
+            colunas["status"].append(r.status)
+            colunas["status_estavel"].append(r.status_estavel)
+            colunas["distancia"].append(r.distancia)
+            colunas["percentual"].append(r.percentual)
+            colunas["confianca"].append(r.confianca)
+            colunas["caixa_detectada"].append(r.caixa_detectada)
+            colunas["motivo_rejeicao"].append(r.motivo_rejeicao)
+
+    return {
+        "indice": np.asarray(colunas["indice"], dtype=np.int64),
+        "timestamp_ms": np.asarray(colunas["timestamp_ms"], dtype=np.float64),
+        "frame_number": np.asarray(colunas["frame_number"], dtype=np.int64),
+        "status": np.asarray(colunas["status"], dtype=str),
+        "status_estavel": np.asarray(colunas["status_estavel"], dtype=str),
+        "distancia": np.asarray(colunas["distancia"], dtype=np.float32),
+        "percentual": np.asarray(colunas["percentual"], dtype=np.float32),
+        "confianca": np.asarray(colunas["confianca"], dtype=np.float32),
+        "caixa_detectada": np.asarray(colunas["caixa_detectada"], dtype=bool),
+        "motivo_rejeicao": np.asarray(colunas["motivo_rejeicao"], dtype=str),
+    }
+
+
+# =============================================================================
+# RESUMOS
+# =============================================================================
+
+def marcar_mudancas(frames: Dict[str, np.ndarray], cfg: dict) -> np.ndarray:
+    """Coluna `mudou` da sessão inteira, com o mesmo portão de tempo mínimo da execução ao vivo."""
+    ts = frames["timestamp_ms"]
+    detector = DetectorCacamba(cfg)
+    detector.resetar_historicos(agora=ts[0] / 1000.0 if len(ts) else None)
+    mudou = np.zeros(len(ts), dtype=bool)
+    for i, (status, t) in enumerate(zip(frames["status_estavel"].tolist(), (ts / 1000.0).tolist())):
+        mudou[i], _ = detector.detectou_mudanca_status(status, agora=t)
+    return mudou
+
+
+def juntar_trechos(partes: List[Dict[str, np.ndarray]], cfg: dict) -> Dict[str, np.ndarray]:
+    """Concatena os trechos de uma sessão (em ordem) e acrescenta a coluna `mudou`."""
+    frames = {k: np.concatenate([p[k] for p in partes]) for k in partes[0]}
+    frames["mudou"] = marcar_mudancas(frames, cfg)
+    return frames
+
+
+def intervalos_status(frames: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Agrupa frames consecutivos com o mesmo status_estavel em intervalos."""
+    status = frames["status_estavel"]
+    ts = frames["timestamp_ms"]
+    if len(status) == 0:
+        return {"inicio_ms": ts, "fim_ms": ts, "status": status, "n_frames": np.zeros(0, np.int64)}
+    quebras = np.flatnonzero(status[1:] != status[:-1]) + 1
+    inicios = np.concatenate(([0], quebras))
+    fins = np.concatenate((quebras, [len(status)]))
+    return {
+        "inicio_ms": ts[inicios],
+        "fim_ms": ts[fins - 1],
+        "status": status[inicios],
+        "n_frames": (fins - inicios).astype(np.int64),
+    }
+
+
+def _normalizar_motivo(motivo: str) -> str:
+    """Remove valores numéricos para agrupar motivos iguais ("cx=0.12" → "cx=#")."""
+    return re.sub(r"-?\d+(\.\d+)?", "#", motivo)
+
+
+def motivos_rejeicao(frames: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    motivos = [_normalizar_motivo(m) for m in frames["motivo_rejeicao"] if m]
+    if not motivos:
+        return {"motivo": np.zeros(0, dtype=str), "contagem": np.zeros(0, np.int64)}
+    nomes, contagem = np.unique(np.asarray(motivos, dtype=str), return_counts=True)
+    ordem = np.argsort(-contagem)
+    return {"motivo": nomes[ordem], "contagem": contagem[ordem].astype(np.int64)}
+
+
+def distribuicao_confianca(frames: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    conf = frames["confianca"][frames["caixa_detectada"]]
+    contagem, _ = np.histogram(conf, bins=BINS_CONFIANCA)
+    return {
+        "bin_inicio": BINS_CONFIANCA[:-1].astype(np.float32),
+        "bin_fim": BINS_CONFIANCA[1:].astype(np.float32),
+        "contagem": contagem.astype(np.int64),
+    }
+
+
+# =============================================================================
+# SAÍDA COLUNAR
+# =============================================================================
+
+def gravar_colunas(caminho_base: Path, colunas: Dict[str, np.ndarray]) -> Path:
+    """Grava um dicionário de colunas em Parquet (pyarrow) ou .npz (fallback)."""
+    if _HAS_PYARROW:
+        destino = caminho_base.with_suffix(".parquet")
+        tabela = pa.table({k: pa.array(v.tolist() if v.dtype.kind == "U" else v) for k, v in colunas.items()})
+        pq.write_table(tabela, destino)
+    else:
+        destino = caminho_base.with_suffix(".npz")
+        np.savez_compressed(destino, **colunas)
+    return destino
+
+
+# =============================================================================
+# ORQUESTRAÇÃO
+# =============================================================================
+
+def planejar_trechos(sessoes: List[str], chunk: int) -> List[Tuple[str, int, int]]:
+    trechos = []
+    for caminho in sessoes:
+        with LeitorSessao(caminho) as leitor:
+            n = len(leitor)
+        passo = chunk if chunk > 0 else max(n, 1)
+        for inicio in range(0, n, passo):
+            trechos.append((caminho, inicio, min(n, inicio + passo)))
+    return trechos
+
+
+def reprocessar(
+    sessoes: List[str],
+    saida: Path,
+    cfg: dict,
+    workers: int,
+    chunk: int = CHUNK_PADRAO,
+) -> Dict[str, Dict[str, np.ndarray]]:
+    trechos = planejar_trechos(sessoes, chunk)
+    saida.mkdir(parents=True, exist_ok=True)
+
+    resultados: Dict[str, List[Dict[str, np.ndarray]]] = {s: [] for s in sessoes}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(processar_trecho, c, i, f, cfg) for c, i, f in trechos]
+        for (caminho, _, _), fut in zip(trechos, futuros):
+            resultados[caminho].append(fut.result())
+
+    por_sessao = {}
+    for caminho, partes in resultados.items():
+        if not partes:
+            continue
+        frames = juntar_trechos(partes, cfg)
+        base = saida / Path(caminho).stem
+        gravar_colunas(base.with_name(base.name + "_frames"), frames)
+        gravar_colunas(base.with_name(base.name + "_intervalos"), intervalos_status(frames))
+        gravar_colunas(base.with_name(base.name + "_motivos"), motivos_rejeicao(frames))
+        gravar_colunas(base.with_name(base.name + "_confianca"), distribuicao_confianca(frames))
+        por_sessao[caminho] = frames
+    return por_sessao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprocessamento offline de sessões V5")
+    parser.add_argument("sessoes", nargs="+", help="Arquivos de sessão (.cses)")
+    parser.add_argument("--saida", default="reprocessado", help="Pasta de saída (padrão: reprocessado/)")
+    parser.add_argument("--config", default="config_v5.json", help="Arquivo de configuração do detector")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos no pool")
+    parser.add_argument(
+        "--chunk", type=int, default=CHUNK_PADRAO,
+        help=f"Frames por trecho (0 = uma sessão por worker; padrão: {CHUNK_PADRAO})",
+    )
+    args = parser.parse_args()
+
+    cfg = ConfigManager(caminho_config=args.config).cfg
+    t0 = time.perf_counter()
+    por_sessao = reprocessar(args.sessoes, Path(args.saida), cfg, args.workers, args.chunk)
+    dt = time.perf_counter() - t0
+
+    total = 0
+    for caminho, frames in por_sessao.items():
+        n = len(frames["indice"])
+        total += n
+        mudancas = int(frames["mudou"].sum())
+        print(f"  {Path(caminho).name}: {n} frames, {mudancas} mudanças de status")
+    formato = "parquet" if _HAS_PYARROW else "npz"
+    print(f"✅ {total} frames em {dt:.1f}s ({total / max(dt, 1e-6):.0f} frames/s, "
+          f"{args.workers} workers) → {args.saida}/ [{formato}]")
+
+
+if __name__ == "__main__":
+    main()
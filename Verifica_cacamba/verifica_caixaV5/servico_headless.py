@@ -0,0 +1,331 @@
+"""
+servico_headless.py — Modo serviço do detector V5 (sem Tkinter, sem PIL)
+
+Para unidades de borda sem display: captura, filtros de profundidade e
+DetectorCacamba rodam no processo principal, uma thread por câmera da seção
+"cameras" (ou uma só, sem a seção); não há overlays, colormap nem conversões
+RGB. Resultados vão para:
+  - log (console + logs/servico_v5.log)
+  - histórico CSV em historico/ (1 registro por intervalo + cada mudança de
+    status), um arquivo por câmera
+  - servidor web local, se habilitado na config (só /status e /ws, da primeira
+    câmera; sem vídeo)
+
+Edições no config_v5.json são aplicadas com o serviço rodando: a thread
+principal repassa a cada câmera o delta da sua config, aplicado entre frames.
+Encerrado por Ctrl+C ou SIGTERM.
+"""
+
+import copy
+import csv
+import logging
+import queue
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from alertas import Alerta, DespachanteAlertas
+from banco_eventos import RegistradorCamera, abrir_banco, descrever_fonte
+from captura import criar_fonte, enumerar_dispositivos
+from config_compilada import ConfigInvalida
+from config_manager import SECOES_SEM_DELTA, ConfigManager, calcular_delta
+from detector_cacamba import DetectorCacamba, ResultadoDeteccao
+from metricas import ContadorQuadros, MedidorEstagios
+from pre_gatilho import criar_pre_gatilho
+from servidor_web import criar_servidor
+
+INTERVALO_HISTORICO_S = 1.0    # período de gravação de registros no CSV
+INTERVALO_DELTAS_S    = 0.05   # a thread principal confere edições da config nesse período
+CAMERA_UNICA          = "principal"  # id da câmera quando não há seção "cameras"
+LOG_ARQUIVO_MAX_BYTES = 5_000_000  # logs/servico_v5.log é rotacionado nesse tamanho...
+LOG_ARQUIVO_BACKUPS   = 5          # ...mantendo servico_v5.log.1 … .5
+CAMPOS_HISTORICO = ["timestamp", "status", "distancia_m", "percentual", "confianca", "fps", "mudanca"]
+
+
+def _configurar_log(pasta: Path) -> logging.Logger:
+    pasta.mkdir(exist_ok=True)
+    logger = logging.getLogger("cacamba.v5.servico")
+    if not logger.handlers:
+        fmt = logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S")
+        arquivo = RotatingFileHandler(
+            pasta / "servico_v5.log", maxBytes=LOG_ARQUIVO_MAX_BYTES, backupCount=LOG_ARQUIVO_BACKUPS, encoding="utf-8",
+        )
+        for handler in (logging.StreamHandler(), arquivo):
+            handler.setFormatter(fmt)
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    return logger
+
+
+@dataclass
+class CameraServico:
+    """Uma câmera do serviço: sua thread de captura + detecção e o que ela grava."""
+
+    id: str
+    nome: str
+    serial: Optional[str] = None
+    cfg: dict = field(default_factory=dict)   # cópia do serviço (global + sobrescritas), base dos deltas
+    cmd_queue: queue.Queue = field(default_factory=queue.Queue)
+    medidor: MedidorEstagios = field(default_factory=MedidorEstagios)
+    contador: ContadorQuadros = field(default_factory=ContadorQuadros)
+    thread: Optional[threading.Thread] = None
+    frames: int = 0
+    mudancas: int = 0
+
+
+class ServicoHeadless:
+    """Uma thread de captura + detecção por câmera configurada, sem interface gráfica."""
+
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        simulate: bool = False,
+        replay: Optional[str] = None,
+        replay_modo: str = "tempo_real",
+        replay_fator: float = 1.0,
+        gravar: Optional[str] = None,
+    ):
+        self.cm = config_manager
+        self.simulate = simulate
+        self.replay = replay
+        self.replay_modo = replay_modo
+        self.replay_fator = replay_fator
+        self.gravar = gravar
+
+        base = Path(__file__).parent
+        self.log = _configurar_log(base / "logs")
+        self._pasta_historico = base / "historico"
+        self._stop_event = threading.Event()
+        # Deltas do config_v5.json editado por fora (thread do observador → thread principal)
+        self._deltas: queue.Queue = queue.Queue()
+        self._cameras: Dict[str, CameraServico] = self._montar_cameras()
+        self._servidor = None
+        self._banco = None
+
+    def parar(self, *_args) -> None:
+        self._stop_event.set()
+
+    # ── Câmeras ───────────────────────────────────────────────────────────────
+
+    def _montar_cameras(self) -> Dict[str, CameraServico]:
+        """Uma câmera por entrada de "cameras" (como a GUI); sem entradas (ou em replay), uma só."""
+        if self.replay:
+            return {CAMERA_UNICA: CameraServico(CAMERA_UNICA, "Replay", cfg=self.cm.cfg_camera())}
+        cameras: Dict[str, CameraServico] = {}
+        for entrada in self.cm.listar_cameras():
+            serial = str(entrada["serial"])
+            cameras[serial] = CameraServico(serial, entrada.get("nome") or serial, serial, cfg=self.cm.cfg_camera(serial))
+        if not cameras:
+            cameras[CAMERA_UNICA] = CameraServico(CAMERA_UNICA, "Câmera", cfg=self.cm.cfg_camera())
+        return cameras
+
+    def _cameras_conectadas(self) -> List[CameraServico]:
+        """Câmeras configuradas cujo serial está conectado; avisa sobre ausentes e extras."""
+        cameras = list(self._cameras.values())
+        if self.simulate or self.replay or not self.cm.listar_cameras():
+            return cameras
+        conectados = {serial for serial, _ in enumerar_dispositivos()}
+        for cam in cameras:
+            if cam.serial not in conectados:
+                self.log.warning(f"⚠️  Câmera '{cam.nome}' ({cam.serial}) não encontrada.")
+        for serial in sorted(conectados - {cam.serial for cam in cameras}):
+            self.log.info(f"ℹ️  RealSense {serial} conectada, mas fora da seção 'cameras'.")
+        return [cam for cam in cameras if cam.serial in conectados]
+
+    def _com_sufixo(self, caminho: Path, cam: CameraServico) -> Path:
+        """Com várias câmeras, cada uma grava em <arquivo>_<serial>.<ext>."""
+        if cam.serial is None or len(self._cameras) < 2:
+            return caminho
+        return caminho.with_name(f"{caminho.stem}_{cam.serial}{caminho.suffix}")
+
+    # ── Thread principal ─────────────────────────────────────────────────────
+
+    def executar(self) -> None:
+        cfg = self.cm.cfg
+        cameras = self._cameras_conectadas()
+        if not cameras:
+            self.log.error("❌ Nenhuma das câmeras configuradas está conectada.")
+            return
+
+        self._pasta_historico.mkdir(exist_ok=True)
+        inicio = f"{datetime.now():%Y%m%d_%H%M%S}"
+        self._servidor = criar_servidor(cfg, log=self.log.info)
+        if self._servidor is not None:
+            self._servidor.iniciar()
+        self._alertas = DespachanteAlertas(cfg, log=self.log.warning)
+        self._banco = abrir_banco(cfg, log=self.log.warning)
+        self.cm.observar(self._deltas.put)
+
+        t_inicio = time.time()
+        for cam in cameras:
+            nome_csv = self._com_sufixo(self._pasta_historico / f"historico_{inicio}.csv", cam)
+            # O detector mescla deltas na sua config: cópia própria da thread, nunca cam.cfg nem cm.cfg
+            cam.thread = threading.Thread(
+                target=self._loop_camera, args=(cam, copy.deepcopy(cam.cfg), nome_csv),
+                name=f"camera-{cam.id}", daemon=True,
+            )
+            cam.thread.start()
+        self.log.info(f"Serviço V5 iniciado (headless): {len(cameras)} câmera(s).")
+
+        try:
+            # Até Ctrl+C/SIGTERM ou todas as fontes acabarem (ex: fim do replay)
+            while any(cam.thread.is_alive() for cam in cameras):
+                self._aplicar_deltas()
+                if self._stop_event.wait(INTERVALO_DELTAS_S):
+                    break
+        finally:
+            self._stop_event.set()
+            for cam in cameras:
+                cam.thread.join(timeout=5.0)
+            self.cm.parar_observacao()
+            self._alertas.parar()
+            if self._banco is not None:
+                self._banco.fechar()
+            if self._servidor is not None:
+                self._servidor.parar()
+            self._resumo(cameras, max(time.time() - t_inicio, 1e-6))
+
+    def _resumo(self, cameras: List[CameraServico], dt: float) -> None:
+        frames = sum(cam.frames for cam in cameras)
+        mudancas = sum(cam.mudancas for cam in cameras)
+        self.log.info(f"✅ Serviço parado: {frames} frames em {dt:.0f}s ({frames / dt:.1f} FPS), {mudancas} mudanças.")
+        for cam in cameras:
+            p = cam.contador.perdidos
+            self.log.info(
+                f"   [{cam.nome}] {cam.frames} frames, {cam.mudancas} mudanças · "
+                f"perdidos USB {p['usb']} · filtros {p['filtros']}"
+            )
+            for estagio, p in cam.medidor.percentis().items():
+                self.log.info(
+                    f"   ⏱ {estagio:<20} p50={p['p50']:.2f}ms p95={p['p95']:.2f}ms p99={p['p99']:.2f}ms"
+                )
+
+    def _aplicar_deltas(self) -> None:
+        """Aplica as edições do arquivo de config e repassa a cada câmera só o que mudou na sua config."""
+        while True:
+            try:
+                delta = self._deltas.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self.cm.aplicar(delta)
+            except ConfigInvalida as e:
+                self.log.warning(f"⚠️  Config alterada com valores inválidos, ignorada: {e}")
+                continue
+            self._alertas.configurar(self.cm.cfg)
+            versao = self.cm.versao
+            for cam in self._cameras.values():
+                nova = self.cm.cfg_camera(cam.serial)
+                efetivo = {s: v for s, v in calcular_delta(cam.cfg, nova).items() if s not in SECOES_SEM_DELTA}
+                cam.cfg = nova
+                if efetivo:
+                    cam.cmd_queue.put({"delta": efetivo, "versao": versao})
+            self.log.info(f"📝 Config recarregada (versão {versao}): {', '.join(delta)}")
+
+    # ── Thread de cada câmera ────────────────────────────────────────────────
+
+    def _loop_camera(self, cam: CameraServico, cfg: dict, nome_csv: Path) -> None:
+        """Captura + detecção de uma câmera; deltas de config chegam pelo cmd_queue, entre frames."""
+        def log(msg: str) -> None:
+            self.log.info(f"[{cam.nome}] {msg}")
+
+        detector = DetectorCacamba(cfg, medidor=cam.medidor)
+        pre_gatilho = registrador = None
+        try:
+            fonte = criar_fonte(
+                cfg,
+                simulate=self.simulate,
+                replay=self.replay,
+                replay_modo=self.replay_modo,
+                replay_fator=self.replay_fator,
+                gravar=str(self._com_sufixo(Path(self.gravar), cam)) if self.gravar else None,
+                com_cor=False,
+                log=log,
+                medidor=cam.medidor,
+                contador=cam.contador,
+                serial=cam.serial,
+            )
+            log(f"Fonte: {fonte.nome}. Histórico: {nome_csv.name}")
+            pre_gatilho = criar_pre_gatilho(cfg, camera=cam.id, log=log)
+            if self._banco is not None:
+                fonte_desc = descrever_fonte(self.simulate, self.replay, cam.serial)
+                registrador = RegistradorCamera(self._banco, cam.id, "headless", fonte_desc)
+            # Só a primeira câmera vai para o servidor web (ele expõe um status só)
+            servidor = self._servidor if cam.id == next(iter(self._cameras)) else None
+
+            t_ultimo_registro = 0.0
+            with open(nome_csv, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=CAMPOS_HISTORICO)
+                writer.writeheader()
+                for quadro in fonte.quadros(self._stop_event, ocioso=lambda: self._atender_comandos(cam, detector)):
+                    self._atender_comandos(cam, detector)
+                    resultado = detector.processar_quadro(quadro)
+                    mudou, anterior = detector.detectou_mudanca_status(resultado.status_estavel)
+                    if quadro.t_captura:
+                        cam.medidor.registrar("lat_captura_deteccao", time.time() - quadro.t_captura)
+                    if pre_gatilho is not None:
+                        pre_gatilho.registrar(quadro, resultado, mudou)
+                    if registrador is not None:
+                        registrador.registrar(resultado, mudou, anterior, quadro.t_captura or None)
+                    cam.frames += 1
+                    if servidor is not None:
+                        servidor.publicar_resultado(resultado, quadro.fps, quadro.timestamp)
+
+                    agora = time.time()
+                    if mudou:
+                        cam.mudancas += 1
+                        log(f"🔔 Mudança de status: {anterior or 'N/A'} → {resultado.status_estavel}")
+                        self._alertas.publicar(Alerta(
+                            "mudanca_status", cam.id, para=resultado.status_estavel, de=anterior, ts=quadro.timestamp,
+                        ))
+                    if mudou or agora - t_ultimo_registro >= INTERVALO_HISTORICO_S:
+                        t_ultimo_registro = agora
+                        writer.writerow(self._registro(quadro.timestamp, resultado, quadro.fps, mudou))
+                        f.flush()
+        except Exception as e:
+            self.log.error(f"❌ [{cam.nome}] Erro captura: {e}")
+            self._alertas.publicar(Alerta("alarme", cam.id, mensagem=f"{cam.nome}: erro captura: {e}",
+                                          ts=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        finally:
+            if pre_gatilho is not None:
+                pre_gatilho.fechar()
+            if registrador is not None:
+                registrador.fechar()
+
+    def _atender_comandos(self, cam: CameraServico, detector: DetectorCacamba) -> None:
+        """Aplica no detector os deltas de config repassados pela thread principal."""
+        while True:
+            try:
+                cmd = cam.cmd_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                detector.aplicar_delta(cmd["delta"], cmd["versao"])
+            except ConfigInvalida as e:
+                self.log.warning(f"⚠️  [{cam.nome}] Config inválida com as sobrescritas da câmera, ignorada: {e}")
+
+    @staticmethod
+    def _registro(ts: str, resultado: ResultadoDeteccao, fps: float, mudou: bool) -> dict:
+        return {
+            "timestamp": ts,
+            "status": resultado.status_estavel,
+            "distancia_m": round(resultado.distancia, 4),
+            "percentual": round(resultado.percentual, 1),
+            "confianca": round(resultado.confianca, 1),
+            "fps": round(fps, 1),
+            "mudanca": int(mudou),
+        }
+
+
+def executar_headless(config_manager: ConfigManager, **kwargs) -> None:
+    servico = ServicoHeadless(config_manager, **kwargs)
+    signal.signal(signal.SIGTERM, servico.parar)
+    try:
+        servico.executar()
+    except KeyboardInterrupt:
+        servico.parar()
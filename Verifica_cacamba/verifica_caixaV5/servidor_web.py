@@ -0,0 +1,348 @@
+"""
+servidor_web.py — Servidor HTTP/WebSocket/MJPEG embutido (V5)
+
+Só stdlib (asyncio) + OpenCV para o JPEG. Roda em uma thread própria com seu
+event loop; a thread da câmera só chama `publicar_resultado()` e
+`publicar_frame()`, que apenas guardam referências (sem I/O, sem encode).
+
+Rotas:
+    GET /             página simples (vídeo + status ao vivo)
+    GET /status       último ResultadoDeteccao em JSON
+    GET /ws           WebSocket: envia o status a cada mudança de status_estavel
+    GET /video.mjpeg  vídeo com overlays (multipart/x-mixed-replace)
+
+Encode uma vez, distribui para todos: a cada tick do MJPEG o frame mais recente
+é codificado no máximo uma vez e os mesmos bytes vão para todos os clientes.
+Cada cliente tem um slot de tamanho 1 — cliente lento perde frames, nunca
+acumula fila.
+"""
+
+import asyncio
+import base64
+import dataclasses
+import hashlib
+import json
+import struct
+import threading
+from typing import Optional, Set
+
+import cv2
+import numpy as np
+
+from detector_cacamba import ResultadoDeteccao
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+_BOUNDARY = "frame"
+
+_PAGINA = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Cacamba V5</title></head>
+<body style="background:#1e1e1e;color:#eee;font-family:Arial">
+<h2>Sistema de Detecção V5</h2>
+<div id="status" style="font-size:28px;font-weight:bold">AGUARDANDO</div>
+<div id="detalhe"></div>
+<img src="/video.mjpeg" style="max-width:100%;margin-top:8px">
+<script>
+const ws = new WebSocket(`ws://${location.host}/ws`);
+ws.onmessage = (ev) => {
+  const r = JSON.parse(ev.data);
+  document.getElementById("status").textContent = r.status_estavel;
+  document.getElementById("detalhe").textContent =
+    `${r.distancia.toFixed(3)} m  ${r.percentual.toFixed(0)}%  conf ${r.confianca.toFixed(0)}%`;
+};
+</script>
+</body></html>
+"""
+
+
+class _SlotCliente:
+    """Fila de tamanho 1 que descarta o item antigo em vez de bloquear."""
+
+    def __init__(self):
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.descartados = 0
+
+    def oferecer(self, item) -> None:
+        if self.fila.full():
+            try:
+                self.fila.get_nowait()
+                self.descartados += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.fila.put_nowait(item)
+
+
+class ServidorStatus:
+    """Servidor local de status/vídeo; thread-safe para os métodos publicar_*."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        porta: int = 8765,
+        fps_mjpeg: float = 10.0,
+        qualidade_jpeg: int = 80,
+        log=print,
+    ):
+        self.host = host
+        self.porta = porta
+        self.periodo_mjpeg = 1.0 / max(fps_mjpeg, 0.1)
+        self.qualidade_jpeg = int(qualidade_jpeg)
+        self.log = log
+
+        self._lock = threading.Lock()
+        self._resultado = ResultadoDeteccao()
+        self._fps = 0.0
+        self._timestamp = ""
+        self._frame: Optional[np.ndarray] = None
+        self._seq_frame = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._parar: Optional[asyncio.Event] = None
+        self._pronto = threading.Event()
+        self._clientes_video: Set[_SlotCliente] = set()
+        self._clientes_ws: Set[_SlotCliente] = set()
+        self.frames_codificados = 0
+
+    # ── API para a thread da câmera ───────────────────────────────────────────
+
+    def tem_clientes_video(self) -> bool:
+        return bool(self._clientes_video)
+
+    def publicar_resultado(self, resultado: ResultadoDeteccao, fps: float, timestamp: str) -> None:
+        with self._lock:
+            mudou = resultado.status_estavel != self._resultado.status_estavel
+            self._resultado = resultado
+            self._fps = fps
+            self._timestamp = timestamp
+        if mudou and self._loop is not None and self._clientes_ws:
+            self._loop.call_soon_threadsafe(self._notificar_ws)
+
+    def publicar_frame(self, frame_bgr: np.ndarray) -> None:
+        """Guarda a referência do frame com overlays; o encode acontece no tick do MJPEG."""
+        with self._lock:
+            self._frame = frame_bgr
+            self._seq_frame += 1
+
+    # ── Ciclo de vida ─────────────────────────────────────────────────────────
+
+    def iniciar(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+        self._thread.start()
+        self._pronto.wait(timeout=5.0)
+
+    def parar(self) -> None:
+        if self._loop is not None and self._parar is not None:
+            self._loop.call_soon_threadsafe(self._parar.set)
+        if self._thread is not None:
+            self._thread.join(timeout=3.0)
+        self._thread = None
+
+    def _executar(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._principal())
+        except Exception as e:
+            self.log(f"❌ Servidor web: {e}")
+        finally:
+            self._pronto.set()
+            self._loop.close()
+            self._loop = None
+
+    async def _principal(self) -> None:
+        self._parar = asyncio.Event()
+        servidor = await asyncio.start_server(self._atender, self.host, self.porta)
+        # Porta 0 = escolhida pelo SO (útil em testes)
+        self.porta = servidor.sockets[0].getsockname()[1]
+        self.log(f"🌐 Servidor web em http://{self.host}:{self.porta}/")
+        self._pronto.set()
+        tarefa_mjpeg = asyncio.create_task(self._loop_mjpeg())
+        async with servidor:
+            await self._parar.wait()
+            # Encerrar conexões abertas (MJPEG/WebSocket) antes de fechar o servidor
+            pendentes = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in pendentes:
+                t.cancel()
+            await asyncio.gather(*pendentes, return_exceptions=True)
+
+    # ── Estado serializado ────────────────────────────────────────────────────
+
+    def _status_json(self) -> bytes:
+        with self._lock:
+            dados = dataclasses.asdict(self._resultado)
+            dados["fps"] = round(self._fps, 1)
+            dados["timestamp"] = self._timestamp
+        return json.dumps(dados, ensure_ascii=False).encode("utf-8")
+
+    def _notificar_ws(self) -> None:
+        payload = self._status_json()
+        for slot in list(self._clientes_ws):
+            slot.oferecer(payload)
+
+    # ── MJPEG: encode uma vez por tick, fan-out para todos ────────────────────
+
+    async def _loop_mjpeg(self) -> None:
+        ultimo_seq = 0
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.periodo_mjpeg)
+            if not self._clientes_video:
+                continue
+            with self._lock:
+                frame, seq = self._frame, self._seq_frame
+            if frame is None or seq == ultimo_seq:
+                continue
+            ultimo_seq = seq
+            # imencode libera o GIL; rodar fora do loop não bloqueia os clientes
+            ok, buf = await loop.run_in_executor(
+                None, cv2.imencode, ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.qualidade_jpeg]
+            )
+            if not ok:
+                continue
+            self.frames_codificados += 1
+            jpeg = buf.tobytes()
+            parte = (
+                f"--{_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                f"Content-Length: {len(jpeg)}\r\n\r\n"
+            ).encode("ascii") + jpeg + b"\r\n"
+            for slot in list(self._clientes_video):
+                slot.oferecer(parte)
+
+    # ── HTTP ──────────────────────────────────────────────────────────────────
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            linha = await reader.readline()
+            partes = linha.decode("latin-1").split()
+            if len(partes) < 2:
+                return
+            metodo, caminho = partes[0], partes[1].split("?", 1)[0]
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = h.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+
+            if metodo != "GET":
+                await self._responder(writer, 405, "text/plain", b"Method Not Allowed")
+            elif caminho == "/":
+                await self._responder(writer, 200, "text/html; charset=utf-8", _PAGINA.encode("utf-8"))
+            elif caminho == "/status":
+                await self._responder(writer, 200, "application/json", self._status_json())
+            elif caminho == "/video.mjpeg":
+                await self._servir_mjpeg(writer)
+            elif caminho == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._servir_ws(reader, writer, headers)
+            else:
+                await self._responder(writer, 404, "text/plain", b"Not Found")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # servidor parando; termina a conexão sem propagar
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _responder(writer: asyncio.StreamWriter, codigo: int, tipo: str, corpo: bytes) -> None:
+        motivos = {200: "OK", 404: "Not Found", 405: "Method Not Allowed"}
+        writer.write(
+            f"HTTP/1.1 {codigo} {motivos.get(codigo, '')}\r\n"
+            f"Content-Type: {tipo}\r\nContent-Length: {len(corpo)}\r\n"
+            f"Cache-Control: no-store\r\nConnection: close\r\n\r\n".encode("latin-1") + corpo
+        )
+        await writer.drain()
+
+    async def _servir_mjpeg(self, writer: asyncio.StreamWriter) -> None:
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary={_BOUNDARY}\r\n"
+            f"Cache-Control: no-store\r\nConnection: close\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        slot = _SlotCliente()
+        self._clientes_video.add(slot)
+        try:
+            while True:
+                parte = await slot.fila.get()
+                writer.write(parte)
+                await writer.drain()
+        finally:
+            self._clientes_video.discard(slot)
+
+    # ── WebSocket (RFC 6455, só o necessário: texto servidor → cliente) ───────
+
+    async def _servir_ws(self, reader, writer, headers: dict) -> None:
+        chave = headers.get("sec-websocket-key", "").encode("latin-1")
+        aceite = base64.b64encode(hashlib.sha1(chave + _WS_GUID).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {aceite}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+        slot = _SlotCliente()
+        slot.fila = asyncio.Queue(maxsize=16)
+        self._clientes_ws.add(slot)
+        slot.oferecer(self._status_json())  # estado atual ao conectar
+        leitura = asyncio.create_task(self._ler_ws_ate_fechar(reader, writer))
+        try:
+            while not leitura.done():
+                obter = asyncio.create_task(slot.fila.get())
+                await asyncio.wait({obter, leitura}, return_when=asyncio.FIRST_COMPLETED)
+                if not obter.done():
+                    obter.cancel()
+                    break
+                writer.write(_quadro_ws(0x1, obter.result()))
+                await writer.drain()
+        finally:
+            self._clientes_ws.discard(slot)
+            leitura.cancel()
+
+    @staticmethod
+    async def _ler_ws_ate_fechar(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Consome frames do cliente; responde ping e retorna no close."""
+        while True:
+            b1, b2 = await reader.readexactly(2)
+            opcode = b1 & 0x0F
+            n = b2 & 0x7F
+            if n == 126:
+                (n,) = struct.unpack(">H", await reader.readexactly(2))
+            elif n == 127:
+                (n,) = struct.unpack(">Q", await reader.readexactly(8))
+            mascara = await reader.readexactly(4) if b2 & 0x80 else b"\0\0\0\0"
+            dados = bytes(c ^ mascara[i % 4] for i, c in enumerate(await reader.readexactly(n)))
+            if opcode == 0x8:
+                writer.write(_quadro_ws(0x8, b""))
+                return
+            if opcode == 0x9:
+                writer.write(_quadro_ws(0xA, dados))
+
+
+def _quadro_ws(opcode: int, payload: bytes) -> bytes:
+    n = len(payload)
+    if n < 126:
+        cabecalho = struct.pack(">BB", 0x80 | opcode, n)
+    elif n < 65536:
+        cabecalho = struct.pack(">BBH", 0x80 | opcode, 126, n)
+    else:
+        cabecalho = struct.pack(">BBQ", 0x80 | opcode, 127, n)
+    return cabecalho + payload
+
+
+def criar_servidor(cfg: dict, log=print) -> Optional[ServidorStatus]:
+    """Cria o servidor a partir da seção "servidor" da config (None se desabilitado)."""
+    sc = cfg.get("servidor", {})
+    if not sc.get("habilitado", False):
+        return None
+    return ServidorStatus(
+        host=sc.get("host", "127.0.0.1"),
+        porta=int(sc.get("porta", 8765)),
+        fps_mjpeg=float(sc.get("fps_mjpeg", 10)),
+        qualidade_jpeg=int(sc.get("qualidade_jpeg", 80)),
+        log=log,
+    )
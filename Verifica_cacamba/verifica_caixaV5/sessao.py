@@ -0,0 +1,288 @@
+"""
+sessao.py — Gravação e leitura de sessões de profundidade (V5)
+
+Sem GUI, sem RealSense. Formato binário simples, pensado para memory-map:
+
+    [magic 8 bytes][uint32 tamanho do header][header JSON][registros...]
+
+Cada registro tem tamanho fixo (timestamp, número do frame, depth z16 e,
+opcionalmente, color BGR), o que permite acesso aleatório por índice via
+np.memmap sem decodificar o arquivo inteiro.
+
+Arquivos terminados em .gz são o mesmo formato comprimido com gzip (usado nos
+despejos curtos do pré-gatilho); a leitura descomprime tudo em memória.
+"""
+
+import gzip
+import json
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+MAGIC = b"CACSES01"
+_FMT_TAMANHO_HEADER = "<I"
+
+MODOS_REPRODUCAO = ("tempo_real", "fator", "maximo")
+INTERVALO_OCIOSO_S = 0.005   # enquanto espera o próximo frame, `ocioso` roda a cada 5 ms
+NIVEL_GZIP = 3                # .gz: compressão rápida (z16 comprime bem já nos níveis baixos)
+
+
+def _dtype_registro(altura: int, largura: int, cor_shape: Optional[Tuple[int, int]]) -> np.dtype:
+    campos = [
+        ("timestamp_ms", "<f8"),
+        ("frame_number", "<i8"),
+        ("depth", "<u2", (altura, largura)),
+    ]
+    if cor_shape is not None:
+        campos.append(("color", "u1", (cor_shape[0], cor_shape[1], 3)))
+    return np.dtype(campos)
+
+
+@dataclass
+class FrameGravado:
+    indice: int
+    timestamp_ms: float
+    frame_number: int
+    depth_z16: np.ndarray
+    color_bgr: Optional[np.ndarray] = None
+
+
+# =============================================================================
+# GRAVAÇÃO
+# =============================================================================
+
+class GravadorSessao:
+    """Grava frames z16 (já filtrados) em registros de tamanho fixo."""
+
+    def __init__(
+        self,
+        caminho,
+        largura: int,
+        altura: int,
+        depth_scale: float,
+        fps: float,
+        cor_shape: Optional[Tuple[int, int]] = None,
+        metadados: Optional[dict] = None,
+    ):
+        self.caminho = Path(caminho)
+        self._dtype = _dtype_registro(altura, largura, cor_shape)
+        self._registro = np.zeros(1, dtype=self._dtype)
+        self._n = 0
+        header = {
+            "largura": largura,
+            "altura": altura,
+            "depth_scale": depth_scale,
+            "fps": fps,
+            "cor_shape": list(cor_shape) if cor_shape else None,
+            "criado_em": time.time(),
+            **(metadados or {}),
+        }
+        dados = json.dumps(header).encode("utf-8")
+        if self.caminho.suffix == ".gz":
+            self._arquivo = gzip.open(self.caminho, "wb", compresslevel=NIVEL_GZIP)
+        else:
+            self._arquivo = open(self.caminho, "wb")
+        self._arquivo.write(MAGIC)
+        self._arquivo.write(struct.pack(_FMT_TAMANHO_HEADER, len(dados)))
+        self._arquivo.write(dados)
+
+    def gravar(
+        self,
+        depth_z16: np.ndarray,
+        frame_bgr: Optional[np.ndarray] = None,
+        timestamp_ms: Optional[float] = None,
+        frame_number: int = -1,
+    ) -> None:
+        reg = self._registro[0]
+        reg["timestamp_ms"] = time.time() * 1000.0 if timestamp_ms is None else timestamp_ms
+        reg["frame_number"] = frame_number
+        reg["depth"] = depth_z16
+        if "color" in self._dtype.names and frame_bgr is not None:
+            ch, cw = self._dtype["color"].shape[:2]
+            if frame_bgr.shape[:2] != (ch, cw):
+                frame_bgr = cv2.resize(frame_bgr, (cw, ch))
+            reg["color"] = frame_bgr
+        self._arquivo.write(self._registro.tobytes())
+        self._n += 1
+
+    @property
+    def frames_gravados(self) -> int:
+        return self._n
+
+    def fechar(self) -> None:
+        if not self._arquivo.closed:
+            self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+# =============================================================================
+# LEITURA
+# =============================================================================
+
+class LeitorSessao:
+    """Acesso aleatório, por índice, a uma sessão gravada (memory-mapped)."""
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        comprimido = self.caminho.suffix == ".gz"
+        with (gzip.open if comprimido else open)(self.caminho, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Arquivo não é uma sessão V5: {self.caminho}")
+            (n_header,) = struct.unpack(_FMT_TAMANHO_HEADER, f.read(4))
+            self.header: dict = json.loads(f.read(n_header).decode("utf-8"))
+            resto = f.read() if comprimido else None
+        offset = len(MAGIC) + 4 + n_header
+
+        cor_shape = self.header.get("cor_shape")
+        self.largura: int = self.header["largura"]
+        self.altura: int = self.header["altura"]
+        self.depth_scale: float = self.header["depth_scale"]
+        self.fps: float = self.header.get("fps", 30.0)
+        self._dtype = _dtype_registro(self.altura, self.largura, tuple(cor_shape) if cor_shape else None)
+
+        # Registros incompletos no fim (gravação interrompida) são ignorados
+        if resto is not None:
+            n = len(resto) // self._dtype.itemsize
+            self._mm = np.frombuffer(resto, dtype=self._dtype, count=n)
+        else:
+            n = (self.caminho.stat().st_size - offset) // self._dtype.itemsize
+            self._mm = (
+                np.memmap(self.caminho, dtype=self._dtype, mode="r", offset=offset, shape=(n,))
+                if n > 0
+                else np.zeros(0, dtype=self._dtype)
+            )
+
+    @property
+    def tem_cor(self) -> bool:
+        return "color" in self._dtype.names
+
+    def __len__(self) -> int:
+        return len(self._mm)
+
+    def __getitem__(self, indice: int) -> FrameGravado:
+        mm = self._mm
+        return FrameGravado(
+            indice=int(indice) % max(len(self), 1),
+            timestamp_ms=float(mm["timestamp_ms"][indice]),
+            frame_number=int(mm["frame_number"][indice]),
+            depth_z16=mm["depth"][indice],
+            color_bgr=mm["color"][indice] if self.tem_cor else None,
+        )
+
+    def timestamps_ms(self) -> np.ndarray:
+        return np.asarray(self._mm["timestamp_ms"])
+
+    def frame_numbers(self) -> np.ndarray:
+        return np.asarray(self._mm["frame_number"])
+
+    def depth_metros(self, indice: int) -> np.ndarray:
+        return self._mm["depth"][indice].astype(np.float32) * np.float32(self.depth_scale)
+
+    def fechar(self) -> None:
+        # Só solta a referência: fechar o mmap explicitamente invalidaria views
+        # (FrameGravado.depth_z16) ainda em uso; o SO libera quando o GC coletar.
+        self._mm = np.zeros(0, dtype=self._dtype)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+# =============================================================================
+# REPRODUÇÃO CADENCIADA
+# =============================================================================
+
+def esperar(segundos: float, stop_event=None, ocioso: Optional[Callable[[], None]] = None) -> bool:
+    """
+    Espera `segundos` chamando `ocioso()` a cada INTERVALO_OCIOSO_S (ex: atender
+    comandos entre frames). Retorna True se o stop_event foi sinalizado.
+    """
+    if ocioso is None:
+        if stop_event is not None:
+            return stop_event.wait(segundos)
+        time.sleep(segundos)
+        return False
+    fim = time.perf_counter() + segundos
+    while True:
+        ocioso()
+        restante = fim - time.perf_counter()
+        if restante <= 0:
+            return stop_event is not None and stop_event.is_set()
+        fatia = min(restante, INTERVALO_OCIOSO_S)
+        if stop_event is not None:
+            if stop_event.wait(fatia):
+                return True
+        else:
+            time.sleep(fatia)
+
+
+def reproduzir(
+    leitor: LeitorSessao,
+    modo: str = "tempo_real",
+    fator: float = 1.0,
+    stop_event=None,
+    inicio: int = 0,
+    ocioso: Optional[Callable[[], None]] = None,
+    pausa=None,
+) -> Iterator[Tuple[FrameGravado, float]]:
+    """
+    Itera os frames da sessão respeitando o modo de cadência.
+
+    Modos:
+        tempo_real — intervalo entre frames igual ao gravado
+        fator      — intervalo gravado dividido por `fator` (2.0 = 2x mais rápido)
+        maximo     — sem espera, o mais rápido possível
+
+    `ocioso` é chamado durante as esperas entre frames (ver `esperar`). Com o
+    Event `pausa` sinalizado a reprodução congela; o tempo parado não conta
+    na cadência.
+
+    Yields:
+        (frame, fps) — fps é a taxa efetiva de entrega do frame.
+    """
+    if modo not in MODOS_REPRODUCAO:
+        raise ValueError(f"Modo de reprodução inválido: {modo}")
+    if modo == "tempo_real":
+        fator = 1.0
+    fator = max(fator, 1e-6)
+
+    ts = leitor.timestamps_ms()
+    t_ref = time.perf_counter()
+    t_prev = t_ref
+    for i in range(inicio, len(leitor)):
+        if stop_event is not None and stop_event.is_set():
+            return
+        if pausa is not None and pausa.is_set():
+            t_pausa = time.perf_counter()
+            while pausa.is_set():
+                if esperar(INTERVALO_OCIOSO_S, stop_event, ocioso):
+                    return
+            t_ref += time.perf_counter() - t_pausa
+            t_prev = time.perf_counter()
+        if modo != "maximo":
+            alvo = t_ref + (ts[i] - ts[inicio]) / 1000.0 / fator
+            espera = alvo - time.perf_counter()
+            if espera > 0 and esperar(espera, stop_event, ocioso):
+                return
+        t_now = time.perf_counter()
+        fps = 1.0 / max(t_now - t_prev, 1e-6)
+        t_prev = t_now
+        yield leitor[i], fps
+
+
+def frame_bgr_de_depth(depth_z16: np.ndarray) -> np.ndarray:
+    """Imagem BGR de fallback para sessões gravadas sem stream color."""
+    norm = cv2.normalize(depth_z16, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    return cv2.cvtColor(norm, cv2.COLOR_GRAY2BGR)
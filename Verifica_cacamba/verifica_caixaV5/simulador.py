@@ -0,0 +1,368 @@
+"""
+simulador.py — Gerador de cenas sintéticas por cenário (V5)
+
+Sem GUI. Gera pares (frame BGR, depth em metros) determinísticos para o
+--simulate e para benchmarks, em qualquer resolução/FPS (ex: 1280x720 a 90 FPS).
+
+Cenários (CENARIOS):
+    senoide          — nível oscila entre vazia e cheia (comportamento antigo)
+    enchendo         — nível sobe de vazia a cheia
+    esvaziando       — nível desce de cheia a vazia
+    pilha_irregular  — superfície com montes (conteúdo desnivelado)
+    pessoa           — pessoa se debruça sobre a cacamba e sai
+    poeira           — buracos (depth 0) e poeira perto da lente
+    inclinacao       — câmera inclinada: gradiente de profundidade no quadro
+    multiplas        — três cacambas lado a lado, níveis defasados
+
+Um roteiro (seção "simulacao" da config) encadeia cenários em loop:
+    "roteiro": [{"cenario": "enchendo", "duracao_s": 20},
+                {"cenario": "pessoa", "duracao_s": 6},
+                {"cenario": "inclinacao", "duracao_s": 15, "inclinacao_graus": 8}]
+
+Tudo o que não muda de frame para frame (chão com inclinação, bordas das
+cacambas, montes, pessoa, imagem de fundo, ruído e speckle) é calculado uma
+vez por geometria e reaproveitado; cada frame só combina fatias prontas.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+N_CAMADAS_RUIDO = 8          # campos de ruído pré-gerados, usados em rodízio
+RUIDO_STD_M     = 0.004
+AMPLITUDE_PILHA_M = 0.08
+PROF_PESSOA_M   = 0.40       # tronco/braço mais perto da câmera que a cacamba
+PROF_POEIRA_M   = 0.25
+POEIRA_MAX      = 0.20       # fração máxima de pixels com speckle
+MARGEM_STATUS_M = 0.02       # nível 0/1 fica além dos limites de vazia/cheia
+FOV_H_GRAUS     = 87.0       # campo de visão horizontal da D4xx (para a inclinação)
+
+
+@dataclass
+class EstadoCena:
+    """Estado instantâneo da cena; níveis de 0 (vazia) a 1 (cheia), um por cacamba."""
+
+    niveis: Tuple[float, ...] = (0.5,)
+    irregularidade: float = 0.0   # 0..1, peso dos montes
+    pessoa: float = 0.0           # 0..1, quanto a pessoa entrou no quadro
+    poeira: float = 0.0           # fração de pixels com speckle
+
+
+@dataclass
+class Cenario:
+    nome: str
+    duracao_s: float
+    estado: Callable[[float, float], EstadoCena]   # (t no passo, duração) → estado
+    inclinacao_graus: float = 0.0
+    n_cacambas: int = 1
+
+
+def _senoide(t: float, fase: float = 0.0) -> float:
+    return 0.5 + 0.5 * math.sin(t * 0.25 + fase)
+
+
+CENARIOS: Dict[str, Cenario] = {c.nome: c for c in (
+    Cenario("senoide", 2 * math.pi / 0.25, lambda t, d: EstadoCena((_senoide(t),))),
+    Cenario("enchendo", 20.0, lambda t, d: EstadoCena((t / d,))),
+    Cenario("esvaziando", 20.0, lambda t, d: EstadoCena((1.0 - t / d,))),
+    Cenario("pilha_irregular", 20.0, lambda t, d: EstadoCena((0.3 + 0.4 * t / d,), irregularidade=1.0)),
+    Cenario("pessoa", 6.0, lambda t, d: EstadoCena((0.4,), pessoa=math.sin(math.pi * t / d))),
+    Cenario("poeira", 15.0, lambda t, d: EstadoCena((_senoide(t),), poeira=0.08)),
+    Cenario("inclinacao", 2 * math.pi / 0.25, lambda t, d: EstadoCena((_senoide(t),)), inclinacao_graus=6.0),
+    Cenario(
+        "multiplas", 2 * math.pi / 0.25,
+        lambda t, d: EstadoCena((_senoide(t, 2.0), _senoide(t), _senoide(t, 4.0))),
+        n_cacambas=3,
+    ),
+)}
+
+
+@dataclass
+class PassoRoteiro:
+    cenario: Cenario
+    duracao_s: float
+    inclinacao_graus: float
+    n_cacambas: int
+
+
+# Chaves aceitas em cada passo do roteiro
+CHAVES_PASSO = ("cenario", "duracao_s", "inclinacao_graus", "n_cacambas")
+INCLINACAO_MAX_GRAUS = 45.0
+
+
+def validar_roteiro(cenario, roteiro) -> List[str]:
+    """Lista de problemas de simulacao.cenario e simulacao.roteiro (vazia se válidos)."""
+    erros: List[str] = []
+    if cenario not in CENARIOS:
+        erros.append(f"simulacao.cenario={cenario!r} desconhecido (use {', '.join(CENARIOS)})")
+    if not isinstance(roteiro, list):
+        return erros + [f"simulacao.roteiro={roteiro!r} não é lista"]
+    for i, passo in enumerate(roteiro):
+        onde = f"simulacao.roteiro[{i}]"
+        if not isinstance(passo, dict):
+            erros.append(f"{onde} não é objeto")
+            continue
+        for chave in passo:
+            if chave not in CHAVES_PASSO:
+                erros.append(f"{onde}: chave {chave!r} não existe (use {', '.join(CHAVES_PASSO)})")
+        nome = passo.get("cenario", "senoide")
+        if nome not in CENARIOS:
+            erros.append(f"{onde}.cenario={nome!r} desconhecido")
+        duracao = passo.get("duracao_s", 1.0)
+        if isinstance(duracao, bool) or not isinstance(duracao, (int, float)) or duracao <= 0:
+            erros.append(f"{onde}.duracao_s={duracao!r} não é número > 0")
+        inclinacao = passo.get("inclinacao_graus", 0.0)
+        if (isinstance(inclinacao, bool) or not isinstance(inclinacao, (int, float))
+                or abs(inclinacao) >= INCLINACAO_MAX_GRAUS):
+            erros.append(f"{onde}.inclinacao_graus={inclinacao!r} fora de (-{INCLINACAO_MAX_GRAUS:g}, {INCLINACAO_MAX_GRAUS:g})")
+        n = passo.get("n_cacambas", 1)
+        if isinstance(n, bool) or not isinstance(n, int) or n < 1:
+            erros.append(f"{onde}.n_cacambas={n!r} não é inteiro >= 1")
+    return erros
+
+
+# =============================================================================
+# CAMADAS PRÉ-CALCULADAS
+# =============================================================================
+
+@dataclass
+class _Geometria:
+    """Camadas fixas de uma (resolução, inclinação, nº de cacambas)."""
+
+    largura: int
+    altura: int
+    fator_inclinacao: np.ndarray           # (h, w) multiplicador de profundidade
+    fundo: np.ndarray                      # (h, w) depth do chão + bordas, já inclinado
+    cacambas: List[Tuple[slice, slice]]    # interior de cada cacamba (ys, xs)
+    pilha: List[np.ndarray]                # montes normalizados [-1, 1] por cacamba
+    pessoa: np.ndarray                     # (h, w) bool, pessoa totalmente dentro
+    cor_base: np.ndarray                   # (h, w, 3) BGR
+    ruido: np.ndarray                      # (N, h, w) float32
+    speckle: np.ndarray                    # (N, k) int32 índices planos em ordem aleatória
+    retangulos: List[Tuple[int, int, int, int]] = field(default_factory=list)
+
+
+def _layout_cacambas(w: int, h: int, n: int) -> List[Tuple[int, int, int, int]]:
+    if n == 1:
+        return [(int(w * 0.30), int(h * 0.28), int(w * 0.70), int(h * 0.75))]
+    passo = w / n
+    return [
+        (int(i * passo + passo * 0.12), int(h * 0.30), int((i + 1) * passo - passo * 0.12), int(h * 0.72))
+        for i in range(n)
+    ]
+
+
+def _montes(rng: np.random.Generator, h: int, w: int) -> np.ndarray:
+    """Superfície suave com alguns montes gaussianos, normalizada para [-1, 1]."""
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    sup = np.zeros((h, w), dtype=np.float32)
+    for _ in range(4):
+        cy, cx = rng.uniform(0, h), rng.uniform(0, w)
+        sy, sx = rng.uniform(0.15, 0.35) * h, rng.uniform(0.15, 0.35) * w
+        sup += rng.uniform(0.5, 1.0) * np.exp(-(((yy - cy) / sy) ** 2 + ((xx - cx) / sx) ** 2))
+    sup -= sup.min()
+    return (sup / max(float(sup.max()), 1e-6) * 2.0 - 1.0).astype(np.float32)
+
+
+def _criar_geometria(
+    largura: int, altura: int, inclinacao_graus: float, n_cacambas: int, cfg: dict, semente: int,
+) -> _Geometria:
+    w, h = largura, altura
+    rng = np.random.default_rng(semente)
+
+    # Inclinação: profundidade cresce linearmente ao longo do eixo vertical do quadro
+    meia_altura = math.tan(math.radians(FOV_H_GRAUS / 2)) * h / w
+    ys = (np.arange(h, dtype=np.float32) / max(h - 1, 1) - 0.5) * 2 * meia_altura
+    fator = 1.0 + math.tan(math.radians(inclinacao_graus)) * ys
+    fator_inclinacao = np.repeat(fator[:, None], w, axis=1).astype(np.float32)
+
+    # Chão fora do range da cacamba (como na instalação real)
+    med = cfg["medicoes"]
+    prof_chao = max(med["altura_camera_chao"], med["profundidade_max_caixa"] + 0.15)
+    fundo = (prof_chao * fator_inclinacao).astype(np.float32)
+
+    retangulos = _layout_cacambas(w, h, n_cacambas)
+    borda = np.zeros((h, w), dtype=bool)
+    cacambas, pilha = [], []
+    espessura = max(2, w // 160)
+    for x1, y1, x2, y2 in retangulos:
+        borda[y1:y2, x1:x2] = True
+        ys_, xs_ = slice(y1 + espessura, y2 - espessura), slice(x1 + espessura, x2 - espessura)
+        borda[ys_, xs_] = False
+        cacambas.append((ys_, xs_))
+        pilha.append(_montes(rng, ys_.stop - ys_.start, xs_.stop - xs_.start))
+    altura_borda = med["altura_camera_chao"] - med["altura_caixa"]
+    fundo[borda] = altura_borda * fator_inclinacao[borda]
+
+    # Pessoa: tronco (elipse) entrando pelo topo + braço estendido sobre a 1ª cacamba
+    pessoa = np.zeros((h, w), dtype=np.uint8)
+    x1, y1, x2, y2 = retangulos[0]
+    cx = (x1 + x2) // 2
+    cv2.ellipse(pessoa, (cx, 0), (w // 7, h // 4), 0, 0, 360, 1, -1)
+    cv2.rectangle(pessoa, (cx - w // 40, 0), (cx + w // 40, (y1 + y2) // 2), 1, -1)
+
+    cor_base = np.full((h, w, 3), 25, dtype=np.uint8)
+    for x1, y1, x2, y2 in retangulos:
+        cv2.rectangle(cor_base, (x1, y1), (x2, y2), (60, 60, 60), -1)
+
+    ruido = rng.normal(0, RUIDO_STD_M, (N_CAMADAS_RUIDO, h, w)).astype(np.float32)
+    # Speckle: prefixo de uma permutação aleatória; a poeira p usa os primeiros p*h*w índices
+    n_speckle = int(h * w * POEIRA_MAX)
+    speckle = np.stack([
+        rng.permutation(h * w)[:n_speckle].astype(np.int32) for _ in range(N_CAMADAS_RUIDO)
+    ])
+    return _Geometria(
+        w, h, fator_inclinacao, fundo, cacambas, pilha, pessoa.astype(bool),
+        cor_base, ruido, speckle, retangulos,
+    )
+
+
+# =============================================================================
+# SIMULADOR
+# =============================================================================
+
+class SimuladorCena:
+    """Gera frames determinísticos (mesmo índice → mesmo frame) a partir de um roteiro."""
+
+    def __init__(
+        self,
+        cfg: dict,
+        largura: int = 640,
+        altura: int = 480,
+        fps: float = 30.0,
+        roteiro: Optional[List[dict]] = None,
+        semente: int = 0,
+    ):
+        self.cfg = cfg
+        self.largura = largura
+        self.altura = altura
+        self.fps = float(fps)
+        self.semente = semente
+        self.passos = self._montar_roteiro(roteiro or [{"cenario": "senoide"}])
+        self._duracao_total = sum(p.duracao_s for p in self.passos)
+        self._geometrias: Dict[Tuple[float, int], _Geometria] = {}
+        # Camadas de todos os passos prontas antes do primeiro frame
+        for passo in self.passos:
+            self._geometria(passo)
+
+    @staticmethod
+    def _montar_roteiro(roteiro: List[dict]) -> List[PassoRoteiro]:
+        passos = []
+        for item in roteiro:
+            nome = item.get("cenario", "senoide")
+            if nome not in CENARIOS:
+                raise ValueError(f"Cenário desconhecido: {nome!r} (opções: {', '.join(CENARIOS)})")
+            c = CENARIOS[nome]
+            passos.append(PassoRoteiro(
+                c,
+                float(item.get("duracao_s", c.duracao_s)),
+                float(item.get("inclinacao_graus", c.inclinacao_graus)),
+                int(item.get("n_cacambas", c.n_cacambas)),
+            ))
+        return passos
+
+    def _geometria(self, passo: PassoRoteiro) -> _Geometria:
+        chave = (passo.inclinacao_graus, passo.n_cacambas)
+        geo = self._geometrias.get(chave)
+        if geo is None:
+            geo = self._geometrias[chave] = _criar_geometria(
+                self.largura, self.altura, passo.inclinacao_graus, passo.n_cacambas, self.cfg, self.semente,
+            )
+        return geo
+
+    def passo_em(self, t: float) -> Tuple[PassoRoteiro, float]:
+        """Passo do roteiro ativo no instante t (em loop) e o tempo decorrido dentro dele."""
+        t = t % self._duracao_total if self._duracao_total > 0 else 0.0
+        for passo in self.passos:
+            if t < passo.duracao_s:
+                return passo, t
+            t -= passo.duracao_s
+        return self.passos[-1], self.passos[-1].duracao_s
+
+    def estado_em(self, t: float) -> EstadoCena:
+        """Estado da cena no instante t (verdade de referência para avaliação)."""
+        passo, t_passo = self.passo_em(t)
+        return passo.cenario.estado(t_passo, passo.duracao_s)
+
+    def profundidade_nivel(self, nivel: float) -> float:
+        """Distância câmera → superfície (m) para um nível de 0 (vazia) a 1 (cheia)."""
+        th = self.cfg["thresholds"]
+        vazia = th["limite_vazia"] + MARGEM_STATUS_M
+        cheia = th["limite_cheia"] - MARGEM_STATUS_M
+        return vazia + (cheia - vazia) * min(max(nivel, 0.0), 1.0)
+
+    def frame(self, indice: int, com_cor: bool = True) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """Frame de número `indice` (t = indice / fps)."""
+        return self.gerar(indice / self.fps, com_cor, indice)
+
+    def gerar(
+        self, t: float, com_cor: bool = True, indice: Optional[int] = None,
+    ) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        passo, t_passo = self.passo_em(t)
+        estado = passo.cenario.estado(t_passo, passo.duracao_s)
+        geo = self._geometria(passo)
+        k = (indice if indice is not None else int(t * self.fps)) % N_CAMADAS_RUIDO
+
+        depth = geo.fundo.copy()
+        fator, ruido = geo.fator_inclinacao, geo.ruido[k]
+        profs = []
+        for i, (ys, xs) in enumerate(geo.cacambas):
+            nivel = estado.niveis[i % len(estado.niveis)]
+            prof = self.profundidade_nivel(nivel)
+            profs.append(prof)
+            sup = prof + ruido[ys, xs]
+            if estado.irregularidade > 0:
+                sup = sup + geo.pilha[i] * (AMPLITUDE_PILHA_M * estado.irregularidade)
+            depth[ys, xs] = sup * fator[ys, xs]
+
+        mascara: Optional[np.ndarray] = None
+        if estado.pessoa > 0:
+            # Entra pelo topo: no começo só a ponta do braço aparece
+            linhas = min(int(self.altura * estado.pessoa), self.altura)
+            mascara = np.zeros_like(geo.pessoa)
+            if linhas > 0:
+                mascara[:linhas] = geo.pessoa[self.altura - linhas:]
+            depth[mascara] = PROF_PESSOA_M
+
+        if estado.poeira > 0:
+            idx = geo.speckle[k]
+            n = int(min(estado.poeira, POEIRA_MAX) * self.largura * self.altura)
+            plano = depth.reshape(-1)
+            plano[idx[: n // 2]] = 0.0                  # buracos (sem retorno)
+            plano[idx[n // 2: n]] = PROF_POEIRA_M       # poeira perto da lente
+        np.clip(depth, 0.0, None, out=depth)
+
+        if not com_cor:
+            return None, depth
+
+        frame_bgr = geo.cor_base.copy()
+        p_vazia, p_cheia = self.profundidade_nivel(0.0), self.profundidade_nivel(1.0)
+        for (x1, y1, x2, y2), prof in zip(geo.retangulos, profs):
+            pct = (p_vazia - prof) / max(p_vazia - p_cheia, 1e-3)
+            fill_y = y2 - int((y2 - y1) * pct)
+            cv2.rectangle(frame_bgr, (x1, fill_y), (x2, y2), (40, 120, 40), -1)
+            cv2.rectangle(frame_bgr, (x1, y1), (x2, y2), (180, 180, 180), 2)
+        if mascara is not None:
+            frame_bgr[mascara] = (90, 110, 160)
+        escala = self.altura / 480
+        cv2.putText(frame_bgr, f"SIMULACAO {passo.cenario.nome}  t={t:.1f}s",
+                    (10, self.altura - int(15 * escala)), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.6 * escala, (0, 220, 220), max(1, int(2 * escala)))
+        return frame_bgr, depth
+
+
+def simulador_de_cfg(cfg: dict) -> SimuladorCena:
+    """SimuladorCena a partir da seção "simulacao" da config."""
+    sim = cfg.get("simulacao", {})
+    roteiro = sim.get("roteiro") or [{"cenario": sim.get("cenario", "senoide")}]
+    return SimuladorCena(
+        cfg,
+        largura=int(sim.get("largura", 640)),
+        altura=int(sim.get("altura", 480)),
+        fps=float(sim.get("fps", 30)),
+        roteiro=roteiro,
+        semente=int(sim.get("semente", 0)),
+    )
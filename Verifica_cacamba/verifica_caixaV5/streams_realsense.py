@@ -0,0 +1,188 @@
+"""
+streams_realsense.py — Escolha dos streams e do modo de profundidade da RealSense (V5)
+
+Só os streams necessários são habilitados:
+
+  - profundidade, sempre
+  - imagem para exibição (com_cor=True): color se o dispositivo tiver sensor
+    RGB, senão infravermelho (o que a GUI mostraria de qualquer jeito);
+    cfg["camera"]["stream_visual"] força "color" ou "infrared"
+  - modo headless (com_cor=False): só profundidade
+
+Com cfg["camera"]["perfil_automatico"], o modo de profundidade é escolhido
+entre os perfis que o dispositivo anuncia: o mais barato (largura × altura ×
+fps) cujo erro RMS estimado na distância do chão fica dentro de
+cfg["camera"]["precisao_alvo_mm"]. Para o detector não perceber a troca (as
+áreas mínimas/máximas são em pixels), só entram modos com fps >= o
+configurado e que, com a magnitude de decimation ajustada, dão a mesma
+resolução de saída da configuração atual.
+
+Erro RMS de profundidade (white paper de tuning das D4xx):
+
+    erro_mm = distância_mm² × subpixel / (fx_px × baseline_mm)
+"""
+
+import copy
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+try:
+    import pyrealsense2 as rs
+    _HAS_REALSENSE = True
+except ImportError:
+    _HAS_REALSENSE = False
+
+BASELINE_PADRAO_MM = 50.0    # D435/D455 ~50 mm; usado se a extrínseca IR1→IR2 não estiver disponível
+MAGNITUDE_MAX_DECIMATION = 8
+
+
+@dataclass
+class ModoDepth:
+    largura: int
+    altura: int
+    fps: int
+    fx: float                # distância focal em pixels nessa resolução
+
+    @property
+    def custo(self) -> int:
+        return self.largura * self.altura * self.fps
+
+
+@dataclass
+class PlanoStreams:
+    largura: int
+    altura: int
+    fps: int
+    visual: Optional[str] = None          # "color", "infrared" ou None (só profundidade)
+    decimacao: Optional[int] = None       # magnitude a usar no filtro decimation (None = a da config)
+    erro_mm: Optional[float] = None       # erro RMS estimado na distância do chão
+
+    def descricao(self) -> str:
+        partes = [f"depth {self.largura}x{self.altura}@{self.fps}"]
+        if self.decimacao:
+            partes.append(f"decimation {self.decimacao}")
+        if self.erro_mm is not None:
+            partes.append(f"erro ~{self.erro_mm:.1f} mm")
+        partes.append(f"+ {self.visual}" if self.visual else "(só profundidade)")
+        return " ".join(partes)
+
+
+def erro_rms_mm(distancia_m: float, fx: float, baseline_mm: float, subpixel: float) -> float:
+    z = distancia_m * 1000.0
+    return z * z * subpixel / (fx * baseline_mm)
+
+
+def magnitude_decimation(cadeia: List[dict]) -> Optional[int]:
+    """Magnitude do primeiro decimation ativo da cadeia; None se não há decimation."""
+    for filtro in cadeia:
+        if filtro.get("tipo") == "decimation" and filtro.get("ativo", True):
+            return int(filtro.get("opcoes", {}).get("filter_magnitude", 2))
+    return None
+
+
+def cadeia_com_decimacao(cadeia: List[dict], magnitude: int) -> List[dict]:
+    """Cópia da cadeia com a magnitude do primeiro decimation ativo trocada."""
+    cadeia = copy.deepcopy(cadeia)
+    for filtro in cadeia:
+        if filtro.get("tipo") == "decimation" and filtro.get("ativo", True):
+            filtro.setdefault("opcoes", {})["filter_magnitude"] = magnitude
+            break
+    return cadeia
+
+
+def escolher_modo(
+    modos: List[ModoDepth], cfg: dict, baseline_mm: float,
+) -> Optional[Tuple[ModoDepth, int, float]]:
+    """
+    (modo, magnitude de decimation, erro_mm) mais barato dentro da precisão
+    alvo; se nenhum atinge, o mais preciso. None se nenhum modo é compatível
+    com a resolução de saída/fps configurados.
+    """
+    cam = cfg["camera"]
+    m_cfg = magnitude_decimation(cam["filtros_realsense"])
+    saida = (cam["resolucao_largura"] // (m_cfg or 1), cam["resolucao_altura"] // (m_cfg or 1))
+    magnitudes = range(1, MAGNITUDE_MAX_DECIMATION + 1) if m_cfg else (1,)
+    distancia = cfg["medicoes"]["altura_camera_chao"]
+
+    candidatos = []
+    for modo in modos:
+        if modo.fps < cam["fps"]:
+            continue
+        for m in magnitudes:
+            if modo.largura % m or modo.altura % m or (modo.largura // m, modo.altura // m) != saida:
+                continue
+            candidatos.append((modo, m, erro_rms_mm(distancia, modo.fx, baseline_mm, cam["subpixel"])))
+    if not candidatos:
+        return None
+    dentro = [c for c in candidatos if c[2] <= cam["precisao_alvo_mm"]]
+    if dentro:
+        return min(dentro, key=lambda c: (c[0].custo, c[2]))
+    return min(candidatos, key=lambda c: (c[2], c[0].custo))
+
+
+# =============================================================================
+# DISPOSITIVO
+# =============================================================================
+
+def _dispositivo(serial: Optional[str]):
+    for dev in rs.context().query_devices():
+        if serial is None or dev.get_info(rs.camera_info.serial_number) == str(serial):
+            return dev
+    raise RuntimeError(f"RealSense {serial} não encontrada." if serial else "Nenhuma RealSense conectada.")
+
+
+def sondar_dispositivo(serial: Optional[str] = None) -> Tuple[List[ModoDepth], float, bool]:
+    """(modos z16 anunciados, baseline em mm, tem sensor color) do dispositivo."""
+    dev = _dispositivo(serial)
+    modos = {}
+    ir: dict = {}
+    tem_cor = False
+    for sensor in dev.query_sensors():
+        for p in sensor.get_stream_profiles():
+            tipo = p.stream_type()
+            if tipo == rs.stream.color:
+                tem_cor = True
+            elif tipo == rs.stream.depth and p.format() == rs.format.z16:
+                vp = p.as_video_stream_profile()
+                chave = (vp.width(), vp.height(), vp.fps())
+                if chave not in modos:
+                    modos[chave] = ModoDepth(*chave, fx=vp.get_intrinsics().fx)
+            elif tipo == rs.stream.infrared:
+                ir.setdefault(p.stream_index(), p)
+    baseline = BASELINE_PADRAO_MM
+    if 1 in ir and 2 in ir:
+        try:
+            baseline = abs(ir[1].get_extrinsics_to(ir[2]).translation[0]) * 1000.0 or BASELINE_PADRAO_MM
+        except RuntimeError:
+            pass
+    return list(modos.values()), baseline, tem_cor
+
+
+def planejar_streams(cfg: dict, serial: Optional[str] = None, com_cor: bool = True,
+                     log=lambda _m: None) -> PlanoStreams:
+    """Streams a habilitar e modo de profundidade para esta câmera/modo."""
+    cam = cfg["camera"]
+    plano = PlanoStreams(cam["resolucao_largura"], cam["resolucao_altura"], cam["fps"])
+    modos, baseline, tem_cor = sondar_dispositivo(serial)
+
+    if com_cor:
+        visual = cam["stream_visual"]
+        if visual == "auto" or (visual == "color" and not tem_cor):
+            visual = "color" if tem_cor else "infrared"
+        plano.visual = visual
+
+    configurado = next((m for m in modos if (m.largura, m.altura, m.fps) == (plano.largura, plano.altura, plano.fps)), None)
+    if configurado is not None:
+        plano.erro_mm = erro_rms_mm(cfg["medicoes"]["altura_camera_chao"], configurado.fx, baseline, cam["subpixel"])
+    if cam["perfil_automatico"]:
+        escolha = escolher_modo(modos, cfg, baseline)
+        if escolha is None:
+            log("⚠️  Nenhum modo de profundidade compatível com a resolução configurada; usando a configuração.")
+        else:
+            modo, magnitude, erro = escolha
+            plano.largura, plano.altura, plano.fps, plano.erro_mm = modo.largura, modo.altura, modo.fps, erro
+            if magnitude_decimation(cam["filtros_realsense"]) is not None:
+                plano.decimacao = magnitude
+            if erro > cam["precisao_alvo_mm"]:
+                log(f"⚠️  Nenhum modo atinge {cam['precisao_alvo_mm']} mm; usando o mais preciso.")
+    return plano
@@ -0,0 +1,91 @@
+"""Despachante de alertas: agrupamento, limite de taxa e fila cheia."""
+
+import copy
+import threading
+import time
+
+import pytest
+
+import alertas
+from alertas import Alerta, DespachanteAlertas
+from config_manager import CONFIG_PADRAO
+
+
+class SaidaColetora:
+    nome = "coletora"
+
+    def __init__(self, liberar=None):
+        self.recebidos = []
+        self.liberar = liberar
+
+    def enviar(self, alerta):
+        if self.liberar is not None:
+            self.liberar.wait(5.0)
+        self.recebidos.append((time.monotonic(), alerta))
+
+
+@pytest.fixture
+def cfg():
+    cfg = copy.deepcopy(CONFIG_PADRAO)
+    cfg["alertas"].update(intervalo_minimo_s=0.4, janela_agrupamento_s=0.0, capacidade_fila=4)
+    return cfg
+
+
+def _despachante(cfg, monkeypatch, saida):
+    monkeypatch.setattr(alertas, "montar_saidas", lambda _cfg: [saida])
+    return DespachanteAlertas(cfg)
+
+
+def _mudanca(camera, de, para):
+    return Alerta("mudanca_status", camera, para=para, de=de)
+
+
+def test_rajada_vira_um_envio_por_intervalo(cfg, monkeypatch):
+    saida = SaidaColetora()
+    desp = _despachante(cfg, monkeypatch, saida)
+    try:
+        desp.publicar(_mudanca("cam1", "VAZIA", "PARCIAL"))
+        time.sleep(0.1)
+        for de, para in [("PARCIAL", "CHEIA"), ("CHEIA", "PARCIAL"), ("PARCIAL", "CHEIA")]:
+            desp.publicar(_mudanca("cam1", de, para))
+        desp.publicar(_mudanca("cam2", "VAZIA", "CHEIA"))
+        limite = time.monotonic() + 5
+        while len(saida.recebidos) < 3 and time.monotonic() < limite:
+            time.sleep(0.02)
+    finally:
+        desp.parar()
+    cam1 = [(t, a) for t, a in saida.recebidos if a.camera == "cam1"]
+    assert [(a.de, a.para, a.quantidade) for _, a in cam1] == [("VAZIA", "PARCIAL", 1), ("PARCIAL", "CHEIA", 3)]
+    assert cam1[1][0] - cam1[0][0] >= 0.4 - 0.02
+    # Outra câmera não espera o limite da primeira
+    assert [a.quantidade for _, a in saida.recebidos if a.camera == "cam2"] == [1]
+
+
+def test_parar_envia_pendentes_sem_esperar(cfg, monkeypatch):
+    cfg["alertas"]["intervalo_minimo_s"] = 60.0
+    saida = SaidaColetora()
+    desp = _despachante(cfg, monkeypatch, saida)
+    desp.publicar(_mudanca("cam1", "VAZIA", "PARCIAL"))
+    time.sleep(0.1)
+    desp.publicar(_mudanca("cam1", "PARCIAL", "CHEIA"))
+    t = time.monotonic()
+    desp.parar()
+    assert time.monotonic() - t < 2.0
+    assert [a.para for _, a in saida.recebidos] == ["PARCIAL", "CHEIA"]
+
+
+def test_fila_cheia_descarta_sem_bloquear(cfg, monkeypatch):
+    liberar = threading.Event()
+    saida = SaidaColetora(liberar)
+    desp = _despachante(cfg, monkeypatch, saida)
+    try:
+        desp.publicar(Alerta("alarme", "cam1"))      # a thread fica presa nesta saída
+        time.sleep(0.1)
+        t = time.monotonic()
+        for _ in range(10):
+            desp.publicar(Alerta("alarme", "cam1"))
+        assert time.monotonic() - t < 0.1
+        assert desp.descartados == 10 - cfg["alertas"]["capacidade_fila"]
+    finally:
+        liberar.set()
+        desp.parar()
@@ -0,0 +1,126 @@
+"""Avaliação de variantes: rótulos, latência de transição, Pareto e ajuste da config."""
+
+import copy
+import json
+import sys
+
+import numpy as np
+import pytest
+
+import avaliar_configuracoes as av
+from config_manager import CONFIG_PADRAO
+
+
+@pytest.fixture
+def cfg():
+    return copy.deepcopy(CONFIG_PADRAO)
+
+
+# ── Rótulos ──────────────────────────────────────────────────────────────────
+
+def test_rotulos_por_intervalo(tmp_path):
+    caminho = tmp_path / "s.rotulos.json"
+    caminho.write_text(json.dumps({"intervalos": [
+        {"inicio_ms": 0, "fim_ms": 200, "status": "VAZIA", "percentual": 5},
+        {"inicio_ms": 300, "fim_ms": 700, "status": "PARCIAL", "percentual_inicio": 10, "percentual_fim": 90},
+    ]}), encoding="utf-8")
+    ts = np.arange(0, 800, 100, dtype=np.float64)
+    status, pct = av.carregar_rotulos(caminho, ts)
+    assert list(status) == ["VAZIA", "VAZIA", "", "PARCIAL", "PARCIAL", "PARCIAL", "PARCIAL", ""]
+    np.testing.assert_allclose(pct, [5, 5, np.nan, 10, 30, 50, 70, np.nan])
+
+
+def test_rotulos_por_frame_pegam_o_mais_proximo(tmp_path):
+    caminho = tmp_path / "s.rotulos.json"
+    caminho.write_text(json.dumps({"frames": {
+        "timestamp_ms": [0, 100, 200], "status": ["VAZIA", "PARCIAL", "CHEIA"], "percentual": [0, 50, 100],
+    }}), encoding="utf-8")
+    status, pct = av.carregar_rotulos(caminho, np.array([-10.0, 40.0, 60.0, 149.0, 151.0, 500.0]))
+    assert list(status) == ["VAZIA", "VAZIA", "PARCIAL", "PARCIAL", "CHEIA", "CHEIA"]
+    np.testing.assert_array_equal(pct, [0, 0, 50, 50, 100, 100])
+
+
+# ── Latência de transição ────────────────────────────────────────────────────
+
+def test_latencia_e_transicao_perdida():
+    ts = np.arange(10, dtype=np.float64) * 100.0
+    rotulo = np.array(["VAZIA", "VAZIA", "PARCIAL", "PARCIAL", "PARCIAL", "", "CHEIA", "CHEIA", "VAZIA", "VAZIA"])
+    previsto = np.array(["VAZIA", "VAZIA", "VAZIA", "VAZIA", "PARCIAL", "PARCIAL", "PARCIAL", "PARCIAL", "PARCIAL", "VAZIA"])
+    latencias, perdidas = av.latencias_transicao(ts, rotulo, previsto)
+    # PARCIAL em 2 → acerto em 4 (0.2 s); CHEIA em 6 nunca chega antes de 8; VAZIA em 8 → acerto em 9
+    assert latencias == pytest.approx([0.2, 0.1])
+    assert perdidas == 1
+    assert av.latencias_transicao(ts, np.full(10, ""), previsto) == ([], 0)
+
+
+# ── Pareto ───────────────────────────────────────────────────────────────────
+
+def _linha(nome, fps, acuracia, erro, latencia, perdidas):
+    return {"variante": nome, "fps": fps, "acuracia_status": acuracia, "erro_preenchimento": erro,
+            "latencia_media_s": latencia, "transicoes_perdidas": perdidas}
+
+
+def test_fronteira_de_pareto():
+    linhas = [
+        _linha("base", 100, 95.0, 2.0, 0.20, 0),
+        _linha("rapida", 400, 90.0, 3.0, 0.25, 0),
+        _linha("pior_que_base", 90, 94.0, 2.5, 0.20, 0),   # dominada por base
+        _linha("igual_a_base", 100, 95.0, 2.0, 0.20, 0),   # empate não domina
+        _linha("sem_leitura", 500, float("nan"), float("nan"), float("nan"), 3),
+        _linha("perde_uma", 100, 95.0, 2.0, 0.20, 1),      # dominada por base
+    ]
+    av.marcar_pareto(linhas)
+    assert [l["variante"] for l in linhas if l["pareto"]] == ["base", "rapida", "igual_a_base", "sem_leitura"]
+
+
+# ── Preparação das variantes ─────────────────────────────────────────────────
+
+def test_recorte_reescreve_a_roi_nas_coordenadas_do_recorte(cfg):
+    ajustada, transformar = av.preparar(av.Variante("rec", recorte=0.05), cfg, 640, 480)
+    x1, y1, x2, y2 = av._janela_recorte(cfg, 0.05, 640, 480)
+    assert transformar(np.zeros((480, 640), np.float32)).shape == (y2 - y1, x2 - x1)
+    roi, w, h = ajustada["roi"], x2 - x1, y2 - y1
+    # Mesmos pixels do frame original
+    assert (x1 + roi["x_min"] * w, x1 + roi["x_max"] * w) == pytest.approx((0.25 * 640, 0.75 * 640))
+    assert (y1 + roi["y_min"] * h, y1 + roi["y_max"] * h) == pytest.approx((0.25 * 480, 0.85 * 480))
+    assert ajustada["medicoes"]["area_minima_pixels"] == cfg["medicoes"]["area_minima_pixels"]
+    assert cfg["roi"]["x_min"] == 0.25
+
+
+def test_piramide_e_escala_ajustam_areas_e_kernel(cfg):
+    variante = av.Variante("p1", piramide=1, escala=0.5, cfg={"filtros": {"kernel_morph_size": 9}})
+    ajustada, transformar = av.preparar(variante, cfg, 640, 480)
+    assert transformar(np.zeros((480, 640), np.float32)).shape == (120, 160)
+    assert ajustada["medicoes"]["area_minima_pixels"] == 5000 // 16
+    assert ajustada["protecao_pessoa"]["area_maxima_corpo"] == 200000 // 16
+    assert ajustada["filtros"]["kernel_morph_size"] == 2          # round(9 / 4)
+    assert ajustada["roi"] == cfg["roi"]
+    assert cfg["filtros"]["kernel_morph_size"] == 5
+
+
+# ── Sessão sintética ─────────────────────────────────────────────────────────
+
+def test_latencia_em_sessao_sintetica(tmp_path, cfg, monkeypatch, capsys):
+    sessao = tmp_path / "sint.cses"
+    monkeypatch.setattr(sys, "argv", [
+        "avaliar_configuracoes.py", "--gerar-sintetica", str(sessao),
+        "--roteiro", "enchendo", "esvaziando", "--resolucao", "320x240",
+    ])
+    av.main()
+    assert "sint.rotulos.json" in capsys.readouterr().out
+
+    with open(av.caminho_rotulos(sessao), encoding="utf-8") as f:
+        rotulos = np.array(json.load(f)["frames"]["status"])
+    mudancas = np.flatnonzero(rotulos[1:] != rotulos[:-1]) + 1
+    esperadas = int((mudancas >= av.frames_aquecimento(cfg)).sum())
+    assert esperadas >= 4
+
+    linhas = av.avaliar([str(sessao)], [av.Variante("base"), av.Variante("piramide1", piramide=1)],
+                        cfg, progresso=lambda _m: None)
+    fps = cfg["camera"]["fps"]
+    for linha in linhas:
+        assert (linha["transicoes"], linha["transicoes_perdidas"]) == (esperadas, 0)
+        # status_estavel = maioria do histórico: atrasa no máximo um histórico inteiro
+        assert 0 < linha["latencia_media_s"] <= linha["latencia_p95_s"] <= cfg["filtros"]["tamanho_historico"] / fps
+        assert linha["acuracia_status"] > 95
+    assert any(l["pareto"] for l in linhas)
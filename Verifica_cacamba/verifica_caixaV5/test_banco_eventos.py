@@ -0,0 +1,66 @@
+"""Banco de eventos: o que o registrador enfileira volta nas consultas."""
+
+import pytest
+
+from banco_eventos import BancoEventos, ConsultaEventos, RegistradorCamera, categoria_motivo
+from detector_cacamba import ResultadoDeteccao
+
+T0 = 1_700_000_040.0     # início de um minuto
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return tmp_path / "historico" / "eventos.db"
+
+
+def _resultado(status, motivo=""):
+    if motivo:
+        return ResultadoDeteccao(status=status, status_estavel=status, motivo_rejeicao=motivo)
+    return ResultadoDeteccao(status=status, status_estavel=status, distancia=1.0, percentual=50.0,
+                             confianca=0.8, caixa_detectada=True)
+
+
+def _sessao(banco, camera="cam1"):
+    reg = RegistradorCamera(banco, camera, "gui", "simulacao")
+    roteiro = [("VAZIA", True), ("VAZIA", False), ("CHEIA", True), ("CHEIA", False), ("VAZIA", True)]
+    for k, (status, mudou) in enumerate(roteiro):
+        reg.registrar(_resultado(status), mudou, None, t=T0 + 10 * k)
+    # Próximo minuto: duas rejeições da mesma categoria
+    reg.registrar(_resultado("VAZIA", "Fora da ROI horizontal (cx=0.91)"), False, None, t=T0 + 61)
+    reg.registrar(_resultado("VAZIA", "Fora da ROI horizontal (cx=0.12)"), False, None, t=T0 + 62)
+    reg.fechar()
+    return reg
+
+
+def test_ida_e_volta_pelas_consultas(caminho):
+    banco = BancoEventos(caminho, intervalo_lote_s=0.05)
+    reg = _sessao(banco)
+    _sessao(banco, camera="cam2")
+    banco.fechar()
+    assert banco.gravadas > 0
+
+    with ConsultaEventos(caminho) as q:
+        assert q.ciclos(T0) == 2
+        assert q.ciclos(T0, camera="cam1") == 1
+        assert q.ciclos(T0 + 30) == 0
+        assert [m[3] for m in q.mudancas(T0, camera="cam1")] == ["VAZIA", "CHEIA", "VAZIA"]
+        assert q.motivos_rejeicao(T0) == [("Fora da ROI horizontal (cx=#)", 4)]
+        minutos = q.minutos(T0, camera="cam1")
+        assert [m[:7] for m in minutos] == [(T0, "cam1", 5, 5, 3, 0, 2), (T0 + 60, "cam1", 2, 0, 2, 0, 0)]
+        assert minutos[0][7:] == (1.0, 50.0, 0.8) and minutos[1][7:] == (None, None, None)
+        intervalos = q.intervalos(T0, camera="cam1")
+        assert [iv[2] for iv in intervalos] == ["VAZIA", "CHEIA", "VAZIA"]
+        assert intervalos[0][:2] == (T0, T0 + 20)
+        (sessao,) = q.sessoes(0, camera="cam1")
+        assert (sessao[0], sessao[3], sessao[6], sessao[7]) == (reg.sessao, "simulacao", 7, 3)
+
+
+def test_consulta_e_so_leitura(caminho):
+    BancoEventos(caminho).fechar()
+    with ConsultaEventos(caminho) as q:
+        with pytest.raises(Exception):
+            q.conn.execute("DELETE FROM mudancas")
+
+
+def test_categoria_motivo():
+    assert categoria_motivo("Área 250000px² > máximo 200000.5px²") == "Área #px² > máximo #px²"
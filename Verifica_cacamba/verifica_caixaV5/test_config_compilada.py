@@ -0,0 +1,99 @@
+"""Snapshot compilado: limites z16 e validação central da config."""
+
+import copy
+
+import numpy as np
+import pytest
+
+from config_compilada import ConfigInvalida, compilar_config, validar_config
+from config_manager import CONFIG_PADRAO
+
+
+@pytest.fixture
+def cfg():
+    return copy.deepcopy(CONFIG_PADRAO)
+
+
+@pytest.mark.parametrize("escala", [0.001, 0.0001, 0.00025])
+def test_limites_z16_equivalem_as_comparacoes_em_metros(cfg, escala):
+    cc = compilar_config(cfg, depth_scale=escala)
+    metros = np.arange(65536, dtype=np.float64) * escala
+    dentro = np.flatnonzero((metros > cc.prof_min) & (metros < cc.prof_max))
+    assert (cc.prof_min_z16, cc.prof_max_z16) == (dentro[0], dentro[-1])
+    clip = np.flatnonzero((metros > cc.clip_min) & (metros < cc.clip_max))
+    assert (cc.clip_min_z16, cc.clip_max_z16) == (clip[0], clip[-1])
+
+
+def test_para_escala_reaproveita_quando_igual(cfg):
+    cc = compilar_config(cfg)
+    assert cc.para_escala(cc.depth_scale) is cc
+    outra = cc.para_escala(cc.depth_scale / 10)
+    assert outra.prof_min_z16 == pytest.approx(cc.prof_min_z16 * 10, abs=10)
+    assert (outra.largura, outra.kernel_size) == (cc.largura, cc.kernel_size)
+
+
+def test_recompilar_mantem_a_escala_do_anterior(cfg):
+    cc = compilar_config(cfg, depth_scale=0.0001)
+    cfg["medicoes"]["profundidade_max_caixa"] = 1.0
+    nova = compilar_config(cfg, anterior=cc)
+    assert nova.depth_scale == 0.0001
+    assert nova.prof_max_z16 == 9999
+
+
+def test_config_padrao_valida(cfg):
+    assert validar_config(cfg) == []
+
+
+def test_config_invalida_lista_todos_os_erros(cfg):
+    cfg["thresholds"]["limite_cheia"] = 0.9
+    cfg["roi"]["x_max"] = 1.5
+    with pytest.raises(ConfigInvalida) as exc:
+        compilar_config(cfg)
+    assert len(exc.value.erros) == 2
+
+
+@pytest.mark.parametrize("secao, chave, valor", [
+    ("thresholds", "limite_vazia", True),
+    ("medicoes", "area_minima_pixels", 10.5),
+    ("roi", "y_min", -0.1),
+    ("camera", "fila_politica", "antigos"),
+    ("estatisticas", "inicio_turnos", ["6:00"]),
+    ("alertas", "webhook_url", "ftp://x"),
+])
+def test_valor_invalido_vira_um_erro(cfg, secao, chave, valor):
+    cfg[secao][chave] = valor
+    erros = validar_config(cfg)
+    assert len(erros) == 1 and f"{secao}." in erros[0]
+
+
+def test_secao_ausente(cfg):
+    del cfg["filtros"]
+    assert sum("ausente" in e for e in validar_config(cfg)) == 4
+
+
+def test_roteiro_valido(cfg):
+    cfg["simulacao"]["roteiro"] = [
+        {"cenario": "enchendo", "duracao_s": 20},
+        {"cenario": "inclinacao", "duracao_s": 15, "inclinacao_graus": 8},
+        {"cenario": "multiplas", "n_cacambas": 3},
+    ]
+    assert validar_config(cfg) == []
+
+
+@pytest.mark.parametrize("simulacao", [
+    {"cenario": "tempestade"},
+    {"largura": 0},
+    {"fps": 0},
+    {"semente": -1},
+    {"roteiro": {"cenario": "enchendo"}},
+    {"roteiro": ["enchendo"]},
+    {"roteiro": [{"cenario": "tempestade"}]},
+    {"roteiro": [{"cenario": "enchendo", "duracao_s": 0}]},
+    {"roteiro": [{"cenario": "enchendo", "duracao": 5}]},
+    {"roteiro": [{"cenario": "inclinacao", "inclinacao_graus": 90}]},
+    {"roteiro": [{"cenario": "multiplas", "n_cacambas": 0}]},
+])
+def test_simulacao_invalida(cfg, simulacao):
+    cfg["simulacao"].update(simulacao)
+    erros = validar_config(cfg)
+    assert len(erros) == 1 and erros[0].startswith("simulacao.")
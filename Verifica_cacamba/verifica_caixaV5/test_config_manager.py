@@ -0,0 +1,106 @@
+"""ConfigManager: perfis, deltas e aplicação validada."""
+
+import copy
+import json
+import time
+
+import pytest
+
+from config_compilada import ConfigInvalida
+from config_manager import ConfigManager, aplicar_delta, calcular_delta
+
+
+@pytest.fixture
+def cm(tmp_path):
+    return ConfigManager(caminho_config=str(tmp_path / "config_v5.json"))
+
+
+def test_perfil_invalido_nao_aplica_nem_grava(cm):
+    cm.salvar_perfil("bom")
+    cm.cfg["perfis"]["ruim"] = {"thresholds": {"limite_vazia": 0.5, "limite_cheia": 0.6}}
+    cm.salvar()
+    assert cm.descarregar()
+    antes = cm.caminho.read_text(encoding="utf-8")
+    versao = cm.versao
+
+    with pytest.raises(ConfigInvalida):
+        cm.carregar_perfil("ruim")
+
+    assert cm.cfg["thresholds"]["limite_vazia"] == 0.70
+    assert cm.versao == versao
+    assert cm.descarregar()
+    assert cm.caminho.read_text(encoding="utf-8") == antes
+    assert cm.carregar_perfil("bom")
+
+
+def test_perfil_inexistente(cm):
+    assert cm.carregar_perfil("nao_existe") is False
+
+
+def test_carregar_perfil_persiste(cm):
+    cm.cfg["thresholds"]["limite_cheia"] = 0.50
+    cm.salvar_perfil("baixo")
+    cm.aplicar({"thresholds": {"limite_cheia": 0.55}})
+    assert cm.carregar_perfil("baixo")
+    assert cm.descarregar()
+    assert json.loads(cm.caminho.read_text(encoding="utf-8"))["thresholds"]["limite_cheia"] == 0.50
+
+
+# ── Deltas ──────────────────────────────────────────────────────────────────
+
+def test_calcular_delta_so_folhas_alteradas():
+    antes = {"roi": {"x_min": 0.25, "x_max": 0.75}, "cameras": [{"serial": "1"}], "sons": {"beep": True}}
+    depois = {"roi": {"x_min": 0.30, "x_max": 0.75}, "cameras": [{"serial": "2"}], "sons": {"beep": True}}
+    assert calcular_delta(antes, depois) == {"roi": {"x_min": 0.30}, "cameras": [{"serial": "2"}]}
+    assert calcular_delta(depois, copy.deepcopy(depois)) == {}
+
+
+def test_aplicar_delta_inverte_calcular_delta(cm):
+    antes = copy.deepcopy(cm.cfg)
+    depois = copy.deepcopy(antes)
+    depois["thresholds"]["limite_cheia"] = 0.5
+    depois["camera"]["filtros_realsense"] = []
+    delta = calcular_delta(antes, depois)
+    assert aplicar_delta(antes, delta) == depois
+    # O delta é copiado: mexer nele depois não altera a config
+    delta["camera"]["filtros_realsense"].append("x")
+    assert antes["camera"]["filtros_realsense"] == []
+
+
+def test_aplicar_incrementa_versao_so_quando_muda(cm):
+    versao = cm.versao
+    assert cm.aplicar({"thresholds": {"limite_cheia": 0.55}}) == {}
+    assert cm.versao == versao
+    assert cm.aplicar({"thresholds": {"limite_cheia": 0.5}}) == {"thresholds": {"limite_cheia": 0.5}}
+    assert cm.versao == versao + 1
+
+
+def test_observar_repete_delta_nao_entregue(cm):
+    cm.salvar()
+    assert cm.descarregar()
+    entregues = []
+
+    def callback(delta):
+        entregues.append(delta)
+        if len(entregues) == 1:
+            raise RuntimeError("fila cheia")
+
+    cm.observar(callback, debounce_s=0.05)
+    try:
+        dados = json.loads(cm.caminho.read_text(encoding="utf-8"))
+        dados["thresholds"]["limite_cheia"] = 0.5
+        cm.caminho.write_text(json.dumps(dados, indent=4), encoding="utf-8")
+        limite = time.monotonic() + 10
+        while len(entregues) < 2 and time.monotonic() < limite:
+            time.sleep(0.05)
+    finally:
+        cm.parar_observacao()
+    assert entregues[:2] == [{"thresholds": {"limite_cheia": 0.5}}] * 2
+
+
+def test_aplicar_rejeita_simulacao_invalida(cm):
+    versao = cm.versao
+    with pytest.raises(ConfigInvalida):
+        cm.aplicar({"simulacao": {"roteiro": [{"cenario": "tempestade", "duracao_s": 5}]}})
+    assert cm.cfg["simulacao"]["roteiro"] == []
+    assert cm.versao == versao
@@ -0,0 +1,72 @@
+"""Detecção direto no z16 deve dar o mesmo resultado que em metros."""
+
+import copy
+
+import numpy as np
+import pytest
+
+from config_manager import CONFIG_PADRAO
+from detector_cacamba import DetectorCacamba
+from simulador import SimuladorCena
+
+ESCALA = 0.001
+
+
+@pytest.fixture(scope="module")
+def frames_z16():
+    cfg = copy.deepcopy(CONFIG_PADRAO)
+    sim = SimuladorCena(cfg, 320, 240, 30, [{"cenario": "enchendo", "duracao_s": 3},
+                                            {"cenario": "pessoa", "duracao_s": 2},
+                                            {"cenario": "poeira", "duracao_s": 2},
+                                            {"cenario": "esvaziando", "duracao_s": 3}])
+    return [(sim.frame(i, com_cor=False)[1] / ESCALA).astype(np.uint16) for i in range(0, 300, 3)]
+
+
+def test_z16_igual_a_metros(frames_z16):
+    em_metros = DetectorCacamba(copy.deepcopy(CONFIG_PADRAO))
+    em_z16 = DetectorCacamba(copy.deepcopy(CONFIG_PADRAO))
+    status = set()
+    for z16 in frames_z16:
+        a = em_metros.processar_frame(z16 * ESCALA)
+        b = em_z16.processar_frame_z16(z16, ESCALA)
+        assert (b.status, b.status_estavel, b.bbox, b.motivo_rejeicao) == (
+            a.status, a.status_estavel, a.bbox, a.motivo_rejeicao)
+        assert b.distancia == pytest.approx(a.distancia, abs=1e-9)
+        assert b.confianca == pytest.approx(a.confianca, abs=1e-6)
+        status.add(a.status)
+    assert {"VAZIA", "PARCIAL", "CHEIA"} <= status
+
+
+def test_processar_quadro_escolhe_z16_quando_disponivel(frames_z16):
+    class Quadro:
+        depth_meters = None
+        depth_z16 = frames_z16[0]
+        depth_scale = ESCALA
+
+    detector = DetectorCacamba(copy.deepcopy(CONFIG_PADRAO))
+    r = detector.processar_quadro(Quadro())
+    assert r.caixa_detectada
+    assert detector.config_compilada.depth_scale == ESCALA
+
+
+def test_troca_de_depth_scale_recalcula_limites(frames_z16):
+    detector = DetectorCacamba(copy.deepcopy(CONFIG_PADRAO))
+    detector.processar_frame_z16(frames_z16[0], ESCALA)
+    limites_mm = detector.config_compilada.prof_min_z16
+    # Mesma cena em unidades de 0.5 mm: o dobro dos valores z16
+    r = detector.processar_frame_z16(frames_z16[0] * 2, ESCALA / 2)
+    assert detector.config_compilada.prof_min_z16 in (2 * limites_mm - 1, 2 * limites_mm, 2 * limites_mm + 1)
+    assert r.caixa_detectada
+
+
+def test_config_acompanha_troca_de_perfil():
+    detector = DetectorCacamba(copy.deepcopy(CONFIG_PADRAO))
+    perfil = copy.deepcopy(CONFIG_PADRAO)
+    perfil["thresholds"]["limite_vazia"] = 0.80
+    assert detector.registrar_perfis({"alto": perfil}) == []
+    assert detector.trocar_perfil("alto", versao=1)
+    assert detector.config["thresholds"]["limite_vazia"] == 0.80
+    assert detector.config_compilada.limite_vazia == 0.80
+    outra = copy.deepcopy(CONFIG_PADRAO)
+    detector.atualizar_config(outra)
+    assert detector.config is outra
@@ -0,0 +1,110 @@
+"""Cadeia de filtros RealSense: validação, nomes das etapas e comparador na ROI."""
+
+import copy
+
+import cv2
+import numpy as np
+import pytest
+
+from config_manager import CONFIG_PADRAO
+from filtros_realsense import FILTROS_REALSENSE_PADRAO, ComparadorFiltros, nomes_etapas, validar_cadeia
+
+ESCALA = 0.001
+
+
+# ── Validação ────────────────────────────────────────────────────────────────
+
+def test_cadeia_padrao_e_valida():
+    assert validar_cadeia(FILTROS_REALSENSE_PADRAO) == []
+    assert validar_cadeia([]) == []
+
+
+@pytest.mark.parametrize("cadeia, trecho", [
+    ({"tipo": "spatial"}, "não é lista"),
+    (["spatial"], "[0] não é objeto"),
+    ([{"tipo": "bilateral"}], "tipo='bilateral' desconhecido"),
+    ([{"tipo": "spatial", "opcoes": [2]}], "[0].opcoes não é objeto"),
+    ([{"tipo": "temporal", "opcoes": {"filter_magnitude": 2}}], "'filter_magnitude' não existe em temporal"),
+    ([{"tipo": "decimation", "opcoes": {"filter_magnitude": 9}}], "filter_magnitude=9 fora de [1, 8]"),
+    ([{"tipo": "spatial", "opcoes": {"filter_smooth_alpha": 0.1}}], "filter_smooth_alpha=0.1 fora de"),
+    ([{"tipo": "hole_filling", "opcoes": {"holes_fill": True}}], "holes_fill=True fora de"),
+    ([{"tipo": "threshold", "opcoes": {"max_distance": "4"}}], "max_distance='4' fora de"),
+])
+def test_erros_da_cadeia(cadeia, trecho):
+    erros = validar_cadeia(cadeia)
+    assert len(erros) == 1 and trecho in erros[0]
+
+
+def test_erros_de_varios_filtros_sao_todos_reportados():
+    erros = validar_cadeia([
+        {"tipo": "decimation", "opcoes": {"filter_magnitude": 0}},
+        {"tipo": "spatial", "opcoes": {"filter_magnitude": 2}},
+        {"tipo": "xyz"},
+        {"tipo": "temporal", "opcoes": {"filter_smooth_alpha": 2, "holes_fill": 9}},
+    ])
+    assert [e.split("]")[0][-1] for e in erros] == ["0", "2", "3", "3"]
+
+
+def test_nomes_das_etapas_com_tipos_repetidos():
+    cadeia = [
+        {"tipo": "decimation"},
+        {"tipo": "spatial"},
+        {"tipo": "temporal", "ativo": False},
+        {"tipo": "spatial", "opcoes": {"filter_magnitude": 3}},
+        {"tipo": "hole_filling"},
+        {"tipo": "spatial", "ativo": True},
+    ]
+    assert nomes_etapas(cadeia) == ["decimation", "spatial", "spatial_2", "hole_filling", "spatial_3"]
+    assert nomes_etapas(FILTROS_REALSENSE_PADRAO) == ["decimation", "spatial", "temporal", "hole_filling"]
+
+
+# ── Comparador ───────────────────────────────────────────────────────────────
+
+def test_suavizacao_reduz_o_ruido_medido():
+    """
+    Plano a 1 m com ruído por pixel, tremida comum a cada frame e buracos:
+    o spatial (blur) reduz a dispersão, o temporal (média exponencial) reduz
+    o ruído entre frames e o hole_filling recupera os pixels inválidos.
+    """
+    rng = np.random.default_rng(0)
+    roi = copy.deepcopy(CONFIG_PADRAO["roi"])
+    comparador = ComparadorFiltros(["spatial", "temporal", "hole_filling"], roi, janela=100)
+    media = None
+    for _ in range(80):
+        tremida = rng.normal(0.0, 5.0)
+        bruto = 1000.0 + tremida + rng.normal(0.0, 20.0, (120, 160))
+        z16 = np.round(bruto).astype(np.uint16)
+        z16[rng.random(z16.shape) < 0.1] = 0
+        comparador.registrar("bruto", z16, ESCALA)
+
+        preenchido = np.where(z16 > 0, bruto, 1000.0 + tremida)
+        espacial = cv2.blur(preenchido, (5, 5))
+        comparador.registrar("spatial", np.where(z16 > 0, np.round(espacial), 0).astype(np.uint16), ESCALA, 0.002)
+        media = espacial if media is None else media + 0.2 * (espacial - media)
+        temporal = np.where(z16 > 0, np.round(media), 0).astype(np.uint16)
+        comparador.registrar("temporal", temporal, ESCALA, 0.001)
+        comparador.registrar("hole_filling", np.round(media).astype(np.uint16), ESCALA)
+
+    r = {linha["etapa"]: linha for linha in comparador.relatorio()}
+    assert comparador.quadros == 80
+    assert list(r) == ["bruto", "spatial", "temporal", "hole_filling"]
+    assert r["bruto"]["ruido_mm"] == pytest.approx(5.0, rel=0.3)
+    assert r["spatial"]["dispersao_mm"] < r["bruto"]["dispersao_mm"] / 3
+    assert r["temporal"]["ruido_mm"] < r["spatial"]["ruido_mm"] / 3
+    assert r["bruto"]["validos_pct"] == pytest.approx(90.0, abs=1.0)
+    assert r["hole_filling"]["validos_pct"] == 100.0
+    assert (r["spatial"]["ms"], r["temporal"]["ms"]) == pytest.approx((2.0, 1.0))
+
+    tabela = comparador.formatar()
+    assert "(80 frames)" in tabela and len(tabela.splitlines()) == 6
+
+
+def test_roi_sem_pixels_validos_interrompe_o_ruido():
+    comparador = ComparadorFiltros([], CONFIG_PADRAO["roi"])
+    cheio = np.full((40, 40), 1000, dtype=np.uint16)
+    for z16 in (cheio, cheio + 2, np.zeros_like(cheio), cheio + 50, cheio + 52):
+        comparador.registrar("bruto", z16, ESCALA)
+    bruto = comparador.relatorio()[0]
+    # O salto 2 → 50 atravessa o frame vazio e não entra na conta
+    assert bruto["ruido_mm"] == pytest.approx(0.0)
+    assert bruto["validos_pct"] == pytest.approx(80.0)
@@ -0,0 +1,72 @@
+"""Linha do tempo: tempo em cada status confere com a soma ingênua dos intervalos."""
+
+import random
+from datetime import datetime
+
+import pytest
+
+from linha_tempo import LinhaTempoStatus, formatar_duracao, inicio_turno
+
+STATUS = ["VAZIA", "PARCIAL", "CHEIA", None]
+
+
+def _ingenuo(trocas, desde, ate):
+    tempos = {}
+    for k, (inicio, status) in enumerate(trocas):
+        fim = trocas[k + 1][0] if k + 1 < len(trocas) else ate
+        a, b = max(inicio, desde), min(fim, ate)
+        if status is not None and b > a:
+            tempos[status] = tempos.get(status, 0.0) + b - a
+    return tempos
+
+
+def _sem_zeros(tempos):
+    return {s: v for s, v in tempos.items() if v > 1e-9}
+
+
+def test_tempo_em_confere_com_soma_ingenua():
+    rng = random.Random(7)
+    linha = LinhaTempoStatus()
+    trocas, t = [], 100.0
+    for _ in range(300):
+        status = rng.choice(STATUS)
+        if not trocas or trocas[-1][1] != status:
+            trocas.append((t, status))
+        linha.registrar(t, status)
+        t += rng.uniform(0.5, 30.0)
+    assert len(linha) == len(trocas)
+    for _ in range(500):
+        desde = rng.uniform(50.0, t + 50.0)
+        ate = desde + rng.uniform(0.0, 2000.0)
+        esperado = _ingenuo(trocas, desde, ate)
+        obtido = _sem_zeros(linha.tempo_em(desde, ate))
+        assert obtido.keys() == esperado.keys()
+        for s, v in esperado.items():
+            assert obtido[s] == pytest.approx(v)
+
+
+def test_status_repetido_e_relogio_voltando():
+    linha = LinhaTempoStatus()
+    linha.registrar(10.0, "VAZIA")
+    linha.registrar(15.0, "VAZIA")
+    linha.registrar(20.0, "CHEIA")
+    linha.registrar(18.0, "PARCIAL")       # relógio voltou: CHEIA fica com duração zero
+    assert len(linha) == 3
+    assert linha.status_atual == "PARCIAL"
+    assert _sem_zeros(linha.tempo_em(0.0, 30.0)) == {"VAZIA": 10.0, "PARCIAL": 10.0}
+    assert linha.tempo_em(30.0, 30.0) == {}
+    assert LinhaTempoStatus().tempo_em(0.0, 10.0) == {}
+
+
+def test_carregar_marca_buracos_sem_dados():
+    linha = LinhaTempoStatus()
+    linha.carregar([(0.0, 10.0, "VAZIA"), (10.0, 20.0, "CHEIA"), (50.0, 60.0, "VAZIA")])
+    assert linha.status_atual is None
+    assert _sem_zeros(linha.tempo_em(0.0, 100.0)) == {"VAZIA": 20.0, "CHEIA": 10.0}
+
+
+def test_janelas():
+    turnos = ["06:00", "14:00", "22:00"]
+    assert inicio_turno(datetime(2024, 5, 2, 15, 30), turnos) == datetime(2024, 5, 2, 14, 0)
+    assert inicio_turno(datetime(2024, 5, 2, 3, 0), turnos) == datetime(2024, 5, 1, 22, 0)
+    assert (formatar_duracao(59 * 60), formatar_duracao(125 * 60)) == ("59m", "2h05m")
@@ -0,0 +1,76 @@
+"""Métricas: percentis por estágio e contagem de frames perdidos."""
+
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from metricas import ContadorQuadros, MedidorEstagios, marcar
+
+
+def test_buracos_na_numeracao_contam_como_usb():
+    c = ContadorQuadros()
+    for n in [10, 11, 14, 15, 20]:
+        c.registrar_numero(n)
+    assert c.resumo()["usb"] == 2 + 4
+    assert c.recebidos == 5
+
+
+def test_numeracao_que_volta_ou_ausente_nao_conta_perda():
+    c = ContadorQuadros()
+    for n in [100, 101, 5, 6, -1, 7]:      # dispositivo reiniciado; -1 = sem numeração (simulação)
+        c.registrar_numero(n)
+    assert c.resumo() == {"recebidos": 6, **dict.fromkeys(ContadorQuadros.CAUSAS, 0)}
+    c.registrar_numero(9)
+    assert c.perdidos["usb"] == 1
+    c.limpar()
+    c.registrar_numero(50)
+    assert c.resumo()["usb"] == 0 and c.recebidos == 1
+
+
+def test_descartar_de_varias_threads_nao_perde_contagem():
+    c = ContadorQuadros()
+
+    def descartar():
+        for _ in range(20_000):
+            c.descartar("pipeline")
+
+    threads = [threading.Thread(target=descartar) for _ in range(6)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert c.perdidos["pipeline"] == 6 * 20_000
+
+
+def test_percentis_em_milissegundos():
+    m = MedidorEstagios()
+    for ms in range(1, 101):
+        m.registrar("det", ms / 1000.0)
+    p = m.percentis()["det"]
+    assert p["n"] == 100
+    esperado = np.percentile(np.arange(1, 101, dtype=float), [50, 95, 99])
+    assert (p["p50"], p["p95"], p["p99"]) == pytest.approx(tuple(esperado))
+    assert p["media"] == pytest.approx(50.5)
+
+
+def test_janela_guarda_so_as_ultimas_amostras():
+    m = MedidorEstagios(janela=10)
+    for _ in range(50):
+        m.registrar("lento", 1.0)
+    for _ in range(10):
+        m.registrar("lento", 0.002)
+    p = m.percentis()["lento"]
+    assert p["n"] == 60
+    assert p["p99"] == pytest.approx(2.0)
+    m.limpar()
+    assert m.percentis() == {}
+
+
+def test_marcar_e_exportar(tmp_path):
+    m = MedidorEstagios()
+    marcar(m, "a", 0.0)
+    assert marcar(None, "a", 0.0) > 0
+    dados = json.loads(m.exportar_json(tmp_path / "lat.json").read_text(encoding="utf-8"))
+    assert dados["unidade"] == "ms" and list(dados["estagios"]) == ["a"]
@@ -0,0 +1,57 @@
+"""Filas entre estágios: política de descarte e sentinela de fim."""
+
+import queue
+
+import pytest
+
+from pipeline import DESCARTAR_ANTIGO, DESCARTAR_NOVO, FIM, FilaEstagio, MonitorPipeline
+
+
+def _drenar(fila):
+    itens = []
+    try:
+        while True:
+            itens.append(fila.obter(timeout=0))
+    except queue.Empty:
+        return itens
+
+
+def test_descartar_antigo_mantem_os_mais_novos():
+    fila = FilaEstagio("deteccao", 2, DESCARTAR_ANTIGO)
+    assert [fila.colocar(i) for i in range(5)] == [0, 0, 1, 1, 1]
+    assert fila.descartados == 3
+    assert _drenar(fila) == [3, 4]
+
+
+def test_descartar_novo_mantem_os_primeiros():
+    fila = FilaEstagio("render", 2, DESCARTAR_NOVO)
+    assert [fila.colocar(i) for i in range(5)] == [0, 0, 1, 1, 1]
+    assert _drenar(fila) == [0, 1]
+
+
+@pytest.mark.parametrize("politica", [DESCARTAR_ANTIGO, DESCARTAR_NOVO])
+def test_fim_sempre_entra(politica):
+    fila = FilaEstagio("x", 2, politica)
+    fila.colocar(1)
+    fila.colocar(2)
+    fila.colocar_fim()
+    assert _drenar(fila)[-1] is FIM
+
+
+def test_politica_invalida():
+    with pytest.raises(ValueError):
+        FilaEstagio("x", 1, "aleatorio")
+
+
+def test_monitor_resumo_zera_a_janela():
+    fila = FilaEstagio("deteccao", 4)
+    mon = MonitorPipeline()
+    mon.estagio("captura")
+    mon.estagio("deteccao", fila)
+    fila.colocar("q")
+    mon.ocupado("deteccao", 0.0)
+    resumo = mon.resumo()
+    assert resumo["captura"]["fila"] is None
+    assert (resumo["deteccao"]["fila"], resumo["deteccao"]["capacidade"]) == (1, 4)
+    assert resumo["deteccao"]["vazao"] > 0
+    assert mon.resumo()["deteccao"]["vazao"] == 0
@@ -0,0 +1,68 @@
+"""Pré-gatilho: anel com número de sequência e gatilhos de despejo."""
+
+import copy
+from types import SimpleNamespace
+
+import numpy as np
+
+from config_manager import CONFIG_PADRAO
+from pre_gatilho import AnelPreGatilho, GatilhosDespejo, PreGatilho
+from sessao import LeitorSessao
+
+
+def _quadro(i, escala=0.001):
+    return SimpleNamespace(
+        depth_z16=np.full((4, 6), i, dtype=np.uint16), depth_meters=None, depth_scale=escala,
+        frame_bgr=None, t_captura=10.0 + i, frame_number=i,
+    )
+
+
+def test_anel_guarda_so_os_ultimos_frames():
+    anel = AnelPreGatilho(capacidade=3)
+    for i in range(5):
+        anel.gravar(_quadro(i))
+    depth = np.empty((4, 6), dtype=np.uint16)
+    # 0 e 1 já foram sobrescritos por 3 e 4
+    assert anel.copiar(0, depth, None) is None
+    assert anel.copiar(1, depth, None) is None
+    assert anel.copiar(4, depth, None) == (14000.0, 4)
+    assert (depth == 4).all()
+    assert anel.depth_scale == 0.001
+
+
+def test_anel_converte_metros_para_z16():
+    anel = AnelPreGatilho(capacidade=2)
+    quadro = _quadro(0)
+    quadro.depth_z16, quadro.depth_meters = None, np.full((4, 6), 1.234, dtype=np.float32)
+    anel.gravar(quadro)
+    depth = np.empty((4, 6), dtype=np.uint16)
+    assert anel.copiar(0, depth, None) is not None
+    assert (depth == 1234).all()
+
+
+def test_rajada_de_rejeicoes_dispara_uma_vez_por_rajada():
+    gatilhos = GatilhosDespejo({
+        "mudanca_status": True, "rajada_rejeicoes": 3, "janela_rejeicoes": 5,
+        "confianca_min": 0.5, "frames_baixa_confianca": 0,
+    })
+    rejeitado = SimpleNamespace(caixa_detectada=False, motivo_rejeicao="area", confianca=0.0)
+    motivos = [gatilhos.avaliar(rejeitado, mudou=False) for _ in range(6)]
+    assert motivos == [None, None, "rajada_rejeicoes", None, None, None]
+    ok = SimpleNamespace(caixa_detectada=True, motivo_rejeicao="", confianca=0.9)
+    assert gatilhos.avaliar(ok, mudou=True) == "mudanca_status"
+
+
+def test_despejo_tem_os_frames_que_a_deteccao_pulou(tmp_path):
+    cfg = copy.deepcopy(CONFIG_PADRAO)
+    cfg["camera"]["fps"] = 10
+    cfg["pre_gatilho"].update(segundos=3, pos_gatilho_s=0, escala_cor=0, pasta=str(tmp_path))
+    pg = PreGatilho(cfg, camera="cam1")
+    ok = SimpleNamespace(caixa_detectada=True, motivo_rejeicao="", confianca=90.0)
+    for i in range(25):
+        pg.gravar(_quadro(i))           # captura: todo frame
+        if i % 4 == 0:                  # detecção sob carga: a fila descartou os outros
+            pg.avaliar(ok, mudou=i == 20)
+    pg.fechar()
+    (despejo,) = tmp_path.glob("evento_cam1_*_mudanca_status.ses.gz")
+    with LeitorSessao(despejo) as leitor:
+        assert list(leitor.frame_numbers()) == list(range(25))
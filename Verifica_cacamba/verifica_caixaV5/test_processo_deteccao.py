@@ -0,0 +1,82 @@
+"""Anel de quadros em memória compartilhada: seqlock de um escritor e um leitor."""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from detector_cacamba import ResultadoDeteccao
+from processo_deteccao import AnelQuadros
+
+N_SLOTS, ALTURA, LARGURA = 3, 8, 12
+
+
+@pytest.fixture
+def aneis():
+    shm = shared_memory.SharedMemory(create=True, size=AnelQuadros.tamanho_bytes(N_SLOTS, ALTURA, LARGURA))
+    try:
+        shm.buf[:] = bytes(shm.size)
+        escritor = AnelQuadros(shm.buf, N_SLOTS, ALTURA, LARGURA)
+        leitor = AnelQuadros(shm.buf, N_SLOTS, ALTURA, LARGURA)
+        yield escritor, leitor
+        del escritor, leitor
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _escrever(anel, n, **kwargs):
+    resultado = ResultadoDeteccao(status="CHEIA", distancia=0.5 + n, caixa_detectada=True, bbox=(1, 2, 3, 4))
+    anel.escrever(resultado, fps=30.0, timestamp=f"12:00:0{n}", t_captura=float(n), **kwargs)
+
+
+def test_le_o_slot_mais_recente(aneis):
+    escritor, leitor = aneis
+    assert leitor.ler_ultimo() is None
+    cor = np.full((ALTURA, LARGURA, 3), 7, dtype=np.uint8)
+    for n in range(5):
+        _escrever(escritor, n, color_rgb=cor if n == 4 else None)
+    copia = leitor.ler_ultimo()
+    assert (copia["numero"], copia["timestamp"]) == (5, "12:00:04")
+    assert copia["resultado"].distancia == 4.5
+    assert copia["resultado"].bbox == (1, 2, 3, 4)
+    assert (copia["frame_color"] == 7).all() and copia["frame_depth"] is None
+    # Nada novo desde o último lido
+    assert leitor.ler_ultimo(ultimo_lido=5) is None
+
+
+def test_slot_em_escrita_nao_e_lido(aneis):
+    escritor, leitor = aneis
+    _escrever(escritor, 0)
+    i = (leitor.escritos() - 1) % N_SLOTS
+    escritor._seq[i] += 1          # ímpar: escritor no meio do slot
+    assert leitor.ler_ultimo() is None
+    escritor._seq[i] += 1
+    assert leitor.ler_ultimo()["numero"] == 1
+
+
+def test_leitura_rasgada_e_descartada(aneis):
+    escritor, leitor = aneis
+    _escrever(escritor, 0, color_rgb=np.zeros((ALTURA, LARGURA, 3), dtype=np.uint8))
+    i = (leitor.escritos() - 1) % N_SLOTS
+
+    def reescrever():
+        escritor._seq[i] += 2
+
+    # Escritor passa pelo slot a cada cópia da imagem: a sequência nunca confere
+    slots = {nome: leitor._slots[nome] for nome in leitor._slots.dtype.names}
+    slots["color"] = _CopiaConcorrente(slots["color"], reescrever)
+    leitor._slots = slots
+    assert leitor.ler_ultimo() is None
+
+
+class _CopiaConcorrente:
+    """Indexação que simula o escritor reescrevendo o slot durante a cópia."""
+
+    def __init__(self, arr, ao_copiar):
+        self._arr = arr
+        self._ao_copiar = ao_copiar
+
+    def __getitem__(self, i):
+        self._ao_copiar()
+        return self._arr[i]
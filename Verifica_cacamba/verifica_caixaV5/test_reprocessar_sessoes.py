@@ -0,0 +1,64 @@
+"""Reprocessamento por trechos deve dar o mesmo resultado que uma passada sequencial."""
+
+import copy
+
+import numpy as np
+import pytest
+
+import reprocessar_sessoes as rp
+from config_manager import CONFIG_PADRAO
+from sessao import GravadorSessao
+from simulador import SimuladorCena
+
+N_FRAMES = 900
+LARGURA, ALTURA = 320, 240
+FPS = 30
+
+
+@pytest.fixture
+def cfg():
+    return copy.deepcopy(CONFIG_PADRAO)
+
+
+@pytest.fixture
+def sessao(tmp_path, cfg):
+    """Sessão sintética que enche e esvazia a cada 12 s (várias mudanças de status)."""
+    sim = SimuladorCena(cfg, LARGURA, ALTURA, FPS, [{"cenario": "enchendo", "duracao_s": 6},
+                                                    {"cenario": "esvaziando", "duracao_s": 6}])
+    caminho = tmp_path / "sessao.cses"
+    with GravadorSessao(caminho, LARGURA, ALTURA, 0.001, FPS) as gravador:
+        for i in range(N_FRAMES):
+            _, depth = sim.frame(i, com_cor=False)
+            gravador.gravar((depth * 1000).astype(np.uint16), timestamp_ms=i * 1000 / FPS, frame_number=i)
+    return str(caminho)
+
+
+def test_trechos_iguais_a_execucao_sequencial(sessao, cfg):
+    sequencial = rp.juntar_trechos([rp.processar_trecho(sessao, 0, N_FRAMES, cfg)], cfg)
+    partes = [rp.processar_trecho(sessao, a, min(a + 150, N_FRAMES), cfg) for a in range(0, N_FRAMES, 150)]
+    por_trechos = rp.juntar_trechos(partes, cfg)
+
+    assert sequencial["mudou"].sum() >= 3
+    np.testing.assert_array_equal(por_trechos["mudou"], sequencial["mudou"])
+    np.testing.assert_array_equal(por_trechos["status_estavel"], sequencial["status_estavel"])
+    np.testing.assert_array_equal(por_trechos["indice"], np.arange(N_FRAMES))
+
+
+def test_reprocessar_em_pool_nao_depende_do_chunk(sessao, cfg, tmp_path):
+    inteiro = rp.reprocessar([sessao], tmp_path / "inteiro", cfg, workers=1, chunk=0)[sessao]
+    picado = rp.reprocessar([sessao], tmp_path / "picado", cfg, workers=2, chunk=110)[sessao]
+
+    np.testing.assert_array_equal(picado["mudou"], inteiro["mudou"])
+    np.testing.assert_array_equal(picado["status_estavel"], inteiro["status_estavel"])
+    assert list((tmp_path / "picado").glob("sessao_intervalos.*"))
+
+
+def test_intervalos_status_agrupa_frames_consecutivos():
+    frames = {
+        "status_estavel": np.array(["VAZIA", "VAZIA", "CHEIA", "CHEIA", "CHEIA", "VAZIA"]),
+        "timestamp_ms": np.arange(6, dtype=np.float64) * 100,
+    }
+    iv = rp.intervalos_status(frames)
+    assert iv["status"].tolist() == ["VAZIA", "CHEIA", "VAZIA"]
+    assert iv["n_frames"].tolist() == [2, 3, 1]
+    assert iv["inicio_ms"].tolist() == [0, 200, 500]
@@ -0,0 +1,57 @@
+"""Serviço headless: uma thread e um detector por câmera configurada."""
+
+import csv
+import threading
+import time
+
+import pytest
+
+from config_manager import ConfigManager
+from servico_headless import ServicoHeadless
+
+
+@pytest.fixture
+def cm(tmp_path):
+    cm = ConfigManager(caminho_config=str(tmp_path / "config_v5.json"))
+    cm.aplicar({"eventos": {"ativo": False}})
+    cm.cfg["cameras"] = [
+        {"serial": "111", "nome": "Norte"},
+        {"serial": "222", "nome": "Sul", "thresholds": {"limite_cheia": 0.40}},
+    ]
+    return cm
+
+
+def test_uma_thread_e_um_historico_por_camera(cm, tmp_path):
+    servico = ServicoHeadless(cm, simulate=True)
+    servico._pasta_historico = tmp_path / "historico"
+    thread = threading.Thread(target=servico.executar)
+    thread.start()
+    limite = time.monotonic() + 10
+    while time.monotonic() < limite and min((c.frames for c in servico._cameras.values()), default=0) < 5:
+        time.sleep(0.05)
+    servico.parar()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+    assert set(servico._cameras) == {"111", "222"}
+    assert all(c.frames >= 5 for c in servico._cameras.values())
+    arquivos = sorted(p.name for p in servico._pasta_historico.glob("*.csv"))
+    assert [a.rsplit("_", 1)[1] for a in arquivos] == ["111.csv", "222.csv"]
+    for arquivo in servico._pasta_historico.glob("*.csv"):
+        with open(arquivo, encoding="utf-8") as f:
+            assert len(list(csv.DictReader(f))) >= 1
+
+
+def test_delta_repassado_com_as_sobrescritas_da_camera(cm):
+    servico = ServicoHeadless(cm, simulate=True)
+    servico._alertas = type("SemAlertas", (), {"configurar": lambda self, cfg: None})()
+    servico._deltas.put({"thresholds": {"limite_cheia": 0.50}, "filtros": {"tamanho_historico": 7}})
+    servico._aplicar_deltas()
+
+    norte = servico._cameras["111"].cmd_queue.get_nowait()
+    sul = servico._cameras["222"].cmd_queue.get_nowait()
+    assert norte["delta"] == {"thresholds": {"limite_cheia": 0.50}, "filtros": {"tamanho_historico": 7}}
+    # A câmera Sul sobrescreve limite_cheia: só o histórico muda para ela
+    assert sul["delta"] == {"filtros": {"tamanho_historico": 7}}
+    assert norte["versao"] == sul["versao"] == cm.versao
+    assert servico._cameras["222"].cfg["thresholds"]["limite_cheia"] == 0.40
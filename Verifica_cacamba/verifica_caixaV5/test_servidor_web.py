@@ -0,0 +1,215 @@
+"""Servidor web: /status, push no WebSocket, MJPEG com um encode por tick e parada limpa."""
+
+import asyncio
+import base64
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import pytest
+
+from detector_cacamba import ResultadoDeteccao
+from servidor_web import ServidorStatus, _SlotCliente
+
+TIMEOUT = 5.0
+
+
+@pytest.fixture
+def servidor():
+    srv = ServidorStatus(host="127.0.0.1", porta=0, fps_mjpeg=50.0, log=lambda _m: None)
+    srv.iniciar()
+    yield srv
+    srv.parar()
+
+
+def _conectar(srv, caminho, headers="", rcvbuf=None):
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if rcvbuf is not None:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    s.settimeout(TIMEOUT)
+    s.connect((srv.host, srv.porta))
+    s.sendall(f"GET {caminho} HTTP/1.1\r\nHost: x\r\n{headers}\r\n".encode("latin-1"))
+    return s
+
+
+def _ler_exato(s, n):
+    dados = b""
+    while len(dados) < n:
+        bloco = s.recv(n - len(dados))
+        if not bloco:
+            raise ConnectionError("conexão fechada")
+        dados += bloco
+    return dados
+
+
+def _ler_linha(s):
+    linha = b""
+    while not linha.endswith(b"\r\n"):
+        linha += _ler_exato(s, 1)
+    return linha[:-2]
+
+
+def _ler_cabecalho(s):
+    linhas = []
+    while (linha := _ler_linha(s)):
+        linhas.append(linha.decode("latin-1"))
+    return linhas
+
+
+def _ler_parte_mjpeg(s):
+    assert _ler_linha(s) == b"--frame"
+    cabecalho = dict(l.split(": ", 1) for l in _ler_cabecalho(s))
+    assert cabecalho["Content-Type"] == "image/jpeg"
+    jpeg = _ler_exato(s, int(cabecalho["Content-Length"]))
+    assert _ler_linha(s) == b""
+    return jpeg
+
+
+def _ler_texto_ws(s):
+    b1, b2 = _ler_exato(s, 2)
+    assert b1 == 0x81 and not b2 & 0x80
+    n = b2 & 0x7F
+    if n == 126:
+        (n,) = struct.unpack(">H", _ler_exato(s, 2))
+    return json.loads(_ler_exato(s, n))
+
+
+def _esperar(condicao, timeout=TIMEOUT):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _frame(valor=0):
+    return np.full((48, 64, 3), valor, dtype=np.uint8)
+
+
+# ── /status e WebSocket ──────────────────────────────────────────────────────
+
+def test_status_em_json(servidor):
+    servidor.publicar_resultado(ResultadoDeteccao(status_estavel="CHEIA", percentual=87.5), 29.94, "12:00:00")
+    with urllib.request.urlopen(f"http://127.0.0.1:{servidor.porta}/status", timeout=TIMEOUT) as r:
+        assert r.headers["Content-Type"] == "application/json"
+        dados = json.loads(r.read())
+    assert (dados["status_estavel"], dados["percentual"], dados["fps"], dados["timestamp"]) == (
+        "CHEIA", 87.5, 29.9, "12:00:00")
+
+
+def test_ws_envia_so_quando_status_estavel_muda(servidor):
+    chave = base64.b64encode(os.urandom(16)).decode("ascii")
+    s = _conectar(servidor, "/ws", f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {chave}\r\n")
+    with s:
+        assert _ler_cabecalho(s)[0] == "HTTP/1.1 101 Switching Protocols"
+        assert _ler_texto_ws(s)["status_estavel"] == "SEM LEITURA"   # estado ao conectar
+        assert _esperar(lambda: servidor._clientes_ws)
+
+        # Mesmo status_estavel (só o instantâneo mudou): nada é enviado
+        servidor.publicar_resultado(ResultadoDeteccao(status="PARCIAL"), 30.0, "t0")
+        servidor.publicar_resultado(ResultadoDeteccao(status_estavel="VAZIA", percentual=3.0), 30.0, "t1")
+        dados = _ler_texto_ws(s)
+        assert (dados["status_estavel"], dados["percentual"], dados["timestamp"]) == ("VAZIA", 3.0, "t1")
+
+        servidor.publicar_resultado(ResultadoDeteccao(status_estavel="CHEIA"), 30.0, "t2")
+        assert _ler_texto_ws(s)["status_estavel"] == "CHEIA"
+
+
+# ── MJPEG ────────────────────────────────────────────────────────────────────
+
+def test_mjpeg_codifica_uma_vez_para_todos_os_clientes(servidor):
+    clientes = [_conectar(servidor, "/video.mjpeg") for _ in range(2)]
+    try:
+        for s in clientes:
+            assert _ler_cabecalho(s)[0] == "HTTP/1.1 200 OK"
+        assert _esperar(lambda: len(servidor._clientes_video) == 2)
+        assert servidor.tem_clientes_video()
+
+        for n, valor in enumerate((40, 200), start=1):
+            servidor.publicar_frame(_frame(valor))
+            recebidos = [_ler_parte_mjpeg(s) for s in clientes]
+            assert recebidos[0] == recebidos[1] and recebidos[0][:2] == b"\xff\xd8"
+            assert servidor.frames_codificados == n
+
+        # Sem frame novo não há encode, por mais ticks que passem
+        time.sleep(10 * servidor.periodo_mjpeg)
+        assert servidor.frames_codificados == 2
+    finally:
+        for s in clientes:
+            s.close()
+
+
+def test_slot_descarta_o_antigo_em_vez_de_acumular():
+    async def cenario():
+        slot = _SlotCliente()
+        for i in range(5):
+            slot.oferecer(i)
+        return slot.fila.qsize(), slot.descartados, slot.fila.get_nowait()
+
+    assert asyncio.run(cenario()) == (1, 4, 4)
+
+
+def test_cliente_lento_perde_frames_sem_atrasar_o_rapido(servidor):
+    rng = np.random.default_rng(0)
+    ruido = [rng.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(4)]
+    lento = _conectar(servidor, "/video.mjpeg", rcvbuf=4096)   # nunca lê o corpo
+    rapido = _conectar(servidor, "/video.mjpeg")
+    parar = threading.Event()
+
+    def publicar():
+        i = 0
+        while not parar.is_set():
+            servidor.publicar_frame(ruido[i % len(ruido)])
+            i += 1
+            time.sleep(servidor.periodo_mjpeg / 2)
+
+    publicador = threading.Thread(target=publicar, daemon=True)
+    try:
+        _ler_cabecalho(rapido)
+        assert _esperar(lambda: len(servidor._clientes_video) == 2)
+        publicador.start()
+
+        def descartes_do_lento():
+            return max((slot.descartados for slot in list(servidor._clientes_video)), default=0)
+
+        recebidos = 0
+        limite = time.monotonic() + TIMEOUT
+        while descartes_do_lento() < 5 and time.monotonic() < limite:
+            _ler_parte_mjpeg(rapido)
+            recebidos += 1
+        assert descartes_do_lento() >= 5
+        assert recebidos > 5
+        assert all(slot.fila.qsize() <= 1 for slot in list(servidor._clientes_video))
+    finally:
+        parar.set()
+        publicador.join(timeout=TIMEOUT)
+        lento.close()
+        rapido.close()
+
+
+# ── Ciclo de vida ────────────────────────────────────────────────────────────
+
+def test_parar_fecha_conexoes_e_libera_a_porta():
+    srv = ServidorStatus(host="127.0.0.1", porta=0, log=lambda _m: None)
+    srv.iniciar()
+    porta = srv.porta
+    assert porta != 0
+    video = _conectar(srv, "/video.mjpeg")
+    _ler_cabecalho(video)
+    assert _esperar(srv.tem_clientes_video)
+
+    inicio = time.monotonic()
+    srv.parar()
+    assert time.monotonic() - inicio < 2.0
+    assert srv._thread is None and srv._loop is None
+    with video:
+        assert video.recv(1) == b""   # MJPEG encerrado pelo servidor
+    with pytest.raises(ConnectionRefusedError):
+        socket.create_connection(("127.0.0.1", porta), timeout=TIMEOUT).close()
+    srv.parar()   # idempotente
@@ -0,0 +1,148 @@
+"""Sessões gravadas: ida e volta GravadorSessao → LeitorSessao e reprodução cadenciada."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import sessao
+from sessao import MAGIC, GravadorSessao, LeitorSessao, reproduzir
+
+LARGURA, ALTURA, ESCALA = 64, 48, 0.001
+
+
+def _frames(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 4000, (ALTURA, LARGURA), dtype=np.uint16) for _ in range(n)]
+
+
+def _gravar(caminho, frames, cor_shape=None, **kwargs):
+    with GravadorSessao(caminho, LARGURA, ALTURA, ESCALA, 30.0, cor_shape=cor_shape, **kwargs) as g:
+        for i, z16 in enumerate(frames):
+            cor = np.full((ALTURA, LARGURA, 3), i, dtype=np.uint8) if cor_shape else None
+            g.gravar(z16, cor, timestamp_ms=1000.0 + i * 33.3, frame_number=100 + i)
+        assert g.frames_gravados == len(frames)
+
+
+def test_ida_e_volta_sem_cor(tmp_path):
+    frames = _frames(5)
+    caminho = tmp_path / "s.cses"
+    _gravar(caminho, frames, metadados={"serial": "123"})
+    with LeitorSessao(caminho) as leitor:
+        assert len(leitor) == 5 and not leitor.tem_cor
+        assert (leitor.largura, leitor.altura, leitor.depth_scale, leitor.fps) == (LARGURA, ALTURA, ESCALA, 30.0)
+        assert leitor.header["serial"] == "123"
+        for i, z16 in enumerate(frames):
+            f = leitor[i]
+            np.testing.assert_array_equal(f.depth_z16, z16)
+            assert (f.indice, f.frame_number, f.color_bgr) == (i, 100 + i, None)
+            assert f.timestamp_ms == pytest.approx(1000.0 + i * 33.3)
+        np.testing.assert_array_equal(leitor.frame_numbers(), np.arange(100, 105))
+        np.testing.assert_allclose(leitor.depth_metros(2), frames[2] * ESCALA, rtol=1e-6)
+        assert leitor[-1].indice == 4
+
+
+def test_cor_redimensionada_para_o_formato_gravado(tmp_path):
+    caminho = tmp_path / "s.cses"
+    _gravar(caminho, _frames(3), cor_shape=(ALTURA // 2, LARGURA // 2))
+    with LeitorSessao(caminho) as leitor:
+        assert leitor.tem_cor
+        assert leitor[2].color_bgr.shape == (ALTURA // 2, LARGURA // 2, 3)
+        assert (leitor[2].color_bgr == 2).all()
+
+
+def test_registro_incompleto_no_fim_e_ignorado(tmp_path):
+    caminho = tmp_path / "s.cses"
+    frames = _frames(4)
+    _gravar(caminho, frames)
+    with open(caminho, "r+b") as f:
+        f.truncate(caminho.stat().st_size - 10)
+    with LeitorSessao(caminho) as leitor:
+        assert len(leitor) == 3
+        np.testing.assert_array_equal(leitor[2].depth_z16, frames[2])
+
+
+def test_arquivo_que_nao_e_sessao(tmp_path):
+    caminho = tmp_path / "outro.bin"
+    caminho.write_bytes(b"X" * len(MAGIC) + b"\0" * 16)
+    with pytest.raises(ValueError):
+        LeitorSessao(caminho)
+
+
+def test_ida_e_volta_comprimida(tmp_path):
+    frames = _frames(6, seed=1)
+    caminho = tmp_path / "evento.ses.gz"
+    _gravar(caminho, frames, cor_shape=(ALTURA // 4, LARGURA // 4))
+    assert caminho.read_bytes()[:2] == b"\x1f\x8b"
+    with LeitorSessao(caminho) as leitor:
+        assert len(leitor) == 6 and leitor.tem_cor
+        for i, z16 in enumerate(frames):
+            np.testing.assert_array_equal(leitor[i].depth_z16, z16)
+            assert leitor[i].frame_number == 100 + i
+
+
+# ── Reprodução cadenciada ────────────────────────────────────────────────────
+
+N_CADENCIA = 13   # 12 intervalos de 33.3 ms → ~0.4 s gravados
+DURACAO_S = (N_CADENCIA - 1) * 0.0333
+
+
+@pytest.fixture
+def leitor_cadencia(tmp_path):
+    caminho = tmp_path / "cadencia.cses"
+    _gravar(caminho, _frames(N_CADENCIA))
+    with LeitorSessao(caminho) as leitor:
+        yield leitor
+
+
+def _cronometrar(iteravel):
+    t0 = time.perf_counter()
+    itens = list(iteravel)
+    return time.perf_counter() - t0, itens
+
+
+def test_maximo_nao_espera(leitor_cadencia, monkeypatch):
+    esperas = []
+    monkeypatch.setattr(sessao, "esperar", lambda *a: esperas.append(a) or False)
+    monkeypatch.setattr(sessao.time, "sleep", lambda s: esperas.append(s))
+    duracao, itens = _cronometrar(reproduzir(leitor_cadencia, "maximo"))
+    assert [f.indice for f, _fps in itens] == list(range(N_CADENCIA))
+    assert esperas == []
+    assert duracao < DURACAO_S / 4
+
+
+def test_tempo_real_e_fator(leitor_cadencia):
+    duracao, itens = _cronometrar(reproduzir(leitor_cadencia, "tempo_real"))
+    assert len(itens) == N_CADENCIA
+    assert DURACAO_S * 0.95 <= duracao < DURACAO_S * 1.5
+
+    duracao, itens = _cronometrar(reproduzir(leitor_cadencia, "fator", fator=2.0))
+    assert DURACAO_S / 2 * 0.95 <= duracao < DURACAO_S / 2 * 1.5
+    assert np.median([fps for _f, fps in itens[1:]]) == pytest.approx(60.0, rel=0.25)
+
+    # `fator` só vale no modo "fator"
+    duracao, _itens = _cronometrar(reproduzir(leitor_cadencia, "tempo_real", fator=4.0))
+    assert duracao >= DURACAO_S * 0.95
+
+
+def test_tempo_em_pausa_nao_conta_na_cadencia(leitor_cadencia):
+    pausa = threading.Event()
+    parado_s, meio = 0.3, N_CADENCIA // 2
+    instantes = []
+    for frame, _fps in reproduzir(leitor_cadencia, "tempo_real", pausa=pausa):
+        instantes.append(time.perf_counter())
+        if frame.indice == meio:
+            pausa.set()
+            threading.Timer(parado_s, pausa.clear).start()
+    assert len(instantes) == N_CADENCIA
+    restante_s = (N_CADENCIA - 1 - meio) * 0.0333
+    # Depois da pausa os frames seguem o intervalo gravado, sem rajada para "recuperar"
+    depois = instantes[-1] - instantes[meio]
+    assert parado_s + restante_s * 0.95 <= depois < parado_s + restante_s * 1.5
+    assert min(np.diff(instantes[meio + 1:])) > 0.0333 * 0.5
+
+
+def test_modo_invalido(leitor_cadencia):
+    with pytest.raises(ValueError):
+        next(reproduzir(leitor_cadencia, "turbo"))
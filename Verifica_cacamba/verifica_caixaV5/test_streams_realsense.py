@@ -0,0 +1,119 @@
+"""Escolha do modo de profundidade: mesma saída após decimation, fps mínimo e precisão alvo."""
+
+import copy
+
+import pytest
+
+from config_manager import CONFIG_PADRAO
+from streams_realsense import ModoDepth, cadeia_com_decimacao, erro_rms_mm, escolher_modo, magnitude_decimation
+
+BASELINE = 50.0
+
+# fx proporcional à largura (~60° de HFOV), como nas D4xx
+MODOS = [
+    ModoDepth(320, 240, 30, fx=192.0),
+    ModoDepth(640, 480, 15, fx=385.0),    # fps abaixo do configurado
+    ModoDepth(640, 480, 30, fx=385.0),
+    ModoDepth(640, 480, 60, fx=385.0),
+    ModoDepth(848, 480, 90, fx=424.0),    # 848 não divide em 320
+    ModoDepth(1280, 720, 30, fx=640.0),   # 1280/4 = 320, mas 720/4 = 180
+    ModoDepth(1280, 960, 30, fx=770.0),
+]
+
+
+@pytest.fixture
+def cfg():
+    cfg = copy.deepcopy(CONFIG_PADRAO)
+    # 640x480 com decimation 2 → saída 320x240
+    cfg["camera"].update(resolucao_largura=640, resolucao_altura=480, fps=30)
+    return cfg
+
+
+def _erro(cfg, modo):
+    return erro_rms_mm(cfg["medicoes"]["altura_camera_chao"], modo.fx, BASELINE, cfg["camera"]["subpixel"])
+
+
+def _chave(escolha):
+    modo, magnitude, _erro = escolha
+    return modo.largura, modo.altura, modo.fps, magnitude
+
+
+# ── Cadeia de filtros ────────────────────────────────────────────────────────
+
+def test_magnitude_do_primeiro_decimation_ativo():
+    assert magnitude_decimation([{"tipo": "spatial"}]) is None
+    assert magnitude_decimation([{"tipo": "decimation"}]) == 2
+    assert magnitude_decimation([
+        {"tipo": "decimation", "ativo": False, "opcoes": {"filter_magnitude": 4}},
+        {"tipo": "decimation", "opcoes": {"filter_magnitude": 3}},
+    ]) == 3
+
+
+def test_cadeia_com_decimacao_copia_e_troca_so_o_ativo():
+    cadeia = [
+        {"tipo": "decimation", "ativo": False, "opcoes": {"filter_magnitude": 4}},
+        {"tipo": "decimation"},
+        {"tipo": "decimation", "opcoes": {"filter_magnitude": 2}},
+    ]
+    nova = cadeia_com_decimacao(cadeia, 5)
+    assert [f.get("opcoes", {}).get("filter_magnitude") for f in nova] == [4, 5, 2]
+    assert "opcoes" not in cadeia[1]
+    assert magnitude_decimation(nova) == 5
+
+
+# ── Escolha do modo ──────────────────────────────────────────────────────────
+
+def test_todos_os_candidatos_mantem_a_saida_e_o_fps(cfg):
+    cfg["camera"]["precisao_alvo_mm"] = 0.0   # nenhum atinge: percorre todos pelo erro
+    restantes = list(MODOS)
+    vistos = []
+    while (escolha := escolher_modo(restantes, cfg, BASELINE)) is not None:
+        modo, magnitude, _erro = escolha
+        vistos.append(_chave(escolha))
+        restantes.remove(modo)
+    assert vistos == [(1280, 960, 30, 4), (640, 480, 30, 2), (640, 480, 60, 2), (320, 240, 30, 1)]
+    for largura, altura, fps, magnitude in vistos:
+        assert (largura // magnitude, altura // magnitude) == (320, 240) and fps >= 30
+
+
+def test_mais_barato_dentro_da_precisao_alvo(cfg):
+    por_resolucao = {(m.largura, m.altura, m.fps): m for m in MODOS}
+    erro_320 = _erro(cfg, por_resolucao[(320, 240, 30)])
+    erro_640 = _erro(cfg, por_resolucao[(640, 480, 30)])
+    assert erro_640 < erro_320
+
+    cfg["camera"]["precisao_alvo_mm"] = erro_320 + 0.01
+    escolha = escolher_modo(MODOS, cfg, BASELINE)
+    assert _chave(escolha) == (320, 240, 30, 1)
+    assert escolha[2] == pytest.approx(erro_320)
+
+    # 640x480@30 e @60 têm o mesmo erro: fica o de menor custo
+    cfg["camera"]["precisao_alvo_mm"] = erro_640 + 0.01
+    assert _chave(escolher_modo(MODOS, cfg, BASELINE)) == (640, 480, 30, 2)
+
+
+def test_sem_modo_na_precisao_alvo_usa_o_mais_preciso(cfg):
+    cfg["camera"]["precisao_alvo_mm"] = 0.1
+    modo, magnitude, erro = escolher_modo(MODOS, cfg, BASELINE)
+    assert (modo.largura, modo.altura, magnitude) == (1280, 960, 4)
+    assert erro == pytest.approx(_erro(cfg, modo)) and erro > 0.1
+
+
+def test_fps_configurado_e_minimo(cfg):
+    cfg["camera"]["fps"] = 60
+    cfg["camera"]["precisao_alvo_mm"] = 100.0
+    assert _chave(escolher_modo(MODOS, cfg, BASELINE)) == (640, 480, 60, 2)
+
+
+def test_sem_decimation_so_a_resolucao_configurada(cfg):
+    for filtro in cfg["camera"]["filtros_realsense"]:
+        if filtro["tipo"] == "decimation":
+            filtro["ativo"] = False
+    cfg["camera"]["precisao_alvo_mm"] = 100.0
+    assert _chave(escolher_modo(MODOS, cfg, BASELINE)) == (640, 480, 30, 1)
+
+
+def test_nenhum_modo_compativel(cfg):
+    cfg["camera"].update(resolucao_largura=1024, resolucao_altura=768)
+    assert escolher_modo(MODOS, cfg, BASELINE) is None
+    assert escolher_modo([], cfg, BASELINE) is None
@@ -4,18 +4,37 @@ verificar_caixaV5.py — Entry point do Sistema de Detecção de Nível da Cacam
 Uso:
     python verificar_caixaV5.py              # Câmera RealSense real
     python verificar_caixaV5.py --simulate   # Modo simulação (sem câmera)
+    python verificar_caixaV5.py --gravar sessao.cses            # Grava a sessão da câmera
+    python verificar_caixaV5.py --replay sessao.cses            # Replay em tempo real
+    python verificar_caixaV5.py --replay sessao.cses --replay-speed 4
+    python verificar_caixaV5.py --replay sessao.cses --replay-speed max
+    python verificar_caixaV5.py --headless   # Serviço sem GUI (unidades sem display)
+    python verificar_caixaV5.py --processo   # Captura + detecção em processo filho
 """
 
 import argparse
 import sys
-import tkinter as tk
 from pathlib import Path
 
 # Garante que o diretório do script está no path para imports relativos
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config_manager import ConfigManager
-from gui_app import DetectorCacambaGUIV5
+
+
+def _parse_replay_speed(parser: argparse.ArgumentParser, valor: str):
+    """Converte --replay-speed em (modo, fator) para sessao.reproduzir()."""
+    if valor == "realtime":
+        return "tempo_real", 1.0
+    if valor == "max":
+        return "maximo", 1.0
+    try:
+        fator = float(valor)
+    except ValueError:
+        parser.error(f"--replay-speed inválido: {valor!r}")
+    if fator <= 0:
+        parser.error("--replay-speed deve ser positivo")
+    return "fator", fator
 
 
 def main():
@@ -25,7 +44,32 @@ def main():
     parser.add_argument(
         "--simulate",
         action="store_true",
-        help="Rodar em modo simulação (sem câmera RealSense física)",
+        help="Rodar em modo simulação (sem câmera RealSense física; cenário na seção \"simulacao\" da config)",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="ARQUIVO",
+        help="Reproduzir uma sessão gravada em vez de usar a câmera",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        default="realtime",
+        help="Cadência do replay: 'realtime', 'max' ou um fator (ex: 2.5)",
+    )
+    parser.add_argument(
+        "--gravar",
+        metavar="ARQUIVO",
+        help="Gravar os frames filtrados da câmera em uma sessão",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Rodar como serviço, sem GUI (sem Tkinter/PIL, sem overlays)",
+    )
+    parser.add_argument(
+        "--processo",
+        action="store_true",
+        help="Captura e detecção em processo filho (memória compartilhada), fora do GIL da GUI",
     )
     parser.add_argument(
         "--config",
@@ -34,10 +78,33 @@ def main():
     )
     args = parser.parse_args()
 
+    replay_modo, replay_fator = _parse_replay_speed(parser, args.replay_speed)
+
     cm = ConfigManager(caminho_config=args.config)
+    fonte_kwargs = dict(
+        simulate=args.simulate,
+        replay=args.replay,
+        replay_modo=replay_modo,
+        replay_fator=replay_fator,
+        gravar=args.gravar,
+    )
+
+    if args.headless:
+        # Import tardio: o modo serviço não pode carregar tkinter nem PIL
+        from servico_headless import executar_headless
+        executar_headless(cm, **fonte_kwargs)
+        return
+
+    import tkinter as tk
+    from gui_app import DetectorCacambaGUIV5
 
     root = tk.Tk()
-    app = DetectorCacambaGUIV5(root, config_manager=cm, simulate=args.simulate)  # noqa: F841
+    app = DetectorCacambaGUIV5(  # noqa: F841
+        root,
+        config_manager=cm,
+        processo=args.processo,
+        **fonte_kwargs,
+    )
     root.mainloop()
 
 